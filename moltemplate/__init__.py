@@ -13,10 +13,12 @@ from .ttree_lex import TtreeShlex, split, LineLex, SplitQuotedString, \
 from .nbody_graph_search import Disconnected, NotUndirected, Edge, Vertex, \
      Dgraph, Ugraph, SortVertsByDegree, DFS, GraphMatcher 
 
-from .nbody_by_type_lib import GenInteractions_int, GenInteractions_str
+from .nbody_by_type_lib import GenInteractions_int, GenInteractions_str, \
+    GenInteractions_graph, SystemGraph
 
-from .lttree import LttreeSettings, LttreeParseArgs, TransformAtomText, \
-    TransformEllipsoidText, AddAtomTypeComments, ExecCommands, WriteFiles
+from .lttree import LttreeSettings, LttreeParseArgs, AtomCoords, \
+    TransformAtomText, TransformEllipsoidText, AddAtomTypeComments, \
+    ExecCommands, WriteFiles
 
 from .lttree_styles import AtomStyle2ColNames, ColNames2AidAtypeMolid, \
     ColNames2Coords, ColNames2Vects, ColNames2Vects, data_atoms, data_masses
@@ -60,6 +62,7 @@ __all__ = [# General modules for parsing and rendering text templates:
            'pdbsort',
            # LAMMPS specific:
            'lttree','lttree_styles','lttree_check','lttree_postprocess',
+           'lttree_data_header', 'lttree_coords',
            'dump2data', 'raw2data',
            'extract_lammps_data',
            'ltemplify',
@@ -67,5 +70,6 @@ __all__ = [# General modules for parsing and rendering text templates:
            'renumber_DATA_first_column',
            'remove_duplicate_atoms','remove_duplicates_nbody',
            'bonds_by_type','charge_by_bond',
+           'pipeline',
            # ESPResSo specific:
            'ettree','ettree_styles','extract_espresso_atom_types']
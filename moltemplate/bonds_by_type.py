@@ -163,7 +163,7 @@ def LookupBondTypes(bond_types,
 
             for typestr in tokens[1:]:
                 if ttree_lex.HasRE(typestr):
-                    regex_str = VarNameToRegex(typestr)
+                    regex_str = ttree_lex.VarNameToRegex(typestr)
                     typepattern.append(re.compile(regex_str))
                 else:
                     typepattern.append(ttree_lex.EscCharStrToChar(typestr))
@@ -175,6 +175,26 @@ def LookupBondTypes(bond_types,
     for ie in range(0, len(bond_ids)):
         bond_types.append(None)
 
+    # Typically many bonds share the same pair of atom types.  Figure out
+    # the bond type only once for each (unordered) pair of atom types.
+    # "typepairs2coefftype" stores the results we have found so far.
+    # (If more than one rule matches a bond, the last one wins.)
+    typepairs2coefftype = {}
+
+    # Rules which contain no wildcards or regular expressions can only
+    # match one pair of atom types, so we can look them up in a dictionary.
+    # The remaining rules must be checked one at a time.
+    exact_typepattern_to_irules = {}
+    irules_with_wildcards = []
+    for irule in range(0, len(typepattern_to_coefftypes)):
+        typepattern = typepattern_to_coefftypes[irule][0]
+        if all([((type(p) is str) and (not ttree_lex.HasWildcard(p)))
+                for p in typepattern]):
+            # (If the same pattern appears twice, keep the last one.)
+            exact_typepattern_to_irules[tuple(typepattern)] = irule
+        else:
+            irules_with_wildcards.append(irule)
+
     for ie in range(0, len(bond_ids)):
         bondid = bond_ids[ie]
         (atomid1, atomid2) = bond_pairs[ie]
@@ -198,14 +218,34 @@ def LookupBondTypes(bond_types,
         atomtype1 = atomids2types[atomid1]
         atomtype2 = atomids2types[atomid2]
 
-        for typepattern, coefftype in typepattern_to_coefftypes:
-
-            # use string comparisons to check if atom types match the pattern
-            if (ttree_lex.MatchesAll((atomtype1, atomtype2), typepattern) or
-                    ttree_lex.MatchesAll((atomtype2, atomtype1), typepattern)):
-                # ("MatchesAll()" defined in "ttree_lex.py")
-
-                bond_types[ie] = coefftype
+        if atomtype2 < atomtype1:
+            typepair = (atomtype2, atomtype1)
+        else:
+            typepair = (atomtype1, atomtype2)
+
+        if typepair not in typepairs2coefftype:
+            # Find the last rule which matches this pair of atom types
+            # (in either order).
+            irule_last = max(exact_typepattern_to_irules.get((atomtype1,
+                                                              atomtype2), -1),
+                             exact_typepattern_to_irules.get((atomtype2,
+                                                              atomtype1), -1))
+            for irule in reversed(irules_with_wildcards):
+                if irule < irule_last:
+                    break
+                typepattern = typepattern_to_coefftypes[irule][0]
+                # use string comparisons to check if atom types match the pattern
+                if (ttree_lex.MatchesAll((atomtype1, atomtype2), typepattern) or
+                        ttree_lex.MatchesAll((atomtype2, atomtype1), typepattern)):
+                    # ("MatchesAll()" defined in "ttree_lex.py")
+                    irule_last = irule
+                    break
+            coefftype = None
+            if irule_last != -1:
+                coefftype = typepattern_to_coefftypes[irule_last][1]
+            typepairs2coefftype[typepair] = coefftype
+
+        bond_types[ie] = typepairs2coefftype[typepair]
 
     for ie in range(0, len(bond_ids)):
         if not bond_types[ie]:
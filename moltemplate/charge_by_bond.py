@@ -14,6 +14,7 @@ import sys
 import re
 from collections import defaultdict
 import re
+import numpy as np
 
 try:
     from . import ttree_lex
@@ -167,13 +168,25 @@ def LookupChargePairs(chargebyatomid,
 
             for typestr in tokens[:2]:
                 if ttree_lex.HasRE(typestr):
-                    regex_str = VarNameToRegex(typestr)
+                    regex_str = ttree_lex.VarNameToRegex(typestr)
                     typepattern.append(re.compile(regex_str))
                 else:
                     typepattern.append(ttree_lex.EscCharStrToChar(typestr))
 
             typepattern_to_chargepairs.append([typepattern, chargepair])
 
+    # Many bonds share the same pair of atom types, so we only look up the
+    # rules once for each (ordered) pair of atom types.
+    # "typepair2charges" stores a list of the charge increments for
+    # the first and second atom from every rule that matches that pair.
+    typepair2charges = {}
+
+    # The charge increments are added to the atoms (in the same order
+    # they would have been added one bond at a time) later, all at once.
+    atomid2iatom = {}  # <-- which atoms receive charge increments?
+    iatoms = []        # <-- (indices into the list of atoms in atomid2iatom)
+    dcharges = []      # <-- the corresponding increments in their charge
+
     for atomid1, atomid2 in bond_pairs:
 
         if atomid1 not in atomids2types:
@@ -195,21 +208,40 @@ def LookupChargePairs(chargebyatomid,
         atomtype1 = atomids2types[atomid1]
         atomtype2 = atomids2types[atomid2]
 
-        found = False
-        for typepattern, chargepair in typepattern_to_chargepairs:
-            # use string comparisons to check if atom types match the pattern
-            if ttree_lex.MatchesAll((atomtype1, atomtype2), typepattern):
-                # ("MatchesAll()" defined in "ttree_lex.py")
-                chargebyatomid[atomid1] += chargepair[0]
-                chargebyatomid[atomid2] += chargepair[1]
-                found = True
-            elif ttree_lex.MatchesAll((atomtype2, atomtype1), typepattern):
-                chargebyatomid[atomid1] += chargepair[1]
-                chargebyatomid[atomid2] += chargepair[0]
-                found = True
-        if (not found) and (not warning_unassigned_chargepairs):
+        typepair = (atomtype1, atomtype2)
+        charges = typepair2charges.get(typepair)
+        if charges is None:
+            charges = []
+            for typepattern, chargepair in typepattern_to_chargepairs:
+                # use string comparisons to check if atom types match the pattern
+                if ttree_lex.MatchesAll((atomtype1, atomtype2), typepattern):
+                    # ("MatchesAll()" defined in "ttree_lex.py")
+                    charges.append((chargepair[0], chargepair[1]))
+                elif ttree_lex.MatchesAll((atomtype2, atomtype1), typepattern):
+                    charges.append((chargepair[1], chargepair[0]))
+            typepair2charges[typepair] = charges
+
+        if len(charges) > 0:
+            iatom1 = atomid2iatom.setdefault(atomid1, len(atomid2iatom))
+            iatom2 = atomid2iatom.setdefault(atomid2, len(atomid2iatom))
+            for dcharge1, dcharge2 in charges:
+                iatoms.append(iatom1)
+                dcharges.append(dcharge1)
+                iatoms.append(iatom2)
+                dcharges.append(dcharge2)
+        elif not warning_unassigned_chargepairs:
             warning_unassigned_chargepairs = (atomid1, atomid2)
 
+    # Now add up the charge increments for each atom.
+    # (np.add.at() adds them in order, so the sums are exactly the same
+    #  as they would be if we had added them one at a time.)
+    atomids_charged = list(atomid2iatom.keys())
+    charges = np.array([chargebyatomid[atomid] for atomid in atomids_charged],
+                       dtype=float)
+    np.add.at(charges, np.array(iatoms, dtype=int), np.array(dcharges))
+    for iatom in range(0, len(atomids_charged)):
+        chargebyatomid[atomids_charged[iatom]] = float(charges[iatom])
+
     if warning_unassigned_chargepairs:
         sys.stderr.write('---------------------------------------------------------------------------\n'
                          'Warning: bonds found between atoms with no partial-charge rules.\n'
@@ -28,7 +28,13 @@ g_date_str = '2022-1-06'
 g_version_str = '0.62.0'
 
 import sys
-from collections import defaultdict
+import os
+import io
+import contextlib
+import multiprocessing
+import warnings
+from collections import defaultdict, deque
+import numpy as np
 from operator import itemgetter, attrgetter
 
 
@@ -62,6 +68,7 @@ class MiscSettings(object):
         self.mol_id_intervals = []
         self.scale = None
         self.in_coord_file_name = ''
+        self.jobs = 1
 
 
 
@@ -334,10 +341,13 @@ def Str2IntervalUnion(s):
 def ParseArgs(argv,
               misc_settings,
               data_settings,
-              warning_strings=None):
+              warning_strings=None,
+              read_data_file=True):
     """
     Read the arguments passed to the program through the command-line, and
     store results in misc_settings and data_settings.
+    (If read_data_file is False, the name of the data file is stored in
+     data_settings.file_name, but its contents are not read.)
     """
     # Loop over the remaining arguments not processed yet.
     # These arguments are specific to the lttree.py program
@@ -565,6 +575,15 @@ def ParseArgs(argv,
             misc_settings.in_coord_file_name = argv[i+1]
             del(argv[i:i + 2])
 
+        elif (argv[i].lower() == '-jobs'):
+            if ((i + 1 >= len(argv)) or
+                (not argv[i + 1].isdigit()) or
+                (int(argv[i + 1]) < 1)):
+                raise InputError('Error(dump2data): ' + argv[i] + ' flag should be followed by\n'
+                                 '       a positive integer (the number of processes to use).\n')
+            misc_settings.jobs = int(argv[i + 1])
+            del(argv[i:i + 2])
+
         elif ((argv[i][0] == '-') and (__name__ == "__main__")):
             raise InputError(
                 'Error(dump2data): Unrecogized command line argument \"' + argv[i] + '\"\n')
@@ -600,10 +619,11 @@ dump2data.py -t t -atomstyle style orig.data < dump.lammpstrj > new.data
                              '    ----\n'
                              + usage_examples)
     else:
-        in_data_file = open(argv[1], 'r')
         data_settings.file_name = argv[1]
-        data_settings.contents = in_data_file.readlines()
-        in_data_file.close()
+        if read_data_file:
+            in_data_file = open(argv[1], 'r')
+            data_settings.contents = in_data_file.readlines()
+            in_data_file.close()
 
     # end of if-then statement for "if __name__ == "__main__""
 
@@ -892,12 +912,16 @@ class SnapshotData(object):
                  data_settings=None):
 
         self.dump_column_names = []
-        self.coords = defaultdict(list)
-        self.coords_ixiyiz = defaultdict(list)
-        self.vects = defaultdict(list)
-        self.velocities = defaultdict(list)
-        self.atomtypes = defaultdict(list)
-        self.molids = defaultdict(list)
+        # Per-atom information is stored in columns (in the same order as the
+        # atoms in the dump file).  Atom-IDs, atom types, and molecule-IDs
+        # are lists of strings.  Coordinates are stored in numpy arrays.
+        self.atomids = []
+        self.atomtypes = []
+        self.molids = None            # (None if there are no molecule-IDs)
+        self.coords = np.zeros((0, 3))
+        self.coords_ixiyiz = None     # (None unless image flags are kept)
+        self.velocities = np.zeros((0, 3))
+        self.vects = dict()           # (vects[atomid] = list of 3-tuples)
         self.xlo_str = self.xhi_str = None
         self.ylo_str = self.yhi_str = None
         self.zlo_str = self.zhi_str = None
@@ -908,6 +932,7 @@ class SnapshotData(object):
         i_atomid = i_atomtype = i_molid = -1
         i_x = i_y = i_z = i_xu = i_yu = i_zu = -1
         i_xs = i_ys = i_zs = i_xsu = i_ysu = i_zsu = -1
+        atom_lines = []
 
         for line in lines:
 
@@ -999,12 +1024,7 @@ class SnapshotData(object):
             elif ((len(line) > 0) and (line[0] != '#')):
                 if (section.find('ITEM: TIMESTEP') == 0):
                     self.timestep_str = line
-                    self.coords = defaultdict(list)
-                    self.coords_ixiyiz = defaultdict(list)
-                    self.vects = defaultdict(list)
-                    self.velocities = defaultdict(list)
-                    self.atomtypes = defaultdict(list)
-                    self.molids = defaultdict(list)
+                    atom_lines = []
                     self.xlo_str = self.xhi_str = None
                     self.ylo_str = self.yhi_str = None
                     self.zlo_str = self.zhi_str = None
@@ -1097,161 +1117,190 @@ class SnapshotData(object):
                             cvec = [xz, yz, zhi-zlo]
 
                 elif (section.find('ITEM: ATOMS') == 0):
-                    tokens = line.split()
-                    atomid = tokens[i_atomid]
-                    atomtype = tokens[i_atomtype]
-                    self.atomtypes[atomid] = atomtype
-                    if i_molid:
-                        molid = tokens[i_molid]
-                        self.molids[atomid] = molid
-
-                    if ((i_x != -1) and (i_y != -1) and (i_z != -1)):
-                        x = float(tokens[i_x])  # i_x determined above
-                        y = float(tokens[i_y])
-                        z = float(tokens[i_z])
-
-                    elif ((i_xu != -1) and (i_yu != -1) and (i_zu != -1)):
-                        x = float(tokens[i_xu])  # i_x determined above
-                        y = float(tokens[i_yu])
-                        z = float(tokens[i_zu])
-
-                    elif ((i_xs != -1) and (i_ys != -1) and (i_zs != -1)):
-                        xs = float(tokens[i_xs])  # i_xs determined above
-                        ys = float(tokens[i_ys])
-                        zs = float(tokens[i_zs])
-
-                        x = float(self.xlo_str) + xs * \
-                            avec[0] + ys * bvec[0] + zs * cvec[0]
-                        y = float(self.ylo_str) + xs * \
-                            avec[1] + ys * bvec[1] + zs * cvec[1]
-                        z = float(self.zlo_str) + xs * \
-                            avec[2] + ys * bvec[2] + zs * cvec[2]
-
-                    # avec, bvec, cvec described here:
-                    # https://lammps.sandia.gov/doc/Howto_triclinic.html
-
-                    elif ((i_xsu != -1) and (i_ysu != -1) and (i_zsu != -1)):
-                        xsu = float(tokens[i_xsu])  # i_xs determined above
-                        ysu = float(tokens[i_ysu])
-                        zsu = float(tokens[i_zsu])
-
-                        x = float(self.xlo_str) + xsu * \
-                            avec[0] + ysu * bvec[0] + zsu * cvec[0]
-                        y = float(self.ylo_str) + xsu * \
-                            avec[1] + ysu * bvec[1] + zsu * cvec[1]
-                        z = float(self.zlo_str) + xsu * \
-                            avec[2] + ysu * bvec[2] + zsu * cvec[2]
-
-                    # Now deal with ix, iy, iz
-                    if (i_ix != -1) and (not x_already_unwrapped):
-                        ix = int(tokens[i_ix])
-                        if (misc_settings.center_snapshot or
-                            (misc_settings.output_format != 'data')):
-                            #sys.stderr.write('atomid='+str(atomid)+', ix = '+str(ix)+', avec='+str(avec)+'\n')
-                            x += ix * avec[0]
-                            y += ix * avec[1]
-                            z += ix * avec[2]
-                        else:
-                            if atomid not in self.coords_ixiyiz:
-                                self.coords_ixiyiz[atomid] = ["0", "0", "0"]
-                            self.coords_ixiyiz[atomid][0] = str(ix)
-
-                    if (i_iy != -1) and (not y_already_unwrapped):
-                        iy = int(tokens[i_iy])
-                        if (misc_settings.center_snapshot or
-                            (misc_settings.output_format != 'data')):
-                            #sys.stderr.write('atomid='+str(atomid)+', iy = '+str(iy)+', bvec='+str(bvec)+'\n')
-                            x += iy * bvec[0]
-                            y += iy * bvec[1]
-                            z += iy * bvec[2]
-                        else:
-                            if atomid not in self.coords_ixiyiz:
-                                self.coords_ixiyiz[atomid] = ["0", "0", "0"]
-                            self.coords_ixiyiz[atomid][1] = str(iy)
-
-                    if (i_iz != -1) and (not z_already_unwrapped):
-                        iz = int(tokens[i_iz])
-                        if (misc_settings.center_snapshot or
-                            (misc_settings.output_format != 'data')):
-                            #sys.stderr.write('atomid='+str(atomid)+', iz = '+str(iz)+', cvec='+str(cvec)+'\n')
-                            x += iz * cvec[0]
-                            y += iz * cvec[1]
-                            z += iz * cvec[2]
-                        else:
-                            if atomid not in self.coords_ixiyiz:
-                                self.coords_ixiyiz[atomid] = ["0", "0", "0"]
-                            self.coords_ixiyiz[atomid][2] = str(iz)
-
-                    #self.coords[atomid] = [str(x), str(y), str(z)]
-                    self.coords[atomid] = [x, y, z]
-
-                    vx = 0.0
-                    vy = 0.0
-                    vz = 0.0
-                    if i_vx != -1:
-                        vx = float(tokens[i_vx])
-                    if i_vy != -1:
-                        vy = float(tokens[i_vy])
-                    if i_vz != -1:
-                        vz = float(tokens[i_vz])
-
-                    self.velocities[atomid] = [vx, vy, vz]
-
-                    # NOTE:
-                    # There can be multiple "vects" associated with each atom
-                    # (for example, dipole moments, ellipsoid directions, etc..)
-
-                    if atomid not in self.vects:
-                        self.vects[atomid] = [
-                            None for I in range(0, len(ii_vects))]
-
-                    for I in range(0, len(ii_vects)):
-                        i_vx = ii_vects[I][0]
-                        i_vy = ii_vects[I][1]
-                        i_vz = ii_vects[I][2]
-                        vx_str = tokens[i_vx]
-                        vy_str = tokens[i_vy]
-                        vz_str = tokens[i_vz]
-
-                        # Now the annoying part:
-                        # Which vect is it (mux,muy,muz) or (quati,quatj,quatk)?
-                        # The columns could be listed in a different order
-                        # in the data file and in the dump file.
-                        # Figure out which vector it is in the data file (stored
-                        # in the integer "I_data") so that column names match.
-                        name_vx = self.dump_column_names[i_vx]
-                        name_vy = self.dump_column_names[i_vy]
-                        name_vz = self.dump_column_names[i_vz]
-                        i_vx_data = 0
-                        I_data = -1
-                        # This code is dreadful and inneficient.
-                        # I never want to touch this code again. (Hope it
-                        # works)
-                        while i_vx_data < len(data_settings.column_names):
-                            if name_vx == data_settings.column_names[i_vx_data]:
-                                I_data = 0
-                                while I_data < len(data_settings.ii_vects):
-                                    if (self.dump_column_names[ii_vects[I][0]] ==
-                                        data_settings.column_names[data_settings.ii_vects[I_data][0]]):
-                                        # (This checks the first component, ([0]) I should also 
-                                        # check [1] and [2], but the code is slow enough already.
-                                        # THIS IS TERRIBLE CODE.
-                                        break
-                                    I_data += 1
-
-                            if (0 <= I_data) and (I_data < len(data_settings.ii_vects)):
-                                break
-
-                            i_vx_data += 1
-
-                        if (0 <= I_data) and (I_data < len(data_settings.ii_vects)):
-                            self.vects[atomid][I_data] = (vx_str,vy_str,vz_str)
-                        else:
-                            raise InputError('Error(dump2data): You have a vector coordinate in your dump file named \"' + name_vx + '\"\n'
-                                             '       However there are no columns with this name in your data file\n'
-                                             '       (or the column was not in the expected place).\n'
-                                             '       Hence, the atom styles in the dump and data files do not match.')
+                    atom_lines.append(line)
+
+        if len(atom_lines) == 0:
+            return
+
+        # Now convert the lines in the "ATOMS" section into columns.
+        # If every entry is a number (and there are no direction vectors,
+        # whose text is copied verbatim), then parse them all at once.
+        # Otherwise split each line into tokens (which is slower).
+        n = len(atom_lines)
+        numeric = None
+        if len(ii_vects) == 0:
+            numeric = _NumericColumns(atom_lines, len(self.dump_column_names))
+        if numeric is not None:
+            # (Columns storing integers should not contain anything else.)
+            for i_col in (i_atomid, i_atomtype, i_molid, i_ix, i_iy, i_iz):
+                if ((i_col not in (None, -1)) and
+                    (not _IsIntegerColumn(numeric[:, i_col]))):
+                    numeric = None
+                    break
+
+        if numeric is not None:
+            def FloatColumn(i_col):
+                return numeric[:, i_col]
+
+            def IntColumn(i_col):
+                return numeric[:, i_col].astype(np.int64)
+
+            self.atomids = _IntStrings(numeric[:, i_atomid])
+            self.atomtypes = _IntStrings(numeric[:, i_atomtype])
+            if i_molid:
+                self.molids = _IntStrings(numeric[:, i_molid])
+        else:
+            rows = [line.split() for line in atom_lines]
+
+            def StrColumn(i_col):
+                return [tokens[i_col] for tokens in rows]
+
+            def FloatColumn(i_col):
+                return np.array([float(s) for s in StrColumn(i_col)])
+
+            def IntColumn(i_col):
+                return np.array([int(s) for s in StrColumn(i_col)],
+                                dtype=np.int64)
+
+            self.atomids = StrColumn(i_atomid)
+            self.atomtypes = StrColumn(i_atomtype)
+            if i_molid:
+                self.molids = StrColumn(i_molid)
+
+        if ((i_x != -1) and (i_y != -1) and (i_z != -1)):
+            x = FloatColumn(i_x)  # i_x determined above
+            y = FloatColumn(i_y)
+            z = FloatColumn(i_z)
+
+        elif ((i_xu != -1) and (i_yu != -1) and (i_zu != -1)):
+            x = FloatColumn(i_xu)  # i_x determined above
+            y = FloatColumn(i_yu)
+            z = FloatColumn(i_zu)
+
+        elif ((i_xs != -1) and (i_ys != -1) and (i_zs != -1)):
+            xs = FloatColumn(i_xs)  # i_xs determined above
+            ys = FloatColumn(i_ys)
+            zs = FloatColumn(i_zs)
+
+            x = float(self.xlo_str) + xs * \
+                avec[0] + ys * bvec[0] + zs * cvec[0]
+            y = float(self.ylo_str) + xs * \
+                avec[1] + ys * bvec[1] + zs * cvec[1]
+            z = float(self.zlo_str) + xs * \
+                avec[2] + ys * bvec[2] + zs * cvec[2]
+
+        # avec, bvec, cvec described here:
+        # https://lammps.sandia.gov/doc/Howto_triclinic.html
+
+        elif ((i_xsu != -1) and (i_ysu != -1) and (i_zsu != -1)):
+            xsu = FloatColumn(i_xsu)  # i_xs determined above
+            ysu = FloatColumn(i_ysu)
+            zsu = FloatColumn(i_zsu)
+
+            x = float(self.xlo_str) + xsu * \
+                avec[0] + ysu * bvec[0] + zsu * cvec[0]
+            y = float(self.ylo_str) + xsu * \
+                avec[1] + ysu * bvec[1] + zsu * cvec[1]
+            z = float(self.zlo_str) + xsu * \
+                avec[2] + ysu * bvec[2] + zsu * cvec[2]
 
+        else:
+            raise InputError('Error(dump2data): The x, y, z columns in the \"ATOMS\" section of the dump\n'
+                             '       file must all be of the same kind (eg. \"x y z\" or \"xu yu zu\").\n')
+
+        # Now deal with ix, iy, iz
+        unwrap = (misc_settings.center_snapshot or
+                  (misc_settings.output_format != 'data'))
+        for i_col, d, already_unwrapped in ((i_ix, 0, x_already_unwrapped),
+                                            (i_iy, 1, y_already_unwrapped),
+                                            (i_iz, 2, z_already_unwrapped)):
+            if (i_col == -1) or already_unwrapped:
+                continue
+            ix = IntColumn(i_col)
+            if unwrap:
+                lvec = (avec, bvec, cvec)[d]
+                x = x + ix * lvec[0]
+                y = y + ix * lvec[1]
+                z = z + ix * lvec[2]
+            else:
+                if self.coords_ixiyiz is None:
+                    self.coords_ixiyiz = np.zeros((n, 3), dtype=np.int64)
+                self.coords_ixiyiz[:, d] = ix
+
+        self.coords = np.column_stack((x, y, z))
+
+        self.velocities = np.zeros((n, 3))
+        for i_col, d in ((i_vx, 0), (i_vy, 1), (i_vz, 2)):
+            if i_col != -1:
+                self.velocities[:, d] = FloatColumn(i_col)
+
+        # NOTE:
+        # There can be multiple "vects" associated with each atom
+        # (for example, dipole moments, ellipsoid directions, etc..)
+        # The columns could be listed in a different order in the data file
+        # and in the dump file.  Figure out which vector it is in the data
+        # file (stored in the integer "I_data") so that column names match.
+        # (This only depends on the column names, not on the atom.)
+        I2I_data = []
+        for I in range(0, len(ii_vects)):
+            name_vx = self.dump_column_names[ii_vects[I][0]]
+            I_data = 0
+            while I_data < len(data_settings.ii_vects):
+                if (name_vx ==
+                    data_settings.column_names[data_settings.ii_vects[I_data][0]]):
+                    # (This checks the first component, ([0]) I should also
+                    # check [1] and [2].)
+                    break
+                I_data += 1
+            if I_data == len(data_settings.ii_vects):
+                raise InputError('Error(dump2data): You have a vector coordinate in your dump file named \"' + name_vx + '\"\n'
+                                 '       However there are no columns with this name in your data file\n'
+                                 '       (or the column was not in the expected place).\n'
+                                 '       Hence, the atom styles in the dump and data files do not match.')
+            I2I_data.append(I_data)
+
+        if len(ii_vects) > 0:
+            for i in range(0, n):
+                tokens = rows[i]
+                atomid = self.atomids[i]
+                if atomid not in self.vects:
+                    self.vects[atomid] = [
+                        None for I in range(0, len(ii_vects))]
+                for I in range(0, len(ii_vects)):
+                    self.vects[atomid][I2I_data[I]] = (tokens[ii_vects[I][0]],
+                                                       tokens[ii_vects[I][1]],
+                                                       tokens[ii_vects[I][2]])
+
+
+
+def _NumericColumns(lines, ncols):
+    """
+    Convert lines of text containing ncols numbers each into a 2-dimensional
+    numpy array (in a single step).  Returns None if this is not possible
+    (for example, if some of the entries are not numbers).
+    """
+    with warnings.catch_warnings():
+        # (np.fromstring() only warns if it was unable to read every entry)
+        warnings.simplefilter('error')
+        try:
+            a = np.fromstring('\n'.join(lines), sep=' ')
+        except (ValueError, DeprecationWarning):
+            return None
+    if a.size != len(lines) * ncols:
+        return None
+    return a.reshape(len(lines), ncols)
+
+
+def _IsIntegerColumn(column):
+    """ Are all of the numbers in this column integers? """
+    if not np.all(np.abs(column) < 2**53):
+        return False  # (also rejects nan and inf)
+    return np.array_equal(column.astype(np.int64), column)
+
+
+def _IntStrings(column):
+    """ Convert a column of integers (stored as floats) into strings. """
+    return [str(i) for i in column.astype(np.int64).tolist()]
 
 
 
@@ -1272,6 +1321,633 @@ def InIntervalUnion(i, intervals):
 
 
 
+def IntervalUnionMask(values, intervals):
+    """
+    A vectorized version of InIntervalUnion().  Returns an array of booleans
+    indicating which integers (in the "values" array) lie within at least
+    one of the intervals.
+    """
+    accept = np.zeros(len(values), dtype=bool)
+    if len(intervals) == 0:
+        accept[:] = True
+    for interval in intervals:
+        assert(len(interval) == 2)
+        accept |= ((interval[0] <= values) &
+                   ((values <= interval[1]) | (interval[1] == 0)))
+    return accept
+
+
+def _FloatStrings(values):
+    """ Convert an array of numbers into a list of strings using str(). """
+    return [str(v) for v in values.tolist()]
+
+
+def WriteSnapshot(lines,
+                  num_snapshots_out,
+                  misc_settings,
+                  data_settings):
+    """
+    Parse the lines of text from a single snapshot in a LAMMPS dump file,
+    and write it to a file in the format selected by the user.
+    (num_snapshots_out is the number of snapshots written so far,
+     including this one.)
+    """
+    snapshot = SnapshotData(lines,
+                            misc_settings,
+                            data_settings)
+
+    atomids = snapshot.atomids
+    coords = snapshot.coords
+    coords_ixiyiz = snapshot.coords_ixiyiz
+    if misc_settings.scale != None:
+        coords = coords * misc_settings.scale
+
+    # Check for consistency
+    natoms = len(set(atomids))
+    if natoms != snapshot.natoms:
+        err_msg = 'Number of lines in \"ITEM: ATOMS\" section disagrees with\n' \
+            + '           \"ITEM: NUMBER OF ATOMS\" declared earlier in this file.\n'
+        raise InputError(err_msg)
+
+    # Additional processing needed?
+    if misc_settings.center_snapshot and (natoms > 0):
+        # (Add the coordinates one at a time, starting from 0.0, so that
+        #  the result does not depend on the summation order numpy uses.)
+        cm = np.cumsum(np.vstack(([0.0, 0.0, 0.0], coords)), axis=0)[-1]
+        cm /= float(natoms)
+        coords_str = [['%.7g' % v for v in (coords[:, d] - cm[d]).tolist()]
+                      for d in range(0, 3)]
+        # (The centered coordinates are rounded to 7 digits)
+        coords = np.column_stack([np.array(coords_str[d], dtype=float)
+                                  for d in range(0, 3)])
+        coords_ixiyiz = np.zeros((len(atomids), 3), dtype=np.int64)
+    else:
+        coords_str = [_FloatStrings(coords[:, d]) for d in range(0, 3)]
+
+    # Now start writing the snapshot:
+    sys.stderr.write('  (writing snapshot ' + str(num_snapshots_out) +
+                     ' at timestep ' + snapshot.timestep_str + ')\n')
+
+    # Print the snapshot
+    # First check which format to output the data:
+    if ((misc_settings.output_format == 'raw') or
+        (misc_settings.output_format == 'xyz') or
+        (misc_settings.output_format == 'xyz-id') or
+        (misc_settings.output_format == 'xyz-mol') or
+        (misc_settings.output_format == 'xyz-type-mol')):
+
+        # Sort the atoms by atom-ID.  (If an atom-ID appears more than once,
+        # then this error was caught earlier.)
+        atomid_ints = np.array([int(atomid) for atomid in atomids],
+                               dtype=np.int64)
+        order = np.argsort(atomid_ints, kind='stable')
+
+        # Check and see if whether the atom is one of the
+        # atoms that was selected by the user.  If not discard.
+        # (I don't offer this feature for 'data' files because
+        #  it is harder to implement for this file type.)
+        selected = IntervalUnionMask(atomid_ints,
+                                     misc_settings.atom_id_intervals)
+        selected &= IntervalUnionMask(np.array([int(atype) for atype in
+                                                snapshot.atomtypes],
+                                               dtype=np.int64),
+                                      misc_settings.atom_type_intervals)
+        if snapshot.molids != None:
+            selected &= IntervalUnionMask(np.array([int(molid) for molid in
+                                                    snapshot.molids],
+                                                   dtype=np.int64),
+                                          misc_settings.mol_id_intervals)
+        elif len(misc_settings.mol_id_intervals) > 0:
+            raise InputError('-mol ERROR: Your trajectory file lacks molecule-id information.\n')
+        order = order[selected[order]]
+
+        if misc_settings.scale == None:
+            xs, ys, zs = [[coords_str[d][i] for i in order.tolist()]
+                          for d in range(0, 3)]
+        else:
+            # Only convert to float and back if
+            # misc_settings.scale != None
+            xs, ys, zs = [_FloatStrings(misc_settings.scale *
+                                        coords[order, d])
+                          for d in range(0, 3)]
+
+        if misc_settings.output_format == 'raw':
+            # Print out the coordinates in simple 3-column text
+            # format
+            sys.stdout.write(''.join([x + ' ' + y + ' ' + z + '\n'
+                                      for x, y, z in zip(xs, ys, zs)]))
+            sys.stdout.write('\n')
+
+        else:
+            # Print out the coordinates in simple 4-column text
+            # format
+            sys.stdout.write(str(natoms) + '\n')
+            descr_str = 'LAMMPS data from timestep ' + snapshot.timestep_str
+            sys.stdout.write(descr_str + '\n')
+
+            if misc_settings.output_format == 'xyz':
+                first_column = [snapshot.atomtypes[i] for i in order.tolist()]
+            elif misc_settings.output_format == 'xyz-id':
+                first_column = [atomids[i] for i in order.tolist()]
+            elif misc_settings.output_format == 'xyz-mol':
+                if snapshot.molids == None:
+                    raise InputError('-xyz-mol ERROR: Your trajectory file lacks molecule-id information.\n')
+                first_column = [snapshot.molids[i] for i in order.tolist()]
+                sys.stderr.write(''.join([molid + '\n'
+                                          for molid in first_column]))
+            elif misc_settings.output_format == 'xyz-type-mol':
+                if snapshot.molids == None:
+                    raise InputError('-xyz-type-mol ERROR: Your trajectory file lacks molecule-id information.\n')
+                first_column = [snapshot.atomtypes[i] + '_' + snapshot.molids[i]
+                                for i in order.tolist()]
+            sys.stdout.write(''.join([c + ' ' + x + ' ' + y + ' ' + z + '\n'
+                                      for c, x, y, z in zip(first_column,
+                                                            xs, ys, zs)]))
+
+    else:
+        # Parse the DATA file specified by the user
+        # and replace appropriate lines or fields with
+        # the corresponding text from the DUMP file.
+        descr_str = 'LAMMPS data from timestep ' + snapshot.timestep_str
+        if (misc_settings.multi and
+            (misc_settings.output_format == 'data')):
+            out_file_name = data_settings.file_name + '.'\
+                + str(num_snapshots_out)
+            sys.stderr.write(
+                '  (creating file \"' + out_file_name + '\")\n')
+            out_file = open(out_file_name, 'w')
+        else:
+            out_file = sys.stdout
+
+        # WriteSnapshotToData() looks up the information for each atom
+        # (using the atom-ID) in the following dictionaries:
+        coords_dict = dict(zip(atomids, zip(*coords_str)))
+        coords_ixiyiz_dict = defaultdict(list)
+        if coords_ixiyiz is not None:
+            coords_ixiyiz_dict.update(
+                zip(atomids, zip(*[[str(i) for i in coords_ixiyiz[:, d].tolist()]
+                                   for d in range(0, 3)])))
+        velocities_dict = dict(zip(atomids, snapshot.velocities.tolist()))
+        atomtypes_dict = defaultdict(list, zip(atomids, snapshot.atomtypes))
+        molids_dict = defaultdict(list)
+        if snapshot.molids != None:
+            molids_dict.update(zip(atomids, snapshot.molids))
+
+        WriteSnapshotToData(out_file,
+                            descr_str,
+                            misc_settings,
+                            data_settings,
+                            snapshot.dump_column_names,
+                            snapshot.natoms,
+                            coords_dict,
+                            coords_ixiyiz_dict,
+                            snapshot.vects,
+                            velocities_dict,
+                            atomtypes_dict,
+                            molids_dict,
+                            snapshot.xlo_str, snapshot.xhi_str,
+                            snapshot.ylo_str, snapshot.yhi_str,
+                            snapshot.zlo_str, snapshot.zhi_str,
+                            snapshot.xy_str, snapshot.xz_str, snapshot.yz_str)
+
+        if (misc_settings.multi and
+            (misc_settings.output_format == 'data')):
+            out_file.close()
+
+
+
+# The line which begins each snapshot (frame) in a LAMMPS dump file:
+g_frame_marker = b'ITEM: TIMESTEP'
+
+
+def _IsFrameMarker(buf, i):
+    """
+    Does the text in buf (a bytes object) at position i consist of a
+    complete 'ITEM: TIMESTEP' line?  (Both '\\n' and '\\r\\n' are accepted.)
+    """
+    j = i + len(g_frame_marker)
+    return ((buf[j:j+1] == b'\n') or (buf[j:j+2] == b'\r\n'))
+
+
+def FrameOffsets(f, start=0, block_size=(1 << 24)):
+    """
+    Scan a LAMMPS dump file (opened in binary mode) and yield the byte
+    offset of every line containing 'ITEM: TIMESTEP', beginning at "start"
+    (which should be 0, or the offset of a frame found earlier).
+    The file is read in large blocks instead of line by line.
+    """
+    marker = b'\n' + g_frame_marker
+    if start > 0:
+        read_pos = start - 1
+        buf = b''
+        buf_offset = start - 1  # the position of buf[0] in the file
+    else:
+        read_pos = 0
+        buf = b'\n'
+        buf_offset = -1
+    while True:
+        # (The caller may use the file while we are paused, so seek first.)
+        f.seek(read_pos)
+        block = f.read(block_size)
+        read_pos += len(block)
+        eof = (len(block) == 0)
+        buf += block
+        pos = 0
+        while True:
+            i = buf.find(marker, pos)
+            if i == -1:
+                keep_from = max(pos, len(buf) - len(marker) - 1)
+                break
+            if (not eof) and (i + len(marker) + 2 > len(buf)):
+                # We can't see the end of this line yet.  Try again later.
+                keep_from = i
+                break
+            if _IsFrameMarker(buf, i + 1):
+                yield buf_offset + i + 1
+            pos = i + len(marker)
+        if eof:
+            return
+        buf = buf[keep_from:]
+        buf_offset += keep_from
+
+
+def LastFrameOffset(f, block_size=(1 << 20)):
+    """
+    Return the byte offset of the last line containing 'ITEM: TIMESTEP' in a
+    LAMMPS dump file (opened in binary mode), by reading the file backwards
+    from the end.  Returns None if there are no such lines.
+    """
+    f.seek(0, 2)
+    pos = f.tell()
+    overlap = b''
+    while pos > 0:
+        n = min(block_size, pos)
+        pos -= n
+        f.seek(pos)
+        buf = f.read(n) + overlap
+        end = len(buf)
+        while True:
+            i = buf.rfind(g_frame_marker, 0, end)
+            if (i == -1) or ((i == 0) and (pos > 0)):
+                # (If i==0, we need to read the previous character first.)
+                break
+            if (((i == 0) or (buf[i-1:i] == b'\n')) and
+                _IsFrameMarker(buf, i)):
+                return pos + i
+            end = i + len(g_frame_marker) - 1
+        overlap = buf[:len(g_frame_marker) + 2]
+    return None
+
+
+def ReadFrameHeader(f, offset):
+    """
+    Read the timestep and the number of atoms from the beginning of the
+    snapshot (frame) located at "offset" in a LAMMPS dump file (opened in
+    binary mode).  Returns a (timestep_str, natoms) tuple.
+    (natoms = -1 if the "ITEM: NUMBER OF ATOMS" section was not found.
+     Lines which have not been completely written yet are ignored.)
+    """
+    f.seek(offset)
+    f.readline()  # (skip past the 'ITEM: TIMESTEP' line)
+    line = f.readline()
+    timestep_str = ''
+    if line.endswith(b'\n'):
+        timestep_str = line.decode().strip()
+    natoms = -1
+    line = f.readline()
+    if line.strip() == b'ITEM: NUMBER OF ATOMS':
+        line = f.readline()
+        if line.endswith(b'\n'):
+            try:
+                natoms = int(line)
+            except ValueError:
+                pass
+    return timestep_str, natoms
+
+
+def ReadFrameLines(f, start, stop=None):
+    """
+    Return the lines of text in a LAMMPS dump file (opened in binary mode),
+    between byte offsets "start" and "stop".  If "stop" is None, the text
+    ends at the beginning of the next frame (or the end of the file).
+    (The next frame may have been omitted from the frame index because it
+     is still being written.)
+    """
+    f.seek(start)
+    if stop is None:
+        data = f.read()
+        marker = b'\n' + g_frame_marker
+        i = data.find(marker)
+        while i != -1:
+            if _IsFrameMarker(data, i + 1):
+                data = data[:i + 1]
+                break
+            i = data.find(marker, i + 1)
+    else:
+        data = f.read(stop - start)
+    return io.TextIOWrapper(io.BytesIO(data)).readlines()
+
+
+# The first line of every frame index file created by LoadFrameIndex()
+g_index_header = '# dump2data.py frame index:'
+
+
+def _IsFrameIndexFile(index_file_name):
+    """
+    Return True if the file does not exist yet, or if it is a frame index
+    created by LoadFrameIndex() (so that it is safe to overwrite it).
+    """
+    try:
+        with open(index_file_name, 'rb') as index_file:
+            header = index_file.readline()
+    except FileNotFoundError:
+        return True
+    except OSError:
+        return False
+    return header.startswith(g_index_header.encode())
+
+
+def _DropIncompleteFrames(frames):
+    """
+    Discard the frames at the end of the list whose timestep or number of
+    atoms could not be read (because the dump file is still being written).
+    """
+    while ((len(frames) > 0) and
+           ((frames[-1][0] == '') or (frames[-1][2] < 0))):
+        del frames[-1]
+
+
+def LoadFrameIndex(f, dump_file_name=None):
+    """
+    Return a list of (timestep_str, offset, natoms) tuples, one for each
+    snapshot (frame) in a LAMMPS dump file (opened in binary mode).
+    If the name of the dump file is known, the list is also saved to a
+    file (named dump_file_name + '.index') so that it only needs to be
+    built once.  (If the dump file has grown since then, only the new
+    portion of the dump file is scanned.)  A file with that name which
+    was not created by this function is left alone.
+    Frames at the end of the file whose timestep or number of atoms have
+    not been written yet are omitted.
+    """
+    frames = []
+    scan_from = 0
+    index_file_name = None
+    if dump_file_name != None:
+        index_file_name = dump_file_name + '.index'
+        if not _IsFrameIndexFile(index_file_name):
+            sys.stderr.write('  (not saving the frame index: \"' +
+                             index_file_name + '\" is some other file)\n')
+            index_file_name = None
+    if index_file_name != None:
+        try:
+            with open(index_file_name, 'r') as index_file:
+                tokens = index_file.readline().split()
+                # The first line stores the size and modification
+                # time of the dump file when the index was created.
+                size = int(tokens[-2])
+                mtime = int(tokens[-1])
+                for line in index_file:
+                    offset_str, natoms_str, timestep_str = line.split(None, 2)
+                    frames.append((timestep_str.strip(),
+                                   int(offset_str),
+                                   int(natoms_str)))
+            _DropIncompleteFrames(frames)
+            stat = os.stat(dump_file_name)
+            if (stat.st_size == size) and (stat.st_mtime_ns == mtime):
+                return frames
+            if (stat.st_size < size) or (len(frames) == 0):
+                raise ValueError('(the dump file was modified)')
+            # Otherwise the dump file has grown (eg. the simulation is
+            # still running).  Discard the last frame (it may have been
+            # incomplete), and resume scanning the file from there.
+            scan_from = frames[-1][1]
+            f.seek(scan_from)
+            if not _IsFrameMarker(f.read(len(g_frame_marker) + 2), 0):
+                raise ValueError('(the dump file was modified)')
+            del frames[-1]
+        except (OSError, IndexError, ValueError):
+            frames = []
+            scan_from = 0
+
+    for offset in FrameOffsets(f, scan_from):
+        timestep_str, natoms = ReadFrameHeader(f, offset)
+        frames.append((timestep_str, offset, natoms))
+    _DropIncompleteFrames(frames)
+
+    if index_file_name != None:
+        stat = os.stat(dump_file_name)
+        try:
+            with open(index_file_name + '.tmp', 'w') as index_file:
+                index_file.write(g_index_header + ' ' +
+                                 str(stat.st_size) + ' ' +
+                                 str(stat.st_mtime_ns) + '\n')
+                for timestep_str, offset, natoms in frames:
+                    index_file.write(str(offset) + ' ' + str(natoms) + ' ' +
+                                     timestep_str + '\n')
+            os.replace(index_file_name + '.tmp', index_file_name)
+        except OSError:
+            sys.stderr.write('  (unable to save the frame index to file \"' +
+                             index_file_name + '\")\n')
+    return frames
+
+
+def ReadSelectedFrames(misc_settings):
+    """
+    If the user requested a single timestep (-t) or the last snapshot (-last),
+    and if the dump file can be read in random order (ie. it is not a pipe),
+    then return a list containing the lines of text in each selected snapshot
+    (usually only one).  These are found without reading the entire file.
+    Otherwise return None.
+    """
+    if misc_settings.multi:
+        return None
+    if misc_settings.in_coord_file_name != '':
+        dump_file_name = misc_settings.in_coord_file_name
+        f = open(dump_file_name, 'rb')
+    else:
+        dump_file_name = None
+        f = getattr(sys.stdin, 'buffer', None)
+        if (f is None) or (not f.seekable()):
+            return None
+    selected_lines = []
+    if misc_settings.last_snapshot:
+        offset = LastFrameOffset(f)
+        if offset != None:
+            selected_lines.append(ReadFrameLines(f, offset))
+    else:
+        frames = LoadFrameIndex(f, dump_file_name)
+        for i in range(0, len(frames)):
+            timestep_str, offset, natoms = frames[i]
+            if int(timestep_str) == int(misc_settings.timestep_str):
+                stop = None
+                if i + 1 < len(frames):
+                    stop = frames[i + 1][1]
+                selected_lines.append(ReadFrameLines(f, offset, stop))
+    if dump_file_name != None:
+        f.close()
+    return selected_lines
+
+
+
+def ReadSnapshots(in_coord_file):
+    """
+    Read a LAMMPS dump file (opened in text mode) one snapshot at a time.
+    For each snapshot, yield a (timestep_str, lines, end_of_file) tuple,
+    where "lines" is a list containing the lines of text in that snapshot,
+    and end_of_file is True if it is the last snapshot in the file.
+    """
+    # Skip to the first line containing 'ITEM: TIMESTEP'
+    end_of_file = False
+    while not end_of_file:
+        line = in_coord_file.readline()
+        if line == '':
+            end_of_file = True
+        elif line == 'ITEM: TIMESTEP\n':
+            break
+
+    while not end_of_file:
+        # lines_current_snapshot stores the lines of text that store
+        # information about the current snapshot.  Since we have read a line
+        # containing 'ITEM: TIMESTEP\n', we should add it to this text.
+        lines_current_snapshot = ['ITEM: TIMESTEP\n']
+
+        # Select the lines of text from the current snapshot
+        # (ie. frame, timestep)
+        timestep_str = ''
+        next_line_is_timestep = True
+        while not end_of_file:
+            line = in_coord_file.readline()
+            if line == '':
+                end_of_file = True
+            elif line == 'ITEM: TIMESTEP\n':
+                break
+            else:
+                if next_line_is_timestep:
+                    timestep_str = line.strip()
+                    next_line_is_timestep = False
+                lines_current_snapshot.append(line)
+
+        yield timestep_str, lines_current_snapshot, end_of_file
+
+
+
+def IsSnapshotSelected(timestep_str, end_of_file, misc_settings):
+    """
+    Should we write the coordinates in the snapshot at this timestep?
+    (end_of_file is True if it is the last snapshot in the dump file.)
+    """
+    write_this_snapshot = False
+
+    if misc_settings.multi:
+
+        write_this_snapshot = True
+        if (misc_settings.tstart and
+            (int(timestep_str) < misc_settings.tstart)):
+            write_this_snapshot = False
+        if (misc_settings.tstop and
+            (int(timestep_str) > misc_settings.tstop)):
+            write_this_snapshot = False
+
+        if misc_settings.tstart:
+            tstart = misc_settings.tstart
+        else:
+            tstart = 0
+
+        if ((int(timestep_str) - tstart)
+                %
+            misc_settings.skip_interval) != 0:
+            write_this_snapshot = False
+
+    else:
+        if misc_settings.last_snapshot:
+            if end_of_file:
+                write_this_snapshot = True
+        else:
+            assert(misc_settings.timestep_str)
+            if (int(timestep_str) ==
+                int(misc_settings.timestep_str)):
+                write_this_snapshot = True
+
+    return write_this_snapshot
+
+
+
+# Settings shared by all of the processes created by WriteSnapshotsInParallel()
+g_job_settings = None
+
+
+def _InitSnapshotJob(misc_settings, data_settings, dump_file_name):
+    global g_job_settings
+    g_job_settings = (misc_settings, data_settings, dump_file_name)
+
+
+def _WriteSnapshotJob(task):
+    """
+    Convert one snapshot (in a separate process).  The text which
+    WriteSnapshot() would have printed to sys.stdout and sys.stderr
+    is returned to the parent process (along with any error), so that it
+    can be printed in the correct order.
+    """
+    num_snapshots_out, lines, start, stop = task
+    misc_settings, data_settings, dump_file_name = g_job_settings
+    out_text = io.StringIO()
+    err_text = io.StringIO()
+    error = None
+    try:
+        if lines is None:
+            with open(dump_file_name, 'rb') as f:
+                lines = ReadFrameLines(f, start, stop)
+        with contextlib.redirect_stdout(out_text), \
+             contextlib.redirect_stderr(err_text):
+            WriteSnapshot(lines,
+                          num_snapshots_out,
+                          misc_settings,
+                          data_settings)
+    except (ValueError, InputError) as err:
+        error = err
+    return out_text.getvalue(), err_text.getvalue(), error
+
+
+def WriteSnapshotsInParallel(tasks,
+                             misc_settings,
+                             data_settings,
+                             dump_file_name=None):
+    """
+    Convert many snapshots simultaneously using "misc_settings.jobs"
+    processes.  Each entry in "tasks" is a tuple of the form:
+       (num_snapshots_out, lines, start, stop)
+    where "lines" is a list containing the lines of text in that snapshot,
+    or None if the snapshot should be read from dump_file_name
+    (between byte offsets "start" and "stop").
+    The snapshots are written in the same order they appear in "tasks".
+    (Only a few snapshots are kept in memory at any given time.)
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pool = multiprocessing.Pool(misc_settings.jobs,
+                                _InitSnapshotJob,
+                                (misc_settings, data_settings, dump_file_name))
+    try:
+        pending = deque()
+        tasks = iter(tasks)
+        while True:
+            while len(pending) < 2 * misc_settings.jobs:
+                task = next(tasks, None)
+                if task is None:
+                    break
+                pending.append(pool.apply_async(_WriteSnapshotJob, (task,)))
+            if len(pending) == 0:
+                break
+            out_text, err_text, error = pending.popleft().get()
+            sys.stderr.write(err_text)
+            sys.stdout.write(out_text)
+            if error != None:
+                raise error
+    finally:
+        pool.terminate()
+        pool.join()
+
+
 
 
 def main():
@@ -1302,261 +1978,73 @@ def main():
 
         num_snapshots_out = 0
 
-        if misc_settings.in_coord_file_name != '':
-            in_coord_file = open(misc_settings.in_coord_file_name)
-        else:
-            in_coord_file = sys.stdin
-
-        # Skip to the first line containing 'ITEM: TIMESTEP'
-        end_of_file = False
-        while not end_of_file:
-            line = in_coord_file.readline()
-            if line == '':
-                end_of_file = True
-            elif line == 'ITEM: TIMESTEP\n':
-                break
-
-
-        # lines_current_snapshot stores the lines of text that store
-        # information about the current snapshot.  Since we have read a line
-        # containing 'ITEM: TIMESTEP\n', we should add it to this text.
-        lines_current_snapshot = ['ITEM: TIMESTEP\n']
-
-
-        # Now begin parsing the file:
-
-        while not end_of_file:
-
-            # Select the lines of text from the current snapshot
-            # (ie. frame, timestep)
-            timestep_str = ''
-            next_line_is_timestep = True
-            while not end_of_file:
-                line = in_coord_file.readline()
-                if line == '':
-                    end_of_file = True
-                elif line == 'ITEM: TIMESTEP\n':
-                    break
-                else:
-                    if next_line_is_timestep:
-                        timestep_str = line.strip()
-                        next_line_is_timestep = False
-                    lines_current_snapshot.append(line)
-
-            # Should we write the coordinates in this snapshot?
-            write_this_snapshot = False
-
-            if misc_settings.multi:
-
-                write_this_snapshot = True
-                if (misc_settings.tstart and
-                    (int(timestep_str) < misc_settings.tstart)):
-                    write_this_snapshot = False
-                if (misc_settings.tstop and
-                    (int(timestep_str) > misc_settings.tstop)):
-                    write_this_snapshot = False
-
-                if misc_settings.tstart:
-                    tstart = misc_settings.tstart
-                else:
-                    tstart = 0
-
-                if ((int(timestep_str) - tstart)
-                        %
-                    misc_settings.skip_interval) != 0:
-                    write_this_snapshot = False
-
-            else:
-                if misc_settings.last_snapshot:
-                    if end_of_file:
-                        write_this_snapshot = True
-                else:
-                    assert(misc_settings.timestep_str)
-                    if (int(timestep_str) ==
-                        int(misc_settings.timestep_str)):
-                        write_this_snapshot = True
-
-            if write_this_snapshot:
-
-                # Now parse the text in these lines
-
-                snapshot = SnapshotData(lines_current_snapshot,
-                                        misc_settings,
-                                        data_settings)
-
-                # Check for consistency
-                if misc_settings.scale != None:
-                    for atomid in snapshot.coords:
-                        for d in range(0, 3):
-                            crd = float(snapshot.coords[atomid][d])
-                            snapshot.coords[atomid][d]=str(crd*misc_settings.scale)
-
-                if len(snapshot.coords) != snapshot.natoms:
-                    err_msg = 'Number of lines in \"ITEM: ATOMS\" section disagrees with\n' \
-                        + '           \"ITEM: NUMBER OF ATOMS\" declared earlier in this file.\n'
-                    raise InputError(err_msg)
-
+        # If only one snapshot was requested (using -t or -last), then try
+        # to jump directly to it (instead of reading the entire dump file).
+        selected_lines = ReadSelectedFrames(misc_settings)
+        if selected_lines != None:
+            for lines in selected_lines:
                 num_snapshots_out += 1
+                WriteSnapshot(lines,
+                              num_snapshots_out,
+                              misc_settings,
+                              data_settings)
+
+        elif (misc_settings.multi and (misc_settings.jobs > 1) and
+              (misc_settings.in_coord_file_name != '')):
+            # Find the location of every snapshot in the dump file, and
+            # let each process read (and convert) the snapshots it was given.
+            dump_file_name = misc_settings.in_coord_file_name
+            with open(dump_file_name, 'rb') as f:
+                frames = LoadFrameIndex(f, dump_file_name)
+            tasks = []
+            for i in range(0, len(frames)):
+                timestep_str, offset, natoms = frames[i]
+                stop = None
+                if i + 1 < len(frames):
+                    stop = frames[i + 1][1]
+                if IsSnapshotSelected(timestep_str,
+                                      i + 1 == len(frames),
+                                      misc_settings):
+                    num_snapshots_out += 1
+                    tasks.append((num_snapshots_out, None, offset, stop))
+            WriteSnapshotsInParallel(tasks,
+                                     misc_settings,
+                                     data_settings,
+                                     dump_file_name)
 
-                # Additional processing needed?
-                if misc_settings.center_snapshot:
-                    cm = [0.0, 0.0, 0.0]
-                    for atomid in snapshot.coords:
-                        for d in range(0, 3):
-                            cm[d] += float(snapshot.coords[atomid][d])
-                    for d in range(0, 3):
-                        cm[d] /= float(len(snapshot.coords))
-                    for atomid in snapshot.coords:
-                        for d in range(0, 3):
-                            snapshot.coords[atomid][d] = "%.7g" % (
-                                float(snapshot.coords[atomid][d]) - cm[d])
-                        snapshot.coords_ixiyiz[atomid] = ["0", "0", "0"]
-                    if misc_settings.output_format != 'data':
-                        for atomid in snapshot.coords:
-                            snapshot.coords_ixiyiz[atomid] = ["0", "0", "0"]
-
-                # Now start writing the snapshot:
-                sys.stderr.write('  (writing snapshot ' + str(num_snapshots_out) +
-                                 ' at timestep ' + snapshot.timestep_str + ')\n')
-
-                # Print the snapshot
-                # First check which format to output the data:
-                if misc_settings.output_format == 'raw':
-                    # Print out the coordinates in simple 3-column text
-                    # format
-                    for atomid, xyz in iter(sorted(snapshot.coords.items(), key=GetIntAtomID)):
-                        # Check and see if whether the atom is one of the
-                        # atoms that was selected by the user.  If not discard.
-                        # (I don't offer this feature for 'data' files because
-                        #  it is harder to implement for this file type.)
-                        if not InIntervalUnion(int(atomid),
-                                misc_settings.atom_id_intervals):
-                            continue
-                        atype = snapshot.atomtypes[atomid]
-                        if not InIntervalUnion(int(atype),
-                                misc_settings.atom_type_intervals):
-                            continue
-                        molid = snapshot.molids[atomid]
-                        if not InIntervalUnion(int(molid),
-                                misc_settings.mol_id_intervals):
-                            continue
-
-                        # Write the coordinates
-                        if misc_settings.scale == None:
-                            sys.stdout.write(
-                                str(xyz[0]) + ' ' + str(xyz[1]) + ' ' + str(xyz[2]) + '\n')
-                        else:
-                            # Only convert to float and back if
-                            # misc_settings.scale != None
-                            sys.stdout.write(str(misc_settings.scale * float(xyz[0])) + ' ' +
-                                             str(misc_settings.scale * float(xyz[1])) + ' ' +
-                                             str(misc_settings.scale * float(xyz[2])) + '\n')
-                    sys.stdout.write('\n')
-
-                elif ((misc_settings.output_format == 'xyz') or
-                      (misc_settings.output_format == 'xyz-id') or
-                      (misc_settings.output_format == 'xyz-mol') or
-                      (misc_settings.output_format == 'xyz-type-mol')):
-                        # Print out the coordinates in simple 3-column text
-                        # format
-                    sys.stdout.write(str(len(snapshot.coords)) + '\n')
-                    descr_str = 'LAMMPS data from timestep ' + snapshot.timestep_str
-                    sys.stdout.write(descr_str + '\n')
-                    for atomid, xyz in iter(sorted(snapshot.coords.items(), key=GetIntAtomID)):
-
-                        # Check and see if whether the atom is one of the
-                        # atoms that was selected by the user. If not discard.
-                        if not InIntervalUnion(int(atomid),
-                                misc_settings.atom_id_intervals):
-                            continue
-                        atype = snapshot.atomtypes[atomid]
-                        if not InIntervalUnion(int(atype),
-                                misc_settings.atom_type_intervals):
-                            continue
-                        molid = snapshot.molids[atomid]
-                        if not InIntervalUnion(int(molid),
-                                misc_settings.mol_id_intervals):
-                            continue
-
-                        if ((misc_settings.output_format == 'xyz') or
-                            (misc_settings.output_format == 'xyz-type)')):
-                            atomtype = snapshot.atomtypes.get(atomid)
-                            if atomtype == None:
-                                raise InputError('xyz ERROR: Your trajectory file lacks atom-type information\n')
-                            first_column = str(atomtype)
-                        elif misc_settings.output_format == 'xyz-id':
-                            first_column = str(atomid)
-                        elif misc_settings.output_format == 'xyz-mol':
-                            molid = snapshot.molids.get(atomid)
-                            if molid == None:
-                                raise InputError('-xyz-mol ERROR: Your trajectory file lacks molecule-id information.\n')
-                            sys.stderr.write(str(molid)+'\n')
-                            first_column = str(molid)
-                        elif misc_settings.output_format == 'xyz-type-mol':
-                            atomtype = snapshot.atomtypes.get(atomid)
-                            if atomtype == None:
-                                raise InputError('xyz-type-mol ERROR: Your trajectory file lacks atom-type information.\n')
-                            molid = snapshot.molids.get(atomid)
-                            if molid == None:
-                                raise InputError('-xyz-type-mol ERROR: Your trajectory file lacks molecule-id information.\n')
-                            first_column = str(atomtype)+'_'+str(molid)
-                        if misc_settings.scale == None:
-                            sys.stdout.write(first_column + ' ' +
-                                             str(xyz[0]) + ' ' +
-                                             str(xyz[1]) + ' ' +
-                                             str(xyz[2]) + '\n')
-                        else:
-                            # Only convert to float and back if
-                            # misc_settings.scale != None
-                            sys.stdout.write(first_column + ' ' +
-                                             str(misc_settings.scale * float(xyz[0])) + ' ' +
-                                             str(misc_settings.scale * float(xyz[1])) + ' ' +
-                                             str(misc_settings.scale * float(xyz[2])) + '\n')
-
-                else:
-                    # Parse the DATA file specified by the user
-                    # and replace appropriate lines or fields with
-                    # the corresponding text from the DUMP file.
-                    descr_str = 'LAMMPS data from timestep ' + snapshot.timestep_str
-                    if (misc_settings.multi and
-                        (misc_settings.output_format == 'data')):
-                        out_file_name = data_settings.file_name + '.'\
-                            + str(num_snapshots_out)
-                        sys.stderr.write(
-                            '  (creating file \"' + out_file_name + '\")\n')
-                        out_file = open(out_file_name, 'w')
-                    else:
-                        out_file = sys.stdout
-
-                    WriteSnapshotToData(out_file,
-                                        descr_str,
-                                        misc_settings,
-                                        data_settings,
-                                        snapshot.dump_column_names,
-                                        snapshot.natoms,
-                                        snapshot.coords,
-                                        snapshot.coords_ixiyiz,
-                                        snapshot.vects,
-                                        snapshot.velocities,
-                                        snapshot.atomtypes,
-                                        snapshot.molids,
-                                        snapshot.xlo_str, snapshot.xhi_str,
-                                        snapshot.ylo_str, snapshot.yhi_str,
-                                        snapshot.zlo_str, snapshot.zhi_str,
-                                        snapshot.xy_str, snapshot.xz_str, snapshot.yz_str)
-
-                    if (misc_settings.multi and
-                        (misc_settings.output_format == 'data')):
-                        out_file.close()
-
-
-            # Clear the contents of lines_current_snapshot
-            # so that it is ready for the next snapshot.
-            lines_current_snapshot = ['ITEM: TIMESTEP\n']
-            # ('ITEM: TIMESTEP\n' is a line we read earlier)
-
-        if misc_settings.in_coord_file_name != '':
-            in_coord_file.close()
+        else:
+            if misc_settings.in_coord_file_name != '':
+                in_coord_file = open(misc_settings.in_coord_file_name)
+            else:
+                in_coord_file = sys.stdin
+
+            selected_snapshots = \
+                ((timestep_str, lines)
+                 for timestep_str, lines, end_of_file
+                 in ReadSnapshots(in_coord_file)
+                 if IsSnapshotSelected(timestep_str,
+                                       end_of_file,
+                                       misc_settings))
+
+            if misc_settings.multi and (misc_settings.jobs > 1):
+                # (The dump file is a pipe, so the snapshots must be read by
+                #  this process, and sent to the other processes.)
+                WriteSnapshotsInParallel(
+                    ((num_snapshots_out, lines, None, None)
+                     for num_snapshots_out, (timestep_str, lines)
+                     in enumerate(selected_snapshots, 1)),
+                    misc_settings,
+                    data_settings)
+            else:
+                for timestep_str, lines in selected_snapshots:
+                    num_snapshots_out += 1
+                    WriteSnapshot(lines,
+                                  num_snapshots_out,
+                                  misc_settings,
+                                  data_settings)
+
+            if misc_settings.in_coord_file_name != '':
+                in_coord_file.close()
 
         for warning_str in warning_strings:
             sys.stderr.write(warning_str + '\n')
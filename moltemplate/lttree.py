@@ -36,6 +36,7 @@ g_version_str = '0.80.4'
 import os
 import sys
 from collections import defaultdict
+import numpy as np
 
 try:
     from .ttree import BasicUISettings, BasicUIParseArgs, EraseTemplateFiles, \
@@ -60,8 +61,8 @@ try:
         data_bonds, data_bond_list, data_angles, data_dihedrals, data_impropers, \
         data_boundary, data_pbc, data_prefix_no_space, in_init, in_settings, \
         in_prefix
-    from .ttree_matrix_stack import AffineTransform, MultiAffineStack, \
-        LinTransform, Matrix2Quaternion, MultQuat
+    from .ttree_matrix_stack import MultiAffineStack, \
+        Matrix2Quaternion, MultQuat
 except (ImportError, SystemError, ValueError):
     # not installed as a package
     from ttree import *
@@ -102,6 +103,8 @@ class LttreeSettings(BasicUISettings):
         self.i_atomtype = None  # <--An integer indicating which column has the atomtype
         self.i_molid = None  # <--An integer indicating which column has the molid, if applicable
         self.print_full_atom_type_name_in_masses = False # <--how to print atom type names in the "Masses" section of a DATA file?
+        self.check_syntax = False # <--check the class definitions for mistakes? (see lttree_check.py)
+        self.allow_wildcards = True # <--allow wildcards in coeff commands? (only used if check_syntax)
 
 
 
@@ -220,6 +223,18 @@ def LttreeParseArgs(argv, settings, main=False, show_warnings=True):
             settings.print_full_atom_type_name_in_masses = False
             del(argv[i:i + 1])
 
+        elif (argv[i].lower() in ('-checksyntax', '-check-syntax')):
+            settings.check_syntax = True
+            del(argv[i:i + 1])
+
+        elif (argv[i].lower() in ('-allow-wildcards', '-allowwildcards')):
+            settings.allow_wildcards = True
+            del(argv[i:i + 1])
+
+        elif (argv[i].lower() in ('-forbid-wildcards', '-forbidwildcards')):
+            settings.allow_wildcards = False
+            del(argv[i:i + 1])
+
         elif (argv[i].find('-') == 0) and main:
             # elif (__name__ == "__main__"):
             raise InputError('Error(' + g_program_name + '):\n'
@@ -304,67 +319,147 @@ def LttreeParseArgs(argv, settings, main=False, show_warnings=True):
     return
 
 
+class AtomCoords(object):
+    """
+    AtomCoords stores the rendered text of the \"Data Atoms\" section
+    of a LAMMPS data file (one block of text for each write() command),
+    together with the transformation matrix which must be applied to each
+    block.  The coordinates and other vector degrees of freedom (such as
+    dipole moments) are read into a NumPy array, and the transformations
+    for all of the blocks are carried out at once when Transform() is
+    invoked.  Usage:
+
+    atom_coords = AtomCoords(settings)
+    block = atom_coords.Append(text, matrix)   <-- (repeat for every block)
+    atom_coords.Transform()
+    text = atom_coords.Text(block)
+
+    """
+
+    def __init__(self, settings):
+        self.settings = settings
+        # The indices of the columns containing coordinates, followed by
+        # the columns containing direction vectors (3 columns per vector):
+        self.i_cols = [i for cxcycz in settings.ii_coords for i in cxcycz] + \
+                      [i for cxcycz in settings.ii_vects for i in cxcycz]
+        self.lines = []      # the columns and comment on each line of text
+        self.i_lines = []    # which of these lines contain atoms?
+        self.coords = []     # numbers in the i_cols columns of those lines
+        self.matrices = []   # the matrix to apply to each block of text
+        self.i_matrix = []   # which matrix should be applied to each atom?
+
+    def Append(self, text, matrix):
+        """ Read the columns of text from one write(\"Data Atoms\") command.
+        The \"matrix\" stores the aggregate sum of combined transformations
+        to be applied to this block of text.
+        This function returns a reference to the block which can be passed
+        to Text() later (after the coordinates have been transformed).
+
+        """
+        settings = self.settings
+        i_cols = self.i_cols
+        i_matrix = len(self.matrices)
+        self.matrices.append([row[:] for row in matrix])
+        i_first = len(self.lines)
+
+        for line_orig in text.split('\n'):
+            ic = line_orig.find('#')
+            if ic != -1:
+                line = line_orig[:ic]
+                comment = ' ' + line_orig[ic:].rstrip('\n')
+            else:
+                line = line_orig.rstrip('\n')
+                comment = ''
+
+            # Split the line into words (columns) using whitespace delimeters
+            columns = SplitQuotedString(line,
+                                        quotes='{',
+                                        endquote='}')
+
+            if len(columns) > 0:
+                if len(columns) == len(settings.column_names) + 3:
+                    raise InputError('Error: lttree.py does not yet support integer unit-cell counters \n'
+                                     '   within the \"' + data_atoms + '\" section of a LAMMPS data file.\n'
+                                     '   Instead please add the appropriate offsets (these offsets\n'
+                                     '   should be multiples of the cell size) to the atom coordinates\n'
+                                     '   in the data file, and eliminate the extra columns. Then try again.\n'
+                                     '   (If you get this message often, email me and I\'ll fix this limitation.)')
+                if len(columns) < len(settings.column_names):
+                    raise InputError('Error: The number of columns in your data file does not\n'
+                                     '       match the LAMMPS atom_style you selected.\n'
+                                     '       Use the -atomstyle <style> command line argument.\n'
+                                     '       (Alternatively this error can be caused by a missing } character.)\n')
+                self.coords.append([float(columns[i]) for i in i_cols])
+                self.i_lines.append(len(self.lines))
+                self.i_matrix.append(i_matrix)
+            self.lines.append((columns, comment))
+
+        return slice(i_first, len(self.lines))
+
+    def Transform(self):
+        """ Apply the transformations to all of the blocks of text at once.
+        Atomic coordinates transform using \"affine\" transformations
+        (translations plus rotations [or other linear transformations]).
+        Dipole moments and other direction-vectors are not effected by
+        translational movement.
+
+        """
+        if (len(self.coords) == 0) or (len(self.i_cols) == 0):
+            return
+        n_coords = len(self.settings.ii_coords)
+        x0 = np.array(self.coords, dtype=float)
+        x0 = x0.reshape(len(self.coords), len(self.i_cols) // 3, 3)
+        M = np.array(self.matrices, dtype=float)[self.i_matrix]
+        x = np.empty_like(x0)
+        # The terms are added in the same order used by AffineTransform()
+        # and LinTransform() so that the results are identical.
+        for d in range(0, 3):
+            x[:, :, d] = (0.0 +
+                          M[:, d, 0:1] * x0[:, :, 0] +
+                          M[:, d, 1:2] * x0[:, :, 1] +
+                          M[:, d, 2:3] * x0[:, :, 2])
+            x[:, :n_coords, d] += M[:, d, 3:4]  # ("b" is part of "matrix")
+
+        i_cols = self.i_cols
+        lines = self.lines
+        for i_line, x_line in zip(self.i_lines,
+                                  x.reshape(len(self.coords), -1).tolist()):
+            columns = lines[i_line][0]
+            for i, x_i in zip(i_cols, x_line):
+                columns[i] = str(x_i)
+        self.coords = []
+        self.i_lines = []
+        self.matrices = []
+        self.i_matrix = []
+
+    def Clear(self):
+        """ Discard all of the text (after it is no longer needed). """
+        self.lines = []
+        self.i_lines = []
+        self.coords = []
+        self.matrices = []
+        self.i_matrix = []
+
+    def Text(self, block):
+        """ Return the text of a block created by Append(). """
+        return '\n'.join([' '.join(columns) + comment
+                          for columns, comment in self.lines[block]])
+
+
+
 def TransformAtomText(text, matrix, settings):
     """ Apply transformations to the coordinates and other vector degrees
     of freedom stored in the \"Data Atoms\" section of a LAMMPS data file.
     This is the \"text\" argument.
     The \"matrix\" stores the aggregate sum of combined transformations
     to be applied.
+    (When transforming many blocks of text, it is faster to use AtomCoords.)
 
     """
-
-    #sys.stderr.write('matrix_stack.M = \n'+ MatToStr(matrix) + '\n')
-
-    lines = text.split('\n')
-
-    for i in range(0, len(lines)):
-        line_orig = lines[i]
-        ic = line_orig.find('#')
-        if ic != -1:
-            line = line_orig[:ic]
-            comment = ' ' + line_orig[ic:].rstrip('\n')
-        else:
-            line = line_orig.rstrip('\n')
-            comment = ''
-
-        # Split the line into words (columns) using whitespace delimeters
-        columns = SplitQuotedString(line,
-                                    quotes='{',
-                                    endquote='}')
-
-        if len(columns) > 0:
-            if len(columns) == len(settings.column_names) + 3:
-                raise InputError('Error: lttree.py does not yet support integer unit-cell counters \n'
-                                 '   within the \"' + data_atoms + '\" section of a LAMMPS data file.\n'
-                                 '   Instead please add the appropriate offsets (these offsets\n'
-                                 '   should be multiples of the cell size) to the atom coordinates\n'
-                                 '   in the data file, and eliminate the extra columns. Then try again.\n'
-                                 '   (If you get this message often, email me and I\'ll fix this limitation.)')
-            if len(columns) < len(settings.column_names):
-                raise InputError('Error: The number of columns in your data file does not\n'
-                                 '       match the LAMMPS atom_style you selected.\n'
-                                 '       Use the -atomstyle <style> command line argument.\n'
-                                 '       (Alternatively this error can be caused by a missing } character.)\n')
-            x0 = [0.0, 0.0, 0.0]
-            x = [0.0, 0.0, 0.0]
-            # Atomic coordinates transform using "affine" transformations
-            # (translations plus rotations [or other linear transformations])
-            for cxcycz in settings.ii_coords:
-                for d in range(0, 3):
-                    x0[d] = float(columns[cxcycz[d]])
-                    AffineTransform(x, matrix, x0)  # x = matrix * x0 + b
-                for d in range(0, 3):  # ("b" is part of "matrix")
-                    columns[cxcycz[d]] = str(x[d])
-            # Dipole moments and other direction-vectors
-            # are not effected by translational movement
-            for cxcycz in settings.ii_vects:
-                for d in range(0, 3):
-                    x0[d] = float(columns[cxcycz[d]])
-                    LinTransform(x, matrix, x0)  # x = matrix * x0
-                for d in range(0, 3):
-                    columns[cxcycz[d]] = str(x[d])
-        lines[i] = ' '.join(columns) + comment
-    return '\n'.join(lines)
+    atom_coords = AtomCoords(settings)
+    block = atom_coords.Append(text, matrix)
+    atom_coords.Transform()
+    return atom_coords.Text(block)
 
 
 
@@ -381,6 +476,10 @@ def TransformEllipsoidText(text, matrix, settings):
 
     lines = text.split('\n')
 
+    # The rotation is the same for every line, so compute it only once
+    qRot = [0.0, 0.0, 0.0, 0.0]
+    Matrix2Quaternion(matrix, qRot)
+
     for i in range(0, len(lines)):
         line_orig = lines[i]
         ic = line_orig.find('#')
@@ -409,9 +508,6 @@ def TransformEllipsoidText(text, matrix, settings):
                       float(columns[-2]),
                       float(columns[-1])]
 
-            qRot = [0.0, 0.0, 0.0, 0.0]
-            Matrix2Quaternion(matrix, qRot)
-
             q_new = [0.0, 0.0, 0.0, 0.0]
             MultQuat(q_new, qRot, q_orig)
 
@@ -614,7 +710,11 @@ def _ExecCommands(command_list,
                   settings,
                   matrix_stack,
                   current_scope_id=None,
-                  substitute_vars=True):
+                  substitute_vars=True,
+                  atom_coords=None,
+                  global_files_content_tmpl=None,
+                  atom_coords_tmpl=None,
+                  hold_output=False):
     """
     _ExecCommands():
     The argument "commands" is a nested list of lists of
@@ -628,8 +728,29 @@ def _ExecCommands(command_list,
     It is an associative array whose key is a string (a filename)
     and whose value is a lists of strings (of rendered templates).
 
+    If an "atom_coords" argument (of type AtomCoords) is supplied, then the
+    coordinates in the "Data Atoms" section are not transformed immediately.
+    Instead, the corresponding entries in "global_files_content" are
+    references to blocks of text stored in "atom_coords".  (The caller must
+    invoke atom_coords.Transform() and replace them with atom_coords.Text().)
+
+    If "global_files_content_tmpl" is supplied, then each template is also
+    rendered without substituting the variables (ie. in the format used by
+    the ".template" files), and stored there during the same pass.
+    ("atom_coords_tmpl" plays the role of "atom_coords" for this text.)
+
+    The "global_files_content" (and "global_files_content_tmpl") arguments
+    can also be FilesWriter objects.  In that case the text is passed on
+    (and eventually written to the file) as soon as the enclosing class or
+    instance has been processed, unless "hold_output" is True.
+    (Text must be held back as long as a post-processing command
+     such as "movecm" needs to read it later.  This is taken care of here.)
+
     """
     files_content = defaultdict(list)
+    files_content_tmpl = None
+    if global_files_content_tmpl != None:
+        files_content_tmpl = defaultdict(list)
     postprocessing_commands = []
 
     while index < len(command_list):
@@ -748,25 +869,21 @@ def _ExecCommands(command_list,
             DeleteLinesWithBadVars(tmpl_list)
 
             # --- Now render the text ---
-            text = Render(tmpl_list,
-                          substitute_vars)
-
-            # ---- Coordinates of the atoms, must be rotated
-            # and translated after rendering.
-            # In addition, other vectors (dipoles, ellipsoid orientations)
-            # must be processed.
-            # This requires us to re-parse the contents of this text
-            # (after it has been rendered), and apply these transformations
-            # before passing them on to the caller.
-            if command.filename == data_atoms:
-                text = TransformAtomText(text, matrix_stack.M, settings)
-            elif command.filename == data_ellipsoids:
-                text = TransformEllipsoidText(text, matrix_stack.M, settings)
-            if command.filename == data_masses:
-                text = AddAtomTypeComments(tmpl_list,
-                                           substitute_vars,
-                                           settings.print_full_atom_type_name_in_masses)
-            files_content[command.filename].append(text)
+            files_content[command.filename].append(
+                _RenderWriteFileCommand(command.filename,
+                                        tmpl_list,
+                                        substitute_vars,
+                                        matrix_stack.M,
+                                        settings,
+                                        atom_coords))
+            if files_content_tmpl != None:
+                files_content_tmpl[command.filename].append(
+                    _RenderWriteFileCommand(command.filename,
+                                            tmpl_list,
+                                            False,
+                                            matrix_stack.M,
+                                            settings,
+                                            atom_coords_tmpl))
 
         elif isinstance(command, ScopeBegin):
 
@@ -781,13 +898,33 @@ def _ExecCommands(command_list,
             # class instance.  _ExecCommands() carries out the commands for
             # a single class/instance.  If we reach a ScopeBegin(),
             # then recursively process the commands belonging to the child.
+            #   Unless we need it later, pass on the text generated so far
+            # before we begin.  Then the child can pass its text directly
+            # to our caller (without waiting for us to finish).
+            hold = hold_output or (len(postprocessing_commands) > 0)
+            if hold:
+                child_files_content = files_content
+                child_files_content_tmpl = files_content_tmpl
+            else:
+                _MergeFilesContent(global_files_content, files_content)
+                files_content = defaultdict(list)
+                child_files_content = global_files_content
+                if files_content_tmpl != None:
+                    _MergeFilesContent(global_files_content_tmpl,
+                                       files_content_tmpl)
+                    files_content_tmpl = defaultdict(list)
+                child_files_content_tmpl = global_files_content_tmpl
             index = _ExecCommands(command_list,
                                   index,
-                                  files_content,
+                                  child_files_content,
                                   settings,
                                   matrix_stack,
                                   command.node,
-                                  substitute_vars)
+                                  substitute_vars,
+                                  atom_coords,
+                                  child_files_content_tmpl,
+                                  atom_coords_tmpl,
+                                  hold)
 
         elif isinstance(command, ScopeEnd):
             if data_atoms in files_content:
@@ -833,19 +970,97 @@ def _ExecCommands(command_list,
 
     # After processing the commands in this list,
     # merge the templates with the callers template list
-    for filename, tmpl_list in files_content.items():
-        global_files_content[filename] += \
-            files_content[filename]
+    _MergeFilesContent(global_files_content, files_content)
+    if files_content_tmpl != None:
+        _MergeFilesContent(global_files_content_tmpl, files_content_tmpl)
 
     return index
 
 
+def _MergeFilesContent(global_files_content, files_content):
+    """
+    Append the text stored in "files_content" (a defaultdict(list))
+    to "global_files_content" (either a defaultdict(list) or a FilesWriter).
+    """
+    if isinstance(global_files_content, FilesWriter):
+        global_files_content.Extend(files_content)
+    else:
+        for filename, str_list in files_content.items():
+            global_files_content[filename] += str_list
+
+
+def _RenderWriteFileCommand(filename,
+                            tmpl_list,
+                            substitute_vars,
+                            matrix,
+                            settings,
+                            atom_coords=None):
+    """
+    Render the contents of a write() or write_once() command
+    (after lines containing deleted variables have been removed).
+    """
+    text = Render(tmpl_list,
+                  substitute_vars)
+
+    # ---- Coordinates of the atoms, must be rotated
+    # and translated after rendering.
+    # In addition, other vectors (dipoles, ellipsoid orientations)
+    # must be processed.
+    # This requires us to re-parse the contents of this text
+    # (after it has been rendered), and apply these transformations
+    # before passing them on to the caller.
+    if filename == data_atoms:
+        if atom_coords != None:
+            text = atom_coords.Append(text, matrix)
+        else:
+            text = TransformAtomText(text, matrix, settings)
+    elif filename == data_ellipsoids:
+        text = TransformEllipsoidText(text, matrix, settings)
+    if filename == data_masses:
+        text = AddAtomTypeComments(tmpl_list,
+                                   substitute_vars,
+                                   settings.print_full_atom_type_name_in_masses)
+    return text
+
+
+def _TransformAtomCoords(files_content, atom_coords):
+    """
+    Transform the coordinates of all of the atoms at once, and
+    replace the references to them with the text they contain.
+    """
+    if data_atoms in files_content:
+        atom_coords.Transform()
+        str_list = files_content[data_atoms]
+        for i in range(0, len(str_list)):
+            if isinstance(str_list[i], slice):
+                str_list[i] = atom_coords.Text(str_list[i])
+
+
 def ExecCommands(commands,
                  files_content,
                  settings,
-                 substitute_vars=True):
+                 substitute_vars=True,
+                 files_content_tmpl=None):
+    """
+    Carry out the write() and write_once() commands in the "commands" list,
+    and append the rendered text to "files_content" (a defaultdict(list)).
+    If "files_content_tmpl" is supplied, the same commands are also rendered
+    without substituting variables (for the ".template" files), and stored
+    there.  (This is faster than invoking ExecCommands() twice.)
+    Either argument can also be a FilesWriter, which writes the text to the
+    files as it is generated (instead of storing all of it in memory).
 
+    """
     matrix_stack = MultiAffineStack()
+    if isinstance(files_content, FilesWriter):
+        atom_coords = files_content.atom_coords
+    else:
+        atom_coords = AtomCoords(settings)
+    atom_coords_tmpl = None
+    if isinstance(files_content_tmpl, FilesWriter):
+        atom_coords_tmpl = files_content_tmpl.atom_coords
+    elif files_content_tmpl != None:
+        atom_coords_tmpl = AtomCoords(settings)
 
     index = _ExecCommands(commands,
                           0,
@@ -853,9 +1068,69 @@ def ExecCommands(commands,
                           settings,
                           matrix_stack,
                           None,
-                          substitute_vars)
+                          substitute_vars,
+                          atom_coords,
+                          files_content_tmpl,
+                          atom_coords_tmpl)
     assert(index == len(commands))
 
+    if not isinstance(files_content, FilesWriter):
+        _TransformAtomCoords(files_content, atom_coords)
+    if ((files_content_tmpl != None) and
+        (not isinstance(files_content_tmpl, FilesWriter))):
+        _TransformAtomCoords(files_content_tmpl, atom_coords_tmpl)
+
+
+class FilesWriter(object):
+    """
+    FilesWriter is an alternative to storing the rendered text of every file
+    in a defaultdict(list) and invoking WriteFiles() at the end.
+    Instead, text is appended to the files (in the order it was generated)
+    a few thousand blocks at a time, so that memory usage does not grow
+    with the size of the system.  The coordinates in the "Data Atoms"
+    section are transformed in batches (using "self.atom_coords") just
+    before they are written.  Usage:
+
+    writer = FilesWriter(settings)
+    ExecCommands(commands, writer, settings)
+    writer.Close()
+
+    """
+
+    def __init__(self,
+                 settings,
+                 suffix='',
+                 write_to_stdout=True,
+                 max_pending=10000):
+        self.atom_coords = AtomCoords(settings)
+        self.suffix = suffix
+        self.write_to_stdout = write_to_stdout
+        self.max_pending = max_pending   # max number of blocks kept in memory
+        self.pending = defaultdict(list)
+        self.num_pending = 0
+
+    def Extend(self, files_content):
+        """ Append the text in "files_content" (a defaultdict(list)). """
+        for filename, str_list in files_content.items():
+            self.pending[filename] += str_list
+            self.num_pending += len(str_list)
+        if self.num_pending >= self.max_pending:
+            self.Flush()
+
+    def Flush(self):
+        """ Write all of the text received so far to the files. """
+        _TransformAtomCoords(self.pending, self.atom_coords)
+        self.atom_coords.Clear()
+        # (Each file is opened in append mode and closed again, so that
+        #  the number of files open at once does not grow with the number
+        #  of files created.)
+        WriteFiles(self.pending, self.suffix, self.write_to_stdout)
+        self.pending = defaultdict(list)
+        self.num_pending = 0
+
+    def Close(self):
+        self.Flush()
+
 
 def WriteFiles(files_content, suffix='', write_to_stdout=True):
     for filename, str_list in files_content.items():
@@ -895,6 +1170,11 @@ def main():
         raise InputError(
             'Error: Alas, you must upgrade to a newer version of python.')
 
+    # Errors found while the files are being parsed and checked for mistakes
+    # are reported with exit status 1 (which is what lttree_check.py used).
+    # Errors found afterwards are reported with exit status -1.
+    error_exit_status = -1
+
     try:
 
         #settings = BasicUISettings()
@@ -913,11 +1193,37 @@ def main():
         g_static_commands = []
         g_instance_commands = []
 
+        check_static_tree = None
+        if settings.check_syntax:
+            error_exit_status = 1
+            # Check for mistakes using the same trees we use to generate
+            # the output files (instead of parsing the files a second time).
+            # (lttree_check imports lttree, so import it here, not above.)
+            try:
+                from .lttree_check import CheckSyntaxCheap, CheckStaticTree
+            except (ImportError, SystemError, ValueError):
+                # not installed as a package
+                from lttree_check import CheckSyntaxCheap, CheckStaticTree
+
+            # The first check only looks for very simple mistakes
+            # (mispelled versions of standard file or variable names).
+            # It needs a separate lexer reading the file from the beginning.
+            lex = TemplateLexer(open(settings.lex.infile, 'r'),
+                                settings.lex.infile)
+            lex.include_path = settings.lex.include_path
+            CheckSyntaxCheap(lex)
+            lex.instream.close()
+
+            def check_static_tree(static_tree_root, replace_var_pairs):
+                CheckStaticTree(static_tree_root, replace_var_pairs, settings)
+
         BasicUI(settings,
                 g_objectdefs,
                 g_objects,
                 g_static_commands,
-                g_instance_commands)
+                g_instance_commands,
+                check_static_tree)
+        error_exit_status = -1
 
         # Interpret the the commands.  (These are typically write() or
         # write_once() commands, rendering templates into text.
@@ -925,37 +1231,40 @@ def main():
         # Coordinate transformations can be applied to the rendered text
         # as a post-processing step.
 
-        sys.stderr.write(' done\nbuilding templates...')
-
-        files_content = defaultdict(list)
-
-        ExecCommands(g_static_commands,
-                     files_content,
-                     settings,
-                     False)
-        ExecCommands(g_instance_commands,
-                     files_content,
-                     settings,
-                     False)
+        # Both versions of each file (the ".template" version containing
+        # the original variable names, and the version with the variables
+        # substituted by values) are rendered during the same pass.
 
-        # Finally: write the rendered text to actual files.
+        # The text is written to the files as soon as it is generated.
 
         # Erase the files that will be written to:
-        sys.stderr.write(' done\nwriting templates...')
         EraseTemplateFiles(g_static_commands)
         EraseTemplateFiles(g_instance_commands)
 
+        sys.stderr.write(' done\nbuilding and rendering templates...')
+
+        # Write the files with the variables substituted by values
+        files_content = FilesWriter(settings)
         # Write the files as templates
         # (with the original variable names present)
-        WriteFiles(files_content, suffix=".template", write_to_stdout=False)
+        files_content_tmpl = FilesWriter(settings,
+                                         suffix='.template',
+                                         write_to_stdout=False)
+
+        ExecCommands(g_static_commands,
+                     files_content,
+                     settings,
+                     True,
+                     files_content_tmpl)
+        ExecCommands(g_instance_commands,
+                     files_content,
+                     settings,
+                     True,
+                     files_content_tmpl)
 
-        # Write the files with the variables substituted by values
-        sys.stderr.write(' done\nbuilding and rendering templates...')
-        files_content = defaultdict(list)
-        ExecCommands(g_static_commands, files_content, settings, True)
-        ExecCommands(g_instance_commands, files_content, settings, True)
         sys.stderr.write(' done\nwriting rendered templates...\n')
-        WriteFiles(files_content)
+        files_content_tmpl.Close()
+        files_content.Close()
         sys.stderr.write(' done\n')
 
         # Now write the variable bindings/assignments table.
@@ -974,10 +1283,10 @@ def main():
                              '      that the moltemplate file contains non-numeric text in one of the\n'
                              '      .move(), .rot(), .scale(), .matrix(), or .quat() commands. If neither of\n'
                              '      these scenarios apply, please report this bug. (jewett.aij at gmail.com)\n')
-            sys.exit(-1)
+            sys.exit(error_exit_status)
         else:
             sys.stderr.write('\n\n' + str(err) + '\n')
-            sys.exit(-1)
+            sys.exit(error_exit_status)
 
     return
 
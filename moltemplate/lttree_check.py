@@ -2012,6 +2012,283 @@ def CheckInFileSyntax(tmpl_list,
                             (table[i][1].binding, table[i][2].binding))
 
 
+def CheckStaticTree(static_tree_root, replace_var_pairs, settings):
+    """
+    CheckStaticTree() checks the contents of the write() and write_once()
+    commands in a static tree (of class definitions) which has already been
+    parsed, and whose @variables have already been looked up (for example,
+    by BasicUI(), or by main() below).  It also checks that coeffs have been
+    defined for every bond, angle, dihedral, improper and atom type in use.
+    "replace_var_pairs" is the dictionary of @variable replacements
+    generated by FindReplacementVarPairs().
+    An InputError is raised if a problem is found.
+
+    """
+
+    data_pair_coeffs_defined = set([])
+    data_bond_coeffs_defined = set([])
+    data_angle_coeffs_defined = set([])
+    data_dihedral_coeffs_defined = set([])
+    data_improper_coeffs_defined = set([])
+    in_pair_coeffs_defined = set([])
+    in_bond_coeffs_defined = set([])
+    in_angle_coeffs_defined = set([])
+    in_dihedral_coeffs_defined = set([])
+    in_improper_coeffs_defined = set([])
+
+    # Now check the static syntax
+    #  Here we check the contents of the the "write_once()" commands:
+    CheckSyntaxStatic(static_tree_root,
+                      static_tree_root,
+                      settings.column_names,
+                      settings.allow_wildcards,
+                      data_pair_coeffs_defined,
+                      data_bond_coeffs_defined,
+                      data_angle_coeffs_defined,
+                      data_dihedral_coeffs_defined,
+                      data_improper_coeffs_defined,
+                      in_pair_coeffs_defined,
+                      in_bond_coeffs_defined,
+                      in_angle_coeffs_defined,
+                      in_dihedral_coeffs_defined,
+                      in_improper_coeffs_defined,
+                      search_instance_commands=False)
+    #  Here we check the contents of the the "write()" commands:
+    CheckSyntaxStatic(static_tree_root,
+                      static_tree_root,
+                      settings.column_names,
+                      settings.allow_wildcards,
+                      data_pair_coeffs_defined,
+                      data_bond_coeffs_defined,
+                      data_angle_coeffs_defined,
+                      data_dihedral_coeffs_defined,
+                      data_improper_coeffs_defined,
+                      in_pair_coeffs_defined,
+                      in_bond_coeffs_defined,
+                      in_angle_coeffs_defined,
+                      in_dihedral_coeffs_defined,
+                      in_improper_coeffs_defined,
+                      search_instance_commands=True)
+
+    if 'bond' in static_tree_root.categories:
+
+        if ((len(data_bond_coeffs_defined) > 0) and
+                (len(in_bond_coeffs_defined) > 0)):
+            raise InputError('---------------------------------------------------------------------\n' +
+                             '     Syntax error: You can EITHER use \"bond_coeff\" commands\n' +
+                             '                    OR you can have a \"Data Bond Coeffs\" section.\n' +
+                             '     LAMMPS will not allow both (...as of late 2012)\n' +
+                             '---------------------------------------------------------------------\n' +
+                             g_no_check_msg)
+            #'     If this is no longer true, to override this error message you must\n'+
+            #'     disable error checking by running moltemplate with the -nocheck option.\n')
+        if len(data_bond_coeffs_defined) > 0:
+            bond_coeffs_defined = data_bond_coeffs_defined
+        else:
+            bond_coeffs_defined = in_bond_coeffs_defined
+
+        bond_types_have_wildcards = False
+        bond_bindings = static_tree_root.categories['bond'].bindings
+        for nd, bond_binding in bond_bindings.items():
+            if not nd.IsDeleted():
+                has_wildcard = HasWildcard(bond_binding.full_name)
+                if has_wildcard:
+                    bond_types_have_wildcards = True
+        for nd, bond_binding in bond_bindings.items():
+            if not nd.IsDeleted():
+                #has_wildcard = HasWildcard(bond_binding.full_name)
+                if ((not (bond_binding in bond_coeffs_defined)) and
+                    #(not has_wildcard) and
+                    (not bond_types_have_wildcards) and
+                    (not ('*' in bond_coeffs_defined))):
+                    raise InputError('---------------------------------------------------------------------\n' +
+                                     '     Syntax error: Missing bond coeff.\n\n' +
+                                     '  No coeffs for the \"' + bond_binding.full_name + '\" bond type have been\n' +
+                                     'defined, but a reference to that bond type was discovered\n' +
+                                     'near ' + ErrorLeader(bond_binding.refs[0].srcloc.infile,
+                                                           bond_binding.refs[0].srcloc.lineno) + '.   Check this file and also check\n'
+                                     'your \"bond_coeff\" commands or your \"Data Bond Coeffs" section.\n'
+                                     '---------------------------------------------------------------------\n' +
+                                     g_no_check_msg)
+
+    if 'angle' in static_tree_root.categories:
+
+        if ((len(data_angle_coeffs_defined) > 0) and
+            (len(in_angle_coeffs_defined) > 0)):
+            raise InputError('---------------------------------------------------------------------\n' +
+                             '     Syntax error: You can EITHER use \"angle_coeff\" commands\n' +
+                             '                    OR you can have a \"Data Angle Coeffs\" section.\n' +
+                             '     LAMMPS will not allow both (...as of late 2012)\n' +
+                             '---------------------------------------------------------------------\n' +
+                             g_no_check_msg)
+            #'     If this is no longer true, to override this error message you must\n'+
+            #'     disable error checking by running moltemplate with the -nocheck option.\n')
+        if len(data_angle_coeffs_defined) > 0:
+            angle_coeffs_defined = data_angle_coeffs_defined
+        else:
+            angle_coeffs_defined = in_angle_coeffs_defined
+
+        angle_types_have_wildcards = False
+        angle_bindings = static_tree_root.categories['angle'].bindings
+        for nd, angle_binding in angle_bindings.items():
+            if not nd.IsDeleted():
+                has_wildcard = HasWildcard(angle_binding.full_name)
+                if has_wildcard:
+                    angle_types_have_wildcards = True
+        for nd, angle_binding in angle_bindings.items():
+            if not nd.IsDeleted():
+                #has_wildcard = HasWildcard(angle_binding.full_name)
+                if ((not (angle_binding in angle_coeffs_defined)) and
+                    #(not has_wildcard)) and
+                    (not angle_types_have_wildcards) and
+                    (not ('*' in angle_coeffs_defined))):
+                    raise InputError('---------------------------------------------------------------------\n' +
+                                     '     Syntax error: Missing angle coeff.\n\n' +
+                                     '  No coeffs for the \"' + angle_binding.full_name + '\" angle type have been\n' +
+                                     'defined, but a reference to that angle type was discovered\n' +
+                                     'near ' + ErrorLeader(angle_binding.refs[0].srcloc.infile,
+                                                           angle_binding.refs[0].srcloc.lineno) + '.   Check this file and also check\n'
+                                     'your \"angle_coeff\" commands or your \"Data Angle Coeffs" section.\n' +
+                                     '---------------------------------------------------------------------\n' +
+                                     g_no_check_msg)
+
+    if 'dihedral' in static_tree_root.categories:
+        #sys.stderr.write('dihedral_bindings = '+str(dihedral_bindings)+'\n')
+
+        if ((len(data_dihedral_coeffs_defined) > 0) and
+            (len(in_dihedral_coeffs_defined) > 0)):
+            raise InputError('---------------------------------------------------------------------\n' +
+                             '     Syntax error: You can EITHER use \"dihedral_coeff\" commands\n' +
+                             '                    OR you can have a \"Data Dihedral Coeffs\" section.\n' +
+                             '     LAMMPS will not allow both (...as of late 2012)\n' +
+                             '---------------------------------------------------------------------\n' +
+                             g_no_check_msg)
+            #'     If this is no longer true, to override this error message you must\n'+
+            #'     disable error checking by running moltemplate with the -nocheck option.\n')
+        if len(data_dihedral_coeffs_defined) > 0:
+            dihedral_coeffs_defined = data_dihedral_coeffs_defined
+        else:
+            dihedral_coeffs_defined = in_dihedral_coeffs_defined
+
+        dihedral_types_have_wildcards = False
+        dihedral_bindings = static_tree_root.categories[
+            'dihedral'].bindings
+        for nd, dihedral_binding in dihedral_bindings.items():
+            if not nd.IsDeleted():
+                has_wildcard = HasWildcard(dihedral_binding.full_name)
+                if has_wildcard:
+                    dihedral_types_have_wildcards = True
+        for nd, dihedral_binding in dihedral_bindings.items():
+            if not nd.IsDeleted():
+                #has_wildcard = HasWildcard(dihedral_binding.full_name)
+                if ((not (dihedral_binding in dihedral_coeffs_defined)) and
+                    #(not has_wildcard) and
+                    (not dihedral_types_have_wildcards) and
+                    (not ('*' in dihedral_coeffs_defined))):
+                    raise InputError('---------------------------------------------------------------------\n' +
+                                     '     Syntax error: Missing dihedral coeff.\n\n' +
+                                     '  No coeffs for the \"' + dihedral_binding.full_name + '\" dihedral type have been\n' +
+                                     'defined, but a reference to that dihedral type was discovered\n' +
+                                     'near ' + ErrorLeader(dihedral_binding.refs[0].srcloc.infile,
+                                                           dihedral_binding.refs[0].srcloc.lineno) + '.   Check this file and also check\n'
+                                     'your \"dihedral_coeff\" commands or your \"Data Dihedral Coeffs" section.\n' +
+                                     '---------------------------------------------------------------------\n' +
+                                     g_no_check_msg)
+
+    if 'improper' in static_tree_root.categories:
+
+        if ((len(data_improper_coeffs_defined) > 0) and
+                (len(in_improper_coeffs_defined) > 0)):
+            raise InputError('---------------------------------------------------------------------\n' +
+                             '     Syntax error: You can EITHER use \"improper_coeff\" commands\n' +
+                             '                    OR you can have a \"Data Improper Coeffs\" section.\n' +
+                             '     LAMMPS will not allow both (...as of late 2012)\n' +
+                             '---------------------------------------------------------------------\n' +
+                             g_no_check_msg)
+            #'     If this is no longer true, to override this error message you must\n'+
+            #'     disable error checking by running moltemplate with the -nocheck option.\n')
+        if len(data_improper_coeffs_defined) > 0:
+            improper_coeffs_defined = data_improper_coeffs_defined
+        else:
+            improper_coeffs_defined = in_improper_coeffs_defined
+
+        improper_types_have_wildcards = False
+        improper_bindings = static_tree_root.categories[
+            'improper'].bindings
+        for nd, improper_binding in improper_bindings.items():
+            if not nd.IsDeleted():
+                has_wildcard = HasWildcard(improper_binding.full_name)
+                if has_wildcard:
+                    improper_types_have_wildcards = True
+        for nd, improper_binding in improper_bindings.items():
+            if not nd.IsDeleted():
+                #has_wildcard = HasWildcard(improper_binding.full_name)
+                if ((not (improper_binding in improper_coeffs_defined)) and
+                    #(not has_wildcard) and
+                    (not improper_types_have_wildcards) and
+                    (not ('*' in improper_coeffs_defined))):
+                    raise InputError('---------------------------------------------------------------------\n' +
+                                     '     Syntax error: Missing improper coeff.\n\n' +
+                                     '  No coeffs for the \"' + improper_binding.full_name + '\" improper type have been\n' +
+                                     'defined, but a reference to that improper type was discovered\n' +
+                                     'near ' + ErrorLeader(improper_binding.refs[0].srcloc.infile,
+                                                           improper_binding.refs[0].srcloc.lineno) + '.   Check this file and also check\n'
+                                     'your \"improper_coeff\" commands or your \"Data Improper Coeffs" section.\n' +
+                                     '---------------------------------------------------------------------\n' +
+                                     g_no_check_msg)
+
+    if 'atom' in static_tree_root.categories:
+
+        if ((len(data_pair_coeffs_defined) > 0) and
+            (len(in_pair_coeffs_defined) > 0)):
+            raise InputError('---------------------------------------------------------------------\n' +
+                             '     Syntax error: You can EITHER use \"pair_coeff\" commands\n' +
+                             '                    OR you can have a \"Data Pair Coeffs\" section.\n' +
+                             '     LAMMPS will not allow both (...as of late 2012)\n' +
+                             '---------------------------------------------------------------------\n' +
+                             g_no_check_msg)
+            #'     If this is no longer true, to override this error message you must\n'+
+            #'     disable error checking by running moltemplate with the -nocheck option.\n')
+
+        if len(data_pair_coeffs_defined) > 0:
+            pair_coeffs_defined = data_pair_coeffs_defined
+        else:
+            pair_coeffs_defined = in_pair_coeffs_defined
+
+        atom_types_have_wildcards = False
+        atom_bindings = static_tree_root.categories['atom'].bindings
+        for nd, atom_binding in atom_bindings.items():
+            if not nd.IsDeleted():
+                has_wildcard = HasWildcard(atom_binding.full_name)
+                if has_wildcard:
+                    atom_types_have_wildcards = True
+        for nd, atom_binding in atom_bindings.items():
+            if not nd.IsDeleted():
+                #has_wildcard = HasWildcard(atom_binding.full_name)
+                if ((not ((atom_binding, atom_binding)
+                          in
+                          pair_coeffs_defined)) and
+                    #(not has_wildcard) and
+                    (not atom_types_have_wildcards) and
+                    (not (('*', '*') in pair_coeffs_defined)) and
+                    (not (atom_binding.nptr.cat_name,
+                          atom_binding.nptr.cat_node,
+                          atom_binding.nptr.leaf_node)
+                     in replace_var_pairs) and
+                    (not g_omit_pair_coeff_checking)):
+
+                    raise InputError('---------------------------------------------------------------------\n' +
+                                     '     Syntax error: Missing pair coeff.\n\n' +
+                                     '  No pair coeffs for the \"' + atom_binding.full_name + '\" atom type have been\n' +
+                                     'defined, but a reference to that atom type was discovered\n' +
+                                     'near ' + ErrorLeader(atom_binding.refs[0].srcloc.infile,
+                                                           atom_binding.refs[0].srcloc.lineno) + '.   Check this file and\n'
+                                     'also check your \"pair_coeff\" commands or your \"Data Pair Coeffs" section.\n\n' +
+                                     g_no_check_msg)
+    # else:
+    #    raise InputError('Error: No atom types (@atom) have been defined.\n')
+
+
 def LttreeCheckParseArgs(argv, settings, main=False, show_warnings=True):
 
     LttreeParseArgs(argv, settings, False, show_warnings)
@@ -2024,18 +2301,8 @@ def LttreeCheckParseArgs(argv, settings, main=False, show_warnings=True):
         if len(argv) == 1:
             raise InputError('Error: This program requires at least one argument\n'
                              '       the name of a file containing ttree template commands\n')
-        settings.allow_wildcards = True
-        i = 1
-        while i < len(argv):
-            if argv[i].lower() in ('-allow-wildcards', '-allowwildcards'):
-                settings.allow_wildcards = True
-                del argv[i:i+1]
-            elif argv[i].lower() in ('-forbid-wildcards', '-forbidwildcards'):
-                settings.allow_wildcards = False
-                del argv[i:i+1]
-            else:
-                i += 1
-            #(perhaps later I'll add some additional argumets)
+        # (The -allow-wildcards and -forbid-wildcards arguments
+        #  were handled by LttreeParseArgs().)
 
         # The only argument left should be the system.lt file we want to read:
         if len(argv) == 2:
@@ -2107,7 +2374,7 @@ def main():
         # has name '' (equivalent to '/')
         sys.stderr.write(g_program_name +
                          ':    parsing the class definitions...')
-        static_tree_root.Parse(settings.lex)
+        static_tree_root.Parse(settings.lex, settings.import_cache)
 
         sys.stderr.write(' done\n' + g_program_name +
                          ':    looking up classes...')
@@ -2127,268 +2394,7 @@ def main():
         sys.stderr.write(' done\n')
         #sys.stderr.write(' done\n\nclass_def_tree = ' + str(static_tree_root) + '\n\n')
 
-        data_pair_coeffs_defined = set([])
-        data_bond_coeffs_defined = set([])
-        data_angle_coeffs_defined = set([])
-        data_dihedral_coeffs_defined = set([])
-        data_improper_coeffs_defined = set([])
-        in_pair_coeffs_defined = set([])
-        in_bond_coeffs_defined = set([])
-        in_angle_coeffs_defined = set([])
-        in_dihedral_coeffs_defined = set([])
-        in_improper_coeffs_defined = set([])
-
-        # Now check the static syntax
-        #  Here we check the contents of the the "write_once()" commands:
-        CheckSyntaxStatic(static_tree_root,
-                          static_tree_root,
-                          settings.column_names,
-                          settings.allow_wildcards,
-                          data_pair_coeffs_defined,
-                          data_bond_coeffs_defined,
-                          data_angle_coeffs_defined,
-                          data_dihedral_coeffs_defined,
-                          data_improper_coeffs_defined,
-                          in_pair_coeffs_defined,
-                          in_bond_coeffs_defined,
-                          in_angle_coeffs_defined,
-                          in_dihedral_coeffs_defined,
-                          in_improper_coeffs_defined,
-                          search_instance_commands=False)
-        #  Here we check the contents of the the "write()" commands:
-        CheckSyntaxStatic(static_tree_root,
-                          static_tree_root,
-                          settings.column_names,
-                          settings.allow_wildcards,
-                          data_pair_coeffs_defined,
-                          data_bond_coeffs_defined,
-                          data_angle_coeffs_defined,
-                          data_dihedral_coeffs_defined,
-                          data_improper_coeffs_defined,
-                          in_pair_coeffs_defined,
-                          in_bond_coeffs_defined,
-                          in_angle_coeffs_defined,
-                          in_dihedral_coeffs_defined,
-                          in_improper_coeffs_defined,
-                          search_instance_commands=True)
-
-        if 'bond' in static_tree_root.categories:
-
-            if ((len(data_bond_coeffs_defined) > 0) and
-                    (len(in_bond_coeffs_defined) > 0)):
-                raise InputError('---------------------------------------------------------------------\n' +
-                                 '     Syntax error: You can EITHER use \"bond_coeff\" commands\n' +
-                                 '                    OR you can have a \"Data Bond Coeffs\" section.\n' +
-                                 '     LAMMPS will not allow both (...as of late 2012)\n' +
-                                 '---------------------------------------------------------------------\n' +
-                                 g_no_check_msg)
-                #'     If this is no longer true, to override this error message you must\n'+
-                #'     disable error checking by running moltemplate with the -nocheck option.\n')
-            if len(data_bond_coeffs_defined) > 0:
-                bond_coeffs_defined = data_bond_coeffs_defined
-            else:
-                bond_coeffs_defined = in_bond_coeffs_defined
-
-            bond_types_have_wildcards = False
-            bond_bindings = static_tree_root.categories['bond'].bindings
-            for nd, bond_binding in bond_bindings.items():
-                if not nd.IsDeleted():
-                    has_wildcard = HasWildcard(bond_binding.full_name)
-                    if has_wildcard:
-                        bond_types_have_wildcards = True
-            for nd, bond_binding in bond_bindings.items():
-                if not nd.IsDeleted():
-                    #has_wildcard = HasWildcard(bond_binding.full_name)
-                    if ((not (bond_binding in bond_coeffs_defined)) and
-                        #(not has_wildcard) and
-                        (not bond_types_have_wildcards) and
-                        (not ('*' in bond_coeffs_defined))):
-                        raise InputError('---------------------------------------------------------------------\n' +
-                                         '     Syntax error: Missing bond coeff.\n\n' +
-                                         '  No coeffs for the \"' + bond_binding.full_name + '\" bond type have been\n' +
-                                         'defined, but a reference to that bond type was discovered\n' +
-                                         'near ' + ErrorLeader(bond_binding.refs[0].srcloc.infile,
-                                                               bond_binding.refs[0].srcloc.lineno) + '.   Check this file and also check\n'
-                                         'your \"bond_coeff\" commands or your \"Data Bond Coeffs" section.\n'
-                                         '---------------------------------------------------------------------\n' +
-                                         g_no_check_msg)
-
-        if 'angle' in static_tree_root.categories:
-
-            if ((len(data_angle_coeffs_defined) > 0) and
-                (len(in_angle_coeffs_defined) > 0)):
-                raise InputError('---------------------------------------------------------------------\n' +
-                                 '     Syntax error: You can EITHER use \"angle_coeff\" commands\n' +
-                                 '                    OR you can have a \"Data Angle Coeffs\" section.\n' +
-                                 '     LAMMPS will not allow both (...as of late 2012)\n' +
-                                 '---------------------------------------------------------------------\n' +
-                                 g_no_check_msg)
-                #'     If this is no longer true, to override this error message you must\n'+
-                #'     disable error checking by running moltemplate with the -nocheck option.\n')
-            if len(data_angle_coeffs_defined) > 0:
-                angle_coeffs_defined = data_angle_coeffs_defined
-            else:
-                angle_coeffs_defined = in_angle_coeffs_defined
-
-            angle_types_have_wildcards = False
-            angle_bindings = static_tree_root.categories['angle'].bindings
-            for nd, angle_binding in angle_bindings.items():
-                if not nd.IsDeleted():
-                    has_wildcard = HasWildcard(angle_binding.full_name)
-                    if has_wildcard:
-                        angle_types_have_wildcards = True
-            for nd, angle_binding in angle_bindings.items():
-                if not nd.IsDeleted():
-                    #has_wildcard = HasWildcard(angle_binding.full_name)
-                    if ((not (angle_binding in angle_coeffs_defined)) and
-                        #(not has_wildcard)) and
-                        (not angle_types_have_wildcards) and
-                        (not ('*' in angle_coeffs_defined))):
-                        raise InputError('---------------------------------------------------------------------\n' +
-                                         '     Syntax error: Missing angle coeff.\n\n' +
-                                         '  No coeffs for the \"' + angle_binding.full_name + '\" angle type have been\n' +
-                                         'defined, but a reference to that angle type was discovered\n' +
-                                         'near ' + ErrorLeader(angle_binding.refs[0].srcloc.infile,
-                                                               angle_binding.refs[0].srcloc.lineno) + '.   Check this file and also check\n'
-                                         'your \"angle_coeff\" commands or your \"Data Angle Coeffs" section.\n' +
-                                         '---------------------------------------------------------------------\n' +
-                                         g_no_check_msg)
-
-        if 'dihedral' in static_tree_root.categories:
-            #sys.stderr.write('dihedral_bindings = '+str(dihedral_bindings)+'\n')
-
-            if ((len(data_dihedral_coeffs_defined) > 0) and
-                (len(in_dihedral_coeffs_defined) > 0)):
-                raise InputError('---------------------------------------------------------------------\n' +
-                                 '     Syntax error: You can EITHER use \"dihedral_coeff\" commands\n' +
-                                 '                    OR you can have a \"Data Dihedral Coeffs\" section.\n' +
-                                 '     LAMMPS will not allow both (...as of late 2012)\n' +
-                                 '---------------------------------------------------------------------\n' +
-                                 g_no_check_msg)
-                #'     If this is no longer true, to override this error message you must\n'+
-                #'     disable error checking by running moltemplate with the -nocheck option.\n')
-            if len(data_dihedral_coeffs_defined) > 0:
-                dihedral_coeffs_defined = data_dihedral_coeffs_defined
-            else:
-                dihedral_coeffs_defined = in_dihedral_coeffs_defined
-
-            dihedral_types_have_wildcards = False
-            dihedral_bindings = static_tree_root.categories[
-                'dihedral'].bindings
-            for nd, dihedral_binding in dihedral_bindings.items():
-                if not nd.IsDeleted():
-                    has_wildcard = HasWildcard(dihedral_binding.full_name)
-                    if has_wildcard:
-                        dihedral_types_have_wildcards = True
-            for nd, dihedral_binding in dihedral_bindings.items():
-                if not nd.IsDeleted():
-                    #has_wildcard = HasWildcard(dihedral_binding.full_name)
-                    if ((not (dihedral_binding in dihedral_coeffs_defined)) and
-                        #(not has_wildcard) and
-                        (not dihedral_types_have_wildcards) and
-                        (not ('*' in dihedral_coeffs_defined))):
-                        raise InputError('---------------------------------------------------------------------\n' +
-                                         '     Syntax error: Missing dihedral coeff.\n\n' +
-                                         '  No coeffs for the \"' + dihedral_binding.full_name + '\" dihedral type have been\n' +
-                                         'defined, but a reference to that dihedral type was discovered\n' +
-                                         'near ' + ErrorLeader(dihedral_binding.refs[0].srcloc.infile,
-                                                               dihedral_binding.refs[0].srcloc.lineno) + '.   Check this file and also check\n'
-                                         'your \"dihedral_coeff\" commands or your \"Data Dihedral Coeffs" section.\n' +
-                                         '---------------------------------------------------------------------\n' +
-                                         g_no_check_msg)
-
-        if 'improper' in static_tree_root.categories:
-
-            if ((len(data_improper_coeffs_defined) > 0) and
-                    (len(in_improper_coeffs_defined) > 0)):
-                raise InputError('---------------------------------------------------------------------\n' +
-                                 '     Syntax error: You can EITHER use \"improper_coeff\" commands\n' +
-                                 '                    OR you can have a \"Data Improper Coeffs\" section.\n' +
-                                 '     LAMMPS will not allow both (...as of late 2012)\n' +
-                                 '---------------------------------------------------------------------\n' +
-                                 g_no_check_msg)
-                #'     If this is no longer true, to override this error message you must\n'+
-                #'     disable error checking by running moltemplate with the -nocheck option.\n')
-            if len(data_improper_coeffs_defined) > 0:
-                improper_coeffs_defined = data_improper_coeffs_defined
-            else:
-                improper_coeffs_defined = in_improper_coeffs_defined
-
-            improper_types_have_wildcards = False
-            improper_bindings = static_tree_root.categories[
-                'improper'].bindings
-            for nd, improper_binding in improper_bindings.items():
-                if not nd.IsDeleted():
-                    has_wildcard = HasWildcard(improper_binding.full_name)
-                    if has_wildcard:
-                        improper_types_have_wildcards = True
-            for nd, improper_binding in improper_bindings.items():
-                if not nd.IsDeleted():
-                    #has_wildcard = HasWildcard(improper_binding.full_name)
-                    if ((not (improper_binding in improper_coeffs_defined)) and
-                        #(not has_wildcard) and
-                        (not improper_types_have_wildcards) and
-                        (not ('*' in improper_coeffs_defined))):
-                        raise InputError('---------------------------------------------------------------------\n' +
-                                         '     Syntax error: Missing improper coeff.\n\n' +
-                                         '  No coeffs for the \"' + improper_binding.full_name + '\" improper type have been\n' +
-                                         'defined, but a reference to that improper type was discovered\n' +
-                                         'near ' + ErrorLeader(improper_binding.refs[0].srcloc.infile,
-                                                               improper_binding.refs[0].srcloc.lineno) + '.   Check this file and also check\n'
-                                         'your \"improper_coeff\" commands or your \"Data Improper Coeffs" section.\n' +
-                                         '---------------------------------------------------------------------\n' +
-                                         g_no_check_msg)
-
-        if 'atom' in static_tree_root.categories:
-
-            if ((len(data_pair_coeffs_defined) > 0) and
-                (len(in_pair_coeffs_defined) > 0)):
-                raise InputError('---------------------------------------------------------------------\n' +
-                                 '     Syntax error: You can EITHER use \"pair_coeff\" commands\n' +
-                                 '                    OR you can have a \"Data Pair Coeffs\" section.\n' +
-                                 '     LAMMPS will not allow both (...as of late 2012)\n' +
-                                 '---------------------------------------------------------------------\n' +
-                                 g_no_check_msg)
-                #'     If this is no longer true, to override this error message you must\n'+
-                #'     disable error checking by running moltemplate with the -nocheck option.\n')
-
-            if len(data_pair_coeffs_defined) > 0:
-                pair_coeffs_defined = data_pair_coeffs_defined
-            else:
-                pair_coeffs_defined = in_pair_coeffs_defined
-
-            atom_types_have_wildcards = False
-            atom_bindings = static_tree_root.categories['atom'].bindings
-            for nd, atom_binding in atom_bindings.items():
-                if not nd.IsDeleted():
-                    has_wildcard = HasWildcard(atom_binding.full_name)
-                    if has_wildcard:
-                        atom_types_have_wildcards = True
-            for nd, atom_binding in atom_bindings.items():
-                if not nd.IsDeleted():
-                    #has_wildcard = HasWildcard(atom_binding.full_name)
-                    if ((not ((atom_binding, atom_binding)
-                              in
-                              pair_coeffs_defined)) and
-                        #(not has_wildcard) and
-                        (not atom_types_have_wildcards) and
-                        (not (('*', '*') in pair_coeffs_defined)) and
-                        (not (atom_binding.nptr.cat_name,
-                              atom_binding.nptr.cat_node,
-                              atom_binding.nptr.leaf_node)
-                         in replace_var_pairs) and
-                        (not g_omit_pair_coeff_checking)):
-
-                        raise InputError('---------------------------------------------------------------------\n' +
-                                         '     Syntax error: Missing pair coeff.\n\n' +
-                                         '  No pair coeffs for the \"' + atom_binding.full_name + '\" atom type have been\n' +
-                                         'defined, but a reference to that atom type was discovered\n' +
-                                         'near ' + ErrorLeader(atom_binding.refs[0].srcloc.infile,
-                                                               atom_binding.refs[0].srcloc.lineno) + '.   Check this file and\n'
-                                         'also check your \"pair_coeff\" commands or your \"Data Pair Coeffs" section.\n\n' +
-                                         g_no_check_msg)
-        # else:
-        #    raise InputError('Error: No atom types (@atom) have been defined.\n')
+        CheckStaticTree(static_tree_root, replace_var_pairs, settings)
 
         sys.stderr.write(g_program_name + ': -- No errors detected. --\n')
         exit(0)
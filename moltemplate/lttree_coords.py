@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+
+# Author: Andrew Jewett (jewett.aij at g mail)
+# License: MIT License  (See LICENSE.md)
+# Copyright (c) 2013
+
+man_page_text = """
+Usage (examples):
+
+lttree_coords.py -pdb solvate.pdb tmp_atom_coords.npy
+
+lttree_coords.py -xyz system.xyz tmp_atom_coords.npy
+
+lttree_coords.py -raw coords.raw tmp_atom_coords.npy
+
+lttree_coords.py -dump traj.lammpstrj tmp_atom_coords.npy \\
+                 [-quat tmp_ellips_quat.dat] \\
+                 [-vel "Data Velocities"]
+
+This program is invoked by moltemplate.sh.  It replaces a series of awk,
+sed, head, tail, and sort commands which were used to extract the atom
+coordinates from PDB, XYZ, RAW, and LAMMPS dump files.
+
+The file is read once, and the coordinates are saved (in the order they
+should appear in the "Atoms" section) in binary numpy (".npy") format,
+as an N x 3 array of byte strings (containing the numbers exactly as they
+appear in the file).  This file is read later by raw2data.py and
+lttree_data_header.py.  (If the file contains no coordinates, then no
+.npy file is created.)
+
+The number of coordinates (and the periodic boundary box, if the file
+contains that information) are printed in a form which can be evaluated
+by the shell, for example:
+NATOMCRDS=780
+BOXSIZE_MINX=0.0
+BOXSIZE_MAXX='  16.000'
+  :
+
+Only the last frame of a LAMMPS dump file is used.  Its atoms are sorted by
+atom-ID.  If that frame contains quaternions (eg. "quatw quati quatj quatk"),
+they are saved to the file following "-quat" (in "w i j k" order).
+If it contains velocities (and angular momenta), they are saved to the file
+following "-vel" (in the format used by the "Velocities" section).
+
+"""
+
+import sys
+import os
+import re
+import math
+import shlex
+import numpy as np
+
+try:
+    from .ttree_lex import InputError
+    from .lttree_data_header import AwkNumber, AwkNumberStr
+    from .dump2data import LastFrameOffset, ReadFrameLines
+except (ImportError, SystemError, ValueError):
+    # not installed as a package
+    from ttree_lex import InputError
+    from lttree_data_header import AwkNumber, AwkNumberStr
+    from dump2data import LastFrameOffset, ReadFrameLines
+
+g_program_name = __file__.split('/')[-1]  # = 'lttree_coords.py'
+g_date_str = '2025-11-16'
+g_version_str = '0.1.0'
+
+
+class CoordSettings(object):
+
+    def __init__(self):
+        self.in_format = ''   # 'pdb', 'xyz', 'raw', or 'dump'
+        self.in_fname = ''
+        self.out_fname = ''
+        self.quat_fname = ''
+        self.vel_fname = ''
+
+
+# Column names in a LAMMPS dump file which store quaternions
+# (listed in the order they should appear in the "Ellipsoids" section)
+g_quat_column_patterns = [
+    re.compile(r'^qw$|^quatw$|^c_q\[1\]$|^c_orient\[4\]$'),
+    re.compile(r'^qi$|^quati$|^qx$|^quatx$|^c_q\[2\]$|^c_orient\[1\]$'),
+    re.compile(r'^qj$|^quatj$|^qy$|^quaty$|^c_q\[3\]$|^c_orient\[2\]$'),
+    re.compile(r'^qk$|^quatk$|^qz$|^quatz$|^c_q\[4\]$|^c_orient\[3\]$')]
+
+
+def _CoordArray(tokens, fname):
+    """
+    Convert a list of strings (3 per atom: x, y, z) into an N x 3 numpy
+    array of byte strings, after checking that they are all numbers.
+    (The numbers are not stored as floats, so that they are copied into
+     the "Atoms" section verbatim, eg. "12.490" remains "12.490".)
+    """
+    try:
+        coords = np.array(tokens, dtype='S').reshape(-1, 3)
+        coords.astype(float)
+    except ValueError:
+        raise InputError('Error: File \"' + fname + '\" contains coordinates which are not numbers.\n')
+    return coords
+
+
+def ReadRawCoords(lines, fname):
+    """
+    Read the coordinates from a file containing 3 columns of numbers.
+    (Lines which do not contain exactly 3 columns are ignored.)
+    """
+    tokens = []
+    for line in lines:
+        fields = line.split()
+        if len(fields) == 3:
+            tokens += fields
+    return _CoordArray(tokens, fname), []
+
+
+def ReadXYZCoords(lines, fname):
+    """
+    Read the coordinates from an XYZ file.  The first two lines are skipped.
+    Lines with 4 columns are assumed to begin with an atom name.
+    """
+    tokens = []
+    for i, line in enumerate(lines):
+        if i < 2:
+            continue
+        fields = line.split()
+        if len(fields) == 4:
+            tokens += fields[1:4]
+        elif len(fields) == 3:
+            tokens += fields
+    return _CoordArray(tokens, fname), []
+
+
+def ReadPDBCoords(lines, fname):
+    """
+    Read the coordinates from the ATOM and HETATM records of a PDB file
+    (in the order they appear in the file), as well as the periodic
+    boundary box (if there is a CRYST1 record).
+    """
+    tokens = []
+    cryst1 = None
+    for line in lines:
+        if line.startswith(('ATOM  ', 'HETATM')):
+            tokens += [line[30:38].strip(),
+                       line[38:46].strip(),
+                       line[46:54].strip()]
+        elif line.startswith('CRYST1') and (cryst1 is None):
+            cryst1 = line
+    if len(tokens) == 0:
+        raise InputError('Error: File \"' + fname + '\" is not a valid PDB file.\n')
+    coords = _CoordArray(tokens, fname)
+
+    # Now extract the periodic bounding-box information from the PDB file
+    # The CRYST1 records are described at:
+    # http://deposit.rcsb.org/adit/docs/pdb_atom_format.html
+    box = []
+    if cryst1 != None:
+        a_str = cryst1[7:15]
+        b_str = cryst1[16:24]
+        c_str = cryst1[25:33]
+        alpha = AwkNumber(cryst1[34:40])
+        beta = AwkNumber(cryst1[41:47])
+        gamma = AwkNumber(cryst1[48:54])
+        if (alpha != 90.0) or (beta != 90.0) or (gamma != 90.0):
+            # I transform the parameters from one format to the other by
+            # inverting the transformation formula from the LAMMPS
+            # documentation https://docs.lammps.org/Howto_triclinic.html
+            # (which matches
+            #  http://www.ccl.net/cca/documents/molecular-modeling/node4.html)
+            b = AwkNumber(b_str)
+            c = AwkNumber(c_str)
+            ca = math.cos(alpha * math.pi / 180.0)
+            cb = math.cos(beta * math.pi / 180.0)
+            cg = math.cos(gamma * math.pi / 180.0)
+            sg = math.sin(gamma * math.pi / 180.0)
+            box = [('TRICLINIC', 'true'),
+                   ('BOXSIZE_MAXX', a_str),
+                   ('BOXSIZE_MAXY', AwkNumberStr(b * sg)),
+                   ('BOXSIZE_MAXZ',
+                    AwkNumberStr(c * math.sqrt(1.0 + 2 * ca * cb * cg -
+                                               ca * ca - cb * cb - cg * cg) /
+                                 sg)),
+                   ('BOXSIZE_XY', AwkNumberStr(b * cg)),
+                   ('BOXSIZE_XZ', AwkNumberStr(c * cb)),
+                   ('BOXSIZE_YZ', AwkNumberStr(c * (ca - (cg * cb)) / sg))]
+        else:
+            box = [('BOXSIZE_MAXX', a_str),
+                   ('BOXSIZE_MAXY', b_str),
+                   ('BOXSIZE_MAXZ', c_str),
+                   ('BOXSIZE_XY', '0.0'),
+                   ('BOXSIZE_XZ', '0.0'),
+                   ('BOXSIZE_YZ', '0.0')]
+        box = [('BOXSIZE_MINX', '0.0'),
+               ('BOXSIZE_MINY', '0.0'),
+               ('BOXSIZE_MINZ', '0.0')] + box
+    return coords, box
+
+
+def ReadDumpCoords(f, fname, quat_fname='', vel_fname=''):
+    """
+    Read the coordinates (sorted by atom-ID) and the periodic boundary box
+    from the last frame of a LAMMPS dump file (opened in binary mode).
+    If quat_fname or vel_fname are not empty, the quaternions or velocities
+    (if present) are also written to files with those names.
+    """
+    offset = LastFrameOffset(f)
+    if offset is None:
+        raise InputError('Error: File \"' + fname + '\" is not a valid LAMMPS dump file.\n')
+    lines = ReadFrameLines(f, offset)
+    if ((len(lines) < 9) or
+        (not lines[8].startswith('ITEM: ATOMS'))):
+        raise InputError('Error: File \"' + fname + '\" is not a valid LAMMPS dump file.\n'
+                         '       (The last frame should begin with 9 lines (\"ITEM: TIMESTEP\" ...\n'
+                         '        \"ITEM: ATOMS\") in the standard order.)\n')
+    natoms = int(AwkNumber(lines[3]))
+
+    # Read the box
+    box_strs = ['%g' % AwkNumber(field)
+                for line in lines[5:8] for field in line.split()]
+
+    box = []
+    if len(box_strs) == 6:
+        # Orthorombic box.
+        box = [('BOXSIZE_MINX', box_strs[0]),
+               ('BOXSIZE_MAXX', box_strs[1]),
+               ('BOXSIZE_MINY', box_strs[2]),
+               ('BOXSIZE_MAXY', box_strs[3]),
+               ('BOXSIZE_MINZ', box_strs[4]),
+               ('BOXSIZE_MAXZ', box_strs[5])]
+    elif len(box_strs) == 9:
+        # Triclinic box.
+        # For triclinic systems the first two columns of "ITEM: BOX BOUNDS"
+        # in the dump describe a bounding box around the system, not the
+        # system itself. See https://docs.lammps.org/dump.html and
+        # https://docs.lammps.org/Howto_triclinic.html
+        b = [float(s) for s in box_strs]
+        xtilt = sorted([0.0, b[2], b[5], b[2] + b[5]])
+        ytilt = sorted([0.0, b[8]])
+        box = [('BOXSIZE_MINX', AwkNumberStr(b[0] - xtilt[0])),
+               ('BOXSIZE_MAXX', AwkNumberStr(b[1] - xtilt[3])),
+               ('BOXSIZE_MINY', AwkNumberStr(b[3] - ytilt[0])),
+               ('BOXSIZE_MAXY', AwkNumberStr(b[4] - ytilt[1])),
+               ('BOXSIZE_MINZ', box_strs[6]),
+               ('BOXSIZE_MAXZ', box_strs[7]),
+               ('BOXSIZE_XY', box_strs[2]),
+               ('BOXSIZE_XZ', box_strs[5]),
+               ('BOXSIZE_YZ', box_strs[8]),
+               ('TRICLINIC', 'true')]
+
+    # Find the columns of: position, quaternion, velocity, and angular momentum.
+    column_names = lines[8].split()[2:]
+    i_pos = [i for i, name in enumerate(column_names)
+             if re.match('[xyz]', name)]
+    i_quat = [None, None, None, None]
+    for i, name in enumerate(column_names):
+        for q in range(0, 4):
+            if g_quat_column_patterns[q].search(name):
+                i_quat[q] = i
+    i_vel = [i for i, name in enumerate(column_names)
+             if re.search('v[xyz]', name)]
+    i_angmom = [i for i, name in enumerate(column_names)
+                if re.search('angmom[xyz]|AngularMomentum[XYZ]', name)]
+    if len(i_pos) < 3:
+        raise InputError('Error: File \"' + fname + '\" lacks x,y,z coordinates.\n')
+
+    # Reorder the atoms, since they are dumped in random order.
+    # (Sort them numerically, using the first column, ie. the atom-ID.)
+    rows = [line.split() for line in lines[9:9 + natoms]]
+    rows = [tokens for tokens in rows if len(tokens) > 0]
+    rows.sort(key=lambda tokens: AwkNumber(tokens[0]))
+    if any([len(tokens) != len(column_names) for tokens in rows]):
+        raise InputError('Error: File \"' + fname + '\" contains lines with the wrong number of columns.\n')
+
+    coords = _CoordArray([tokens[i] for tokens in rows for i in i_pos[:3]],
+                         fname)
+
+    # Save the orientations.
+    if (quat_fname != '') and (None not in i_quat):
+        with open(quat_fname, 'w') as quat_file:
+            quat_file.write(''.join([' '.join([tokens[i] for i in i_quat]) +
+                                     '\n' for tokens in rows]))
+
+    # Save the velocities and, if present, angular momenta too.
+    if (vel_fname != '') and (len(i_vel) == 3):
+        i_cols = None
+        if len(i_angmom) == 0:
+            i_cols = [0] + i_vel
+        elif len(i_angmom) == 3:
+            i_cols = [0] + i_vel + i_angmom
+        if i_cols != None:
+            with open(vel_fname, 'w') as vel_file:
+                vel_file.write(''.join([' '.join([tokens[i] for i in i_cols]) +
+                                        '\n' for tokens in rows]))
+    return coords, box
+
+
+def CoordsParseArgs(argv, settings):
+    i = 1
+    while i < len(argv):
+        if argv[i] in ('-pdb', '-xyz', '-raw', '-dump'):
+            if i + 1 >= len(argv):
+                raise InputError('Error(' + g_program_name + '): The ' + argv[i] + ' flag should be followed by a file name.\n')
+            settings.in_format = argv[i][1:]
+            settings.in_fname = argv[i + 1]
+            del(argv[i:i + 2])
+        elif argv[i] in ('-quat', '-vel'):
+            if i + 1 >= len(argv):
+                raise InputError('Error(' + g_program_name + '): The ' + argv[i] + ' flag should be followed by a file name.\n')
+            if argv[i] == '-quat':
+                settings.quat_fname = argv[i + 1]
+            else:
+                settings.vel_fname = argv[i + 1]
+            del(argv[i:i + 2])
+        elif ((argv[i].lower() == '-?') or
+              (argv[i].lower() == '--?') or
+              (argv[i].lower() == '-help') or
+              (argv[i].lower() == '--help')):
+            sys.stdout.write(man_page_text + '\n')
+            sys.exit(0)
+        elif argv[i][0] == '-':
+            raise InputError('Error(' + g_program_name + '):\n'
+                             'Unrecogized command line argument \"' + argv[i] + '\"\n')
+        else:
+            i += 1
+
+    if (settings.in_format == '') or (len(argv) != 2):
+        raise InputError('Error(' + g_program_name + '):\n'
+                         'Expected a coordinate file (-pdb, -xyz, -raw, or -dump)\n'
+                         'followed by the name of the .npy file to create.\n')
+    settings.out_fname = argv[1]
+
+
+def main():
+    try:
+        settings = CoordSettings()
+        CoordsParseArgs([arg for arg in sys.argv], settings)
+        if settings.in_format == 'dump':
+            with open(settings.in_fname, 'rb') as f:
+                coords, box = ReadDumpCoords(f,
+                                             settings.in_fname,
+                                             settings.quat_fname,
+                                             settings.vel_fname)
+        else:
+            with open(settings.in_fname, 'r') as f:
+                lines = f.readlines()
+            if settings.in_format == 'pdb':
+                coords, box = ReadPDBCoords(lines, settings.in_fname)
+            elif settings.in_format == 'xyz':
+                coords, box = ReadXYZCoords(lines, settings.in_fname)
+            else:
+                coords, box = ReadRawCoords(lines, settings.in_fname)
+
+        if len(coords) > 0:
+            with open(settings.out_fname, 'wb') as out_file:
+                np.save(out_file, coords)
+        elif os.path.exists(settings.out_fname):
+            os.remove(settings.out_fname)
+        sys.stdout.write('NATOMCRDS=' + str(len(coords)) + '\n')
+        for name, value in box:
+            sys.stdout.write(name + '=' + shlex.quote(value) + '\n')
+
+    except (ValueError, OSError, InputError) as err:
+        sys.stderr.write('\n' + str(err) + '\n')
+        sys.exit(1)
+
+    return
+
+
+if __name__ == '__main__':
+    main()
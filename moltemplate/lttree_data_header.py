@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+
+# Author: Andrew Jewett (jewett.aij at g mail)
+# License: MIT License  (See LICENSE.md)
+# Copyright (c) 2013
+
+man_page_text = """
+Usage (examples):
+
+lttree_data_header.py -count-types ttree_assignments.txt
+
+lttree_data_header.py -types NATOMTYPES NBONDTYPES NANGLETYPES \\
+                             NDIHEDRALTYPES NIMPROPERTYPES \\
+                      [-box MINX MAXX MINY MAXY MINZ MAXZ] \\
+                      [-triclinic XY XZ YZ] \\
+                      [-coords tmp_atom_coords.npy] > system.data
+
+This program is invoked by moltemplate.sh.  It replaces a series of awk
+commands which used to read the same files many times over.
+
+With the "-count-types" argument, it counts the number of atom types,
+bond types, angle types, dihedral types, and improper types (as well as
+the number of atoms) in the ttree_assignments.txt file (in a single pass),
+and prints them in a form which can be evaluated by the shell, for example:
+NATOMTYPES=4
+NBONDTYPES=3
+  :
+NATOMS=780
+
+Otherwise, it counts the number of lines in each of the data sections
+("Data Atoms", "Data Bonds", ...) in the current directory, determines the
+periodic boundary conditions (from the "Data Boundary" file, from the
+-box and -triclinic arguments, or from the extent of the coordinates in the
+file following -coords), and prints the header of the LAMMPS data file
+to the standard output.  (The coordinates are stored in numpy ".npy" format.
+That file is created by lttree_coords.py.)
+
+"""
+
+import sys
+import os
+import re
+import numpy as np
+
+try:
+    from .ttree_lex import InputError
+    from .lttree_styles import data_atoms, data_ellipsoids, data_bonds, \
+        data_angles, data_dihedrals, data_impropers, data_cmap, \
+        data_boundary, data_pbc, data_header
+except (ImportError, SystemError, ValueError):
+    # not installed as a package
+    from ttree_lex import InputError
+    from lttree_styles import data_atoms, data_ellipsoids, data_bonds, \
+        data_angles, data_dihedrals, data_impropers, data_cmap, \
+        data_boundary, data_pbc, data_header
+
+g_program_name = __file__.split('/')[-1]  # = 'lttree_data_header.py'
+g_date_str = '2025-11-16'
+g_version_str = '0.1.0'
+
+
+# The names of the shell variables storing the number of types,
+# and the prefixes of the corresponding lines in ttree_assignments.txt
+type_count_names = [('NATOMTYPES', 'atom'),
+                    ('NBONDTYPES', 'bond'),
+                    ('NANGLETYPES', 'angle'),
+                    ('NDIHEDRALTYPES', 'dihedral'),
+                    ('NIMPROPERTYPES', 'improper')]
+
+
+class DataHeaderSettings(object):
+
+    def __init__(self):
+        self.count_types = False
+        self.ttree_assignments_fname = 'ttree_assignments.txt'
+        self.ntypes = [0 for name, cat in type_count_names]
+        # The box boundaries (strings).  An empty string means "unspecified".
+        self.box = ['0.0', '', '0.0', '', '0.0', '']
+        self.triclinic = False
+        self.tilt = ['0.0', '0.0', '0.0']
+        self.coords_fname = ''
+
+
+def _IsNonEmpty(fname):
+    """ (equivalent to the shell command: [ -s fname ]) """
+    return os.path.isfile(fname) and (os.path.getsize(fname) > 0)
+
+
+def _AwkFields(line):
+    """
+    Split a line into fields the same way awk does (by default).
+    (Only spaces, tabs, and newlines are treated as delimiters.)
+    """
+    return [field for field in re.split('[ \t\n]+', line) if field != '']
+
+
+_re_awk_number = re.compile(r'[ \t\n]*([-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?)')
+
+def AwkNumber(s):
+    """ Convert a string to a number, the way awk does. """
+    try:
+        return float(s)
+    except ValueError:
+        m = _re_awk_number.match(s)
+        if m:
+            return float(m.group(1))
+        return 0.0
+
+
+def AwkNumberStr(x):
+    """
+    Convert a number to a string, the way awk (mawk) prints it:
+    integers are printed as integers, everything else using "%.6g".
+    """
+    if (x == x) and (abs(x) <= 2147483647) and (x == int(x)):
+        return str(int(x))
+    return '%.6g' % x
+
+
+def CountTypes(lines):
+    """
+    Count the number of lines beginning with "@/atom:" or "@{/atom:"
+    (and "@/bond:", "@/angle:", "@/dihedral:", "@/improper:", ...)
+    in the contents of a ttree_assignments.txt file (in a single pass).
+    The number of atoms (lines beginning with "$/atom:" or "${/atom:")
+    is counted at the same time.
+    Returns a list of integers (in the same order as type_count_names),
+    and the number of atoms.
+    """
+    cat2index = dict()
+    for i in range(0, len(type_count_names)):
+        cat2index[type_count_names[i][1]] = i
+    ntypes = [0 for name, cat in type_count_names]
+    natoms = 0
+    for line in lines:
+        if line[:1] != '@':
+            if line.startswith(('$/atom:', '${/atom:')):
+                natoms += 1
+            continue
+        if line[1:3] == '{/':
+            ic = line.find(':', 3)
+            cat = line[3:ic]
+        elif line[1:2] == '/':
+            ic = line.find(':', 2)
+            cat = line[2:ic]
+        else:
+            continue
+        if (ic != -1) and (cat in cat2index):
+            ntypes[cat2index[cat]] += 1
+    return ntypes, natoms
+
+
+def CountLines(fname):
+    """
+    Return the number of lines in a file (including the last line,
+    even if it does not end in a newline character).
+    The file is read in blocks (and not stored in memory).
+    """
+    n = 0
+    last_byte = b'\n'
+    with open(fname, 'rb') as f:
+        while True:
+            block = f.read(1 << 20)
+            if len(block) == 0:
+                break
+            n += block.count(b'\n')
+            last_byte = block[-1:]
+    if last_byte != b'\n':
+        n += 1
+    return n
+
+
+def ReadBoundary(lines):
+    """
+    Read the box boundaries from the contents of a "Data Boundary" file.
+    The file may contain the boundary conditions multiple times.
+    (As always, the most recent setting overrides the earlier settings.)
+    Returns two lists of strings:
+    [xlo, xhi, ylo, yhi, zlo, zhi] and [xy, xz, yz]
+    (Entries which were not found are empty strings.)
+    """
+    box = ['', '', '', '', '', '']
+    tilt = ['', '', '']
+    for line in lines:
+        fields = _AwkFields(line.replace('\r', ''))
+        for d in range(0, 3):
+            if (len(fields) > 2) and (fields[2] == 'xyz'[d] + 'lo'):
+                box[2 * d] = fields[0]
+            if (len(fields) > 3) and (fields[3] == 'xyz'[d] + 'hi'):
+                box[2 * d + 1] = fields[1]
+        # (Carriage-return characters are not discarded in this case.)
+        fields = _AwkFields(line)
+        for d in range(0, 3):
+            if (len(fields) > 3 + d) and (fields[3 + d] == ('xy', 'xz', 'yz')[d]):
+                tilt[d] = fields[d]
+    return box, tilt
+
+
+def CoordExtents(coords):
+    """
+    Return the minimum and maximum x, y, z coordinates from an N x 3 array.
+    The result is a list of 6 numbers: [xmin, xmax, ymin, ymax, zmin, zmax]
+    """
+    if len(coords) == 0:
+        return [0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+    xyz_min = coords.min(axis=0).tolist()
+    xyz_max = coords.max(axis=0).tolist()
+    return [xyz_min[0], xyz_max[0],
+            xyz_min[1], xyz_max[1],
+            xyz_min[2], xyz_max[2]]
+
+
+def WriteDataHeader(settings, out_file):
+    """
+    Print the header of the LAMMPS data file (including the number of atoms,
+    bonds, ..., the number of types, and the periodic boundary conditions).
+    The data section files are read from the current directory.
+    """
+    counts = []
+    for fname, name in [(data_atoms, 'atoms'),
+                        (data_ellipsoids, 'ellipsoids'),
+                        (data_bonds, 'bonds'),
+                        (data_angles, 'angles'),
+                        (data_dihedrals, 'dihedrals'),
+                        (data_impropers, 'impropers'),
+                        (data_cmap, 'crossterms')]:
+        if _IsNonEmpty(fname):
+            n = CountLines(fname)
+        elif name == 'ellipsoids':
+            continue  # (omit this line unless there are ellipsoids)
+        else:
+            n = 0
+        if (name == 'crossterms') and (n == 0):
+            continue
+        counts.append((n, name))
+
+    out_file.write('LAMMPS Description\n\n')
+    for n, name in counts:
+        out_file.write('     ' + str(n) + '  ' + name + '\n')
+    out_file.write('\n')
+    for i in range(0, len(type_count_names)):
+        out_file.write('     ' + str(settings.ntypes[i]) + '  ' +
+                       type_count_names[i][1] + ' types\n')
+    out_file.write('\n')
+
+    if _IsNonEmpty(data_header):
+        with open(data_header, 'r') as f:
+            for line in f:
+                out_file.write(line)
+        out_file.write('\n')
+
+    # --- PERIODIC BOUNDARY CONDITIONS ---
+
+    # Note: If there is a "Data Boundary" file present, it overrides any
+    #       settings which may have been stored in a pdb file or other file.
+
+    box = list(settings.box)
+    triclinic = settings.triclinic
+    tilt = list(settings.tilt)
+
+    if _IsNonEmpty(data_pbc) and not _IsNonEmpty(data_boundary):
+        os.rename(data_pbc, data_boundary)
+        sys.stderr.write('WARNING: write_once(\"' + data_pbc + '\") is depreciated\n'
+                         '     Use write_once(\"' + data_boundary + '\") instead\n')
+
+    if _IsNonEmpty(data_boundary):
+        with open(data_boundary, 'r', newline='\n') as f:
+            box, tilt = ReadBoundary(f)
+        for d in range(0, 3):
+            if (box[2 * d] == '') or (box[2 * d + 1] == ''):
+                out_file.flush()
+                sys.stderr.write('Error: Problem with box boundary format (\"' +
+                                 'xyz'[d] + 'lo ' + 'xyz'[d] + 'hi\") in \"' +
+                                 data_boundary + '\"\n')
+                sys.exit(12)
+        if (tilt[0] != '') or (tilt[1] != '') or (tilt[2] != ''):
+            if (tilt[0] != '') and (tilt[1] != '') and (tilt[2] != ''):
+                triclinic = True
+            else:
+                out_file.flush()
+                sys.stderr.write('Error: Problem with triclinic format (\"xy xz yz\") in \"' +
+                                 data_boundary + '\"\n')
+                sys.exit(13)
+
+    if '' in box:
+        sys.stderr.write('Periodic boundary conditions unspecified. Attempting to generate automatically.\n')
+        # By default, disable triclinic
+        triclinic = False
+        if (settings.coords_fname != '') and _IsNonEmpty(settings.coords_fname):
+            # Estimate the minimimum, maximum x,y,z values
+            # from the coordinate data...
+            minmax = CoordExtents(np.load(settings.coords_fname).astype(float))
+            # ...and add a narrow margin (10%) around the boundaries:
+            margin = 0.1
+            for d in range(0, 3):
+                width = minmax[2 * d + 1] - minmax[2 * d]
+                box[2 * d] = AwkNumberStr(minmax[2 * d] -
+                                           0.5 * margin * width)
+                box[2 * d + 1] = AwkNumberStr(minmax[2 * d + 1] +
+                                               0.5 * margin * width)
+        else:
+            # By default, choose some reasonably large box:
+            box = ['-100.0', '100.0', '-100.0', '100.0', '-100.0', '100.0']
+            # ...and print message scolding the user for being lazy
+            sys.stderr.write(
+                '----------------------------------------------------------------------\n'
+                '---- WARNING: Unable to determine periodic boundary conditions.   ----\n'
+                '----           (A default cube of volume=(200.0)^3 was used.      ----\n'
+                '----               This is probably not what you want!)           ----\n'
+                '---- It is recommended that you specify your periodic boundary    ----\n'
+                '---- by adding a write_once(\"Data Boundary\") command to your .lt file. ----\n'
+                '---- For example:                                                 ----\n'
+                '----                                                              ----\n'
+                '----   write_once(\"Data Boundary\") {                                   ----\n'
+                '----     2.51  46.79 xlo xhi                                      ----\n'
+                '----     -4.38 35.824 ylo yhi                                     ----\n'
+                '----     0.3601 42.95 zlo zhi                                     ----\n'
+                '----   }                                                          ----\n'
+                '----------------------------------------------------------------------\n')
+
+    out_file.write('  ' + box[0] + ' ' + box[1] + ' xlo xhi\n'
+                   '  ' + box[2] + ' ' + box[3] + ' ylo yhi\n'
+                   '  ' + box[4] + ' ' + box[5] + ' zlo zhi\n')
+    if triclinic:
+        # This is a triclinic (non orthoganal) crystal basis.
+        sys.stderr.write('triclinic parameters: XY XZ YZ = ' +
+                         ' '.join(tilt) + '\n\n')
+        out_file.write('  ' + ' '.join(tilt) + ' xy xz yz\n')
+    out_file.write('\n')
+
+
+def DataHeaderParseArgs(argv, settings):
+    i = 1
+    while i < len(argv):
+        if argv[i] == '-count-types':
+            settings.count_types = True
+            if (i + 1 < len(argv)) and (argv[i + 1][:1] != '-'):
+                settings.ttree_assignments_fname = argv[i + 1]
+                del(argv[i:i + 2])
+            else:
+                del(argv[i:i + 1])
+        elif argv[i] == '-types':
+            n = len(type_count_names)
+            if ((i + n >= len(argv)) or
+                (not all([s.isdigit() for s in argv[i + 1:i + 1 + n]]))):
+                raise InputError('Error(' + g_program_name + '): The ' + argv[i] + ' flag should be followed by\n'
+                                 '       ' + str(n) + ' integers (the number of atom types, bond types, ...).\n')
+            settings.ntypes = [int(s) for s in argv[i + 1:i + 1 + n]]
+            del(argv[i:i + 1 + n])
+        elif argv[i] == '-box':
+            if i + 6 >= len(argv):
+                raise InputError('Error(' + g_program_name + '): The ' + argv[i] + ' flag should be followed by 6 arguments:\n'
+                                 '       xlo xhi ylo yhi zlo zhi  (any of which may be empty strings)\n')
+            settings.box = argv[i + 1:i + 7]
+            del(argv[i:i + 7])
+        elif argv[i] == '-triclinic':
+            if i + 3 >= len(argv):
+                raise InputError('Error(' + g_program_name + '): The ' + argv[i] + ' flag should be followed by 3 arguments:\n'
+                                 '       xy xz yz\n')
+            settings.triclinic = True
+            settings.tilt = argv[i + 1:i + 4]
+            del(argv[i:i + 4])
+        elif argv[i] == '-coords':
+            if i + 1 >= len(argv):
+                raise InputError('Error(' + g_program_name + '): The ' + argv[i] + ' flag should be followed by\n'
+                                 '       the name of a file containing atom coordinates (.npy format).\n')
+            settings.coords_fname = argv[i + 1]
+            del(argv[i:i + 2])
+        elif ((argv[i].lower() == '-?') or
+              (argv[i].lower() == '--?') or
+              (argv[i].lower() == '-help') or
+              (argv[i].lower() == '--help')):
+            sys.stdout.write(man_page_text + '\n')
+            sys.exit(0)
+        elif argv[i][0] == '-':
+            raise InputError('Error(' + g_program_name + '):\n'
+                             'Unrecogized command line argument \"' + argv[i] + '\"\n')
+        else:
+            i += 1
+
+    if len(argv) != 1:
+        raise InputError('Error(' + g_program_name + '):\n'
+                         'Unrecogized command line argument \"' + argv[1] + '\"\n')
+
+
+def main():
+    try:
+        settings = DataHeaderSettings()
+        DataHeaderParseArgs([arg for arg in sys.argv], settings)
+        if settings.count_types:
+            ntypes = [0 for name, cat in type_count_names]
+            natoms = 0
+            if os.path.exists(settings.ttree_assignments_fname):
+                with open(settings.ttree_assignments_fname, 'r') as f:
+                    ntypes, natoms = CountTypes(f)
+            for i in range(0, len(type_count_names)):
+                sys.stdout.write(type_count_names[i][0] + '=' +
+                                 str(ntypes[i]) + '\n')
+            sys.stdout.write('NATOMS=' + str(natoms) + '\n')
+        else:
+            WriteDataHeader(settings, sys.stdout)
+
+    except (ValueError, InputError) as err:
+        sys.stderr.write('\n' + str(err) + '\n')
+        sys.exit(4)
+
+    return
+
+
+if __name__ == '__main__':
+    main()
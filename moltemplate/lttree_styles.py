@@ -41,6 +41,7 @@ data_bonds_by_type = "Data Bonds By Type"
 data_angles_by_type = "Data Angles By Type"
 data_dihedrals_by_type = "Data Dihedrals By Type"
 data_impropers_by_type = "Data Impropers By Type"
+data_charge_by_bond = "Data Charge By Bond"
 
 # class2 data sections
 data_bondbond_coeffs = "Data BondBond Coeffs"
@@ -61,6 +62,8 @@ data_triangles = "Data Triangles"
 data_boundary = "Data Boundary"
 # (for backward compatibility), an older version of this file was named:
 data_pbc = "Data PBC"
+# text which should be copied verbatim into the header of the data file
+data_header = "Data Header"
 
 data_file_header_names = set(['LAMMPS Description',
                               'Atoms', 'Masses', 'Velocities',
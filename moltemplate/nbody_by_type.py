@@ -167,29 +167,23 @@ else:
 
 try:
     from .extract_lammps_data import *
-    from .nbody_by_type_lib import GenInteractions_str
+    from .nbody_by_type_lib import GenInteractions_graph, SystemGraph
     from .ttree_lex import *
     from .lttree_styles import AtomStyle2ColNames, ColNames2AidAtypeMolid
 except (ImportError, SystemError, ValueError):
     from extract_lammps_data import *
-    from nbody_by_type_lib import GenInteractions_str
+    from nbody_by_type_lib import GenInteractions_graph, SystemGraph
     from ttree_lex import *
     from lttree_styles import AtomStyle2ColNames, ColNames2AidAtypeMolid
 
 
 
-def GenInteractions_lines(lines_atoms,
-                          lines_bonds,
-                          lines_nbody,
-                          lines_nbodybytype,
-                          atom_style,
-                          g_bond_pattern,
-                          canonical_order,  # function to sort atoms and bonds
-                          prefix='',
-                          suffix='',
-                          report_progress=False,
-                          check_undefined=False):
-
+def ReadSystemGraph(lines_atoms, lines_bonds, atom_style):
+    """
+    Read the "Atoms" and "Bonds" sections (lists of lines of text) and
+    convert them into a SystemGraph object (which can be passed to
+    GenInteractions_lines(), once for each type of interaction).
+    """
     column_names = AtomStyle2ColNames(atom_style)
     i_atomid, i_atomtype, i_molid = ColNames2AidAtypeMolid(column_names)
 
@@ -228,6 +222,34 @@ def GenInteractions_lines(lines_atoms,
             bond_pairs.append((EscCharStrToChar(tokens[2]),
                                EscCharStrToChar(tokens[3])))
 
+    return SystemGraph(bond_pairs,
+                       atomids_str,
+                       atomtypes_str,
+                       bondids_str,
+                       bondtypes_str)
+
+
+
+def GenInteractions_lines(lines_atoms,
+                          lines_bonds,
+                          lines_nbody,
+                          lines_nbodybytype,
+                          atom_style,
+                          g_bond_pattern,
+                          canonical_order,  # function to sort atoms and bonds
+                          prefix='',
+                          suffix='',
+                          report_progress=False,
+                          check_undefined=False,
+                          system_graph=None,
+                          nprocs=1):  # number of processes used for matching
+
+    # If the caller has not already done so, convert the atoms and bonds
+    # into a graph.  (If "system_graph" is supplied, then the "lines_atoms"
+    # and "lines_bonds" arguments are ignored.)
+    if system_graph is None:
+        system_graph = ReadSystemGraph(lines_atoms, lines_bonds, atom_style)
+
     typepattern_to_coefftypes = []
 
     for i in range(0, len(lines_nbodybytype)):
@@ -266,16 +288,13 @@ def GenInteractions_lines(lines_atoms,
 
             typepattern_to_coefftypes.append([typepattern, coefftype])
 
-    coefftype_to_atomids_str = GenInteractions_str(bond_pairs,
-                                                   g_bond_pattern,
-                                                   typepattern_to_coefftypes,
-                                                   canonical_order,
-                                                   atomids_str,
-                                                   atomtypes_str,
-                                                   bondids_str,
-                                                   bondtypes_str,
-                                                   report_progress,
-                                                   check_undefined)
+    coefftype_to_atomids_str = GenInteractions_graph(system_graph,
+                                                     g_bond_pattern,
+                                                     typepattern_to_coefftypes,
+                                                     canonical_order,
+                                                     report_progress,
+                                                     check_undefined,
+                                                     nprocs)
     lines_nbody_new = []
     for coefftype, atomids_list in coefftype_to_atomids_str.items():
         for atomids_found in atomids_list:
@@ -287,6 +306,44 @@ def GenInteractions_lines(lines_atoms,
     return lines_nbody_new
 
 
+def LoadBondPattern(src_bond_pattern):
+    """
+    Import the python module (eg. "nbody_Angles.py", or one of the files in
+    the "nbody_alt_symmetry/" directory) which defines the bond_pattern graph
+    and canonical_order() function for a given type of interaction.
+    """
+    # If the file name ends in ".py", then strip off this suffix.
+    pc = src_bond_pattern.rfind('.py')
+    if pc != -1:
+        src_bond_pattern = src_bond_pattern[0:pc]
+
+    # search locations
+    package_opts = [[src_bond_pattern, __package__],
+                    ['nbody_alt_symmetry.'+src_bond_pattern, __package__]]
+
+    if __package__:
+        for i in range(0, len(package_opts)):
+            package_opts[i][0] = '.' + package_opts[i][0]
+        package_opts.append(['.'+src_bond_pattern, __package__+'.nbody_alt_symmetry'])
+
+
+    g = None
+    for name, pkg in package_opts:
+        try:
+            g = importlib.import_module(name, pkg)
+            break
+        except (ImportError, SystemError, ValueError):
+            pass
+
+    if g is None:
+        raise InputError('Error: Unable to locate file \"' +
+                         src_bond_pattern + '.py\"\n'
+                         '       (Did you mispell the file name?\n'
+                         '        Check the \"nbody_alt_symmetry/\" directory.)\n')
+
+    return g
+
+
 def GenInteractions_files(lines_data,
                           src_bond_pattern,
                           fname_atoms,
@@ -358,30 +415,7 @@ def GenInteractions_files(lines_data,
                              if((len(line.strip()) > 0)and(line.strip()[0] != '#'))]
         f.close()
 
-    # search locations
-    package_opts = [[src_bond_pattern, __package__],
-                    ['nbody_alt_symmetry.'+src_bond_pattern, __package__]]
-
-    if __package__:
-        for i in range(0, len(package_opts)):
-            package_opts[i][0] = '.' + package_opts[i][0]
-        package_opts.append(['.'+src_bond_pattern, __package__+'.nbody_alt_symmetry'])
-
-
-    g = None
-    for name, pkg in package_opts:
-        try:
-            g = importlib.import_module(name, pkg)
-            break
-        except (ImportError, SystemError, ValueError):
-            pass
-
-    if g is None:
-        sys.stderr.write('Error: Unable to locate file \"' +
-                         src_bond_pattern + '.py\"\n'
-                         '       (Did you mispell the file name?\n'
-                         '        Check the \"nbody_alt_symmetry/\" directory.)\n')
-        sys.exit(-1)
+    g = LoadBondPattern(src_bond_pattern)
 
     return GenInteractions_lines(lines_atoms,
                                  lines_bonds,
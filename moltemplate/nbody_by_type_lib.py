@@ -8,6 +8,7 @@
 
 
 import sys
+import multiprocessing
 from collections import defaultdict
 
 
@@ -29,15 +30,248 @@ from collections import defaultdict
 
 try:
     from .nbody_graph_search import Ugraph, GraphMatcher
-    from .ttree_lex import MatchesPattern, MatchesAll, InputError
+    from .ttree_lex import MatchesPattern, MatchesAll, HasWildcard, InputError
 except (ImportError, SystemError, ValueError):
     # not installed as a package
     from nbody_graph_search import Ugraph, GraphMatcher
-    from ttree_lex import MatchesPattern, MatchesAll, InputError
+    from ttree_lex import MatchesPattern, MatchesAll, HasWildcard, InputError
 
 #import gc
 
 
+class PatternIndex(object):
+    """
+    PatternIndex quickly finds which combinations of atom and bond types
+    (from a list of "atombondtypes" tuples) match a given typepattern.
+    The result is the same as invoking MatchesAll() on every entry in the list.
+
+    Each element of a typepattern (a string, a string containing wildcards,
+    or a compiled regular expression) is only compared with the atom types
+    (or bond types) which are actually present (once), and the result is
+    stored.  Exact strings are looked up in a dictionary.  The entries
+    in the list are indexed by the type of their first atom.
+
+    """
+
+    def __init__(self,
+                 atombondtypes_list,
+                 num_verts,
+                 atomtypes_int2str,
+                 bondtypes_int2str):
+        self.num_verts = num_verts
+        self.int2str = (atomtypes_int2str, bondtypes_int2str)
+        self.types_list = []
+        present = (set([]), set([]))
+        for atombondtypes in atombondtypes_list:
+            self.types_list.append(tuple(atombondtypes[0]) +
+                                   tuple(atombondtypes[1]))
+            present[0].update(atombondtypes[0])
+            present[1].update(atombondtypes[1])
+        self.present = (sorted(present[0]), sorted(present[1]))
+        self.str2ints = ({}, {})
+        for is_bond in (0, 1):
+            for t in self.present[is_bond]:
+                type_str = self.int2str[is_bond][t]
+                if type_str in self.str2ints[is_bond]:
+                    self.str2ints[is_bond][type_str].append(t)
+                else:
+                    self.str2ints[is_bond][type_str] = [t]
+        # self.matching[is_bond][pattern] = the set of (present) types
+        #                                   which match that pattern
+        self.matching = ({}, {})
+        self.by_first_type = {}
+        for i in range(0, len(self.types_list)):
+            t = self.types_list[i][0]
+            if t in self.by_first_type:
+                self.by_first_type[t].append(i)
+            else:
+                self.by_first_type[t] = [i]
+
+    def MatchingTypes(self, pattern, is_bond):
+        """
+        Return the set of atom types (or bond types, if is_bond)
+        present in the system which match this element of a typepattern.
+        """
+        matching = self.matching[is_bond]
+        types = matching.get(pattern)
+        if types is None:
+            if (type(pattern) is str) and (not HasWildcard(pattern)):
+                types = frozenset(self.str2ints[is_bond].get(pattern, []))
+            else:
+                int2str = self.int2str[is_bond]
+                types = frozenset([t for t in self.present[is_bond]
+                                   if MatchesPattern(int2str[t], pattern)])
+            matching[pattern] = types
+        return types
+
+    def MayMatch(self, typepattern):
+        """
+        Return True if every atom (and bond) in the typepattern is matched by
+        at least one of the atom (or bond) types present in the system.
+        """
+        for i in range(0, len(typepattern)):
+            if not self.MatchingTypes(typepattern[i], i >= self.num_verts):
+                return False
+        return True
+
+    def Lookup(self, typepattern):
+        """
+        Return the (sorted) indices of the entries in "atombondtypes_list"
+        which match typepattern.
+        """
+        allowed = []
+        for i in range(0, len(typepattern)):
+            types = self.MatchingTypes(typepattern[i], i >= self.num_verts)
+            if not types:
+                return []
+            allowed.append(types)
+        candidates = []
+        for t in allowed[0]:
+            candidates += self.by_first_type.get(t, [])
+        candidates.sort()
+        matches = []
+        for i in candidates:
+            types = self.types_list[i]
+            assert(len(types) == len(allowed))
+            for k in range(1, len(allowed)):
+                if types[k] not in allowed[k]:
+                    break
+            else:
+                matches.append(i)
+        return matches
+
+
+
+def _MatchComponent(task):
+    """
+    Search for g_bond_pattern in a single connected component of a graph.
+    The component is described by its number of vertices, and a list of
+    (undirected) edges connecting them (in the order they should be added).
+    Returns a list of lists of matches.  The matches in the list with index
+    iv are the ones beginning at vertex iv (in the order GraphMatcher found
+    them).  (This function is invoked by MatchesByComponent().)
+    """
+    g_bond_pattern, nv, edges = task
+    G = Ugraph()
+    for iv in range(0, nv):
+        G.AddVertex(iv)
+    for iv, jv in edges:
+        G.AddEdge(iv, jv)
+    matches = [[] for iv in range(0, nv)]
+    for atombondids in GraphMatcher(G, g_bond_pattern).Matches():
+        matches[atombondids[0][0]].append(atombondids)
+    return matches
+
+
+
+def MatchesByComponent(G_system, g_bond_pattern, nprocs=1):
+    """
+    Iterator over all matches between G_system and g_bond_pattern.
+    The matches (and the order they are visited) are identical to
+    GraphMatcher(G_system, g_bond_pattern).Matches().  However, since
+    g_bond_pattern is connected, each match lies inside one of the connected
+    components of G_system (eg. a molecule).  Each component is searched
+    separately.  Most of the components in a large system are copies of a
+    few different molecules.  Components whose vertices (and edges) are
+    connected in the same way are only searched once, and the result is
+    reused for the others (after translating the vertex and edge indices).
+    If nprocs > 1, the components are searched in parallel using
+    a pool of nprocs processes.
+    """
+    # This approach assumes the neighbors of each vertex are listed in the
+    # order the edges were added to G_system (which is what AddEdge() does).
+    # If not, then search the entire graph instead.
+    in_order = (type(G_system) is Ugraph)
+    if in_order:
+        ied_to_ieu = G_system.ied_to_ieu
+        for Iv in range(0, G_system.GetNumVerts()):
+            neighbors = G_system.neighbors[Iv]
+            for k in range(1, len(neighbors)):
+                if ied_to_ieu[neighbors[k - 1]] >= ied_to_ieu[neighbors[k]]:
+                    in_order = False
+                    break
+            if not in_order:
+                break
+    if not in_order:
+        for atombondids in GraphMatcher(G_system, g_bond_pattern).Matches():
+            yield atombondids
+        return
+
+    # Find the connected components of G_system.  The vertices in each
+    # component are listed in increasing order.  Their position in this
+    # list (iv_local) is their index within the component.
+    nv = G_system.GetNumVerts()
+    G_edges = G_system.edges
+    Iv_to_comp = [-1] * nv
+    Iv_to_iv_local = [-1] * nv
+    comp_verts = []
+    for Iv in range(0, nv):
+        if Iv_to_comp[Iv] != -1:
+            continue
+        ic = len(comp_verts)
+        Iv_to_comp[Iv] = ic
+        verts = [Iv]
+        k = 0
+        while k < len(verts):
+            for Je in G_system.neighbors[verts[k]]:
+                Jv = G_edges[Je].stop
+                if Iv_to_comp[Jv] == -1:
+                    Iv_to_comp[Jv] = ic
+                    verts.append(Jv)
+            k += 1
+        verts.sort()
+        for iv_local in range(0, len(verts)):
+            Iv_to_iv_local[verts[iv_local]] = iv_local
+        comp_verts.append(verts)
+
+    # Now sort the (undirected) edges by component (preserving their order)
+    comp_edges = [[] for ic in range(0, len(comp_verts))]
+    comp_edges_local = [[] for ic in range(0, len(comp_verts))]
+    for Ie in range(0, G_system.GetNumEdges()):
+        edge = G_system.GetEdge(Ie)
+        ic = Iv_to_comp[edge.start]
+        comp_edges[ic].append(Ie)
+        comp_edges_local[ic].append((Iv_to_iv_local[edge.start],
+                                     Iv_to_iv_local[edge.stop]))
+
+    # Identical components share the same entry in "tasks"
+    tasks = []
+    shape_to_itask = {}
+    comp_to_itask = []
+    for ic in range(0, len(comp_verts)):
+        shape = (len(comp_verts[ic]), tuple(comp_edges_local[ic]))
+        itask = shape_to_itask.get(shape)
+        if itask is None:
+            itask = len(tasks)
+            shape_to_itask[shape] = itask
+            tasks.append((g_bond_pattern, shape[0], shape[1]))
+        comp_to_itask.append(itask)
+    del shape_to_itask
+    del comp_edges_local
+
+    if (nprocs > 1) and (len(tasks) > 1):
+        pool = multiprocessing.Pool(min(nprocs, len(tasks)))
+        try:
+            results = pool.map(_MatchComponent, tasks,
+                               max(1, len(tasks) // (4 * nprocs)))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_MatchComponent(task) for task in tasks]
+
+    # Report the matches in the same order that GraphMatcher would have
+    # (ordered by their first vertex).
+    for Iv in range(0, nv):
+        ic = Iv_to_comp[Iv]
+        verts = comp_verts[ic]
+        edges = comp_edges[ic]
+        for atombondids in results[comp_to_itask[ic]][Iv_to_iv_local[Iv]]:
+            yield (tuple([verts[iv] for iv in atombondids[0]]),
+                   tuple([edges[ie] for ie in atombondids[1]]))
+
+
+
 def GenInteractions_int(G_system,
                         g_bond_pattern,
                         typepattern_to_coefftypes,
@@ -45,7 +279,8 @@ def GenInteractions_int(G_system,
                         atomtypes_int2str,
                         bondtypes_int2str,
                         report_progress=False,  # print messages to sys.stderr?
-                        check_undefined_atomids_str = None):
+                        check_undefined_atomids_str = None,
+                        nprocs=1):  # number of processes used for matching
     """
     GenInteractions() automatically determines a list of interactions
     present in a system of bonded atoms (argument "G_system"),
@@ -125,11 +360,9 @@ def GenInteractions_int(G_system,
     # atom and bond types and store all of the non-redundant ones in
     # the "interactions_by_type" variable.
 
-    gm = GraphMatcher(G_system, g_bond_pattern)
-
     interactions_by_type = defaultdict(list)
 
-    for atombondids in gm.Matches():
+    for atombondids in MatchesByComponent(G_system, g_bond_pattern, nprocs):
         # "atombondids" is a tuple.
         #  atombondids[0] has atomIDs from G_system corresponding to g_bond_pattern
         #     (These atomID numbers are indices into the G_system.verts[] list.)
@@ -190,24 +423,6 @@ def GenInteractions_int(G_system,
     coefftype_to_atomids = OrderedDict()
     abids_to_coefftypes = OrderedDict()
 
-    # -------------------- reporting progress -----------------------
-    if report_progress:
-        # The next interval of code is not technically necessary, but it makes
-        # the printed output easier to read by excluding irrelevant interactions
-        # Now, test each match to see if the atoms and bonds involved match
-        # any of the type-patterns in the "typepattern_to_coefftypes" argument.
-
-        types_atoms_all_str = set([])
-        types_bonds_all_str = set([])
-        for typepattern, coefftype in typepattern_to_coefftypes:
-            for atombondtypes, abidslist in interactions_by_type.items():
-                for Iv in atombondtypes[0]:
-                    types_atoms_all_str.add(atomtypes_int2str[Iv])
-                for Ie in atombondtypes[1]:
-                    types_bonds_all_str.add(bondtypes_int2str[Ie])
-    # ------------------ reporting progress (end) -------------------
-
-
     # ------------------ check to make sure all interactions are defined ------
     if check_undefined_atomids_str:
         # Checking for missing interactions is a headache.
@@ -255,6 +470,19 @@ def GenInteractions_int(G_system,
     # ------------------ check to make sure all interactions are defined (end)
 
 
+    # Force fields typically define many thousands of typepatterns, but only
+    # a few of the atom types (and bond types) they refer to are present in
+    # the system.  Rather than comparing every typepattern with every
+    # entry in interactions_by_type, we use a PatternIndex to find out which
+    # entries match each typepattern.  (The results are the same, and they
+    # are visited in the same order, so the "last match wins" later on.)
+
+    pattern_index = PatternIndex(interactions_by_type.keys(),
+                                 g_bond_pattern.GetNumVerts(),
+                                 atomtypes_int2str,
+                                 bondtypes_int2str)
+    abidslists = list(interactions_by_type.values())
+
     count = 0
 
     for typepattern, coefftype in typepattern_to_coefftypes:
@@ -270,30 +498,7 @@ def GenInteractions_int(G_system,
             # are (potentially) satisfied by any of the atoms present in the system.
             # If any of the required atoms for this typepattern are not present
             # in this system, then skip to the next typepattern.
-            atoms_available_Iv = [False for Iv in range(
-                0, g_bond_pattern.GetNumVerts())]
-            for Iv in range(0, g_bond_pattern.GetNumVerts()):
-                for type_atom_str in types_atoms_all_str:
-                    if MatchesPattern(type_atom_str, typepattern[Iv]):
-                        atoms_available_Iv[Iv] = True
-            atoms_available = True
-            for Iv in range(0, g_bond_pattern.GetNumVerts()):
-                if not atoms_available_Iv[Iv]:
-                    atoms_available = False
-
-            bonds_available_Ie = [False for Ie in range(
-                0, g_bond_pattern.GetNumEdges())]
-            for Ie in range(0, g_bond_pattern.GetNumEdges()):
-                for type_bond_str in types_bonds_all_str:
-                    if MatchesPattern(type_bond_str,
-                                      typepattern[g_bond_pattern.GetNumVerts() + Ie]):
-                        bonds_available_Ie[Ie] = True
-            bonds_available = True
-            for Ie in range(0, g_bond_pattern.GetNumEdges()):
-                if not bonds_available_Ie[Ie]:
-                    bonds_available = False
-
-            if atoms_available and bonds_available:
+            if pattern_index.MayMatch(typepattern):
 
                 # Explanation:
                 # (Again) only if ALL of the atoms and bond requirements for
@@ -310,47 +515,42 @@ def GenInteractions_int(G_system,
 
         # ------------------ reporting progress (end) -------------------
 
-        for atombondtypes, abidslist in interactions_by_type.items():
-            # express atom & bond types in a tuple of the original string
-            # format
-            types_atoms = [atomtypes_int2str[Iv] for Iv in atombondtypes[0]]
-            types_bonds = [bondtypes_int2str[Ie] for Ie in atombondtypes[1]]
-            type_strings = types_atoms + types_bonds
-
-            # use string comparisons to check for a match with typepattern
-            if MatchesAll(type_strings, typepattern):  # <-see "ttree_lex.py"
-                for abids in abidslist:
-                    # Re-order the atoms (and bonds) in a "canonical" way.
-                    # Only add new interactions to the list after re-ordering
-                    # them and checking that they have not been added earlier.
-                    # (...well not when using the same coefftype at least.
-                    #  This prevents the same triplet of atoms from
-                    #  being used to calculate the bond-angle twice:
-                    #  once for 1-2-3 and 3-2-1, for example.)
-                    abids = canonical_order(abids)
-                    redundant = False
+        # Find the entries in interactions_by_type whose atom & bond types
+        # match typepattern (equivalent to invoking MatchesAll() on each)
+        for i in pattern_index.Lookup(typepattern):
+            abidslist = abidslists[i]
+            for abids in abidslist:
+                # Re-order the atoms (and bonds) in a "canonical" way.
+                # Only add new interactions to the list after re-ordering
+                # them and checking that they have not been added earlier.
+                # (...well not when using the same coefftype at least.
+                #  This prevents the same triplet of atoms from
+                #  being used to calculate the bond-angle twice:
+                #  once for 1-2-3 and 3-2-1, for example.)
+                abids = canonical_order(abids)
+                redundant = False
+                if abids in abids_to_coefftypes:
+                    coefftypes = abids_to_coefftypes[abids]
+                    if coefftype in coefftypes:
+                        redundant = True
+
+                if check_undefined_atomids_str:
+                    atomids_int = tuple(abids[0])
+                    atomids_matched[atomids_int] = True
+
+                if not redundant:
+
+                    # (It's too bad python does not
+                    #  have an Ordered defaultdict)
+                    if coefftype in coefftype_to_atomids:
+                        coefftype_to_atomids[coefftype].append(abids[0])
+                    else:
+                        coefftype_to_atomids[coefftype] = [abids[0]]
                     if abids in abids_to_coefftypes:
-                        coefftypes = abids_to_coefftypes[abids]
-                        if coefftype in coefftypes:
-                            redundant = True
-                   
-                    if check_undefined_atomids_str:
-                        atomids_int = tuple(abids[0])
-                        atomids_matched[atomids_int] = True
-
-                    if not redundant:                       
-                        
-                        # (It's too bad python does not
-                        #  have an Ordered defaultdict)
-                        if coefftype in coefftype_to_atomids:
-                            coefftype_to_atomids[coefftype].append(abids[0])
-                        else:
-                            coefftype_to_atomids[coefftype] = [abids[0]]
-                        if abids in abids_to_coefftypes:
-                            abids_to_coefftypes[abids].append(coefftype)
-                        else:
-                            abids_to_coefftypes[abids] = [coefftype]
-                        count += 1
+                        abids_to_coefftypes[abids].append(coefftype)
+                    else:
+                        abids_to_coefftypes[abids] = [coefftype]
+                    count += 1
 
     if report_progress:
         sys.stderr.write('  (found ' +
@@ -380,79 +580,106 @@ def GenInteractions_int(G_system,
 
 
 
-def GenInteractions_str(bond_pairs,
-                        g_bond_pattern,
-                        typepattern_to_coefftypes,
-                        canonical_order,  # function to sort atoms and bonds
-                        atomids_str,
-                        atomtypes_str,
-                        bondids_str,
-                        bondtypes_str,
-                        report_progress=False,  # print messages to sys.stderr?
-                        check_undefined=False):
-
-    assert(len(atomids_str) == len(atomtypes_str))
-    assert(len(bondids_str) == len(bondtypes_str))
-    # The atomids and atomtypes and bondtypes are strings.
-    # First we assign a unique integer id to each string.
-
-    atomids_str2int = {}
-    atomtypes_str2int = {}
-    atomtypes_int2str = []
-    atomtype_int = 0
-    for i in range(0, len(atomids_str)):
-        if atomids_str[i] in atomids_str2int:
-            raise InputError('Error: multiple atoms have the same id (' +
-                             str(atomids_str[i]) + ')')
-        atomids_str2int[atomids_str[i]] = i
-        #atomtypes_int = len(atomtypes_int)+1
-        if (not (atomtypes_str[i] in atomtypes_str2int)):
-            atomtypes_str2int[atomtypes_str[i]] = atomtype_int
-            atomtypes_int2str.append(atomtypes_str[i])
-            atomtype_int += 1
-        # atomtypes_int.append(atomtype_int)
-
-    bondids_str2int = {}
-    bondtypes_str2int = {}
-    bondtypes_int2str = []
-    bondtype_int = 0
-    for i in range(0, len(bondids_str)):
-        if bondids_str[i] in bondids_str2int:
-            raise InputError('Error: multiple bonds have the same id (' +
-                             str(bondids_str[i]) + ')')
-        bondids_str2int[bondids_str[i]] = i
-        #bondtype_int = len(bondtypes_int)+1
-        if (not (bondtypes_str[i] in bondtypes_str2int)):
-            bondtypes_str2int[bondtypes_str[i]] = bondtype_int
-            bondtypes_int2str.append(bondtypes_str[i])
-            bondtype_int += 1
-
-    # Now convert "bond_pairs" into the UGraph format
-    G_system = Ugraph()
-    for iv in range(0, len(atomtypes_str)):
-        G_system.AddVertex(iv, atomtypes_str2int[atomtypes_str[iv]])
-
-    for ie in range(0, len(bond_pairs)):
-        atomid1_str = bond_pairs[ie][0]
-        atomid2_str = bond_pairs[ie][1]
-        if (atomid1_str not in atomids_str2int):
-            raise InputError('Error in Bonds Section:\n'
-                             '  ' + atomid1_str + ' is not defined in Atoms section\n')
-        if (atomid2_str not in atomids_str2int):
-            raise InputError('Error in Bonds Section:\n'
-                             '  ' + atomid2_str + ' is not defined in Atoms section\n')
-        G_system.AddEdge(atomids_str2int[atomid1_str],
-                         atomids_str2int[atomid2_str],
-                         bondtypes_str2int[bondtypes_str[ie]])
-
-    coefftype_to_atomids_int = GenInteractions_int(G_system,
+class SystemGraph(object):
+    """
+    SystemGraph stores the atoms and bonds in a system in "Ugraph" format
+    (see GenInteractions_int()), along with the strings which are used to
+    identify the atom ids, atom types, and bond types.  Building this graph
+    takes time, so the same SystemGraph can be used by GenInteractions_graph()
+    to search for several different bond patterns (eg. angles, dihedrals,
+    and impropers) in the same system.
+
+    """
+
+    def __init__(self,
+                 bond_pairs,
+                 atomids_str,
+                 atomtypes_str,
+                 bondids_str,
+                 bondtypes_str):
+        assert(len(atomids_str) == len(atomtypes_str))
+        assert(len(bondids_str) == len(bondtypes_str))
+        # The atomids and atomtypes and bondtypes are strings.
+        # First we assign a unique integer id to each string.
+
+        atomids_str2int = {}
+        atomtypes_str2int = {}
+        atomtypes_int2str = []
+        atomtype_int = 0
+        for i in range(0, len(atomids_str)):
+            if atomids_str[i] in atomids_str2int:
+                raise InputError('Error: multiple atoms have the same id (' +
+                                 str(atomids_str[i]) + ')')
+            atomids_str2int[atomids_str[i]] = i
+            #atomtypes_int = len(atomtypes_int)+1
+            if (not (atomtypes_str[i] in atomtypes_str2int)):
+                atomtypes_str2int[atomtypes_str[i]] = atomtype_int
+                atomtypes_int2str.append(atomtypes_str[i])
+                atomtype_int += 1
+            # atomtypes_int.append(atomtype_int)
+
+        bondids_str2int = {}
+        bondtypes_str2int = {}
+        bondtypes_int2str = []
+        bondtype_int = 0
+        for i in range(0, len(bondids_str)):
+            if bondids_str[i] in bondids_str2int:
+                raise InputError('Error: multiple bonds have the same id (' +
+                                 str(bondids_str[i]) + ')')
+            bondids_str2int[bondids_str[i]] = i
+            #bondtype_int = len(bondtypes_int)+1
+            if (not (bondtypes_str[i] in bondtypes_str2int)):
+                bondtypes_str2int[bondtypes_str[i]] = bondtype_int
+                bondtypes_int2str.append(bondtypes_str[i])
+                bondtype_int += 1
+
+        # Now convert "bond_pairs" into the UGraph format
+        G_system = Ugraph()
+        for iv in range(0, len(atomtypes_str)):
+            G_system.AddVertex(iv, atomtypes_str2int[atomtypes_str[iv]])
+
+        for ie in range(0, len(bond_pairs)):
+            atomid1_str = bond_pairs[ie][0]
+            atomid2_str = bond_pairs[ie][1]
+            if (atomid1_str not in atomids_str2int):
+                raise InputError('Error in Bonds Section:\n'
+                                 '  ' + atomid1_str + ' is not defined in Atoms section\n')
+            if (atomid2_str not in atomids_str2int):
+                raise InputError('Error in Bonds Section:\n'
+                                 '  ' + atomid2_str + ' is not defined in Atoms section\n')
+            G_system.AddEdge(atomids_str2int[atomid1_str],
+                             atomids_str2int[atomid2_str],
+                             bondtypes_str2int[bondtypes_str[ie]])
+
+        self.G = G_system
+        self.atomids_str = atomids_str
+        self.atomtypes_int2str = atomtypes_int2str
+        self.bondtypes_int2str = bondtypes_int2str
+
+
+
+def GenInteractions_graph(system_graph,
+                          g_bond_pattern,
+                          typepattern_to_coefftypes,
+                          canonical_order,  # function to sort atoms and bonds
+                          report_progress=False,  # print messages to sys.stderr?
+                          check_undefined=False,
+                          nprocs=1):  # number of processes used for matching
+    """
+    Equivalent to GenInteractions_str(), except that the atoms and bonds
+    have already been converted into a graph (a SystemGraph object).
+    """
+    atomids_str = system_graph.atomids_str
+
+    coefftype_to_atomids_int = GenInteractions_int(system_graph.G,
                                                    g_bond_pattern,
                                                    typepattern_to_coefftypes,
                                                    canonical_order,
-                                                   atomtypes_int2str,
-                                                   bondtypes_int2str,
+                                                   system_graph.atomtypes_int2str,
+                                                   system_graph.bondtypes_int2str,
                                                    report_progress,
-                                                   (atomids_str if check_undefined else None))
+                                                   (atomids_str if check_undefined else None),
+                                                   nprocs)
 
     coefftype_to_atomids_str = OrderedDict()
     for coefftype, atomidss_int in coefftype_to_atomids_int.items():
@@ -469,3 +696,31 @@ def GenInteractions_str(bond_pairs,
         # gc.collect()
 
     return coefftype_to_atomids_str
+
+
+
+def GenInteractions_str(bond_pairs,
+                        g_bond_pattern,
+                        typepattern_to_coefftypes,
+                        canonical_order,  # function to sort atoms and bonds
+                        atomids_str,
+                        atomtypes_str,
+                        bondids_str,
+                        bondtypes_str,
+                        report_progress=False,  # print messages to sys.stderr?
+                        check_undefined=False,
+                        nprocs=1):  # number of processes used for matching
+
+    system_graph = SystemGraph(bond_pairs,
+                               atomids_str,
+                               atomtypes_str,
+                               bondids_str,
+                               bondtypes_str)
+
+    return GenInteractions_graph(system_graph,
+                                 g_bond_pattern,
+                                 typepattern_to_coefftypes,
+                                 canonical_order,
+                                 report_progress,
+                                 check_undefined,
+                                 nprocs)
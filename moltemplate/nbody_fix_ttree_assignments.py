@@ -57,6 +57,93 @@ except (ImportError, SystemError, ValueError):
 g_program_name = __file__.split('/')[-1]
 
 
+def FixTtreeAssignments(cat_name, lines_generated, lines_bindings):
+    """
+    Insert the variable names from the first column of "lines_generated"
+    into the appropriate place in "lines_bindings" (the lines of text from
+    a ttree_assignments.txt file), renumbering the pre-existing variables in
+    the same category so that they follow the new ones.
+    Returns a list containing the new lines of text.
+    """
+    lines_new = []
+
+    # Figure out which lines in the 'ttree_assignments.txt' file
+    # contain the variables of the type you are looking for.
+    # Make note of the relevant line numbers
+    i_preexisting_begin = -1
+    i_preexisting_end = -1
+    in_section = False
+    possible_cat_names = set(
+        ['$' + cat_name, '$/' + cat_name, '${' + cat_name, '${/' + cat_name])
+
+    preexisting_interaction_list = []
+    for i in range(0, len(lines_bindings)):
+        line = lines_bindings[i].strip()
+        tokens = SplitQuotedString(line)  # strip comments, handle quotes
+        if len(tokens) == 2:
+            before_colon = tokens[0].split(':')[0]
+            if before_colon in possible_cat_names:
+                if i_preexisting_begin == -1:
+                    i_preexisting_begin = i
+                    in_section = True
+            else:
+                if in_section:
+                    i_preexisting_end = i
+                in_section = False
+
+    if i_preexisting_end == -1:
+        i_preexisting_end = len(lines_bindings)
+
+    if i_preexisting_begin == -1:
+        lines_new += lines_bindings
+    else:
+        # write out all the lines in the original file up until the point where
+        # the variables in the category we are looking for were encountered
+        lines_new += lines_bindings[:i_preexisting_begin]
+
+    sys.stderr.write('  (adding new lines)\n')
+
+    # Now add some new lines (2-column format).
+    # As with any ttree_assignment.txt file:
+    #   The first column has our generated variable names
+    #   The second column has the counter assigned to that variable
+    new_counter = 1
+    for line_orig in lines_generated:
+        line = line_orig.strip()
+        if len(line) > 0:
+            tokens = SplitQuotedString(line)  # strip comments, handle quotes
+            lines_new.append(tokens[0] + '  ' + str(new_counter) + '\n')
+            new_counter += 1
+
+    sys.stderr.write('  (adding pre-exisiting lines)\n')
+
+    if i_preexisting_begin != -1:
+        # Append the original pre-existing interactions of that type, but assign
+        # them to higher numbers.  (Hopefully this helps to make sure that these
+        # assignments will override any of the automatic/generated assignments.)
+        # As with any ttree_assignment.txt file:
+        #   The first column has our generated variable names
+        #   The second column has the counter assigned to that variable
+
+        # sys.stderr.write('  i_preexisting_begin='+
+        #                 str(i_preexisting_begin)+
+        #                 ' i_preexisting_end='+str(i_preexisting_end)+'\n')
+
+        for i in range(i_preexisting_begin, i_preexisting_end):
+            line = lines_bindings[i].strip()
+            tokens = SplitQuotedString(line)  # strip comments, handle quotes
+            if len(tokens) == 2:
+                lines_new.append(tokens[0] + '  ' + str(new_counter) + '\n')
+                new_counter += 1
+
+        #sys.stderr.write('  (writing pre-exisiting lines)\n')
+
+        # write out all the lines in the original file after this point.
+        lines_new += lines_bindings[i_preexisting_end:]
+
+    return lines_new
+
+
 def main():
     try:
         if (len(sys.argv) != 3):
@@ -71,93 +158,23 @@ def main():
         f.close()
 
         # Selections are simply lists of 2-tuples (pairs)
+
         #f = open('ttree_assignments.txt','r')
         #lines_bindings = f.readlines()
         # f.close()
         lines_bindings = sys.stdin.readlines()
 
-        # Figure out which lines in the 'ttree_assignments.txt' file
-        # contain the variables of the type you are looking for.
-        # Make note of the relevant line numbers
-        i_preexisting_begin = -1
-        i_preexisting_end = -1
-        in_section = False
-        possible_cat_names = set(
-            ['$' + cat_name, '$/' + cat_name, '${' + cat_name, '${/' + cat_name])
-
-        preexisting_interaction_list = []
-        for i in range(0, len(lines_bindings)):
-            line = lines_bindings[i].strip()
-            tokens = SplitQuotedString(line)  # strip comments, handle quotes
-            if len(tokens) == 2:
-                before_colon = tokens[0].split(':')[0]
-                if before_colon in possible_cat_names:
-                    if i_preexisting_begin == -1:
-                        i_preexisting_begin = i
-                        in_section = True
-                else:
-                    if in_section:
-                        i_preexisting_end = i
-                    in_section = False
-
-        if i_preexisting_end == -1:
-            i_preexisting_end = len(lines_bindings)
-
-        if i_preexisting_begin == -1:
-            for line in lines_bindings:
-                sys.stdout.write(line)
-        else:
-            # write out all the lines in the original file up until the point where
-            # the variables in the category we are looking for were encountered
-            for i in range(0, i_preexisting_begin):
-                sys.stdout.write(lines_bindings[i])
-
-        sys.stderr.write('  (adding new lines)\n')
-
-        # Now add some new lines (2-column format).
-        # As with any ttree_assignment.txt file:
-        #   The first column has our generated variable names
-        #   The second column has the counter assigned to that variable
-        new_counter = 1
-        for line_orig in lines_generated:
-            line = line_orig.strip()
-            if len(line) > 0:
-                tokens = SplitQuotedString(line)  # strip comments, handle quotes
-                sys.stdout.write(tokens[0] + '  ' + str(new_counter) + '\n')
-                new_counter += 1
-
-        sys.stderr.write('  (adding pre-exisiting lines)\n')
-        if i_preexisting_begin != -1:
-            # Append the original pre-existing interactions of that type, but assign
-            # them to higher numbers.  (Hopefully this helps to make sure that these
-            # assignments will override any of the automatic/generated assignments.)
-            # As with any ttree_assignment.txt file:
-            #   The first column has our generated variable names
-            #   The second column has the counter assigned to that variable
-
-            # sys.stderr.write('  i_preexisting_begin='+
-            #                 str(i_preexisting_begin)+
-            #                 ' i_preexisting_end='+str(i_preexisting_end)+'\n')
-
-            for i in range(i_preexisting_begin, i_preexisting_end):
-                line = lines_bindings[i].strip()
-                tokens = SplitQuotedString(line)  # strip comments, handle quotes
-                if len(tokens) == 2:
-                    sys.stdout.write(tokens[0] + '  ' + str(new_counter) + '\n')
-                    new_counter += 1
-
-            #sys.stderr.write('  (writing pre-exisiting lines)\n')
-
-            # write out all the lines in the original file after this point.
-            for i in range(i_preexisting_end, len(lines_bindings)):
-                sys.stdout.write(lines_bindings[i])
+        for line in FixTtreeAssignments(cat_name,
+                                        lines_generated,
+                                        lines_bindings):
+            sys.stdout.write(line)
 
         sys.exit(0)
 
-
     except (ValueError, InputError) as err:
         sys.stderr.write('\n' + str(err) + '\n')
         sys.exit(-1)
 
+
 if __name__ == '__main__':
     main()
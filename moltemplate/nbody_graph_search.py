@@ -831,110 +831,135 @@ class GraphMatcher(object):
             # Thus it is impossible for a subgraph of G to be isomorphic to g.
             return  # return no matches
 
+        # Implementation:
+        # This is a VF2-style depth-first search.  (It used to be implemented
+        # as a recursive generator, but the overhead of creating nested
+        # generators dominated the cost of searching large graphs.)  Instead
+        # we use an explicit stack (one cursor for each edge in g), and
+        # flat lists of integers.
+
+        # Store the neighbors of each vertex in G in "CSR" format:
+        #   The edges emanating from vertex Iv are  nbr_edge[k]
+        #   (which point to vertex nbr_vert[k]),  for k in the range
+        #   nbr_start[Iv] <= k < nbr_start[Iv+1]
+        G_edges = self.G.edges
+        nbr_start = [0] * (self.G.nv + 1)
+        nbr_edge = []
         for Iv in range(0, self.G.nv):
+            nbr_edge.extend(self.G.neighbors[Iv])
+            nbr_start[Iv + 1] = len(nbr_edge)
+        nbr_vert = [G_edges[Je].stop for Je in nbr_edge]
+
+        # The edges of g are matched in order.  Edge "se" from g begins at a
+        # vertex which has already been matched.  It either leads to a
+        # new (unmatched) vertex from g ("new_vert[se]==True"), or it
+        # closes a loop.  (Since g was re-ordered in depth-first-search order,
+        # this only depends on "se", so we can figure it out in advance.)
+        ne_g = self.g.ne
+        g_start = [self.g.edges[ie].start for ie in range(0, ne_g)]
+        g_stop = [self.g.edges[ie].stop for ie in range(0, ne_g)]
+        new_vert = [False] * ne_g
+        sv = 1
+        for ie in range(0, ne_g):
+            assert(g_start[ie] < sv)
+            if g_stop[ie] >= sv:
+                new_vert[ie] = True
+                sv += 1
+
+        iv_to_Iv = self.iv_to_Iv
+        ie_to_Ie = self.ie_to_Ie
+        voccupiedG = self.voccupiedG
+        eoccupiedG = self.eoccupiedG
+        cursor = [0] * (ne_g + 1)
+        Reformat = self._MatchFormatter()
 
-            # match vertex Iv from G with vertex 0 from graph g
-            self.iv_to_Iv[0] = Iv
-            self.voccupiedG[Iv] = True
-
-            # Implementation:
-            # In this loop we begin the search process
-            # starting with a different vertex (Iv) from big graph G,
-            # and matching it with the first vertex (iv=0) from small graph g.
-            # In this way the match "begins" from vertex Iv in G.
-            #
-            # Any matches found which begin from vertex Iv are distinct
-            # from matches beginning from any other vertex in G.
-            # Looping over all Iv in G is necessary and sufficient
-            # to insure that all possible subgraphs of G
-            # (which are isomorphic to g) are considered.
-
-            self.sv = 1  # we have matched one vertex already
-            self.se = 0  # we haven't matched any edges yet
-            for match in self.Match():
-                yield match
-            self.voccupiedG[Iv] = False
+        for Iv in range(0, self.G.nv):
 
-    def Match(self):
+            # match vertex Iv from G with vertex 0 from graph g
+            iv_to_Iv[0] = Iv
+            voccupiedG[Iv] = True
+
+            if ne_g == 0:
+                yield Reformat()
+                voccupiedG[Iv] = False
+                continue
+
+            # "se" is the number of edges from g which have been matched so far
+            se = 0
+            cursor[0] = nbr_start[Iv]
+            while se >= 0:
+                Iv_start = iv_to_Iv[g_start[se]]
+                k = cursor[se]
+                k_end = nbr_start[Iv_start + 1]
+                if new_vert[se]:
+                    # Find an edge in G leading to an unvisited vertex in G
+                    while (k < k_end) and voccupiedG[nbr_vert[k]]:
+                        k += 1
+                else:
+                    # Find an unused edge in G connecting the pair of
+                    # vertices in G that correspond to this edge in g
+                    Iv_stop = iv_to_Iv[g_stop[se]]
+                    while ((k < k_end) and
+                           ((nbr_vert[k] != Iv_stop) or
+                            eoccupiedG[nbr_edge[k]])):
+                        k += 1
+
+                if k < k_end:
+                    cursor[se] = k + 1
+                    # Match edge Je from big graph G with
+                    #  edge se from small graph g
+                    Je = nbr_edge[k]
+                    ie_to_Ie[se] = Je
+                    eoccupiedG[Je] = True
+                    if new_vert[se]:
+                        # ...and match vertex Jv from G with g_stop[se]
+                        Jv = nbr_vert[k]
+                        iv_to_Iv[g_stop[se]] = Jv
+                        voccupiedG[Jv] = True
+                    se += 1
+                    if se < ne_g:
+                        cursor[se] = nbr_start[iv_to_Iv[g_start[se]]]
+                        continue
+                    yield Reformat()
+
+                # Backtrack: undo the most recent edge (and vertex) we matched
+                se -= 1
+                if se >= 0:
+                    eoccupiedG[ie_to_Ie[se]] = False
+                    ie_to_Ie[se] = Dgraph.NULL
+                    if new_vert[se]:
+                        voccupiedG[iv_to_Iv[g_stop[se]]] = False
+                        iv_to_Iv[g_stop[se]] = Dgraph.NULL
+
+            voccupiedG[Iv] = False
+
+        iv_to_Iv[0] = Dgraph.NULL
+
+    def _MatchFormatter(self):
+        """
+        Returns a function which is equivalent to ReformatMatch(), and which
+        reads the match directly from the self.iv_to_Iv and self.ie_to_Ie
+        lists (avoiding the per-match vertex and edge lookups).
 
-        # self.se represents how many vertices have been matched so far.
-        # We are done searching if all of the edges from 0 to self.se-1
-        # from graph g have been selected (matched with edges from graph G).
-        if self.se == self.g.ne:
-            # Note: This also gaurantees that all vertices have been visited.
-            assert(self.sv == self.g.nv)
-            yield self.ReformatMatch()
+        """
+        iv_to_Iv = self.iv_to_Iv
+        ie_to_Ie = self.ie_to_Ie
+        vorder_g = self.vorder_g
+        if type(self.g) is Dgraph:
+            eorder_g = self.eorder_g
+            return lambda: (tuple([iv_to_Iv[iv] for iv in vorder_g]),
+                            tuple([ie_to_Ie[ie] for ie in eorder_g]))
 
-        else:
-            # VF2-style recursive loop:
-
-            # We know the next edge to be matched is connected to at least
-            # one previously visited vertex from g which has already been
-            # been added to the the current match-in-progress.
-            iv = self.g.edges[self.se].start
-            Iv = self.iv_to_Iv[iv]
-            assert(iv < self.sv)  # <-- check to verify this is so
-
-            # The other vertex may or may not have been visited (matched) yet.
-            iv_neighbor = self.g.edges[self.se].stop
-
-            # Two cases:
-            # Case 1: edge self.se points to a previously visited vertex from g
-            #         This means we have a loop.
-            if iv_neighbor < self.sv:
-                # In that case, then the corresponding edge in G must
-                # connect the corresponding pair of vertices from G.
-                # (Which we know have already been assigned to vertices in g
-                #  because both iv and iv_neighbor are < self.sv)
-                Iv_neighbor = self.iv_to_Iv[iv_neighbor]
-                # Loop over all of the edges in G which connect this pair
-                # of vertices (Iv --> Iv_neighbor)
-                for Je in self.G.neighbors[Iv]:
-                    Jv = self.G.edges[Je].stop
-                    if ((Jv == Iv_neighbor) and
-                        (not self.eoccupiedG[Je])):
-
-                        # Match edge Je from big   graph G with
-                        #  edge self.se from small graph g
-                        self.ie_to_Ie[self.se] = Je
-                        self.se += 1
-                        self.eoccupiedG[Je] = True
-                        for match in self.Match():
-                            yield match
-                        self.eoccupiedG[Je] = False
-                        self.se -= 1
-                        self.ie_to_Ie[self.se] = Dgraph.NULL
-
-            # Case 2:
-            else:  # this would mean that iv_neighbor >= self.sv
-
-                # If iv_neighbor>=self.sv, then this edge points to to a vertex
-                # in g which has not yet been paired with a vertex from G.
-
-                # Loop over all of the edges in G which connect vertex
-                # Iv from G to new (unvisited) vertices in G
-                for Je in self.G.neighbors[Iv]:
-                    Jv = self.G.edges[Je].stop
-                    if (not self.voccupiedG[Jv]):
-
-                        assert(not self.eoccupiedG[Je])
-                        # Match both edge Je with je
-                        #      AND vertex Jv with jv
-                        self.ie_to_Ie[self.se] = Je
-                        self.se += 1
-                        self.eoccupiedG[Je] = True
-                        self.iv_to_Iv[self.sv] = Jv
-                        self.sv += 1
-                        self.voccupiedG[Jv] = True
-                        # Then continue the recursion
-                        for match in self.Match():
-                            yield match
-                        self.voccupiedG[Jv] = False
-                        self.sv -= 1
-                        self.iv_to_Iv[self.sv] = Dgraph.NULL
-                        self.eoccupiedG[Je] = False
-                        self.se -= 1
-                        self.ie_to_Ie[self.se] = Dgraph.NULL
+        # For each undirected edge in g (ieu), find the directed edge (ie)
+        ieu_ie = [Dgraph.NULL for ieu in range(0, self.g.neu)]
+        for ie in range(0, self.g.ne):
+            if self.g.edges[ie].start <= self.g.edges[ie].stop:
+                ieu_ie[self.g.LookupUndirectedEdgeIdx(ie)] = ie
+        if Dgraph.NULL in ieu_ie:
+            return self.ReformatMatch
+        G_ied_to_ieu = self.G.ied_to_ieu
+        return lambda: (tuple([iv_to_Iv[iv] for iv in vorder_g]),
+                        tuple([G_ied_to_ieu[ie_to_Ie[ie]] for ie in ieu_ie]))
 
     def ReformatMatch(self):
         #   (This is because we are assuming g is connected.
@@ -21,6 +21,53 @@ sys.path.append(os.getcwd())
 g_program_name = __file__.split('/')[-1]
 
 
+def ReorderAtoms(lines, grph):
+    """
+    Rearrange the atom-IDs on each line (from the "Angles", "Dihedrals", or
+    "Impropers" section of a DATA file) into canonical order.  "grph" is the
+    module defining the bond_pattern and canonical_order() for this section.
+    Returns a list containing the new lines of text.
+    """
+    # This module defines the graph representing the bond pattern for this type
+    # of interaction.  (The number of vertices and edges for the graph corresponds
+    # to the number of atoms and bonds in this type of interaction.)
+    natoms = grph.bond_pattern.GetNumVerts()
+    nbonds = grph.bond_pattern.GetNumEdges()
+
+
+    lines_new = []
+    for line_orig in lines:
+        line = line_orig.rstrip('\n')
+        comment = ''
+        if '#' in line_orig:
+            ic = line.find('#')
+            line = line_orig[:ic]
+            comment = ' ' + line_orig[ic:].rstrip('\n')
+
+        tokens = line.strip().split()
+        swapped = False
+        if len(tokens) == 2 + natoms:
+            all_integers = True
+            abids_l = [[0 for i in range(0, natoms)],
+                       [0 for i in range(0, nbonds)]]
+            for i in range(0, natoms):
+                if not tokens[2 + i].isdigit():
+                    all_integers = False
+            if all_integers:
+                for i in range(0, natoms):
+                    abids_l[0][i] = int(tokens[2 + i])
+            else:
+                for i in range(0, natoms):
+                    abids_l[0][i] = tokens[2 + i]
+            abids = grph.canonical_order((tuple(abids_l[0]), tuple(abids_l[1])))
+            for i in range(0, natoms):
+                tokens[2 + i] = str(abids[0][i])
+
+        lines_new.append(' '.join(tokens) + comment + '\n')
+
+    return lines_new
+
+
 def main():
     in_stream = sys.stdin
 
@@ -77,41 +124,8 @@ def main():
                          '        Check the \"nbody_alt_symmetry/\" directory.)\n')
         sys.exit(-1)
 
-    # This module defines the graph representing the bond pattern for this type
-    # of interaction.  (The number of vertices and edges for the graph corresponds
-    # to the number of atoms and bonds in this type of interaction.)
-    natoms = grph.bond_pattern.GetNumVerts()
-    nbonds = grph.bond_pattern.GetNumEdges()
-
-
-    for line_orig in in_stream:
-        line = line_orig.rstrip('\n')
-        comment = ''
-        if '#' in line_orig:
-            ic = line.find('#')
-            line = line_orig[:ic]
-            comment = ' ' + line_orig[ic:].rstrip('\n')
-
-        tokens = line.strip().split()
-        swapped = False
-        if len(tokens) == 2 + natoms:
-            all_integers = True
-            abids_l = [[0 for i in range(0, natoms)],
-                       [0 for i in range(0, nbonds)]]
-            for i in range(0, natoms):
-                if not tokens[2 + i].isdigit():
-                    all_integers = False
-            if all_integers:
-                for i in range(0, natoms):
-                    abids_l[0][i] = int(tokens[2 + i])
-            else:
-                for i in range(0, natoms):
-                    abids_l[0][i] = tokens[2 + i]
-            abids = grph.canonical_order((tuple(abids_l[0]), tuple(abids_l[1])))
-            for i in range(0, natoms):
-                tokens[2 + i] = str(abids[0][i])
-
-        sys.stdout.write(' '.join(tokens) + comment + '\n')
+    for line in ReorderAtoms(in_stream, grph):
+        sys.stdout.write(line)
 
     return
 
@@ -0,0 +1,737 @@
+#!/usr/bin/env python3
+
+# Author: Andrew Jewett (jewett.aij at g mail)
+# License: MIT License  (See LICENSE.md)
+# Copyright (c) 2013
+
+man_page_text = """
+Usage (example):
+
+pipeline.py -atomstyle full [-nocheck] [-checkff] [-overlay-bonds] ...
+
+This program is invoked by moltemplate.sh after lttree.py has finished.
+It carries out the steps which are needed to convert the files generated
+by lttree.py into LAMMPS data and input script sections:
+  - removing duplicate atoms (and renumbering them),
+  - generating bonds, angles, dihedrals, and impropers by atom type,
+  - expanding wildcard characters in "_coeff" commands,
+  - checking the files for undefined variables (unless -nocheck is used),
+  - removing duplicate bonded interactions (and renumbering them),
+  - assigning partial charges by bond type.
+Historically, each of these steps was performed by a separate python script
+(for example nbody_by_type.py, nbody_fix_ttree_assignments.py, ttree_render.py,
+remove_duplicates_nbody.py, renumber_DATA_first_column.py, ...) which
+were invoked from moltemplate.sh, once per data section.  This program
+performs the same steps in a single python process, so that the contents of
+the ttree_assignments.txt file (and the other files) are only read once.
+(Those scripts can still be used as stand-alone programs.)
+
+The files are read from, and written to, the current directory.
+
+Optional arguments (these mimic the corresponding moltemplate.sh arguments):
+
+ -atomstyle style        The LAMMPS atom_style (default: "full")
+ -nocheck                Skip checking for undefined variables
+ -checkff                Complain about missing "By Type" interactions
+ -overlay-bonds          Do not remove duplicate bonds
+ -overlay-angles         Do not remove duplicate angles
+ -overlay-dihedrals      Do not remove duplicate dihedrals
+ -overlay-impropers      Do not remove duplicate impropers
+ -report-duplicates id_filter type_filter
+                         Report which duplicate interactions were removed
+ -bond-symmetry file.py  Rules for the atom order in bonds
+ -angle-symmetry file.py       (...angles)
+ -dihedral-symmetry file.py    (...dihedrals)
+ -improper-symmetry file.py    (...impropers)
+ -jobs N                 Use N processes when generating interactions by type
+
+"""
+
+import sys
+import os
+import io
+import re
+import glob
+import gc
+from collections import defaultdict
+
+try:
+    from .ttree_lex import InputError, LineLex
+    from .lttree_styles import *
+    from .lttree_postprocess import LttreePostprocess
+    from .ttree_render import ReadBindings, RenderTemplate
+    from .remove_duplicate_atoms import RemoveDuplicateAtoms
+    from .remove_duplicates_nbody import RemoveDuplicatesNbody
+    from .renumber_DATA_first_column import RenumberFirstColumn
+    from .nbody_by_type import GenInteractions_lines, LoadBondPattern, \
+        ReadSystemGraph
+    from .nbody_fix_ttree_assignments import FixTtreeAssignments
+    from .nbody_reorder_atoms import ReorderAtoms
+    from .postprocess_coeffs import ReadCoeffTypes, ExpandCoeffWildcards
+    from .bonds_by_type import LookupBondTypes
+    from .charge_by_bond import LookupChargePairs
+except (ImportError, SystemError, ValueError):
+    # not installed as a package
+    from ttree_lex import InputError, LineLex
+    from lttree_styles import *
+    from lttree_postprocess import LttreePostprocess
+    from ttree_render import ReadBindings, RenderTemplate
+    from remove_duplicate_atoms import RemoveDuplicateAtoms
+    from remove_duplicates_nbody import RemoveDuplicatesNbody
+    from renumber_DATA_first_column import RenumberFirstColumn
+    from nbody_by_type import GenInteractions_lines, LoadBondPattern, \
+        ReadSystemGraph
+    from nbody_fix_ttree_assignments import FixTtreeAssignments
+    from nbody_reorder_atoms import ReorderAtoms
+    from postprocess_coeffs import ReadCoeffTypes, ExpandCoeffWildcards
+    from bonds_by_type import LookupBondTypes
+    from charge_by_bond import LookupChargePairs
+
+
+g_program_name = __file__.split('/')[-1]  # = 'pipeline.py'
+g_date_str = '2025-11-16'
+g_version_str = '0.1.0'
+
+
+class PipelineSettings(object):
+
+    def __init__(self):
+        self.atom_style = 'full'
+        self.ttree_assignments_fname = 'ttree_assignments.txt'
+        self.check = True
+        self.checkff = False
+        self.remove_duplicate_bonds = True
+        self.remove_duplicate_angles = True
+        self.remove_duplicate_dihedrals = True
+        self.remove_duplicate_impropers = True
+        self.report_duplicates = False
+        self.rd_id_filter = ''
+        self.rd_type_filter = ''
+        self.subgraph_script_bonds = ''
+        self.subgraph_script_angles = ''
+        self.subgraph_script_dihedrals = ''
+        self.subgraph_script_impropers = ''
+        self.jobs = 1
+
+
+
+def PipelineParseArgs(argv, settings):
+    i = 1
+    while i < len(argv):
+        if ((argv[i].lower() == '-atomstyle') or
+            (argv[i].lower() == '-atom-style') or
+            (argv[i].lower() == '-atom_style')):
+            if i + 1 >= len(argv):
+                raise InputError('Error(' + g_program_name + '): The ' + argv[i] + ' flag should be followed by a LAMMPS\n'
+                                 '       atom_style name (or single quoted string containing a space-separated\n'
+                                 '       list of column names such as: atom-ID atom-type q x y z molecule-ID.)\n')
+            settings.atom_style = argv[i + 1]
+            del(argv[i:i + 2])
+        elif ((argv[i].lower() == '-ttreeassignments') or
+              (argv[i].lower() == '-ttree-assignments') or
+              (argv[i].lower() == '-ttree_assignments')):
+            if i + 1 >= len(argv):
+                raise InputError('Error(' + g_program_name + '): The ' + argv[i] + ' flag should be followed by \n'
+                                 '       a file containing the variable bindings created by ttree/moltemplate.\n')
+            settings.ttree_assignments_fname = argv[i + 1]
+            del(argv[i:i + 2])
+        elif argv[i] == '-nocheck':
+            settings.check = False
+            del(argv[i:i + 1])
+        elif argv[i] == '-checkff':
+            settings.checkff = True
+            del(argv[i:i + 1])
+        elif argv[i] == '-overlay-bonds':
+            settings.remove_duplicate_bonds = False
+            del(argv[i:i + 1])
+        elif argv[i] == '-overlay-angles':
+            settings.remove_duplicate_angles = False
+            del(argv[i:i + 1])
+        elif argv[i] == '-overlay-dihedrals':
+            settings.remove_duplicate_dihedrals = False
+            del(argv[i:i + 1])
+        elif argv[i] == '-overlay-impropers':
+            settings.remove_duplicate_impropers = False
+            del(argv[i:i + 1])
+        elif argv[i] == '-report-duplicates':
+            if i + 2 >= len(argv):
+                raise InputError('Error(' + g_program_name + '): Expected 2 string arguments following the\n'
+                                 '       ' + argv[i] + ' argument.\n')
+            settings.report_duplicates = True
+            settings.rd_id_filter = argv[i + 1]
+            settings.rd_type_filter = argv[i + 2]
+            del(argv[i:i + 3])
+        elif argv[i] in ('-bond-symmetry', '-angle-symmetry',
+                         '-dihedral-symmetry', '-improper-symmetry'):
+            if i + 1 >= len(argv):
+                raise InputError('Error(' + g_program_name + '): The ' + argv[i] + ' flag should be followed by the\n'
+                                 '       name of a python file (eg. from the \"nbody_alt_symmetry/\" directory).\n')
+            if argv[i] == '-bond-symmetry':
+                settings.subgraph_script_bonds = argv[i + 1]
+            elif argv[i] == '-angle-symmetry':
+                settings.subgraph_script_angles = argv[i + 1]
+            elif argv[i] == '-dihedral-symmetry':
+                settings.subgraph_script_dihedrals = argv[i + 1]
+            else:
+                settings.subgraph_script_impropers = argv[i + 1]
+            del(argv[i:i + 2])
+        elif argv[i] == '-jobs':
+            if ((i + 1 >= len(argv)) or
+                (not argv[i + 1].isdigit()) or
+                (int(argv[i + 1]) < 1)):
+                raise InputError('Error(' + g_program_name + '): The ' + argv[i] + ' flag should be followed by\n'
+                                 '       a positive integer (the number of processes to use).\n')
+            settings.jobs = int(argv[i + 1])
+            del(argv[i:i + 2])
+        elif ((argv[i].lower() == '-?') or
+              (argv[i].lower() == '--?') or
+              (argv[i].lower() == '-help') or
+              (argv[i].lower() == '--help')):
+            sys.stdout.write(man_page_text + '\n')
+            sys.exit(0)
+        elif argv[i][0] == '-':
+            raise InputError('Error(' + g_program_name + '):\n'
+                             'Unrecogized command line argument \"' + argv[i] + '\"\n')
+        else:
+            i += 1
+
+    if len(argv) != 1:
+        problem_args = ['\"' + arg + '\"' for arg in argv[1:]]
+        raise InputError('Syntax Error(' + g_program_name + '):\n\n'
+                         '       Problem with argument list.\n'
+                         '       The remaining arguments are:\n\n'
+                         '         ' + (' '.join(problem_args)) + '\n\n'
+                         '       (The actual problem may be earlier in the argument list.)\n')
+
+
+
+def SplitLines(text):
+    """ Split a string into lines (each ending in '\\n', like readlines()) """
+    return io.StringIO(text).readlines()
+
+
+
+class PipelineFiles(object):
+    """
+    A cache containing the contents of the files generated by lttree.py
+    (stored as lists of lines), so that each file is read at most once.
+    Files which are modified are also written back to the disk immediately,
+    because moltemplate.sh reads them after this program has finished.
+    """
+
+    def __init__(self):
+        self.contents = {}
+        self.system_graph = None
+
+    def ReadLines(self, fname):
+        """ Return the lines in a file (or [] if the file does not exist). """
+        if fname not in self.contents:
+            try:
+                f = open(fname, 'r')
+                self.contents[fname] = f.readlines()
+                f.close()
+            except IOError:
+                self.contents[fname] = []
+        return self.contents[fname]
+
+    def NonEmpty(self, fname):
+        """ Equivalent to the shell command: [ -s "$fname" ] """
+        return len(self.ReadLines(fname)) > 0
+
+    def GetSystemGraph(self, atom_style):
+        """
+        Return a graph of the atoms and bonds in the system (read from the
+        "Data Atoms.template" and "Data Bonds.template" files), which is
+        needed to generate angles, dihedrals, and impropers by type.
+        The graph is only built once (unless those files are modified).
+        """
+        if self.system_graph is None:
+            self.system_graph = ReadSystemGraph(
+                NonCommentLines(self.ReadLines(data_atoms + '.template')),
+                NonCommentLines(self.ReadLines(data_bonds + '.template')),
+                atom_style)
+        return self.system_graph
+
+    def Modified(self, fname):
+        # (The system graph must be rebuilt if the atoms or bonds change.)
+        if fname in (data_atoms + '.template', data_bonds + '.template'):
+            self.system_graph = None
+
+    def WriteLines(self, fname, lines):
+        self.Modified(fname)
+        self.contents[fname] = lines
+        f = open(fname, 'w')
+        f.write(''.join(lines))
+        f.close()
+
+    def AppendLines(self, fname, lines):
+        self.Modified(fname)
+        self.contents[fname] = self.ReadLines(fname) + lines
+        f = open(fname, 'a')
+        f.write(''.join(lines))
+        f.close()
+
+
+
+class PipelineBindings(object):
+    """
+    The variable names and values (bindings) stored in ttree_assignments.txt.
+    Both the lines of text and the corresponding dictionary are kept in
+    memory.  The file is only written when Save() is invoked.
+    """
+
+    def __init__(self, fname):
+        self.fname = fname
+        f = open(fname, 'r')
+        self.lines = f.readlines()
+        f.close()
+        self.assignments = ReadBindings(self.lines)
+        self.modified = False
+
+    def Replace(self, lines):
+        self.lines = lines
+        self.assignments = ReadBindings(lines)
+        gc.collect()
+        self.modified = True
+
+    def Save(self):
+        if self.modified:
+            f = open(self.fname, 'w')
+            f.write(''.join(self.lines))
+            f.close()
+            self.modified = False
+
+
+
+def RenderSection(files, bindings, fname_template, fname_out, append=False):
+    """ Equivalent to: ttree_render.py ttree_assignments.txt < x.template > x """
+    lines_rendered = SplitLines(
+        RenderTemplate(io.StringIO(''.join(files.ReadLines(fname_template))),
+                       fname_template,
+                       bindings.assignments))
+    if append:
+        files.AppendLines(fname_out, lines_rendered)
+    else:
+        files.WriteLines(fname_out, lines_rendered)
+
+
+
+def NonCommentLines(lines):
+    """ Discard blank lines and lines beginning with '#' """
+    return [line for line in lines
+            if ((len(line.strip()) > 0) and (line.strip()[0] != '#'))]
+
+
+
+def NaturalSortKey(s):
+    """ Sort file names the same way as "ls -v" (numbers ordered by value) """
+    return [int(t) if t.isdigit() else t for t in re.split(r'(\d+)', s)]
+
+
+
+def RemoveDuplicateAtomsStage(files):
+    files.WriteLines(data_atoms,
+                     RemoveDuplicateAtoms(files.ReadLines(data_atoms)))
+    files.WriteLines(data_atoms + '.template',
+                     RemoveDuplicateAtoms(files.ReadLines(data_atoms + '.template')))
+    files.WriteLines(data_atoms,
+                     RenumberFirstColumn(files.ReadLines(data_atoms)))
+
+
+
+def BondsByTypeStage(files, bindings, settings):
+    if not files.NonEmpty(data_bonds_by_type):
+        sys.stdout.write('Error: You have a \"Data Bond List\", section somewhere\n'
+                         '       without a \"Data Bonds By Type\" section to support it.\n'
+                         '       (Did you mean to use \"Data Bonds\" instead?)\n'
+                         'Details:\n'
+                         '       Unlike the \"Data Bonds\" section, the \"Data Bond List\" section\n'
+                         '       allows the user to omit the bond types.  Instead moltemplate attempts\n'
+                         '       to infer the type of bond by considering the pair of atom types.\n'
+                         '       However you must define a \"Data Bonds By Type\" section\n'
+                         '       to make this feature work (or use \"Data Bonds\" instead).\n')
+        sys.exit(15)
+
+    sys.stderr.write('Looking up bond types according to atom type\n')
+
+    #-- Generate a list of lines containing: bondid bondtype atomid1 atomid2 --
+    bond_types = []
+    bond_ids = []
+    bond_pairs = []
+    LookupBondTypes(bond_types,
+                    bond_ids,
+                    bond_pairs,
+                    files.ReadLines(data_atoms + '.template'),
+                    files.ReadLines(data_bond_list + '.template'),
+                    files.ReadLines(data_bonds_by_type + '.template'),
+                    settings.atom_style,
+                    data_bond_list)
+    lines_gen = [bond_ids[ie] + ' ' +
+                 bond_types[ie] + ' ' +
+                 bond_pairs[ie][0] + ' ' +
+                 bond_pairs[ie][1] + '\n'
+                 for ie in range(0, len(bond_types))]
+
+    # Insert these lines into the "Data Bonds.template" file.  (Existing
+    # "Bonds" are appended after the generated interactions, so that
+    # hopefully they will override those interactions.)
+    files.WriteLines(data_bonds + '.template',
+                     lines_gen + files.ReadLines(data_bonds + '.template'))
+
+    # Now substitute the variable values (assignments) into the variable
+    # names present in the .template file.
+    RenderSection(files, bindings, data_bonds + '.template', data_bonds)
+
+    sys.stderr.write('\n\n')
+
+
+
+def NbodyByTypeStage(files,
+                     bindings,
+                     settings,
+                     section_name,
+                     data_section,
+                     data_section_by_type,
+                     subgraph_script_user,
+                     check_undefined):
+    """
+    Generate 3-body and 4-body interactions (for the "Angles", "Dihedrals",
+    or "Impropers" section) using the rules in every file whose name begins
+    with data_section_by_type (eg. "Data Angles By Type (gaff_angle.py)").
+    Returns the (possibly updated) subgraph_script_user, as well as the names
+    of the last two files containing rules (used for warning messages).
+    """
+    singular = section_name[:-1].lower()    # eg. "angle"
+    fname_by_type1 = ''
+    fname_by_type2 = ''
+
+    fnames = glob.glob(glob.escape(data_section_by_type) + '*.template')
+    fnames.sort(key=NaturalSortKey)
+
+    for fname in fnames:
+        if ((not files.NonEmpty(fname)) or (not files.NonEmpty(data_bonds))):
+            # This handles the special cases that occur when
+            # 1) There are no bonds in your system
+            # 2) "Data Angles By Type"*.template matches nothing
+            break
+
+        if section_name == 'Angles':
+            sys.stderr.write('Generating 3-body angle interactions by atom/bond type\n')
+        else:
+            sys.stderr.write('Generating 4-body ' + singular +
+                             ' interactions by atom/bond type\n')
+
+        # Extract the text between parenthesis (if present, empty-str otherwise)
+        # Example: fname="Data Angles By Type (gaff_angle.py).template"
+        subgraph_script = ''
+        if re.search(r'\(.*\)', fname):
+            subgraph_script = fname.split('(', 1)[1].split(')', 1)[0]
+        # Example: (continued) subgraph_script should equal "gaff_angle.py"
+
+        # The user can also override this choice:
+        if subgraph_script_user != '':
+            subgraph_script = subgraph_script_user
+        elif subgraph_script != '':
+            subgraph_script_user = subgraph_script
+
+        if subgraph_script == '':
+            subgraph_script = 'nbody_' + section_name + '.py'
+        else:
+            sys.stderr.write('(using the rules in \"' + subgraph_script + '\")\n')
+
+        fname_by_type2 = fname_by_type1
+        fname_by_type1 = fname
+
+        #-- Generate a list of the interactions on separate lines --
+        g = LoadBondPattern(subgraph_script)
+        lines_gen = GenInteractions_lines(
+            None,
+            None,
+            [],
+            NonCommentLines(files.ReadLines(fname)),
+            settings.atom_style,
+            g.bond_pattern,
+            g.canonical_order,
+            '$/' + singular + ':bytype',
+            '',
+            True,
+            check_undefined,
+            files.GetSystemGraph(settings.atom_style),
+            settings.jobs)
+
+        # Insert these lines into the "Data Angles.template" file
+        # (Existing "Angles" are appended after the generated interactions.)
+        files.WriteLines(data_section + '.template',
+                         lines_gen + files.ReadLines(data_section + '.template'))
+
+        sys.stderr.write('(Repairing ttree_assignments.txt file after ' +
+                         section_name.lower() + ' added.)\n')
+
+        # Insert the new variable names into the list of bindings
+        # (renumbering the relevant variable-assignments to avoid clashes).
+        bindings.Replace(FixTtreeAssignments('/' + singular,
+                                             lines_gen,
+                                             bindings.lines))
+
+        sys.stderr.write('(Rendering ttree_assignments.tmp file after ' +
+                         section_name.lower() + ' added.)\n')
+
+        RenderSection(files, bindings, data_section + '.template', data_section)
+
+        sys.stderr.write('\n')
+
+    return subgraph_script_user, fname_by_type1, fname_by_type2
+
+
+
+def CoeffWildcardStage(files, bindings):
+    """
+    Deal with wildcard characters ('*', '?') in "_coeff" commands appearing
+    in any LAMMPS input scripts generated by moltemplate.  Replace them with
+    explicit variable names, and render the result.
+    """
+    coeff_commands = ('pair_coeff', 'bond_coeff', 'angle_coeff',
+                      'dihedral_coeff', 'improper_coeff')
+    coeff_types = None
+
+    sys.stderr.write('expanding wildcards in \"_coeff\" commands\n')
+
+    for fname in sorted(glob.glob('*.template')):
+        has_coeff_commands = False
+        has_wildcards = False
+        for line in files.ReadLines(fname):
+            tokens = line.split()
+            if len(tokens) > 0:
+                if tokens[0] in coeff_commands:
+                    has_coeff_commands = True
+                # file contains both _coeff commands and wildcards *,? on
+                # the same line:
+                if ((tokens[0].find('_coeff') != -1) and
+                    ('*' in line or ',' in line or '?' in line)):
+                    has_wildcards = True
+        if not (has_coeff_commands and has_wildcards):
+            continue
+
+        sys.stderr.write('  expanding wildcards in \"_coeff\" commands in \"' +
+                         fname + '\"\n')
+
+        if coeff_types is None:
+            coeff_types = ReadCoeffTypes(bindings.lines)
+
+        lex = LineLex(io.StringIO(''.join(files.ReadLines(fname))), fname)
+        lex.commenters = ''            #(don't attempt to skip over comments)
+        lex.line_extend_chars += '&'   #(because LAMMPS interprets '&' as '\')
+        files.WriteLines(fname, ExpandCoeffWildcards(lex, coeff_types))
+
+        # Now reassign integers to these variables
+        RenderSection(files, bindings, fname, fname[:-len('.template')])
+
+
+
+def RemoveDuplicatesStage(files,
+                          settings,
+                          section_name,
+                          data_section,
+                          n,
+                          remove_duplicates,
+                          subgraph_script,
+                          fname_by_type1='',
+                          fname_by_type2=''):
+    """
+    Remove duplicate bonds, angles, dihedrals, or impropers (unless the
+    user disabled this), and renumber the remaining interactions.
+    """
+    singular = section_name[:-1]     # eg. "Angle"
+    if subgraph_script == '':
+        subgraph_script = 'nbody_' + section_name + '.py'
+
+    if remove_duplicates:
+        g = LoadBondPattern(subgraph_script)
+        files.WriteLines(data_section,
+                         RemoveDuplicatesNbody(
+                             ReorderAtoms(files.ReadLines(data_section), g),
+                             n))
+        if settings.report_duplicates:
+            lines = RemoveDuplicatesNbody(
+                list(files.ReadLines(data_section + '.template')),
+                n,
+                singular,
+                'warning_duplicate_' + section_name.lower() + '.txt',
+                settings.rd_id_filter,
+                settings.rd_type_filter)
+        else:
+            lines = RemoveDuplicatesNbody(
+                list(files.ReadLines(data_section + '.template')), n)
+        files.WriteLines(data_section + '.template', lines)
+
+    files.WriteLines(data_section,
+                     RenumberFirstColumn(files.ReadLines(data_section)))
+
+    if fname_by_type2 != '':
+        conflict_str = singular.lower() + 's'
+        paren_str = ').'
+        if section_name == 'Impropers':
+            conflict_str = 'imrpopers'
+            paren_str = '.)'
+        sys.stderr.write(
+            '#############################################################################\n'
+            'WARNING:\n'
+            '  It appears as though multiple conflicting rules were used to generate\n' +
+            section_name.upper()[:-1] + ' interactions.  (This can occur when combining molecules built with\n'
+            'different force-field rules' + paren_str + '  In your case, you are using rules defined here:\n'
+            '   \"' + fname_by_type2 + '\"\n'
+            '   \"' + fname_by_type1 + '\"\n'
+            '   (Files ending in .py are located here:\n'
+            '    ' + os.path.dirname(os.path.abspath(__file__)) + '/nbody_alt_symmetry/)\n'
+            'If the molecules built using these two different force-field settings are not\n'
+            'connected, AND if you do NOT override force-field ' + conflict_str + ' with explicitly\n'
+            'defined ' + section_name.lower() + ', then you can probably ignore this warning message.  Otherwise\n'
+            'please check the list of ' + singular.lower() + ' interactions to make sure they are correct!\n'
+            '(It might help to build a much smaller system using the same molecule types.)\n'
+            '#############################################################################\n')
+
+
+
+def ChargeByBondStage(files, bindings, settings):
+    """ Assign atom partial charges according to who they are bonded to """
+    sys.stderr.write('Looking up partial charge contributions from bonds\n')
+
+    lines_bonds = files.ReadLines(data_bonds + '.template')
+    lines_bond_list = files.ReadLines(data_bond_list + '.template')
+    if ((len(lines_bonds) == 0) and (len(lines_bond_list) == 0)):
+        sys.stderr.write('Error(' + g_program_name + '): No bonds defined for this system\n'
+                         '      (This error may be a bug in moltemplate.)\n')
+
+    chargebyatomid = defaultdict(float)
+    LookupChargePairs(chargebyatomid,
+                      files.ReadLines(data_atoms + '.template'),
+                      lines_bonds,
+                      lines_bond_list,
+                      files.ReadLines(data_charge_by_bond + '.template'),
+                      settings.atom_style,
+                      data_bond_list)
+    lines_gen = ['  set atom ' + str(atomid) +
+                 ' charge ' + str(charge) + '\n'
+                 for atomid, charge in chargebyatomid.items()]
+
+    # Insert these lines into the "In Charges.template" file
+    files.WriteLines(in_charges + '.template',
+                     lines_gen + files.ReadLines(in_charges + '.template'))
+
+    RenderSection(files, bindings, in_charges + '.template', in_charges,
+                  append=True)
+
+
+
+def RunPipeline(settings):
+    """
+    Carry out all of the steps performed by moltemplate.sh after lttree.py
+    has generated the (.template) files in the current directory.
+    """
+    files = PipelineFiles()
+    bindings = PipelineBindings(settings.ttree_assignments_fname)
+
+    if files.NonEmpty(data_atoms):
+        RemoveDuplicateAtomsStage(files)
+
+    # ---------------- Interactions By Type -----------------
+    # These data sections must be processed before everything else (because
+    # they effect the other data sections, and the ttree_assignments.txt file.)
+
+    if files.NonEmpty(data_bond_list + '.template'):
+        BondsByTypeStage(files, bindings, settings)
+
+    (settings.subgraph_script_angles,
+     fname_angles_by_type1,
+     fname_angles_by_type2) = NbodyByTypeStage(files, bindings, settings,
+                                               'Angles',
+                                               data_angles,
+                                               data_angles_by_type,
+                                               settings.subgraph_script_angles,
+                                               settings.checkff)
+    (settings.subgraph_script_dihedrals,
+     fname_dihedrals_by_type1,
+     fname_dihedrals_by_type2) = NbodyByTypeStage(files, bindings, settings,
+                                                  'Dihedrals',
+                                                  data_dihedrals,
+                                                  data_dihedrals_by_type,
+                                                  settings.subgraph_script_dihedrals,
+                                                  settings.checkff)
+    (settings.subgraph_script_impropers,
+     fname_impropers_by_type1,
+     fname_impropers_by_type2) = NbodyByTypeStage(files, bindings, settings,
+                                                  'Impropers',
+                                                  data_impropers,
+                                                  data_impropers_by_type,
+                                                  settings.subgraph_script_impropers,
+                                                  False)
+
+    CoeffWildcardStage(files, bindings)
+
+    bindings.Save()
+
+    if settings.check:
+        sys.stderr.write('\n')
+        try:
+            LttreePostprocess(settings.atom_style,
+                              settings.ttree_assignments_fname)
+        except (ValueError, InputError) as err:
+            sys.stderr.write('\n' + str(err) + '\n')
+            sys.exit(3)
+        sys.stderr.write('(' + g_program_name + ': -- No errors detected. --)\n\n')
+
+    # -------------------------------------------------------
+    # If present, then remove duplicate bonds, angles, dihedrals, and impropers
+    # (unless overridden by the user).
+    # -------------------------------------------------------
+
+    if files.NonEmpty(data_masses):
+        files.WriteLines(data_masses,
+                         RemoveDuplicateAtoms(files.ReadLines(data_masses)))
+
+    if files.NonEmpty(data_bonds):
+        RemoveDuplicatesStage(files, settings, 'Bonds', data_bonds, 2,
+                              settings.remove_duplicate_bonds,
+                              settings.subgraph_script_bonds)
+    if files.NonEmpty(data_angles):
+        RemoveDuplicatesStage(files, settings, 'Angles', data_angles, 3,
+                              settings.remove_duplicate_angles,
+                              settings.subgraph_script_angles,
+                              fname_angles_by_type1,
+                              fname_angles_by_type2)
+    if files.NonEmpty(data_dihedrals):
+        RemoveDuplicatesStage(files, settings, 'Dihedrals', data_dihedrals, 4,
+                              settings.remove_duplicate_dihedrals,
+                              settings.subgraph_script_dihedrals,
+                              fname_dihedrals_by_type1,
+                              fname_dihedrals_by_type2)
+    if files.NonEmpty(data_impropers):
+        RemoveDuplicatesStage(files, settings, 'Impropers', data_impropers, 4,
+                              settings.remove_duplicate_impropers,
+                              settings.subgraph_script_impropers,
+                              fname_impropers_by_type1,
+                              fname_impropers_by_type2)
+
+    # ------------------ Charge By Bond ----------------------
+    if files.NonEmpty(data_charge_by_bond):
+        ChargeByBondStage(files, bindings, settings)
+
+
+
+def main():
+    sys.stderr.write(g_program_name + ' v' +
+                     g_version_str + ' ' + g_date_str + '\n')
+    try:
+        settings = PipelineSettings()
+        PipelineParseArgs([arg for arg in sys.argv], settings)
+        RunPipeline(settings)
+
+    except (ValueError, InputError) as err:
+        sys.stderr.write('\n' + str(err) + '\n')
+        sys.exit(4)
+
+    return
+
+
+if __name__ == '__main__':
+    main()
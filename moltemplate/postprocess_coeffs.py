@@ -45,6 +45,9 @@ import sys
 import argparse
 import re
 import gc
+import fnmatch
+from bisect import bisect_left
+from collections import OrderedDict
 
 try:
     from .ttree import ExtractFormattingCommands
@@ -70,6 +73,277 @@ g_program_name = g_filename
 
 
 
+def ReadCoeffTypes(fbindings):
+    """
+    Read a 2-column file (typically "ttree_assignments.txt") containing
+    variable names and their values (which are ignored), and return the
+    names of all of the atom, bond, angle, dihedral, and improper types
+    (as a tuple of 5 OrderedDicts, whose keys are in the order they appear in
+    the file, so that wildcards are always expanded in the same order).
+    """
+    atom_types = OrderedDict()
+    bond_types = OrderedDict()
+    angle_types = OrderedDict()
+    dihedral_types = OrderedDict()
+    improper_types = OrderedDict()
+
+    #BasicUIReadBindingsStream(assignments, f, bindings_filename)
+
+    # The line above is robust but it uses far too much memory.
+    # This for loop below works for most cases.
+    for line in fbindings:
+        #tokens = lines.strip().split()
+        # like split but handles quotes
+        tokens = SplitQuotedString(line.strip())
+        if len(tokens) < 2:
+            continue
+        if tokens[0].find('@') != 0:
+            continue
+        if tokens[0][2:].find('atom') == 0:
+            atom_types[tokens[0][1:]] = True
+        elif tokens[0][2:].find('bond') == 0:
+            bond_types[tokens[0][1:]] = True
+        elif tokens[0][2:].find('angle') == 0:
+            angle_types[tokens[0][1:]] = True
+        elif tokens[0][2:].find('dihedral') == 0:
+            dihedral_types[tokens[0][1:]] = True
+        elif tokens[0][2:].find('improper') == 0:
+            improper_types[tokens[0][1:]] = True
+
+    return (atom_types, bond_types, angle_types, dihedral_types, improper_types)
+
+
+
+class TypeIndex(object):
+    """
+    TypeIndex stores a collection of type names (for example, the atom types
+    returned by ReadCoeffTypes()), and finds the ones which match a wildcard
+    (glob) pattern or regular expression, without checking every type name
+    against every pattern.
+     - Type names are sorted, so that the names beginning with the text
+       preceding the first wildcard character of a pattern can be found by
+       bisection.  Only those names are compared with the pattern.
+     - Patterns without wildcards are looked up in a set.
+     - The results for each pattern (and each regular expression, which is
+       compiled only once) are remembered, since the same patterns often
+       appear many times.
+    The matching names are returned in the same order that they would be
+    visited by iterating over the original collection.
+    """
+
+    def __init__(self, types):
+        self.types = list(types)
+        self.types_set = set(self.types)
+        self.sorted_types = sorted([(t, i) for i, t in enumerate(self.types)])
+        self.matches = {}
+
+    def Matching(self, typepattern, is_re=False):
+        """
+        Return a list of the type names which match "typepattern".
+        If "is_re" is True, "typepattern" is interpreted as a regular
+        expression (in the format accepted by VarNameToRegex()).
+        """
+        key = (typepattern, is_re)
+        matches = self.matches.get(key)
+        if matches is not None:
+            return matches
+
+        if is_re:
+            regex = re.compile(VarNameToRegex(typepattern))
+            matches = [t for t in self.types if regex.search(t)]
+        elif HasWildcard(typepattern):
+            # The text preceding the first wildcard character
+            # (or character class) must match exactly.
+            iw = min([i for i in (typepattern.find('*'),
+                                  typepattern.find('?'),
+                                  typepattern.find('['))
+                      if i != -1])
+            prefix = typepattern[:iw]
+            j = bisect_left(self.sorted_types, (prefix, -1))
+            indices = []
+            while ((j < len(self.sorted_types)) and
+                   self.sorted_types[j][0].startswith(prefix)):
+                t, i = self.sorted_types[j]
+                if fnmatch.fnmatchcase(t, typepattern):
+                    indices.append(i)
+                j += 1
+            indices.sort()
+            matches = [self.types[i] for i in indices]
+        elif typepattern in self.types_set:
+            matches = [typepattern]
+        else:
+            matches = []
+
+        self.matches[key] = matches
+        return matches
+
+
+
+def ExpandCoeffWildcards(lex, coeff_types):
+    """
+    Read the lines of text from "lex" (a LineLex object).  Replace each
+    "_coeff" command containing wildcard characters (or regular expressions)
+    with a list of commands which refer explicitly to each matching type
+    (from "coeff_types", the tuple returned by ReadCoeffTypes()).
+    Returns a list containing the new lines of text.
+    """
+    atom_types, bond_types, angle_types, dihedral_types, improper_types = \
+        [TypeIndex(types) for types in coeff_types]
+
+    lines_new = []
+
+    while True:
+        line_orig = lex.ReadLine()
+        #sys.stderr.write('line_orig = \"'+str(line_orig)+'\"\n')
+        if (not line_orig) or (line_orig == ''):
+            break
+        tokens = line_orig.strip().split('@')
+        # If the second token is surrounded by '/' characters, interpret
+        # it as a regular expression.
+        token1_is_re = ((len(tokens) >= 2) and
+                        HasRE(tokens[1]))
+        # If the second token contains wildcard characters, interpret
+        # it as a wildcard (ie. glob) expression.
+        token1_is_wild = ((len(tokens) >= 2) and
+                          HasWildcard(tokens[1]) #does it contain '*' or '?'
+                          and 
+                          (tokens[1][0] != '{')) #(ignore * or ? in {})
+
+        if ((len(tokens) >= 2) and
+            (tokens[0].find('bond_coeff') == 0) and
+            (token1_is_re or token1_is_wild)):
+            left_paren, typepattern, text_after = ExtractVarName(tokens[1])
+            for btype in bond_types.Matching(typepattern, token1_is_re):
+                #assert(left_paren == '')
+                tokens[1] = btype + text_after
+                lines_new.append('@'.join(tokens) + '\n')
+
+        elif ((len(tokens) >= 2) and
+            (tokens[0].find('angle_coeff') == 0) and
+            (token1_is_re or token1_is_wild)):
+            left_paren, typepattern, text_after = ExtractVarName(tokens[1])
+            for antype in angle_types.Matching(typepattern, token1_is_re):
+                #assert(left_paren == '')
+                tokens[1] = antype + text_after
+                lines_new.append('@'.join(tokens) + '\n')
+
+        elif ((len(tokens) >= 2) and
+            (tokens[0].find('dihedral_coeff') == 0) and
+            (token1_is_re or token1_is_wild)):
+            left_paren, typepattern, text_after = ExtractVarName(tokens[1])
+            for dtype in dihedral_types.Matching(typepattern, token1_is_re):
+                #assert(left_paren == '')
+                tokens[1] = dtype + text_after
+                lines_new.append('@'.join(tokens) + '\n')
+
+        elif ((len(tokens) >= 2) and
+            (tokens[0].find('improper_coeff') == 0) and
+            (token1_is_re or token1_is_wild)):
+            left_paren, typepattern, text_after = ExtractVarName(tokens[1])
+            for itype in improper_types.Matching(typepattern, token1_is_re):
+                #assert(left_paren == '')
+                tokens[1] = itype + text_after
+                lines_new.append('@'.join(tokens) + '\n')
+
+        #elif ((len(tokens) >= 3) and
+        #      (tokens[0].find('pair_coeff') == 0) and
+        #      (HasWildcard(tokens[1]) or HasWildcard(tokens[2]))):
+        elif ((len(tokens) >= 2) and
+              (tokens[0].find('pair_coeff') == 0)):
+            # First deal with cases with only one @variable, such as:
+            #    pair_coeff @atom:A*   *       ...
+            #    pair_coeff    *     @atom:A*  ...
+            # (We don't deal with cases like "* *" because LAMMPS interprets
+            #  these in a special way:  manybody pair_styles use "* *")
+            if len(tokens) == 2:
+                if tokens[0].rstrip()[-1:] == '*':
+                    tokens[0] = tokens[0].rstrip()[:-1]
+                    tokens.insert(1, '/atom:* ')
+                else:
+                    ic = tokens[1].find(' * ')
+                    tokens.append('/atom:* '+tokens[1][ic+3:])
+                    tokens[1] = tokens[1][:ic]+' '
+           
+            assert(len(tokens) >= 3)
+            left_paren1,typepattern1,text_after1=ExtractVarName(tokens[1])
+
+            # Then deal with cases like this:
+            #  pair_coeff @{/atom:r1}*@{/atom:r3} @{/atom:r4}*@{/atom:r6}
+            # In this case we should be using ' ' as the delimeter, not '@'
+            # to separate the two arguments from eachother, since
+            #   @{/atom:r1}*@{/atom:r3} is the first argument, and
+            #   @{/atom:r4}*@{/atom:r6} is the second argument
+
+            # Check: Were there any whitespace characters in the text
+            #        separating token[1] from token[2]?
+            if ((left_paren1 == '{') and
+                (len(tokens) > 3) and
+                (len(text_after1) > 1) and
+                (not text_after1[-1].isspace())):
+                # If not, then tokens[1] and tokens[2] are both part of
+                # the 1st argument.
+                tokens[1] = tokens[1]+'@'+tokens[2]
+                left_paren1 = ''
+                text_after1 = ''
+                typepattern1 = tokens[1]
+                del tokens[2]
+
+            left_paren2,typepattern2,text_after2=ExtractVarName(tokens[2])
+            # Check: Were there any whitespace characters in the text
+            #        separating token[2] from what follows?
+            if ((left_paren2 == '{') and
+                (len(tokens) > 4) and
+                (len(text_after2) > 1) and
+                (not text_after2[-1].isspace())):
+                # If not, then tokens[2] and tokens[3] are both part of
+                # the 2nd argument.
+                tokens[2] = tokens[2]+'@'+tokens[3]
+                left_paren2 = ''
+                text_after2 = ''
+                typepattern2 = tokens[2]
+                del tokens[3]
+
+            ################
+            # If surrounded by '/' characters, the token is meant to be
+            # interpreted as a regular expression.
+            token1_is_re = HasRE(tokens[1])
+            token2_is_re = HasRE(tokens[2])
+            # If the token contains wildcard characters, interpret
+            # it as a wildcard (ie. glob) expression.
+            token1_is_wild = (HasWildcard(tokens[1])   #contain '*' or '?'
+                              and (tokens[1][0] != '{'))  #ignore * in {}
+            token2_is_wild = (HasWildcard(tokens[2])   #contain '*' or '?'
+                              and (tokens[2][0] != '{'))  #ignore * in {}
+            ################
+
+            if token1_is_re or token1_is_wild:
+                atom_types1 = atom_types.Matching(typepattern1, token1_is_re)
+            else:
+                atom_types1 = [t for t in [typepattern1]
+                               if MatchesPattern(t, typepattern1)]
+
+            if token2_is_re or token2_is_wild:
+                atom_types2 = atom_types.Matching(typepattern2, token2_is_re)
+            else:
+                atom_types2 = [t for t in [typepattern2]
+                               if MatchesPattern(t, typepattern2)]
+
+            for atype1 in atom_types1:
+                #sys.stderr.write('atype1 = \"'+str(atype1)+'\"\n')
+                #assert(left_paren1 == '')
+                tokens[1] = left_paren1 + atype1 + text_after1
+                for atype2 in atom_types2:
+                    #sys.stderr.write(' atype2 = \"'+str(atype2)+'\"\n')
+                    #assert(left_paren2 == '')
+                    tokens[2] = left_paren2 + atype2 + text_after2
+                    lines_new.append('@'.join(tokens) + '\n')
+        else:
+            lines_new.append(line_orig)
+
+    return lines_new
+
+
+
 def main():
     try:
         ap = argparse.ArgumentParser()
@@ -81,34 +355,7 @@ def main():
         bindings_filename = args.bindings_filename
         f = open(bindings_filename)
 
-        atom_types = set([])
-        bond_types = set([])
-        angle_types = set([])
-        dihedral_types = set([])
-        improper_types = set([])
-
-        #BasicUIReadBindingsStream(assignments, f, bindings_filename)
-
-        # The line above is robust but it uses far too much memory.
-        # This for loop below works for most cases.
-        for line in f:
-            #tokens = lines.strip().split()
-            # like split but handles quotes
-            tokens = SplitQuotedString(line.strip())
-            if len(tokens) < 2:
-                continue
-            if tokens[0].find('@') != 0:
-                continue
-            if tokens[0][2:].find('atom') == 0:
-                atom_types.add(tokens[0][1:])
-            elif tokens[0][2:].find('bond') == 0:
-                bond_types.add(tokens[0][1:])
-            elif tokens[0][2:].find('angle') == 0:
-                angle_types.add(tokens[0][1:])
-            elif tokens[0][2:].find('dihedral') == 0:
-                dihedral_types.add(tokens[0][1:])
-            elif tokens[0][2:].find('improper') == 0:
-                improper_types.add(tokens[0][1:])
+        coeff_types = ReadCoeffTypes(f)
 
         f.close()
         gc.collect()
@@ -124,179 +371,8 @@ def main():
         lex.commenters = ''            #(don't attempt to skip over comments)
         lex.line_extend_chars += '&'   #(because LAMMPS interprets '&' as '\')
 
-        while True:
-            line_orig = lex.ReadLine()
-            #sys.stderr.write('line_orig = \"'+str(line_orig)+'\"\n')
-            if (not line_orig) or (line_orig == ''):
-                break
-            tokens = line_orig.strip().split('@')
-            # If the second token is surrounded by '/' characters, interpret
-            # it as a regular expression.
-            token1_is_re = ((len(tokens) >= 2) and
-                            HasRE(tokens[1]))
-            # If the second token contains wildcard characters, interpret
-            # it as a wildcard (ie. glob) expression.
-            token1_is_wild = ((len(tokens) >= 2) and
-                              HasWildcard(tokens[1]) #does it contain '*' or '?'
-                              and 
-                              (tokens[1][0] != '{')) #(ignore * or ? in {})
-
-            if ((len(tokens) >= 2) and
-                (tokens[0].find('bond_coeff') == 0) and
-                (token1_is_re or token1_is_wild)):
-                left_paren, typepattern, text_after = ExtractVarName(tokens[1])
-                if token1_is_re:
-                    regex_str = VarNameToRegex(typepattern)
-                    typepattern = re.compile(regex_str)
-                for btype in bond_types:
-                    if MatchesPattern(btype, typepattern):
-                        #assert(left_paren == '')
-                        tokens[1] = btype + text_after
-                        sys.stdout.write('@'.join(tokens) + '\n')
-
-            elif ((len(tokens) >= 2) and
-                (tokens[0].find('angle_coeff') == 0) and
-                (token1_is_re or token1_is_wild)):
-                left_paren, typepattern, text_after = ExtractVarName(tokens[1])
-                if token1_is_re:
-                    regex_str = VarNameToRegex(typepattern)
-                    typepattern = re.compile(regex_str)
-                for antype in angle_types:
-                    if MatchesPattern(antype, typepattern):
-                        #assert(left_paren == '')
-                        tokens[1] = antype + text_after
-                        sys.stdout.write('@'.join(tokens) + '\n')
-
-            elif ((len(tokens) >= 2) and
-                (tokens[0].find('dihedral_coeff') == 0) and
-                (token1_is_re or token1_is_wild)):
-                left_paren, typepattern, text_after = ExtractVarName(tokens[1])
-                if token1_is_re:
-                    regex_str = VarNameToRegex(typepattern)
-                    typepattern = re.compile(regex_str)
-                for dtype in dihedral_types:
-                    if MatchesPattern(dtype, typepattern):
-                        #assert(left_paren == '')
-                        tokens[1] = dtype + text_after
-                        sys.stdout.write('@'.join(tokens) + '\n')
-
-            elif ((len(tokens) >= 2) and
-                (tokens[0].find('improper_coeff') == 0) and
-                (token1_is_re or token1_is_wild)):
-                left_paren, typepattern, text_after = ExtractVarName(tokens[1])
-                if token1_is_re:
-                    regex_str = VarNameToRegex(typepattern)
-                    typepattern = re.compile(regex_str)
-                for itype in improper_types:
-                    if MatchesPattern(itype, typepattern):
-                        #assert(left_paren == '')
-                        tokens[1] = itype + text_after
-                        sys.stdout.write('@'.join(tokens) + '\n')
-
-            #elif ((len(tokens) >= 3) and
-            #      (tokens[0].find('pair_coeff') == 0) and
-            #      (HasWildcard(tokens[1]) or HasWildcard(tokens[2]))):
-            elif ((len(tokens) >= 2) and
-                  (tokens[0].find('pair_coeff') == 0)):
-                # First deal with cases with only one @variable, such as:
-                #    pair_coeff @atom:A*   *       ...
-                #    pair_coeff    *     @atom:A*  ...
-                # (We don't deal with cases like "* *" because LAMMPS interprets
-                #  these in a special way:  manybody pair_styles use "* *")
-                if len(tokens) == 2:
-                    if tokens[0].rstrip()[-1:] == '*':
-                        tokens[0] = tokens[0].rstrip()[:-1]
-                        tokens.insert(1, '/atom:* ')
-                    else:
-                        ic = tokens[1].find(' * ')
-                        tokens.append('/atom:* '+tokens[1][ic+3:])
-                        tokens[1] = tokens[1][:ic]+' '
-               
-                assert(len(tokens) >= 3)
-                left_paren1,typepattern1,text_after1=ExtractVarName(tokens[1])
-
-                # Then deal with cases like this:
-                #  pair_coeff @{/atom:r1}*@{/atom:r3} @{/atom:r4}*@{/atom:r6}
-                # In this case we should be using ' ' as the delimeter, not '@'
-                # to separate the two arguments from eachother, since
-                #   @{/atom:r1}*@{/atom:r3} is the first argument, and
-                #   @{/atom:r4}*@{/atom:r6} is the second argument
-
-                # Check: Were there any whitespace characters in the text
-                #        separating token[1] from token[2]?
-                if ((left_paren1 == '{') and
-                    (len(tokens) > 3) and
-                    (len(text_after1) > 1) and
-                    (not text_after1[-1].isspace())):
-                    # If not, then tokens[1] and tokens[2] are both part of
-                    # the 1st argument.
-                    tokens[1] = tokens[1]+'@'+tokens[2]
-                    left_paren1 = ''
-                    text_after1 = ''
-                    typepattern1 = tokens[1]
-                    del tokens[2]
-
-                left_paren2,typepattern2,text_after2=ExtractVarName(tokens[2])
-                # Check: Were there any whitespace characters in the text
-                #        separating token[2] from what follows?
-                if ((left_paren2 == '{') and
-                    (len(tokens) > 4) and
-                    (len(text_after2) > 1) and
-                    (not text_after2[-1].isspace())):
-                    # If not, then tokens[2] and tokens[3] are both part of
-                    # the 2nd argument.
-                    tokens[2] = tokens[2]+'@'+tokens[3]
-                    left_paren2 = ''
-                    text_after2 = ''
-                    typepattern2 = tokens[2]
-                    del tokens[3]
-
-                ################
-                # If surrounded by '/' characters, the token is meant to be
-                # interpreted as a regular expression.
-                token1_is_re = HasRE(tokens[1])
-                token2_is_re = HasRE(tokens[2])
-                # If the token contains wildcard characters, interpret
-                # it as a wildcard (ie. glob) expression.
-                token1_is_wild = (HasWildcard(tokens[1])   #contain '*' or '?'
-                                  and (tokens[1][0] != '{'))  #ignore * in {}
-                token2_is_wild = (HasWildcard(tokens[2])   #contain '*' or '?'
-                                  and (tokens[2][0] != '{'))  #ignore * in {}
-                ################
-
-                if token1_is_re:
-                    atom_types1 = atom_types
-                    regex_str = VarNameToRegex(typepattern1)
-                    typepattern1 = re.compile(regex_str)
-                elif token1_is_wild:
-                    atom_types1 = atom_types
-                else:
-                    atom_types1 = set([typepattern1])
-
-                if token2_is_re:
-                    atom_types2 = atom_types
-                    regex_str = VarNameToRegex(typepattern2)
-                    typepattern2 = re.compile(regex_str)
-                elif token2_is_wild:
-                    atom_types2 = atom_types
-                else:
-                    atom_types2 = set([typepattern2])
-
-
-                for atype1 in atom_types1:
-                    #sys.stderr.write('atype1 = \"'+str(atype1)+'\"\n')
-                    if MatchesPattern(atype1, typepattern1):
-                        #assert(left_paren1 == '')
-                        tokens[1] = left_paren1 + atype1 + text_after1
-                        for atype2 in atom_types2:
-                            #sys.stderr.write(' atype2 = \"'+str(atype2)+'\"\n')
-                            if MatchesPattern(atype2, typepattern2):
-                                #assert(left_paren2 == '')
-                                tokens[2] = left_paren2 + atype2 + text_after2
-                                sys.stdout.write('@'.join(tokens) + '\n')
-            else:
-                sys.stdout.write(line_orig)
-
+        for line in ExpandCoeffWildcards(lex, coeff_types):
+            sys.stdout.write(line)
 
         # now close the file (if we opened it)
         if args.template is not None:
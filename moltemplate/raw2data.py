@@ -6,6 +6,7 @@
 # Copyright (c) 2014
 
 import sys, io
+import numpy as np
 
 try:
     from .dump2data import *
@@ -19,6 +20,154 @@ g_program_name = 'raw2data.py'
 g_date_str = '2022-1-06'
 g_version_str = 'v0.44.2'
 
+# Section names which can appear in a LAMMPS data file.  (The "Atoms" section
+# ends at the first one of these which follows it.)
+g_data_sections = lammps_data_sections | set(['Velocities', 'Ellipsoids',
+                                              'Lines', 'Triangles', 'Bodies',
+                                              'Pair Coeffs', 'PairIJ Coeffs',
+                                              'CMAP'])
+
+# Number of lines which are processed (and written) at once
+g_chunk_size = 65536
+
+
+def ReadRawFrames(in_coord_file, in_coord_file_name='stdin'):
+    """
+    Read the frames (separated by blank lines) from a file containing 3
+    columns of numbers (x,y,z coordinates).  Yield each frame as an N x 3
+    numpy array of strings (in the order they appear in the file).
+    """
+    while True:
+
+        line = '\n'
+        while (line != '') and (line.strip() == ''):
+            line = in_coord_file.readline()
+
+        if line == '':  # if EOF
+            break
+
+        frame_lines = []
+        while line.strip() != '':
+            frame_lines.append(line)
+            line = in_coord_file.readline()
+
+        # (The coordinates are kept as strings, so that they are copied
+        #  into the data file exactly as they appear in the coordinate file.)
+        rows = [line.split()[:3] for line in frame_lines]
+        try:
+            if any([len(tokens) != 3 for tokens in rows]):
+                raise ValueError
+            frame_crds = np.array(rows, dtype=str)
+            frame_crds.astype(float)
+        except ValueError:
+            raise InputError('Error(raw2data): The coordinate file \"' + in_coord_file_name + '\"\n'
+                             '       contains lines which do not have 3 numbers (x,y,z).\n')
+        yield frame_crds
+
+
+def WriteAtomLines(out_file, lines, num_atoms, crds,
+                   data_settings, ignore_atom_id):
+    """
+    Replace the x,y,z coordinates in a list of lines from the "Atoms" section
+    (with comments and surrounding whitespace already removed), and write
+    the resulting lines to out_file.  The coordinates of each atom are read
+    from the rows of the crds array.
+    If ignore_atom_id is True, the rows are used in the order the atoms
+    appear in the data file (num_atoms is the number of atoms which preceded
+    these lines).  Otherwise the atom whose ID is n receives row n-1.
+    Return the number of atoms in these lines.
+    """
+    i_x, i_y, i_z = data_settings.i_coords
+    i_max = max(i_x, i_y, i_z)
+    ncolumns = len(data_settings.column_names)
+    rows = [(i, line.split()) for i, line in enumerate(lines) if line != '']
+    if ignore_atom_id:
+        ii_crds = range(num_atoms, num_atoms + len(rows))
+    else:
+        ii_crds = [int(tokens[0]) - 1 if tokens[0].isdigit() else -1
+                   for i, tokens in rows]
+    replace = [(i, tokens, i_crd) for (i, tokens), i_crd in zip(rows, ii_crds)
+               if 0 <= i_crd < len(crds)]
+    if len(replace) > 0:
+        # Look up the new coordinates of all of these atoms at once
+        # (crds stores the original text of each number, so it is unchanged)
+        xyz_strs = crds[[i_crd for i, tokens, i_crd in replace]].astype(str)
+        for (i, tokens, i_crd), xyz in zip(replace, xyz_strs.tolist()):
+            if i_max >= len(tokens):
+                raise InputError('Error(raw2data): Atom style incompatible with data file.\n'
+                                 '       Specify the atom_style using -atomstyle style.\n')
+            tokens[i_x], tokens[i_y], tokens[i_z] = xyz
+            # There are no ix,iy,iz columns in the coordinate file,
+            # so don't include them in the data file either.
+            if len(tokens) == ncolumns + 3:
+                del tokens[-3:]
+            lines[i] = ' '.join(tokens)
+    out_file.write('\n'.join(lines) + '\n')
+    return len(rows)
+
+
+def WriteRawSnapshotToData(out_file, data_file, crds,
+                           data_settings, ignore_atom_id):
+    """
+    Read a LAMMPS DATA file (data_file) line by line and copy it to out_file,
+    replacing the coordinates in the "Atoms" section with the rows of crds
+    (an N x 3 array).  The lines are processed and written in chunks
+    (at most one section at a time), so the entire data file is never
+    stored in memory.
+    Return the number of atoms in the "Atoms" section.
+    """
+    section = ''
+    num_atoms = 0
+    atom_lines = []
+    out_lines = []
+    for line_orig in data_file:
+        ic = line_orig.find('#')
+        if ic != -1:
+            line = line_orig[:ic]
+        else:
+            line = line_orig
+        line = line.strip()
+
+        if line in g_data_sections:
+            # We have reached the end of the previous section.
+            if len(atom_lines) > 0:
+                num_atoms += WriteAtomLines(out_file, atom_lines,
+                                            num_atoms, crds,
+                                            data_settings, ignore_atom_id)
+                atom_lines = []
+            section = line
+            out_lines.append(line)
+            out_file.write('\n'.join(out_lines) + '\n')
+            out_lines = []
+        elif section == 'Atoms':
+            atom_lines.append(line)
+            if len(atom_lines) == g_chunk_size:
+                num_atoms += WriteAtomLines(out_file, atom_lines,
+                                            num_atoms, crds,
+                                            data_settings, ignore_atom_id)
+                atom_lines = []
+        else:
+            if ((len(line) > 0) and
+                (section != '') and
+                (section != 'Velocities')):
+                # Copy the text directly from the original data file
+                # (including comments) without modification.
+                line = line_orig.rstrip('\n')
+            out_lines.append(line)
+            if len(out_lines) == g_chunk_size:
+                out_file.write('\n'.join(out_lines) + '\n')
+                out_lines = []
+
+    if len(atom_lines) > 0:
+        num_atoms += WriteAtomLines(out_file, atom_lines,
+                                    num_atoms, crds,
+                                    data_settings, ignore_atom_id)
+    if len(out_lines) > 0:
+        out_file.write('\n'.join(out_lines) + '\n')
+
+    return num_atoms
+
+
     #######  Main Code Below: #######
 def main():
     sys.stderr.write(g_program_name + ' ' + g_version_str + ' ' + g_date_str)
@@ -31,15 +180,15 @@ def main():
 
         # First process any arguments which are specific to "raw2data.py"
         # (and remove them before passing them to dump2data.ParseArgs())
-        sort_data_file_by_atom_id = False
+        ignore_atom_id = False
         argv = [arg for arg in sys.argv]
         i = 1
         while i < len(argv):
             if argv[i].lower() == '-ignore-atom-id':
-                sort_data_file_by_atom_id = True
+                ignore_atom_id = True
                 del argv[i:i+1]
-            if argv[i].lower() == '-sort':
-                sort_data_file_by_atom_id = False
+            elif argv[i].lower() == '-sort':
+                ignore_atom_id = False
                 del argv[i:i+1]
             else:
                 i += 1
@@ -49,100 +198,35 @@ def main():
         ParseArgs(argv,
                   misc_settings,
                   data_settings,
-                  warning_strings)
-
-        frame_atom_order = []
-
-        # The atoms in the "Atoms" section of the data file might be out 
-        # of order. Extract the text from that section, and figure out the 
-        # atom-ID assigned to each atom (number in the first column).
-        # Then assign the these atom-ID numbers to entries in the 
-        # coordinates list (frame_coords) in the same order.  We want the
-        # lines of text in the coordinate file to pasted to the end of
-        # the lines of text in the "Atoms" section of the data file
-        # in the same order, regardless of the atom-ID numbers in that file.
-        # Counterintuitively, the only way to do that is to assign the same
-        # atom-ID numbers to the coordinate list in frame_coords".  So we
-        # have to extract those numbers from the data file.
-        in_atoms_section = False
-        num_blank_lines = 0
-        for line in data_settings.contents:
-            ic = line.find('#')
-            line = line[:ic]    #(this also removes the newline character)
-            tokens = line.strip().split()
-            if line.strip() == 'Atoms':
-                in_atoms_section = True
-            elif line.strip() in lammps_data_sections:
-                in_atoms_section = False
-            elif in_atoms_section:
-                if len(tokens) > 0:
-                    if sort_data_file_by_atom_id:
-                        atomid = tokens[0]
-                        frame_atom_order.append(atomid)
-                        #sys.stderr.write('atomid=\"'+str(atomid)+'\"\n')
-                    else:
-                        frame_atom_order.append(str(len(frame_atom_order)+1))
-                else:
-                    num_blank_lines += 1
-                    if num_blank_lines > 1:
-                        in_atoms_section = False
-
-        frame_coords = defaultdict(list)
-        frame_coords_ixiyiz = defaultdict(list)
-        frame_vects = defaultdict(list)
-        frame_velocities = defaultdict(list)
-        frame_xlo_str = frame_xhi_str = None
-        frame_ylo_str = frame_yhi_str = None
-        frame_zlo_str = frame_zhi_str = None
-        frame_xy_str = frame_xz_str = frame_yz_str = None
-        frame_natoms = -1
-        frame_timestep_str = ''
-        i_atomid = i_atomtype = i_molid = -1
-        i_x = i_y = i_z = i_xu = i_yu = i_zu = -1
-        i_xs = i_ys = i_zs = i_xsu = i_ysu = i_zsu = -1
-
-        dump_column_names = []
-
-        #num_frames_in = -1
+                  warning_strings,
+                  read_data_file=False)
+
+        # The atoms in the "Atoms" section of the data file might be out
+        # of order.  By default, the coordinates on line n of the coordinate
+        # file are assigned to the atom whose ID number is n.
+        # If "-ignore-atom-id" was specified, the coordinates are instead
+        # assigned to the atoms in the order they appear in the data file,
+        # regardless of the atom-ID numbers in that file.
+
         num_frames_out = 0
-        finished_reading_frame = False
-        read_last_frame = False
-
-        in_coord_file = sys.stdin
-        #in_coord_file = open('tmp_atom_coords.dat','r')
-
-        read_last_frame = False
-        while True:
-
-            line = '\n'
-            while (line != '') and (line.strip() == ''):
-                line = in_coord_file.readline()
-
-            if line == '':  # if EOF
-                break
-
-            #frame_vects = defaultdict(list)
-            frame_coords = defaultdict(list)
-            while line.strip() != '':
-                n_crds = len(frame_coords)
-                #sys.stdout.write("n_crds="+str(n_crds)+": \""+line.strip()+"\"\n")
-                atomid = frame_atom_order[n_crds]
-                frame_coords[atomid] = line.split()
-                #frame_coords_ixiyiz[atomid] = ['0','0','0']
-                #frame_vects[atomid] = ['0.0','0.0','0.0']
-                line = in_coord_file.readline()
-
-            # Check to see if there are any blank lines at this location in the file
-            # If there are, it means we are at a new "frame" (in the trajectory).
-            # Skip over any blank line(s) separating this frame from the next frame
-            # so that the next time we enter the loop, we are at the beginning
-            # of a new frame.
-            while (line != '') and (line.strip() == ''):
-                line = in_coord_file.readline()
+
+        if misc_settings.in_coord_file_name.endswith('.npy'):
+            # This binary file (created by lttree_coords.py) contains a
+            # single frame, stored as an N x 3 array of byte strings.
+            in_frames = [np.load(misc_settings.in_coord_file_name)]
+        else:
+            if misc_settings.in_coord_file_name != '':
+                in_coord_file = open(misc_settings.in_coord_file_name, 'r')
+                in_frames = ReadRawFrames(in_coord_file,
+                                          misc_settings.in_coord_file_name)
+            else:
+                in_frames = ReadRawFrames(sys.stdin)
+
+        for frame_crds in in_frames:
 
             # Parse the DATA file specified by the user
-            # and replace appropriate lines or fields with
-            # the corresponding text from the input file.
+            # and replace the coordinates in the "Atoms" section
+            # with the corresponding coordinates from the input file.
             if misc_settings.multi:
                 out_file_name = data_settings.file_name + '.'\
                     + str(num_frames_out)
@@ -151,22 +235,21 @@ def main():
             else:
                 out_file = sys.stdout
 
-            WriteSnapshotToData(out_file,
-                                None,
-                                misc_settings,
-                                data_settings,
-                                None,
-                                frame_natoms,
-                                frame_coords,
-                                None, #frame_coords_ixiyiz,
-                                frame_vects,
-                                frame_velocities,
-                                None,
-                                None,
-                                frame_xlo_str, frame_xhi_str,
-                                frame_ylo_str, frame_yhi_str,
-                                frame_zlo_str, frame_zhi_str,
-                                frame_xy_str, frame_xz_str, frame_yz_str)
+            with open(data_settings.file_name, 'r') as data_file:
+                num_atoms = WriteRawSnapshotToData(out_file,
+                                                   data_file,
+                                                   frame_crds,
+                                                   data_settings,
+                                                   ignore_atom_id)
+            if out_file is not sys.stdout:
+                out_file.close()
+            num_frames_out += 1
+
+            if len(frame_crds) > num_atoms:
+                raise InputError('Error(raw2data): The coordinate file contains more atoms ('
+                                 + str(len(frame_crds)) + ')\n'
+                                 '       than the \"Atoms\" section of the data file ('
+                                 + str(num_atoms) + ').\n')
 
     except (ValueError, InputError) as err:
         sys.stderr.write('\n' + str(err) + '\n')
@@ -22,50 +22,73 @@ except (ImportError, SystemError, ValueError):
     # not installed as a package
     from ttree_lex import SplitQuotedString
 
+def _AtomID(line_orig):
+    """
+    Return the atom ID (the first word) of a line of text from the
+    "Atoms" section, or None if the line is blank (or contains only a comment).
+    """
+    line = line_orig.rstrip('\n')
+    if '#' in line_orig:
+        ic = line.find('#')
+        line = line_orig[:ic]
+
+    # Split the line into words (tokens) using whitespace delimeters
+    tokens = SplitQuotedString(line,
+                               quotes='{',
+                               endquote='}')
+    if len(tokens) > 0:
+        return tokens[0]
+    return None
+
+
+def LastAtomLines(lines):
+    """
+    Read the lines of text (from any iterable, such as a file) in a single
+    pass.  Return a list of flags (a bytearray) indicating which lines to
+    keep.  A line is kept if it is the last line referring to its atom.
+    (Blank lines are discarded.)
+    """
+    atomid2iline = {}
+    nlines = 0
+    for line_orig in lines:
+        atom_id = _AtomID(line_orig)
+        if atom_id != None:
+            atomid2iline[atom_id] = nlines
+        nlines += 1
+    keep = bytearray(nlines)
+    for i in atomid2iline.values():
+        keep[i] = 1
+    return keep
+
+
+def RemoveDuplicateAtoms(lines):
+    """
+    Remove the lines (from a list of lines of text) which refer to an atom
+    which appears again later in the list.  Blank lines are also removed.
+    (The list is modified in place, and also returned to the caller.)
+    """
+    # If duplicate lines exist, eliminate the ones that occur earlier in the
+    # file.  (Deleting them one at a time would take O(n^2) time.)
+    keep = LastAtomLines(lines)
+    lines[:] = [line for line, k in zip(lines, keep) if k]
+    return lines
+
+
 def main():
-    in_stream = sys.stdin
-    f = None
-    fname = None
     if len(sys.argv) == 2:
+        # If we were given a file name, we can read it twice instead of
+        # storing the contents of the file in memory.
         fname = sys.argv[1]
-        f = open(fname, 'r')
-        in_stream = f
-
-    atom_ids_in_use = set([])
-
-    lines = in_stream.readlines()
-
-    # Start at the end of the file and read backwards.
-    # If duplicate lines exist, eliminate the ones that occur earlier in the file.
-    i = len(lines)
-    while i > 0:
-        i -= 1
-        line_orig = lines[i]
-        line = line_orig.rstrip('\n')
-        if '#' in line_orig:
-            ic = line.find('#')
-            line = line_orig[:ic]
-
-        # Split the line into words (tokens) using whitespace delimeters
-        tokens = SplitQuotedString(line,
-                                   quotes='{',
-                                   endquote='}')
-
-        if len(tokens) > 0:
-            atom_id = tokens[0]
-            if atom_id in atom_ids_in_use:
-                del lines[i]
-            else:
-                atom_ids_in_use.add(atom_id)
-        else:
-            del lines[i]
-
-
-    for line in lines:
-        sys.stdout.write(line)
-
-    if f != None:
-        f.close()
+        with open(fname, 'r') as f:
+            keep = LastAtomLines(f)
+        with open(fname, 'r') as f:
+            for line, k in zip(f, keep):
+                if k:
+                    sys.stdout.write(line)
+    else:
+        lines = RemoveDuplicateAtoms(sys.stdin.readlines())
+        for line in lines:
+            sys.stdout.write(line)
 
     return
 
@@ -26,39 +26,30 @@ except (ImportError, SystemError, ValueError):
     from ttree_lex import SplitQuotedString
 
 
-def main():
-    in_stream = sys.stdin
-
-    interaction_style = ""
-    log_warning_filename = ""
-    filter_id_str = ""
-    filter_type_str = ""
-    if len(sys.argv) > 1:
-        n = int(sys.argv[1])
-    if len(sys.argv) > 3:
-        interaction_style = sys.argv[2]  # eg. "Dihedral"
-        log_warning_filename = sys.argv[3]  # eg. "warning_duplicate_dihedrals.txt"
-    if len(sys.argv) > 4:
-        filter_id_str = sys.argv[4]  # eg. "bytype"
-    if len(sys.argv) > 5:
-        filter_type_str = sys.argv[5]  # eg. "__"
-    if (len(sys.argv) not in (2,4,5,6)) or (n < 1):
-        sys.stderr.write(
-            'Error (remove_duplicates_nbody.py): expected 1,3,4, or 5 arguments.\n')
-        sys.exit(-1)
-
-    # Keep track of what interaction(s) were assigned to each set of atoms
+def RemoveDuplicatesNbody(lines,
+                          n,
+                          interaction_style="",
+                          log_warning_filename="",
+                          filter_id_str="",
+                          filter_type_str=""):
+    """
+    Remove the lines (from a list of lines of text) describing an n-body
+    interaction between a set of atoms which also appear together in a
+    later line.  Blank lines are also removed.  If log_warning_filename
+    is not "", a description of the discarded interactions is written to
+    that file.  (The list is modified in place and returned to the caller.)
+    """
+    # Keep track of the last line assigned to each set of atoms.
+    atomids2iline = {}  # of type Dict[Tuple[str], int]
+    # If we are reporting duplicates, also keep track of all of the
+    # interactions assigned to each set of atoms (in the order they appear).
     atomids2interactions = defaultdict(list)  # Dict[Tuple[str], List[str])
-    atomids2interaction = {}  # of type Dict[Tuple[str], str]
 
-    lines = in_stream.readlines()
-
-    # Start at the end of the file and read backwards.
-    # If duplicate lines exist, eliminate the ones that occur earlier in the file.
-    i = len(lines)
-    while i > 0:
-        i -= 1
-        line_orig = lines[i]
+    # Read the file in a single pass.  Lines which are blank, or which refer
+    # to a set of atoms which appears again later, are marked for deletion.
+    # (Deleting them one at a time would take O(n^2) time.)
+    keep = bytearray(len(lines))
+    for i, line_orig in enumerate(lines):
         line = line_orig.rstrip('\n')
         if '#' in line_orig:
             ic = line.find('#')
@@ -70,21 +61,20 @@ def main():
                                    endquote='}')
 
         if len(tokens) == 0:
-            del lines[i]  # skip blank lines
+            continue  # skip blank lines
         elif len(tokens) == 2 + n:
             atom_ids = tuple(tokens[2:2 + n])
-            if atom_ids in atomids2interactions:
-                # If an interaction already exists between these atoms
-                # then delete this one (this line)
-                del lines[i]
-            else:
-                # Then this is the remaining interaction assigned to these atoms
-                atomids2interaction[atom_ids] = line
-            # Also keep track of all the interactions we did not keep.
-            atomids2interactions[atom_ids].append(line)
-
-    for line in lines:
-        sys.stdout.write(line)
+            # If an interaction already exists between these atoms
+            # then delete the earlier one
+            iprev = atomids2iline.get(atom_ids)
+            if iprev != None:
+                keep[iprev] = 0
+            atomids2iline[atom_ids] = i
+            if log_warning_filename != "":
+                atomids2interactions[atom_ids].append(line)
+        keep[i] = 1
+
+    lines[:] = [line for line, k in zip(lines, keep) if k]
 
     # This portion of the code generates warning messages when duplicate
     # interactions were deleted.  But the code is a little confusing because
@@ -94,10 +84,16 @@ def main():
     if log_warning_filename != "":
         with open(log_warning_filename, 'w') as log_warning:
             # Did the user ask us to report duplicates?
-            for atom_ids, interactions in atomids2interactions.items():
+            # (List them in reverse order of the line that was kept.)
+            for atom_ids in sorted(atomids2interactions,
+                                   key=atomids2iline.get,
+                                   reverse=True):
+                interactions = atomids2interactions[atom_ids]
                 if len(interactions) == 1:
                     continue
-                chosen_interaction = atomids2interaction[atom_ids]
+                # (The interaction which appears last is the one we kept.)
+                interactions.reverse()
+                chosen_interaction = interactions[0]
                 chosen_interaction_tokens = chosen_interaction.split()
                 interaction_id = chosen_interaction_tokens[0]  # eg. "$/dihedral:bytype6910"
                 interaction_type = chosen_interaction_tokens[1]  # eg. "@/dihedral:OPLSAA/HC_CM_CM_HC"
@@ -122,7 +118,7 @@ def main():
                     f"    "
                     + "\n    ".join([int_str.split()[1] for int_str in interactions]) + "\n"
                     f"  ...but only this {interaction_style.lower()} type was kept:\n"
-                    f"    {atomids2interaction[atom_ids].split()[1]}\n"
+                    f"    {chosen_interaction_tokens[1]}\n"
                     f"  Was this the correct {interaction_style.lower()} type for these atoms?\n"
                     f"  If not, create an explicit {interaction_style.lower()} interaction between those atoms\n"
                     f"  in the \"Data {interaction_style}\" section of your molecule to override this choice.\n"
@@ -132,6 +128,41 @@ def main():
             # In that case, delete the file:
             if os.stat(log_warning_filename).st_size == 0:
                 os.remove(log_warning_filename)
+
+    return lines
+
+
+def main():
+    in_stream = sys.stdin
+
+    interaction_style = ""
+    log_warning_filename = ""
+    filter_id_str = ""
+    filter_type_str = ""
+    if len(sys.argv) > 1:
+        n = int(sys.argv[1])
+    if len(sys.argv) > 3:
+        interaction_style = sys.argv[2]  # eg. "Dihedral"
+        log_warning_filename = sys.argv[3]  # eg. "warning_duplicate_dihedrals.txt"
+    if len(sys.argv) > 4:
+        filter_id_str = sys.argv[4]  # eg. "bytype"
+    if len(sys.argv) > 5:
+        filter_type_str = sys.argv[5]  # eg. "__"
+    if (len(sys.argv) not in (2,4,5,6)) or (n < 1):
+        sys.stderr.write(
+            'Error (remove_duplicates_nbody.py): expected 1,3,4, or 5 arguments.\n')
+        sys.exit(-1)
+
+    lines = RemoveDuplicatesNbody(in_stream.readlines(),
+                                  n,
+                                  interaction_style,
+                                  log_warning_filename,
+                                  filter_id_str,
+                                  filter_type_str)
+
+    for line in lines:
+        sys.stdout.write(line)
+
     return
 
 
@@ -16,62 +16,100 @@
 """
 
 import sys
-from operator import itemgetter
-
-def main():
-    in_stream = sys.stdin
-    f = None
-    fname = None
-    if len(sys.argv) == 2:
-        fname = sys.argv[1]
-        f = open(fname, 'r')
-        in_stream = f
-
-
-    lines = in_stream.readlines()
-    column1_iorig_columnsAfter1 = []
-
-    # Start at the end of the file and read backwards.
-    # If duplicate lines exist, eliminate the ones that occur earlier in the file.
-    i = 0
-    while i < len(lines):
-        line_orig = lines[i]
-        line = line_orig.rstrip('\n')
-        comment = ''
-        if '#' in line_orig:
-            ic = line.find('#')
-            line = line_orig[:ic]
-            comment = ' ' + line_orig[ic:].rstrip('\n')
-
-        tokens = line.strip().split()
+from array import array
+import numpy as np
+
+
+def _SplitLine(line_orig):
+    """
+    Split a line of text into words (tokens), and a comment (if present).
+    """
+    line = line_orig.rstrip('\n')
+    comment = ''
+    if '#' in line_orig:
+        ic = line.find('#')
+        line = line_orig[:ic]
+        comment = ' ' + line_orig[ic:].rstrip('\n')
+    return line.strip().split(), comment
+
+
+def FirstColumnRanks(lines):
+    """
+    Read the lines of text (from any iterable, such as a file) in a single
+    pass, and return the new number which should replace the number in the
+    first column of each (non-blank) line.  These are consecutive integers
+    (starting at 1), in the same order as the original numbers.
+    (Lines with the same number are kept in their original order.)
+    """
+    # If every entry in the first column is an integer, store them in an
+    # array of 64-bit integers (and sort them using numpy).  Otherwise
+    # fall back to sorting a list of python objects.
+    column1 = array('q')
+    for line_orig in lines:
+        tokens, comment = _SplitLine(line_orig)
         if len(tokens) > 0:
             if str.isdigit(tokens[0]):
-                column1 = int(tokens[0])
+                key = int(tokens[0])
             else:
-                column1 = tokens[0]
-            column1_iorig_columnsAfter1.append(
-                [column1, i, ' '.join(tokens[1:]) + comment])
-        i += 1
-
-    # Sort the list of lines by the first number on each line
-
-    column1_iorig_columnsAfter1.sort(key=itemgetter(0))
-
-    # Change all of these numbers so that they are consecutive starting at 1
-    for i in range(0, len(column1_iorig_columnsAfter1)):
-        column1_iorig_columnsAfter1[i][0] = i + 1
+                key = tokens[0]
+            if isinstance(column1, array):
+                try:
+                    column1.append(key)
+                    continue
+                except (TypeError, OverflowError):
+                    column1 = list(column1)
+            column1.append(key)
+
+    N = len(column1)
+    if isinstance(column1, array):
+        order = np.argsort(np.frombuffer(column1, dtype=np.int64),
+                           kind='stable')
+        ranks = np.empty(N, dtype=np.int64)
+        ranks[order] = np.arange(1, N + 1)
+    else:
+        order = sorted(range(N), key=column1.__getitem__)
+        ranks = [0] * N
+        for i in range(0, N):
+            ranks[order[i]] = i + 1
+    return ranks
+
+
+def RenumberLines(lines, ranks):
+    """
+    Replace the first column of each (non-blank) line with the
+    corresponding entry from "ranks" (see FirstColumnRanks()).
+    This generator yields the new lines of text.  (Blank lines are omitted.)
+    """
+    i = 0
+    for line_orig in lines:
+        tokens, comment = _SplitLine(line_orig)
+        if len(tokens) > 0:
+            yield str(ranks[i]) + ' ' + ' '.join(tokens[1:]) + comment + '\n'
+            i += 1
 
-    # Sort the list of lines so they are back in the original order
 
-    column1_iorig_columnsAfter1.sort(key=itemgetter(1))
+def RenumberFirstColumn(lines):
+    """
+    Replace the numbers in the first column of each (non-blank) line
+    with consecutive integers (starting at 1), preserving their order.
+    Returns a list of the new lines of text.  (Blank lines are omitted.)
+    """
+    return list(RenumberLines(lines, FirstColumnRanks(lines)))
 
-    for i in range(0, len(column1_iorig_columnsAfter1)):
-        column1 = column1_iorig_columnsAfter1[i][0]
-        columnsAfter1 = column1_iorig_columnsAfter1[i][2]
-        sys.stdout.write(str(column1) + ' ' + columnsAfter1 + '\n')
 
-    if f != None:
-        f.close()
+def main():
+    if len(sys.argv) == 2:
+        # If we were given a file name, read it twice (instead of
+        # storing the contents of the file in memory).
+        fname = sys.argv[1]
+        with open(fname, 'r') as f:
+            ranks = FirstColumnRanks(f)
+        with open(fname, 'r') as f:
+            for line in RenumberLines(f, ranks):
+                sys.stdout.write(line)
+    else:
+        for line in RenumberFirstColumn(sys.stdin.readlines()):
+            sys.stdout.write(line)
 
     return
 
@@ -94,6 +94,9 @@ ttree.py
 lttree.py
 lttree_check.py
 lttree_postprocess.py
+lttree_data_header.py
+lttree_coords.py
+pipeline.py
 nbody_by_type.py
 nbody_fix_ttree_assignments.py
 nbody_reorder_atoms.py
@@ -128,6 +131,8 @@ IFS=$OIFS
 LTTREE_COMMAND="$PYTHON_COMMAND \"${PY_SCR_DIR}/lttree.py\""
 
 # command that invokes lttree_check.py
+# (lttree.py performs the same checks when invoked with "-checksyntax",
+#  so this is only used to decide whether or not to check for mistakes.)
 LTTREE_CHECK_COMMAND="$PYTHON_COMMAND \"${PY_SCR_DIR}/lttree_check.py\""
 
 # command that invokes lttree_postprocess.py
@@ -209,8 +214,7 @@ postprocess="Postprocess"
 #     automatically in order to build a LAMMPS data file.
 # ---------------------------------------------------------------
 
-tmp_atom_coords="tmp_atom_coords.dat"  #<-temporary file for storing coordinates
-tmp_dump="tmp_dump.dat"
+tmp_atom_coords="tmp_atom_coords.npy"  #<-temporary file for storing coordinates
 tmp_ellips_quat="tmp_ellips_quat.dat"
 
 
@@ -218,7 +222,6 @@ MOLTEMPLATE_TEMP_FILES=$(cat <<EOF
 *.template
 ttree_assignments.txt
 $tmp_atom_coords
-$tmp_dump
 $tmp_ellips_quat
 $data_masses
 $data_pair_coeffs
@@ -352,6 +355,15 @@ Optional arguments:
                 commands to obey standard naming conventions.  The "-nocheck"
                 argument bypasses these checks and eliminates these restrictions.
 
+-import-cache DIRECTORY
+                Save a parsed copy of every file loaded using "import" in
+                DIRECTORY, so that large force-field files do not have to be
+                parsed again next time.  (Setting the MOLTEMPLATE_CACHE_DIR
+                environment variable has the same effect.)  This directory
+                should not be writable by other users.  Old entries are
+                deleted when the cache exceeds 256MB.
+                ("-no-import-cache" disables the cache.)
+
 -checkff        This cause moltemplate.sh to check to make sure that there
                 are valid angle and dihedral interactions defined for every
                 3 or 4 consecutively bonded atoms in the system
@@ -379,6 +391,9 @@ Optional arguments:
                             See nbody_Dihedrals.py, nbody_Impropers.py (in the
                             moltemplate directory) to learn the file format.
 
+-jobs N         Use N processes when searching for angles, dihedrals, and
+                impropers (by type).  (Molecules are searched in parallel.)
+
 -molc           Additional post-processing for the file "In Settings". This
                 options implicitly sets "-overlay-bonds".
 
@@ -427,7 +442,7 @@ fi
 
 # --- Did the user specify a file containing atomic coordinates?
 
-rm -f "$tmp_atom_coords" "$tmp_dump" "$tmp_ellips_quat"
+rm -f "$tmp_atom_coords" "$tmp_ellips_quat"
 
 # Optional files containing atom coordinates:
 PDB_FILE=""
@@ -451,6 +466,7 @@ RD_ID_FILTER=""
 RD_TYPE_FILTER=""
 SETTINGS_MOLC=""
 CHECKFF=""
+NBODY_JOBS=""
 RUN_VMD_AT_END=""
 APPEND_EXAMPLE_SCRIPT=""
 
@@ -523,6 +539,14 @@ while [ "$i" -lt "$ARGC" ]; do
         i=$((i+1))
         eval A=\${ARGV${i}}
         RD_TYPE_FILTER="$A"
+    elif [ "$A" = "-jobs" ]; then
+        if [ "$i" -eq "$ARGC" ]; then
+            echo "ERROR: Expected a number following the -jobs argument" >&2
+            exit 7
+        fi
+        i=$((i+1))
+        eval A=\${ARGV${i}}
+        NBODY_JOBS="$A"
     elif [ "$A" = "-vmd" ]; then
         RUN_VMD_AT_END="true"
     elif [ "$A" = "-molc" ]; then
@@ -556,7 +580,10 @@ while [ "$i" -lt "$ARGC" ]; do
             exit 8
         fi
         #echo "  (extracting coordinates from \"$RAW_FILE\")" >&2
-        awk '{if (NF==3) {print $0}}' < "$RAW_FILE" > "$tmp_atom_coords"
+        if ! COORD_SETTINGS=`$PYTHON_COMMAND "${PY_SCR_DIR}/lttree_coords.py" -raw "$RAW_FILE" "$tmp_atom_coords"`; then
+            exit 8
+        fi
+        eval "$COORD_SETTINGS"
 
     elif [ "$A" = "-bond-symmetry" ]; then
         # Change the atom ordering rules in a 2-body bonded interaction:
@@ -631,12 +658,10 @@ while [ "$i" -lt "$ARGC" ]; do
             exit 8
         fi
         #echo "  (extracting coordinates from \"$XYZ_FILE\")" >&2
-
-        # "isnum(x)" returns 1 or 0 depending upon whether or not
-        # a string is numeric.
-        #http://rosettacode.org/wiki/Determine_if_a_string_is_numeric#AWK
-
-        awk '{if (NR>2) {if (NF==4) {print $2" "$3" "$4} else {if (NF==3) {print $1" "$2" "$3}}}}' < "$XYZ_FILE" > "$tmp_atom_coords"
+        if ! COORD_SETTINGS=`$PYTHON_COMMAND "${PY_SCR_DIR}/lttree_coords.py" -xyz "$XYZ_FILE" "$tmp_atom_coords"`; then
+            exit 8
+        fi
+        eval "$COORD_SETTINGS"
 
     elif [ "$A" = "-pdb" ]; then
         if [ "$i" -eq "$ARGC" ]; then
@@ -655,72 +680,14 @@ while [ "$i" -lt "$ARGC" ]; do
             exit 10
         fi
         #echo "  (extracting coordinates from \"$PDB_FILE\")" >&2
-        if grep -q '^ATOM  \|^HETATM' "$PDB_FILE"; then
-            # Extract the coordinates from the PDB file:
-
-            # COMMENT:
-            # I used to sort the PDB file by (ChainID,SeqNum,InsertCode)
-            # and then extract the coordinates from the file.
-            # This turned out to be inconvenient for users.  Instead
-            # just read the coordinates in the order they appear in the file:
 
-            awk '/^ATOM  |^HETATM/{print substr($0,31,8)" "substr($0,39,8)" "substr($0,47,8)}' \
-                < "$PDB_FILE" \
-                > "$tmp_atom_coords"
-
-        else
-            echo "$SYNTAX_MSG" >&2
-            echo "-----------------------" >&2
-            echo "" >&2
-            echo "Error: File \"$PDB_FILE\" is not a valid PDB file." >&2
+        # Extract the coordinates from the PDB file (in the order they
+        # appear in the file), and the periodic bounding-box information
+        # (from the CRYST1 record, if present).
+        if ! COORD_SETTINGS=`$PYTHON_COMMAND "${PY_SCR_DIR}/lttree_coords.py" -pdb "$PDB_FILE" "$tmp_atom_coords"`; then
             exit 11
         fi
-        # Now extract the periodic bounding-box informatio from the PDB file
-        # The CRYST1 records are described at:
-        # http://deposit.rcsb.org/adit/docs/pdb_atom_format.html
-        BOXSIZE_A=-1.0
-        BOXSIZE_B=-1.0
-        BOXSIZE_C=-1.0
-        ALPHA=" 90.00"  #Note: The space before the number in " 90.00" is intentional.
-        BETA=" 90.00"   #      Later we will check to see if the system is triclinic
-        GAMMA=" 90.00"  #      by comparing these strings for equality with " 90.00"
-        if grep -qF "CRYST1" "$PDB_FILE"; then
-            BOXSIZE_A=`awk '/CRYST1/{print substr($0,8,8)}' < "$PDB_FILE"`
-            BOXSIZE_B=`awk '/CRYST1/{print substr($0,17,8)}' < "$PDB_FILE"`
-            BOXSIZE_C=`awk '/CRYST1/{print substr($0,26,8)}' < "$PDB_FILE"`
-            ALPHA=`awk '/CRYST1/{print substr($0,35,6)}' < "$PDB_FILE"`
-            BETA=`awk '/CRYST1/{print substr($0,42,6)}' < "$PDB_FILE"`
-            GAMMA=`awk '/CRYST1/{print substr($0,49,6)}' < "$PDB_FILE"`
-        fi
-        if [ `echo "$ALPHA!=90.0"|bc` -eq 1 ] || [ `echo "$BETA!=90.0"|bc` -eq 1 ] || [ `echo "$GAMMA!=90.0"|bc` -eq 1 ]; then
-            # I transform the parameters from one format to the other by inverting
-            # the transformation formula from the LAMMPS documentation 
-            # https://docs.lammps.org/Howto_triclinic.html  (which matches
-            # http://www.ccl.net/cca/documents/molecular-modeling/node4.html)
-            TRICLINIC="true"
-            PI=3.1415926535897931
-            BOXSIZE_X=$BOXSIZE_A
-            BOXSIZE_Y=`awk -v PI="$PI" -v BOXSIZE_B="$BOXSIZE_B" -v GAMMA="$GAMMA" 'BEGIN{print BOXSIZE_B*sin(GAMMA*PI/180.0)}'`
-            BOXSIZE_XY=`awk -v PI="$PI" -v BOXSIZE_B="$BOXSIZE_B" -v GAMMA="$GAMMA" 'BEGIN{print BOXSIZE_B*cos(GAMMA*PI/180.0)}'`
-            BOXSIZE_XZ=`awk -v PI="$PI" -v BOXSIZE_C="$BOXSIZE_C" -v BETA="$BETA"   'BEGIN{print BOXSIZE_C*cos(BETA*PI/180.0)}'`
-            BOXSIZE_YZ=`awk -v PI="$PI" -v BOXSIZE_C="$BOXSIZE_C" -v ALPHA="$ALPHA" -v BETA="$BETA" -v GAMMA="$GAMMA" 'BEGIN{ca=cos(ALPHA*PI/180.0); cb=cos(BETA*PI/180.0); cg=cos(GAMMA*PI/180.0); sg=sin(GAMMA*PI/180.0); print BOXSIZE_C*(ca-(cg*cb))/sg}'`
-            BOXSIZE_Z=`awk -v PI="$PI" -v BOXSIZE_C="$BOXSIZE_C" -v ALPHA="$ALPHA" -v BETA="$BETA" -v GAMMA="$GAMMA" 'BEGIN{ca=cos(ALPHA*PI/180.0); cb=cos(BETA*PI/180.0); cg=cos(GAMMA*PI/180.0); sg=sin(GAMMA*PI/180.0); print BOXSIZE_C*sqrt(1.0+2*ca*cb*cg-ca*ca-cb*cb-cg*cg)/sg}'`
-            #BOXSIZE_Z=`awk -v BOXSIZE_C="$BOXSIZE_C" -v BOXSIZE_XZ="$BOXSIZE_XZ" -v BOXSIZE_YZ="$BOXSIZE_YZ" 'BEGIN{print sqrt((BOXSIZE_C*BOXSIZE_C)-((BOXSIZE_XZ*BOXSIZE_XZ)+(BOXSIZE_YZ*BOXSIZE_YZ)))}'`
-            # Note: The two expressions for "BOXSIZE_Z" are algebraically equivalent.
-        else
-            BOXSIZE_X=$BOXSIZE_A
-            BOXSIZE_Y=$BOXSIZE_B
-            BOXSIZE_Z=$BOXSIZE_C
-            BOXSIZE_XY=0.0
-            BOXSIZE_XZ=0.0
-            BOXSIZE_YZ=0.0
-        fi
-        BOXSIZE_MINX=0.0
-        BOXSIZE_MINY=0.0
-        BOXSIZE_MINZ=0.0
-        BOXSIZE_MAXX=$BOXSIZE_X
-        BOXSIZE_MAXY=$BOXSIZE_Y
-        BOXSIZE_MAXZ=$BOXSIZE_Z
+        eval "$COORD_SETTINGS"
 
     # Contributing author for read DUMP: Otello M Roscioni.
     elif [ "$A" = "-dump" ]; then
@@ -740,75 +707,14 @@ while [ "$i" -lt "$ARGC" ]; do
             exit 8
         fi
 
-        # Reorder the last frame of a DUMP file, as the atoms are dumped randomly.
-        last=$(head -4 "$DUMP_FILE" | awk 'NR==4{print $1+9}')
-        tail -$last "$DUMP_FILE" | head -9 > "$tmp_dump"
-        tail -$last "$DUMP_FILE" | tail -n+10 | sort -n >> "$tmp_dump"
-
-        # Read the box
-        IFS=$CR
-        box=( $(head -8 "$tmp_dump" | awk 'NR>5{for (i=1;i<=NF;i++){printf "%g\n",$i}}') )
-
-        # Find the columns of: position, quaternion, velocity, and angular momentum.
-        pos=( $(sed -n '9p;9q' "$tmp_dump" | awk '{for(i=1; i<=NF; i++){if($i~/^[xyz]/){printf "%i\n",i-2} }}') )
-        # Quaternion order:
-	# (I,J,K,W) from "compute orient all property/atom quati quatj quatk quatw"
-	# (W,I,J,K) from "compute q      all property/atom quatw quati quatj quatk"
-	quat=( $(sed -n '9p;9q' "$tmp_dump" | awk '{for(i=1; i<=NF; i++){
-               if(                         $i~/^qw$/||$i~/^quatw$/||$i~/^c_q\[1\]$/||$i~/^c_orient\[4\]$/){qo[1]=i-2}
-               if($i~/^qi$/||$i~/^quati$/||$i~/^qx$/||$i~/^quatx$/||$i~/^c_q\[2\]$/||$i~/^c_orient\[1\]$/){qo[2]=i-2}
-               if($i~/^qj$/||$i~/^quatj$/||$i~/^qy$/||$i~/^quaty$/||$i~/^c_q\[3\]$/||$i~/^c_orient\[2\]$/){qo[3]=i-2}
-               if($i~/^qk$/||$i~/^quatk$/||$i~/^qz$/||$i~/^quatz$/||$i~/^c_q\[4\]$/||$i~/^c_orient\[3\]$/){qo[4]=i-2}
-               }}END{for(i in qo){printf "%i\n",qo[i]}}') )
-        vel=( $(sed -n '9p;9q' "$tmp_dump" | awk '{for(i=1; i<=NF; i++){if($i~/v[xyz]/){printf "%i\n",i-2} }}') )
-        angmom=( $(sed -n '9p;9q' "$tmp_dump" | awk '{for(i=1; i<=NF; i++){if($i~/angmom[xyz]/||$i~/AngularMomentum[XYZ]/){printf "%i\n",i-2} }}') )
-        IFS=$OIFS
-
-        # Orthorombic box.
-        if [ ${#box[@]} == 6 ]; then
-          BOXSIZE_MINX=${box[0]}
-          BOXSIZE_MAXX=${box[1]}
-          BOXSIZE_MINY=${box[2]}
-          BOXSIZE_MAXY=${box[3]}
-          BOXSIZE_MINZ=${box[4]}
-          BOXSIZE_MAXZ=${box[5]}
-        fi
-
-        # Triclinic box.
-        # For triclinic systems the first two columns of "ITEM: BOX BOUNDS" in 
-        # the dump describe a bounding box around the system, not the system 
-        # itself. See https://docs.lammps.org/dump.html and https://docs.lammps.org/Howto_triclinic.html
-        if [ ${#box[@]} == 9 ]; then
-          xtilt=( $(echo "0.0 ${box[2]} ${box[5]} $(bc -l<<<${box[2]}+${box[5]})"|xargs -n1|sort -n) )
-          ytilt=( $(echo "0.0 ${box[8]}"|xargs -n1|sort -n) )
-          BOXSIZE_MINX=$(echo ${box[0]}" "${xtilt[0]} |awk '{print $1-$2}')
-          BOXSIZE_MAXX=$(echo ${box[1]}" "${xtilt[3]} |awk '{print $1-$2}')
-          BOXSIZE_MINY=$(echo ${box[3]}" "${ytilt[0]} |awk '{print $1-$2}')
-          BOXSIZE_MAXY=$(echo ${box[4]}" "${ytilt[1]} |awk '{print $1-$2}')
-          BOXSIZE_MINZ=${box[6]}
-          BOXSIZE_MAXZ=${box[7]}
-          BOXSIZE_XY=${box[2]}
-          BOXSIZE_XZ=${box[5]}
-          BOXSIZE_YZ=${box[8]}
-          TRICLINIC="true"
-        fi
-
-        # Save the coordinates.
-        awk -v x=${pos[0]} -v y=${pos[1]} -v z=${pos[2]} 'NR>9{print $x" "$y" "$z}' "$tmp_dump" > "$tmp_atom_coords"
-
-        # Save the orientations. Make sure that the columns reserved for quaternions are not used to store velocities.
-        if [[ ${#quat[@]} == 4 ]]; then 
-           awk -v qw=${quat[0]} -v qx=${quat[1]} -v qy=${quat[2]} -v qz=${quat[3]} 'NR>9{print $qw" "$qx" "$qy" "$qz}' "$tmp_dump" > "$tmp_ellips_quat"
+        # Extract the coordinates and the box from the last frame of the
+        # DUMP file (sorting the atoms, since they are dumped randomly).
+        # Save the orientations and velocities (if present) too.
+        if ! COORD_SETTINGS=`$PYTHON_COMMAND "${PY_SCR_DIR}/lttree_coords.py" -dump "$DUMP_FILE" "$tmp_atom_coords" -quat "$tmp_ellips_quat" -vel "$data_velocities"`; then
+            exit 8
         fi
+        eval "$COORD_SETTINGS"
 
-        # Save the velocities and, if present, angular momenta too.
-        if [[ ${#vel[@]} == 3 && ${#angmom[@]} == 0 ]]; then 
-           awk -v vx=${vel[0]} -v vy=${vel[1]} -v vz=${vel[2]} 'NR>9{print $1 " "$vx" "$vy" "$vz}' "$tmp_dump" > "$data_velocities"
-
-        elif [[ ${#vel[@]} == 3 && ${#angmom[@]} == 3 ]]; then 
-           awk -v vx=${vel[0]} -v vy=${vel[1]} -v vz=${vel[2]} -v ax=${angmom[0]} -v ay=${angmom[1]} -v az=${angmom[2]} 'NR>9{print $1 " "$vx" "$vy" "$vz" "$ax" "$ay" "$az}' "$tmp_dump" > "$data_velocities"
-        fi
-    
     elif [ "$A" = "-atomstyle" ] || [ "$A" = "-atom-style" ] || [ "$A" = "-atom_style" ]; then
         if [ "$i" -eq "$ARGC" ]; then
             echo "$SYNTAX_MSG" >&2
@@ -946,19 +852,23 @@ done
 
 
 
-# If checking is not disabled, then first check for common spelling errors.
+# If checking is not disabled, then lttree.py also checks for common
+# spelling errors (using the class definitions it has already parsed).
 
 if [ -n "$LTTREE_CHECK_COMMAND" ]; then
-    if ! eval $LTTREE_CHECK_COMMAND $TTREE_ARGS $LTTREE_CHECK_ARGS; then
-        exit 1
-    fi
+    LTTREE_COMMAND="$LTTREE_COMMAND -checksyntax $LTTREE_CHECK_ARGS"
 fi
 
 #   --- Run ttree. ---
 #
 # 3, 2, 1, ...
 
-if ! eval $LTTREE_COMMAND $TTREE_ARGS; then
+eval $LTTREE_COMMAND $TTREE_ARGS
+LTTREE_STATUS=$?
+if [ $LTTREE_STATUS -eq 1 ] && [ -n "$LTTREE_CHECK_COMMAND" ]; then
+    # (A syntax error was found while checking the files for mistakes.)
+    exit 1
+elif [ $LTTREE_STATUS -ne 0 ]; then
     exit 2
 fi
 
@@ -980,37 +890,22 @@ echo "" >&2
 # Invoking the $LTTREE_COMMAND should generate a file ("ttree_assignments.txt")
 # containing all of the "counter" variables (counters corresponding to
 # atoms, bonds, atom-types, bond-types, etc...).
-# Later, it will be convenient to create a version of this file
-# which only contains static counter variables
-# (ie. counter variables beginning with @, not $).
-awk '/@/ {print $0}' < ttree_assignments.txt > ttree_assignments_static.txt
 
 
 
 # Now count the number of atom-types, bond-types, angle-types, etc...
 
 # Find the number of atom types, bond types, angle types, dihedra types, etc...
-# The next line will count the number of times "@/atom" appears in the file:
-NATOMTYPES=`awk 'BEGIN{n=0} /^@\/atom:/{n++}END{print n}' < ttree_assignments.txt`
-NBONDTYPES=`awk 'BEGIN{n=0} /^@\/bond:/{n++}END{print n}' < ttree_assignments.txt`
-NANGLETYPES=`awk 'BEGIN{n=0} /^@\/angle:/{n++}END{print n}' < ttree_assignments.txt`
-NDIHEDRALTYPES=`awk 'BEGIN{n=0} /^@\/dihedral:/{n++}END{print n}' < ttree_assignments.txt`
-NIMPROPERTYPES=`awk 'BEGIN{n=0} /^@\/improper:/{n++}END{print n}' < ttree_assignments.txt`
-
-# The next line will count the number of times "@{/atom" appears in the file:
-NATOMTYPES_SP=`awk 'BEGIN{n=0} /^@{\/atom:/{n++}END{print n}' < ttree_assignments.txt`
-NBONDTYPES_SP=`awk 'BEGIN{n=0} /^@{\/bond:/{n++}END{print n}' < ttree_assignments.txt`
-NANGLETYPES_SP=`awk 'BEGIN{n=0} /^@{\/angle:/{n++}END{print n}' < ttree_assignments.txt`
-NDIHEDRALTYPES_SP=`awk 'BEGIN{n=0} /^@{\/dihedral:/{n++}END{print n}' < ttree_assignments.txt`
-NIMPROPERTYPES_SP=`awk 'BEGIN{n=0} /^@{\/improper:/{n++}END{print n}' < ttree_assignments.txt`
-# Add these numbers together to get the total number of times either
-# "@{atom" or "@{/atom" appears in the ttree_assignments.txt file.
-# This is the number of different atom types in the system.
-NATOMTYPES=$((NATOMTYPES + NATOMTYPES_SP))
-NBONDTYPES=$((NBONDTYPES + NBONDTYPES_SP))
-NANGLETYPES=$((NANGLETYPES + NANGLETYPES_SP))
-NDIHEDRALTYPES=$((NDIHEDRALTYPES + NDIHEDRALTYPES_SP))
-NIMPROPERTYPES=$((NIMPROPERTYPES + NIMPROPERTYPES_SP))
+# This is the number of times either "@/atom:" or "@{/atom:" (or "@/bond:",
+# "@{/bond:", ...) appears at the beginning of a line in the
+# ttree_assignments.txt file.  (All of these are counted in a single pass,
+# along with the number of atoms, ie. the lines beginning with "$/atom:" or
+# "${/atom:".  The result is a list of shell variable assignments:
+# NATOMTYPES=..., etc., and NATOMS=...)
+if ! TYPE_COUNTS=`$PYTHON_COMMAND "${PY_SCR_DIR}/lttree_data_header.py" -count-types ttree_assignments.txt`; then
+    ERR_INTERNAL
+fi
+eval "$TYPE_COUNTS"
 
 
 # OMR: Moltemplate can handle the creation of valid input decks for LAMMPS even
@@ -1033,7 +928,8 @@ NIMPROPERTYPES=$((NIMPROPERTYPES + NIMPROPERTYPES_SP))
 
 IFS=$CR
 for file in $MOLTEMPLATE_TEMP_FILES; do
-    if [ -e "$file" ]; then
+    # (Skip "$tmp_atom_coords".  It is a binary file, not a text file.)
+    if [ -e "$file" ] && [ "$file" != "$tmp_atom_coords" ]; then
         #dos2unix < "$file" > "$file.dos2unix"
         tr -d '\r' < "$file" > "$file.dos2unix"
         rm -f "$file" >/dev/null 2>&1 || true
@@ -1055,37 +951,18 @@ if [ -s "${postprocess}.template" ]; then
     else
         files=("${data_atoms}")
     fi
+    # (Render all of them at once, so ttree_assignments.txt is only read once.)
+    render_args=()
     for f in "${files[@]}"; do
-        if ! $PYTHON_COMMAND "${PY_SCR_DIR}/ttree_render.py" \
-            ttree_assignments.txt \
-            < "${f}.template" \
-            > "${f}"; then
-            ERR_INTERNAL
-        fi
+        render_args+=("${f}.template" "${f}")
     done
-fi
-
-if [ -s "${data_atoms}" ]; then
-    if ! $PYTHON_COMMAND "${PY_SCR_DIR}/remove_duplicate_atoms.py" \
-                                   < "${data_atoms}" \
-                                   > "${data_atoms}.tmp"; then
-        ERR_INTERNAL
-    fi
-    mv -f "${data_atoms}.tmp" "${data_atoms}"
-    if ! $PYTHON_COMMAND "${PY_SCR_DIR}/remove_duplicate_atoms.py" \
-                                   < "${data_atoms}.template" \
-                                   > "${data_atoms}.tmp"; then
+    if ! $PYTHON_COMMAND "${PY_SCR_DIR}/ttree_render.py" \
+        ttree_assignments.txt "${render_args[@]}"; then
         ERR_INTERNAL
     fi
-    mv -f "${data_atoms}.tmp" "${data_atoms}.template"
+fi
 
-    if ! $PYTHON_COMMAND "${PY_SCR_DIR}/renumber_DATA_first_column.py" \
-                                       < "${data_atoms}" \
-                                       > "${data_atoms}.tmp"; then
-        ERR_INTERNAL
-    fi
-    mv -f "${data_atoms}.tmp" "${data_atoms}"
-else
+if [ ! -s "${data_atoms}" ]; then
     if [[ $NATOMTYPES -eq 0 ]] && [[ -n "$LTTREE_CHECK_COMMAND" ]]; then
         echo "Error: There are no atoms in your system. Suggestions:" >&2
         echo "" >&2
@@ -1115,1042 +992,96 @@ fi
 
 
 
-# ---------------- Interactions By Type -----------------
-# At the time of writing, bonded-interactions-by-atom-type were not
-# understood by LAMMPS.  These features require auxilliary python scripts.
-# These data sections must be processed before everything else (because
-# they effect the other data sections, and the ttree_assignments.txt file.)
-# -------------------------------------------------------
-
-if [ -s "${data_bond_list}.template" ]; then
-
-    if [ ! -s "$data_bonds_by_type" ]; then
-        echo "Error: You have a \"Data Bond List\", section somewhere"
-        echo "       without a \"Data Bonds By Type\" section to support it."
-        echo "       (Did you mean to use \"Data Bonds\" instead?)"
-        echo "Details:"
-        echo "       Unlike the \"Data Bonds\" section, the \"Data Bond List\" section"
-        echo "       allows the user to omit the bond types.  Instead moltemplate attempts"
-        echo "       to infer the type of bond by considering the pair of atom types."
-        echo "       However you must define a \"Data Bonds By Type\" section"
-        echo "       to make this feature work (or use \"Data Bonds\" instead)."
-
-        exit 15
-    fi
-    echo "Looking up bond types according to atom type" >&2
-    #-- Generate a file containing bondid bondtype atomid1 atomid2 --
-    if ! $PYTHON_COMMAND "${PY_SCR_DIR}/bonds_by_type.py" \
-            -atom-style "$ATOM_STYLE" \
-            -atoms "${data_atoms}.template" \
-            -bond-list "${data_bond_list}.template" \
-            -bondsbytype "${data_bonds_by_type}.template" \
-            -prefix '$/bond:bytype' > gen_bonds.template.tmp; then
-        exit 4
-    fi
-
-    # ---- cleanup: ----
-    # ---- Create or re-build the "${data_bonds}.template" file ----
-    # Instert these lines into the "${data_bonds}.template" file which includes
-    # the newly generated interactions. (Note: these are in .template format)
-
-    cp gen_bonds.template.tmp new_bonds.template.tmp
-    if [ -s "${data_bonds}.template" ]; then
-        # Then append existing "Bonds" to the end of the generated interactions
-        # (Hopefully this way they will override those interactions.)
-        cat "${data_bonds}.template" >> new_bonds.template.tmp
-    fi
-    mv -f new_bonds.template.tmp "${data_bonds}.template"
-
-
-
-    #  ------  THE NEXT STEP IS NOT CURRENTLY NEEDED ------
-    # All of the $bond variables have already been created, they just lack types
-    # However we will need to do this if the user wants to omits the bond-ids.
-    # In case I plan to allow the user to omit bond-ids, I leave this code here.
-    #
-    #echo "(Repairing ttree_assignments.txt file after bonds added.)" >&2
-    #
-    ## ---- Repair the ttree_assignments.txt file ----
-    ## The next 2 lines extract the variable names from data_new.template.tmp
-    ## and instert them into the appropriate place in ttree_assignments.txt
-    ## (renumbering the relevant variable-assignments to avoid clashes).
-    #if ! $PYTHON_COMMAND "${PY_SCR_DIR}/nbody_fix_ttree_assignments.py" \
-    #      '/bond' gen_bonds.template.tmp \
-    #      < ttree_assignments.txt \
-    #      > ttree_assignments.tmp; then
-    #    exit 5
-    #fi
-    #
-    #echo "(Rendering ttree_assignments.tmp file after bonds added.)" >&2
-    #mv -f ttree_assignments.tmp ttree_assignments.txt
-    #  ----------------------------------------------------
-
-
-
-    # ---- Re-build (render) the "$data_bonds" file ----
-    # Now substitute these variable values (assignments) into the variable
-    # names present in the .template file.  (We want to convert the file from
-    # a .template format into an ordinary (numeric) LAMMPS data-section format.)
-
-    if ! $PYTHON_COMMAND "${PY_SCR_DIR}/ttree_render.py" \
-           ttree_assignments.txt \
-           < "${data_bonds}.template" \
-           > "$data_bonds"; then
-        exit 6
-    fi
-
-    echo "" >&2
-
-    rm -f gen_bonds.template.tmp new_bonds.template.tmp
-
-    echo "" >&2
-
-fi
-
-
-
-
-
-
-FILE_angles_by_type1=""
-FILE_angles_by_type2=""
-#for FILE in "$data_angles_by_type"*.template; do
-
-IFS=$(echo -en "\n\b")
-for FILE in `ls -v "$data_angles_by_type"*.template 2> /dev/null`; do
-
-    if [ ! -s "$FILE" ] || [ ! -s "$data_bonds" ]; then
-        break;  # This handles with the special cases that occur when
-                # 1) There are no bonds in your system
-                # 2) "$data_angles_by_type"*.template matches nothing
-    fi
-
-    echo "Generating 3-body angle interactions by atom/bond type" >&2
 
-    # Extract the text between parenthesis (if present, empty-str otherwise)
-    # Example: FILE="Data Angles By Type (gaff_angle.py)"
-    SUBGRAPH_SCRIPT=`echo "$FILE" | awk '/\(.*\)/ {print $0}' | cut -d'(' -f2-| cut -d')' -f 1`
-    # Example: (continued) SUBGRAPH_SCRIPT should equal "gaff_angle.py"
-
-    # The user can also override this choice:
-    if [ -n "$SUBGRAPH_SCRIPT_ANGLES" ]; then
-        SUBGRAPH_SCRIPT="$SUBGRAPH_SCRIPT_ANGLES"
-    elif [ -n "$SUBGRAPH_SCRIPT" ]; then
-        SUBGRAPH_SCRIPT_ANGLES="$SUBGRAPH_SCRIPT"
-    fi
-
-    if [ -z "$SUBGRAPH_SCRIPT" ]; then
-        SUBGRAPH_SCRIPT="nbody_Angles.py"
-    else
-        echo "(using the rules in \"$SUBGRAPH_SCRIPT\")" >&2
-        # if [ ! -s "${PY_SCR_DIR}/nbody_alt_symmetry/$SUBGRAPH_SCRIPT" ]; then
-        #     echo "Error: File \"$SUBGRAPH_SCRIPT\" not found." >&2
-            #     echo "       It should be located in this directory:" >&2
-        #     echo "       ${PY_SCR_DIR}/nbody_alt_symmetry/" >&2
-        #     exit 4
-        # fi
-    fi
-
-    FILE_angles_by_type2="$FILE_angles_by_type1"
-    FILE_angles_by_type1="$FILE"
-
-    #-- Generate a file containing the list of interactions on separate lines --
-    if ! $PYTHON_COMMAND "${PY_SCR_DIR}/nbody_by_type.py" \
-            -subgraph "${SUBGRAPH_SCRIPT}" \
-            -section "Angles" \
-            -sectionbytype "Angles By Type" \
-            -atom-style "$ATOM_STYLE" \
-            -atoms "${data_atoms}.template" \
-            -bonds "${data_bonds}.template" \
-            -nbodybytype "${FILE}" \
-            $CHECKFF \
-            -prefix '$/angle:bytype' > gen_angles.template.tmp; then
-        exit 4
-    fi
-
-    # ---- cleanup: ----
-    # ---- Re-build the "${data_angles}.template" file ----
-    # Instert these lines into the "${data_angles}.template" file which includes
-    # the newly generated interactions. (Note: these are in .template format)
-
-    cp gen_angles.template.tmp new_angles.template.tmp
-    if [ -s "${data_angles}.template" ]; then
-        # Then append existing "Angles" to the end of the generated interactions
-        # (Hopefully this way they will override those interactions.)
-        cat "${data_angles}.template" >> new_angles.template.tmp
-    fi
-    mv -f new_angles.template.tmp "${data_angles}.template"
-
-    echo "(Repairing ttree_assignments.txt file after angles added.)" >&2
-
-    # ---- Repair the ttree_assignments.txt file ----
-    # The next 2 lines extract the variable names from data_new.template.tmp
-    # and instert them into the appropriate place in ttree_assignments.txt
-    # (renumbering the relevant variable-assignments to avoid clashes).
-    if ! $PYTHON_COMMAND "${PY_SCR_DIR}/nbody_fix_ttree_assignments.py" \
-          '/angle' gen_angles.template.tmp \
-          < ttree_assignments.txt \
-          > ttree_assignments.tmp; then
-        exit 5
-    fi
-
-    echo "(Rendering ttree_assignments.tmp file after angles added.)" >&2
-
-    # ---- Re-build (render) the "$data_angles" file ----
-    # Now substitute these variable values (assignments) into the variable
-    # names present in the .template file.  (We want to convert the file from
-    # a .template format into an ordinary (numeric) LAMMPS data-section format.)
-    if ! $PYTHON_COMMAND "${PY_SCR_DIR}/ttree_render.py" \
-           ttree_assignments.tmp \
-           < "${data_angles}.template" \
-           > "$data_angles"; then
-        exit 6
-    fi
-    echo "" >&2
-
-    mv -f ttree_assignments.tmp ttree_assignments.txt
-    rm -f gen_angles.template.tmp new_angles.template.tmp
-done
-IFS=$OIFS
-
-
-
-FILE_dihedrals_by_type1=""
-FILE_dihedrals_by_type2=""
-#for FILE in "$data_dihedrals_by_type"*.template; do
-IFS=$(echo -en "\n\b")
-for FILE in `ls -v "$data_dihedrals_by_type"*.template 2> /dev/null`; do
-
-    if [ ! -s "$FILE" ] || [ ! -s "$data_bonds" ]; then
-        break;  # This handles with the special cases that occur when
-                # 1) There are no bonds in your system
-                # 2) "$data_dihedrals_by_type"*.template matches nothing
-    fi
-
-    echo "Generating 4-body dihedral interactions by atom/bond type" >&2
-
-    # Extract the text between parenthesis (if present, empty-str otherwise)
-    # Example: FILE="Data Dihedrals By Type (gaff_dih.py)"
-    SUBGRAPH_SCRIPT=`echo "$FILE" | awk '/\(.*\)/ {print $0}' | cut -d'(' -f2-| cut -d')' -f 1`
-    # Example: (continued) SUBGRAPH_SCRIPT should equal "gaff_dih.py"
-
-    # The user can also override this choice:
-    if [ -n "$SUBGRAPH_SCRIPT_DIHEDRALS" ]; then
-        SUBGRAPH_SCRIPT="$SUBGRAPH_SCRIPT_DIHEDRALS"
-    elif [ -n "$SUBGRAPH_SCRIPT" ]; then
-        SUBGRAPH_SCRIPT_DIHEDRALS="$SUBGRAPH_SCRIPT"
-    fi
-
-    if [ -z "$SUBGRAPH_SCRIPT" ]; then
-        SUBGRAPH_SCRIPT="nbody_Dihedrals.py"
-    else
-        echo "(using the rules in \"$SUBGRAPH_SCRIPT\")" >&2
-        # if [ ! -s "${PY_SCR_DIR}/nbody_alt_symmetry/$SUBGRAPH_SCRIPT" ]; then
-        #     echo "Error: File \"$SUBGRAPH_SCRIPT\" not found." >&2
-            # echo "       It should be located in this directory:" >&2
-        #     echo "       ${PY_SCR_DIR}/nbody_alt_symmetry/" >&2
-        #     exit 4
-        # fi
-    fi
-
-    FILE_dihedrals_by_type2="$FILE_dihedrals_by_type1"
-    FILE_dihedrals_by_type1="$FILE"
-
-    #-- Generate a file containing the list of interactions on separate lines --
-    if ! $PYTHON_COMMAND "${PY_SCR_DIR}/nbody_by_type.py" \
-            -subgraph "${SUBGRAPH_SCRIPT}" \
-            -section "Dihedrals" \
-            -sectionbytype "Dihedrals By Type" \
-            -atom-style "$ATOM_STYLE" \
-            -atoms "${data_atoms}.template" \
-            -bonds "${data_bonds}.template" \
-            -nbodybytype "${FILE}" \
-            $CHECKFF \
-            -prefix '$/dihedral:bytype' > gen_dihedrals.template.tmp; then
-        exit 4
-    fi
-
-    # ---- cleanup: ----
-    # ---- Re-build the "${data_dihedrals}.template" file ----
-    # Instert these lines into the "${data_dihedrals}.template" file which includes
-    # the newly generated interactions. (Note: these are in .template format)
-
-    cp gen_dihedrals.template.tmp new_dihedrals.template.tmp
-    if [ -s "${data_dihedrals}.template" ]; then
-        # Then append existing "Dihedrals" to the end of the generated interactions
-        # (Hopefully this way they will override those interactions.)
-        cat "${data_dihedrals}.template" >> new_dihedrals.template.tmp
-    fi
-    mv -f new_dihedrals.template.tmp "${data_dihedrals}.template"
-
-    echo "(Repairing ttree_assignments.txt file after dihedrals added.)" >&2
-
-    # ---- Repair the ttree_assignments.txt file ----
-    # The next 2 lines extract the variable names from data_new.template.tmp
-    # and instert them into the appropriate place in ttree_assignments.txt
-    # (renumbering the relevant variable-assignments to avoid clashes).
-    if ! $PYTHON_COMMAND "${PY_SCR_DIR}/nbody_fix_ttree_assignments.py" \
-          '/dihedral' gen_dihedrals.template.tmp \
-          < ttree_assignments.txt \
-          > ttree_assignments.tmp; then
-        exit 5
-    fi
-
-    echo "(Rendering ttree_assignments.tmp file after dihedrals added.)" >&2
-
-    # ---- Re-build (render) the "$data_dihedrals" file ----
-    # Now substitute these variable values (assignments) into the variable
-    # names present in the .template file.  (We want to convert the file from
-    # a .template format into an ordinary (numeric) LAMMPS data-section format.)
-    if ! $PYTHON_COMMAND "${PY_SCR_DIR}/ttree_render.py" \
-           ttree_assignments.tmp \
-           < "${data_dihedrals}.template" \
-           > "$data_dihedrals"; then
-        exit 6
-    fi
-    echo "" >&2
-
-    mv -f ttree_assignments.tmp ttree_assignments.txt
-    rm -f gen_dihedrals.template.tmp new_dihedrals.template.tmp
-done
-IFS=$OIFS
-
-
-
-
-
-FILE_impropers_by_type1=""
-FILE_impropers_by_type2=""
-#for FILE in "$data_impropers_by_type"*.template; do
-IFS=$(echo -en "\n\b")
-for FILE in `ls -v "$data_impropers_by_type"*.template 2> /dev/null`; do
-
-    if [ ! -s "$FILE" ] || [ ! -s "$data_bonds" ]; then
-        break;  # This handles with the special cases that occur when
-                # 1) There are no bonds in your system
-                # 2) "$data_impropers_by_type"*.template matches nothing
-    fi
-
-    echo "Generating 4-body improper interactions by atom/bond type" >&2
-
-    # Extract the text between parenthesis (if present, empty-str otherwise)
-    # Example: FILE="Data Impropers By Type (gaff_impr.py)"
-    SUBGRAPH_SCRIPT=`echo "$FILE" | awk '/\(.*\)/ {print $0}' | cut -d'(' -f2-| cut -d')' -f 1`
-    # Example: (continued) SUBGRAPH_SCRIPT should equal "gaff_impr.py"
-
-    # The user can also override this choice:
-    if [ -n "$SUBGRAPH_SCRIPT_IMPROPERS" ]; then
-        SUBGRAPH_SCRIPT="$SUBGRAPH_SCRIPT_IMPROPERS"
-    elif [ -n "$SUBGRAPH_SCRIPT" ]; then
-        SUBGRAPH_SCRIPT_IMPROPERS="$SUBGRAPH_SCRIPT"
-    fi
-
-    if [ -z "$SUBGRAPH_SCRIPT" ]; then
-        SUBGRAPH_SCRIPT="nbody_Impropers.py"
-    else
-        echo "(using the rules in \"$SUBGRAPH_SCRIPT\")" >&2
-        # if [ ! -s "${PY_SCR_DIR}/nbody_alt_symmetry/$SUBGRAPH_SCRIPT" ]; then
-        #     echo "Error: File \"$SUBGRAPH_SCRIPT\" not found." >&2
-            # echo "       It should be located in this directory:" >&2
-        #     echo "       ${PY_SCR_DIR}/nbody_alt_symmetry/" >&2
-        #     exit 4
-        # fi
-    fi
-
-    FILE_impropers_by_type2="$FILE_impropers_by_type1"
-    FILE_impropers_by_type1="$FILE"
-
-    #-- Generate a file containing the list of interactions on separate lines --
-    if ! $PYTHON_COMMAND "${PY_SCR_DIR}/nbody_by_type.py" \
-            -subgraph "${SUBGRAPH_SCRIPT}" \
-            -section "Impropers" \
-            -sectionbytype "Impropers By Type" \
-            -atom-style "$ATOM_STYLE" \
-            -atoms "${data_atoms}.template" \
-            -bonds "${data_bonds}.template" \
-            -nbodybytype "${FILE}" \
-            -prefix '$/improper:bytype' > gen_impropers.template.tmp; then
-        exit 4
-    fi
-
-    # ---- cleanup: ----
-    # ---- Re-build the "${data_impropers}.template" file ----
-    # Instert these lines into the "${data_impropers}.template" file which includes
-    # the newly generated interactions. (Note: these are in .template format)
-
-    cp gen_impropers.template.tmp new_impropers.template.tmp
-    if [ -s "${data_impropers}.template" ]; then
-        # Then append existing "Impropers" to the end of the generated interactions
-        # (Hopefully this way they will override those interactions.)
-        cat "${data_impropers}.template" >> new_impropers.template.tmp
-    fi
-    mv -f new_impropers.template.tmp "${data_impropers}.template"
-
-    echo "(Repairing ttree_assignments.txt file after impropers added.)" >&2
-
-    # ---- Repair the ttree_assignments.txt file ----
-    # The next 2 lines extract the variable names from data_new.template.tmp
-    # and instert them into the appropriate place in ttree_assignments.txt
-    # (renumbering the relevant variable-assignments to avoid clashes).
-    if ! $PYTHON_COMMAND "${PY_SCR_DIR}/nbody_fix_ttree_assignments.py" \
-          '/improper' gen_impropers.template.tmp \
-          < ttree_assignments.txt \
-          > ttree_assignments.tmp; then
-        exit 5
-    fi
-
-    echo "(Rendering ttree_assignments.tmp file after impropers added.)" >&2
-
-    # ---- Re-build (render) the "$data_impropers" file ----
-    # Now substitute these variable values (assignments) into the variable
-    # names present in the .template file.  (We want to convert the file from
-    # a .template format into an ordinary (numeric) LAMMPS data-section format.)
-    if ! $PYTHON_COMMAND "${PY_SCR_DIR}/ttree_render.py" \
-           ttree_assignments.tmp \
-           < "${data_impropers}.template" \
-           > "$data_impropers"; then
-        exit 6
-    fi
-    echo "" >&2
-
-    mv -f ttree_assignments.tmp ttree_assignments.txt
-    rm -f gen_impropers.template.tmp new_impropers.template.tmp
-done
-IFS=$OIFS
-
-
-
-# Find all the files created by lttree.py containing lines beginning with 
-# "pair_coeff", "bond_coeff", "angle_coeff", "dihedral_coeff", "improper_coeff".
-# These files need to be processed further.
-
-
-OUT_FILES_WITH_COEFF_COMMANDS=""
-for f in *.template; do
-    HAS_COEFF_COMMANDS=`awk 'BEGIN{has_coeffs=0} {if ((NF>0)&&(($1=="pair_coeff")||($1=="bond_coeff")||($1=="angle_coeff")||($1=="dihedral_coeff")||($1=="improper_coeff"))) has_coeffs=1} END{print has_coeffs}' < "$f"`
-    if [ "$HAS_COEFF_COMMANDS" -eq "1" ]; then
-        if [ -n "$OUT_FILES_WITH_COEFF_COMMANDS" ]; then
-            printf -v OUT_FILES_WITH_COEFF_COMMANDS "${OUT_FILES_WITH_COEFF_COMMANDS}\n$f"
-        else
-            OUT_FILES_WITH_COEFF_COMMANDS="$f"
-        fi
-    fi
-done
-
-# Deal with wildcard characters ('*', '?') in "_coeff" commands
-# appearing in any LAMMPS input scripts generated by moltemplate.
-# Replace them with explicit variable names.  Do this before rendering
-#if [ -s "${in_settings}.template" ]; then
-echo "expanding wildcards in \"_coeff\" commands" >&2
-
-IFS=$CR
-for file_name in $OUT_FILES_WITH_COEFF_COMMANDS; do
-    #echo "  searching for \"_coeff\" commands in file \"$file_name\"" >&2
-    # file contains both _coeff commands and wildcards *,? on the same line:
-    if ! awk '{if (match($1,/'_coeff/') && match($0,/'[*,?]/')) exit 1}' < "$file_name"; then
-
-        echo "  expanding wildcards in \"_coeff\" commands in \"$file_name\"">&2
-        if ! eval $PYTHON_COMMAND "${PY_SCR_DIR}/postprocess_coeffs.py" ttree_assignments_static.txt < "$file_name" > "${file_name}.tmp"; then
-            ERR_INTERNAL
-        fi
-
-        mv -f "${file_name}.tmp" "$file_name"
-        # Now reassign integers to these variables
-        bn=`basename "$file_name" .template`
-        if grep '\$' < "$file_name" > /dev/null; then
-            # If "$file_name" contains the $ character, then there might be
-            # $-style counter variables somewhere in the file.  In that case
-            # we must consider all the variables in the entire
-            # "ttree_assignments.txt" file, when substituting numbers for
-            # variables.  This is a very big file and can take a while to read
-            # so we don't do it unless it's necessary.
-            if ! $PYTHON_COMMAND "${PY_SCR_DIR}/ttree_render.py" \
-                 ttree_assignments.txt \
-                 < "$file_name" \
-                 > "$bn"; then
-                exit 6
-            fi
-        else
-            # If "$file_name" does not contains the $ character, then we can
-            # ignore all of the $-style variables in the "ttree_assignments.txt"
-            # file, which will save a lot of time.  In that case we can use
-            # "ttree_assignments_static.txt" instead which omits those lines
-            # of text and is much faster to parse as a result.
-            if ! $PYTHON_COMMAND "${PY_SCR_DIR}/ttree_render.py" \
-                 ttree_assignments_static.txt \
-                 < "$file_name" \
-                 > "$bn"; then
-                exit 6
-            fi
-        fi
-    fi
-done
-#fi
-IFS=$OIFS
-
-if [ -n "$LTTREE_POSTPROCESS_COMMAND" ]; then
-    echo "" >&2
-    if ! eval $LTTREE_POSTPROCESS_COMMAND $TTREE_ARGS; then
-        exit 3
-    fi
-    echo "" >&2
-fi
-
-
-# -------------------------------------------------------
-# If present, then remove duplicate bonds, angles, dihedrals, and impropers
-# (unless overridden by the user).
 # -------------------------------------------------------
-
-
-if [ -s "${data_masses}" ]; then
-    if ! $PYTHON_COMMAND "${PY_SCR_DIR}/remove_duplicate_atoms.py" \
-                                   < "${data_masses}" \
-                                   > "${data_masses}.tmp"; then
-        ERR_INTERNAL
-    fi
-    mv -f "${data_masses}.tmp" "${data_masses}"
-fi
-
-
-if [ -s "${data_bonds}" ]; then
-    SUBGRAPH_SCRIPT="nbody_Bonds.py"
-    if [ -n "$SUBGRAPH_SCRIPT_BONDS" ]; then
-        SUBGRAPH_SCRIPT="$SUBGRAPH_SCRIPT_BONDS"
-    fi
-    if [ ! -z $REMOVE_DUPLICATE_BONDS ]; then
-        if ! $PYTHON_COMMAND "${PY_SCR_DIR}/nbody_reorder_atoms.py" \
-                             Bonds \
-                             "$SUBGRAPH_SCRIPT" \
-                             < "${data_bonds}" \
-                             > "${data_bonds}.tmp"; then
-            ERR_INTERNAL
-        fi
-        cp -f "${data_bonds}.tmp" "${data_bonds}"
-        if ! $PYTHON_COMMAND "${PY_SCR_DIR}/remove_duplicates_nbody.py" 2 \
-                             < "${data_bonds}" \
-                             > "${data_bonds}.tmp"; then
-            ERR_INTERNAL
-        fi
-        mv "${data_bonds}.tmp" "${data_bonds}"
-	if [ ! -z "$REPORT_DUPLICATES" ]; then
-          if ! $PYTHON_COMMAND "${PY_SCR_DIR}/remove_duplicates_nbody.py" 2 Bond warning_duplicate_bonds.txt "$RD_ID_FILTER" "$RD_TYPE_FILTER" \
-                               < "${data_bonds}.template" \
-                               > "${data_bonds}.tmp"; then
-              ERR_INTERNAL
-          fi
-	else
-          if ! $PYTHON_COMMAND "${PY_SCR_DIR}/remove_duplicates_nbody.py" 2 \
-                               < "${data_bonds}.template" \
-                               > "${data_bonds}.tmp"; then
-              ERR_INTERNAL
-          fi
-	fi
-        mv "${data_bonds}.tmp" "${data_bonds}.template"
-    fi
-    if ! $PYTHON_COMMAND "${PY_SCR_DIR}/renumber_DATA_first_column.py" \
-                         < "${data_bonds}" \
-                         > "${data_bonds}.tmp"; then
-        ERR_INTERNAL
-    fi
-    mv -f "${data_bonds}.tmp" "${data_bonds}"
-fi
-
-
-
-
-if [ -s "${data_angles}" ]; then
-    SUBGRAPH_SCRIPT="nbody_Angles.py"
-    if [ -n "$SUBGRAPH_SCRIPT_ANGLES" ]; then
-        SUBGRAPH_SCRIPT="$SUBGRAPH_SCRIPT_ANGLES"
-    fi
-    if [ ! -z $REMOVE_DUPLICATE_ANGLES ]; then
-        if ! $PYTHON_COMMAND "${PY_SCR_DIR}/nbody_reorder_atoms.py" \
-                             Angles \
-                             "$SUBGRAPH_SCRIPT" \
-                             < "${data_angles}" \
-                             > "${data_angles}.tmp"; then
-            ERR_INTERNAL
-        fi
-        cp -f "${data_angles}.tmp" "${data_angles}"
-        if ! $PYTHON_COMMAND "${PY_SCR_DIR}/remove_duplicates_nbody.py" 3 \
-                             < "${data_angles}" \
-                             > "${data_angles}.tmp"; then
-            ERR_INTERNAL
-        fi
-        mv "${data_angles}.tmp" "${data_angles}"
-	if [ ! -z "$REPORT_DUPLICATES" ]; then
-          if ! $PYTHON_COMMAND "${PY_SCR_DIR}/remove_duplicates_nbody.py" 3 Angle warning_duplicate_angles.txt "$RD_ID_FILTER" "$RD_TYPE_FILTER" \
-                               < "${data_angles}.template" \
-                               > "${data_angles}.tmp"; then
-              ERR_INTERNAL
-          fi
-	else
-	  if ! $PYTHON_COMMAND "${PY_SCR_DIR}/remove_duplicates_nbody.py" 3 \
-                               < "${data_angles}.template" \
-                               > "${data_angles}.tmp"; then
-              ERR_INTERNAL
-          fi
-        fi
-        mv "${data_angles}.tmp" "${data_angles}".template
-    fi
-    if ! $PYTHON_COMMAND "${PY_SCR_DIR}/renumber_DATA_first_column.py" \
-                         < "${data_angles}" \
-                         > "${data_angles}.tmp"; then
-        ERR_INTERNAL
-    fi
-    mv -f "${data_angles}.tmp" "${data_angles}"
-
-    if  [ ! -z $FILE_angles_by_type2 ]; then
-        MSG_MULTIPLE_ANGLE_RULES=$(cat <<EOF
-#############################################################################
-WARNING:
-  It appears as though multiple conflicting rules were used to generate
-ANGLE interactions.  (This can occur when combining molecules built with
-different force-field rules).  In your case, you are using rules defined here:
-   "$FILE_angles_by_type2"
-   "$FILE_angles_by_type1"
-   (Files ending in .py are located here:
-    $PY_SCR_DIR/nbody_alt_symmetry/)
-If the molecules built using these two different force-field settings are not
-connected, AND if you do NOT override force-field angles with explicitly
-defined angles, then you can probably ignore this warning message.  Otherwise
-please check the list of angle interactions to make sure they are correct!
-(It might help to build a much smaller system using the same molecule types.)
-#############################################################################
-
-EOF
-)
-        echo "$MSG_MULTIPLE_ANGLE_RULES" >&2
-    fi
-fi
-
-
-
-
-
-if [ -s "${data_dihedrals}" ]; then
-    SUBGRAPH_SCRIPT="nbody_Dihedrals.py"
-    if [ -n "$SUBGRAPH_SCRIPT_DIHEDRALS" ]; then
-        SUBGRAPH_SCRIPT="$SUBGRAPH_SCRIPT_DIHEDRALS"
-    fi
-    if [ ! -z $REMOVE_DUPLICATE_DIHEDRALS ]; then
-        if ! $PYTHON_COMMAND "${PY_SCR_DIR}/nbody_reorder_atoms.py" \
-                             Dihedrals \
-                             "$SUBGRAPH_SCRIPT" \
-                             < "${data_dihedrals}" \
-                             > "${data_dihedrals}.tmp"; then
-            ERR_INTERNAL
-        fi
-        cp -f "${data_dihedrals}.tmp" "${data_dihedrals}"
-        if ! $PYTHON_COMMAND "${PY_SCR_DIR}/remove_duplicates_nbody.py" 4 \
-                             < "${data_dihedrals}" \
-                             > "${data_dihedrals}.tmp"; then
-            ERR_INTERNAL
-        fi
-        mv "${data_dihedrals}.tmp" "${data_dihedrals}"
-	if [ ! -z "$REPORT_DUPLICATES" ]; then
-          if ! $PYTHON_COMMAND "${PY_SCR_DIR}/remove_duplicates_nbody.py" 4 Dihedral warning_duplicate_dihedrals.txt "$RD_ID_FILTER" "$RD_TYPE_FILTER" \
-                               < "${data_dihedrals}.template" \
-                               > "${data_dihedrals}.tmp"; then
-              ERR_INTERNAL
-          fi
-	else
-          if ! $PYTHON_COMMAND "${PY_SCR_DIR}/remove_duplicates_nbody.py" 4 \
-                               < "${data_dihedrals}.template" \
-                               > "${data_dihedrals}.tmp"; then
-              ERR_INTERNAL
-          fi
-	fi
-        mv "${data_dihedrals}.tmp" "${data_dihedrals}.template"
-    fi
-    if ! $PYTHON_COMMAND "${PY_SCR_DIR}/renumber_DATA_first_column.py" \
-                         < "${data_dihedrals}" \
-                         > "${data_dihedrals}.tmp"; then
-        ERR_INTERNAL
-    fi
-    mv -f "${data_dihedrals}.tmp" "${data_dihedrals}"
-
-    if  [ ! -z $FILE_dihedrals_by_type2 ]; then
-        MSG_MULTIPLE_DIHEDRAL_RULES=$(cat <<EOF
-#############################################################################
-WARNING:
-  It appears as though multiple conflicting rules were used to generate
-DIHEDRAL interactions.  (This can occur when combining molecules built with
-different force-field rules).  In your case, you are using rules defined here:
-   "$FILE_dihedrals_by_type2"
-   "$FILE_dihedrals_by_type1"
-   (Files ending in .py are located here:
-    $PY_SCR_DIR/nbody_alt_symmetry/)
-If the molecules built using these two different force-field settings are not
-connected, AND if you do NOT override force-field dihedrals with explicitly
-defined dihedrals, then you can probably ignore this warning message.  Otherwise
-please check the list of dihedral interactions to make sure they are correct!
-(It might help to build a much smaller system using the same molecule types.)
-#############################################################################
-
-EOF
-)
-        echo "$MSG_MULTIPLE_DIHEDRAL_RULES" >&2
-    fi
-fi
-
-
-
-
-
-if [ -s "${data_impropers}" ]; then
-    SUBGRAPH_SCRIPT="nbody_Impropers.py"
-    if [ -n "$SUBGRAPH_SCRIPT_IMPROPERS" ]; then
-        SUBGRAPH_SCRIPT="$SUBGRAPH_SCRIPT_IMPROPERS"
-    fi
-    if [ ! -z $REMOVE_DUPLICATE_IMPROPERS ]; then
-        if ! $PYTHON_COMMAND "${PY_SCR_DIR}/nbody_reorder_atoms.py" \
-                             Impropers \
-                             "$SUBGRAPH_SCRIPT" \
-                             < "${data_impropers}" \
-                             > "${data_impropers}.tmp"; then
-            ERR_INTERNAL
-        fi
-        cp -f "${data_impropers}.tmp" "${data_impropers}"
-        if ! $PYTHON_COMMAND "${PY_SCR_DIR}/remove_duplicates_nbody.py" 4 \
-                             < "${data_impropers}" \
-                             > "${data_impropers}.tmp"; then
-            ERR_INTERNAL
-        fi
-        mv "${data_impropers}.tmp" "${data_impropers}"
-	if [ ! -z "$REPORT_DUPLICATES" ]; then
-          if ! $PYTHON_COMMAND "${PY_SCR_DIR}/remove_duplicates_nbody.py" 4 Improper warning_duplicate_impropers.txt "$RD_ID_FILTER" "$RD_TYPE_FILTER" \
-                               < "${data_impropers}.template" \
-                               > "${data_impropers}.tmp"; then
-              ERR_INTERNAL
-          fi
-	else
-          if ! $PYTHON_COMMAND "${PY_SCR_DIR}/remove_duplicates_nbody.py" 4 \
-                               < "${data_impropers}.template" \
-                               > "${data_impropers}.tmp"; then
-              ERR_INTERNAL
-          fi
-	fi
-        mv "${data_impropers}.tmp" "${data_impropers}.template"
-    fi
-    if ! $PYTHON_COMMAND "${PY_SCR_DIR}/renumber_DATA_first_column.py" \
-                         < "${data_impropers}" \
-                         > "${data_impropers}.tmp"; then
-        ERR_INTERNAL
-    fi
-    mv -f "${data_impropers}.tmp" "${data_impropers}"
-
-    if  [ ! -z $FILE_impropers_by_type2 ]; then
-        MSG_MULTIPLE_IMPROPER_RULES=$(cat <<EOF
-#############################################################################
-WARNING:
-  It appears as though multiple conflicting rules were used to generate
-IMPROPER interactions.  (This can occur when combining molecules built with
-different force-field rules.)  In your case, you are using rules defined here:
-   "$FILE_impropers_by_type2"
-   "$FILE_impropers_by_type1"
-   (Files ending in .py are located here:
-    $PY_SCR_DIR/nbody_alt_symmetry/)
-If the molecules built using these two different force-field settings are not
-connected, AND if you do NOT override force-field imrpopers with explicitly
-defined impropers, then you can probably ignore this warning message.  Otherwise
-please check the list of improper interactions to make sure they are correct!
-(It might help to build a much smaller system using the same molecule types.)
-#############################################################################
-
-EOF
-)
-        echo "$MSG_MULTIPLE_IMPROPER_RULES" >&2
-    fi
-
-fi
-
-
-
-
-
-# ------------------ Charge By Bond ----------------------
-# Assign atom partial charges according to who they are bonded to
-
-if [ -s "$data_charge_by_bond" ]; then
-    echo "Looking up partial charge contributions from bonds" >&2
-    if ! $PYTHON_COMMAND "${PY_SCR_DIR}/charge_by_bond.py" \
-         -atom-style "$ATOM_STYLE" \
-         -atoms "${data_atoms}.template" \
-         -bonds "${data_bonds}.template" \
-         -bond-list "${data_bond_list}.template" \
-         -chargebybond "${data_charge_by_bond}.template" \
-         > gen_charges.template.tmp; then
-        exit 4
-    fi
-
-    # ---- cleanup: ----
-    # ---- Create or re-build the "${in_charges}.template" file ----
-    # Instert these lines into the "${in_charges}.template" file which includes
-    # the newly generated interactions. (Note: these are in .template format)
-
-    cp gen_charges.template.tmp new_charges.template.tmp
-    if [ -s "${in_charges}.template" ]; then
-        # Then append existing "Bonds" to the end of the generated interactions
-        # (Hopefully this way they will override those interactions.)
-        cat "${in_charges}.template" >> new_charges.template.tmp
-    fi
-    mv -f new_charges.template.tmp "${in_charges}.template"
-
-    # ---- Re-build (render) the "$in_charges" file ----
-    # Now substitute these variable values (assignments) into the variable
-    # names present in the .template file.  (We want to convert the file from
-    # a .template format into an ordinary (numeric) LAMMPS data-section format.)
-    if ! $PYTHON_COMMAND "${PY_SCR_DIR}/ttree_render.py" \
-         ttree_assignments.txt \
-         < "${in_charges}.template" \
-         >> "${in_charges}"; then
-        exit 6
-    fi
-    echo "" >&2
-
-    rm -f gen_charges.template.tmp new_charges.template.tmp
-
-    echo "" >&2
-fi
-
-
-
+# The remaining steps are carried out by pipeline.py in a single process:
+#  - removing duplicate atoms (and renumbering them),
+#  - generating bonds, angles, dihedrals, and impropers by atom type
+#    (updating the ttree_assignments.txt file accordingly),
+#  - expanding wildcard characters ('*', '?') in "_coeff" commands,
+#  - checking for undefined variables (lttree_postprocess.py),
+#  - removing duplicate bonded interactions (unless overridden by the user),
+#  - assigning atom partial charges by bond type ("Data Charge By Bond").
+# (Historically these steps were performed by separate python scripts:
+#  nbody_by_type.py, nbody_fix_ttree_assignments.py, ttree_render.py, ...
+#  which had to re-read the same files many times.)
 # -------------------------------------------------------
 
-rm -f "$OUT_FILE_DATA"
-
-#NATOMS=`awk 'BEGIN{n=0} /^\\\$\/atom:/{n++}END{print n}' < ttree_assignments.txt`
-#NBONDS=`awk 'BEGIN{n=0} /^\\\$\/bond:/{n++}END{print n}' < ttree_assignments.txt`
-#NANGLES=`awk 'BEGIN{n=0} /^\\\$\/angle:/{n++}END{print n}' < ttree_assignments.txt`
-#NDIHEDRALS=`awk 'BEGIN{n=0} /^\\\$\/dihedral:/{n++}END{print n}' < ttree_assignments.txt`
-#NIMPROPERS=`awk 'BEGIN{n=0} /^\\\$\/improper:/{n++}END{print n}' < ttree_assignments.txt`
-#
-#NATOMS_SP=`awk 'BEGIN{n=0} /^\\\${\/atom:/{n++}END{print n}' < ttree_assignments.txt`
-#NBONDS_SP=`awk 'BEGIN{n=0} /^\\\${\/bond:/{n++}END{print n}' < ttree_assignments.txt`
-#NANGLES_SP=`awk 'BEGIN{n=0} /^\\\${\/angle:/{n++}END{print n}' < ttree_assignments.txt`
-#NDIHEDRALS_SP=`awk 'BEGIN{n=0} /^\\\${\/dihedral:/{n++}END{print n}' < ttree_assignments.txt`
-#NIMPROPERS_SP=`awk 'BEGIN{n=0} /^\\\${\/improper:/{n++}END{print n}' < ttree_assignments.txt`
-#
-#NATOMS=$((NATOMS + NATOMS_SP))
-#NBONDS=$((NBONDS + NBONDS_SP))
-#NANGLES=$((NANGLES + NANGLES_SP))
-#NDIHEDRALS=$((NDIHEDRALS + NDIHEDRALS_SP))
-#NIMPROPERS=$((NIMPROPERS + NIMPROPERS_SP))
-
-NATOMS="0"
-NBONDS="0"
-NANGLES="0"
-NDIHEDRALS="0"
-NIMPROPERS="0"
-NCMAP="0"
-
-if [ -s "${data_atoms}" ]; then
-  NATOMS=`awk 'END{print NR}' < "${data_atoms}"`
+PIPELINE_ARGS=(-atomstyle "$ATOM_STYLE")
+if [ -z "$LTTREE_POSTPROCESS_COMMAND" ]; then
+    PIPELINE_ARGS+=(-nocheck)
 fi
-if [ -s "${data_ellipsoids}" ]; then
-  NELLIPSOIDS=`awk 'END{print NR}' < "${data_ellipsoids}"`
+if [ -n "$CHECKFF" ]; then
+    PIPELINE_ARGS+=(-checkff)
 fi
-if [ -s "${data_bonds}" ]; then
-  NBONDS=`awk 'END{print NR}' < "${data_bonds}"`
+if [ -z "$REMOVE_DUPLICATE_BONDS" ]; then
+    PIPELINE_ARGS+=(-overlay-bonds)
 fi
-if [ -s "${data_angles}" ]; then
-  NANGLES=`awk 'END{print NR}' < "${data_angles}"`
+if [ -z "$REMOVE_DUPLICATE_ANGLES" ]; then
+    PIPELINE_ARGS+=(-overlay-angles)
 fi
-if [ -s "${data_dihedrals}" ]; then
-  NDIHEDRALS=`awk 'END{print NR}' < "${data_dihedrals}"`
+if [ -z "$REMOVE_DUPLICATE_DIHEDRALS" ]; then
+    PIPELINE_ARGS+=(-overlay-dihedrals)
 fi
-if [ -s "${data_impropers}" ]; then
-  NIMPROPERS=`awk 'END{print NR}' < "${data_impropers}"`
+if [ -z "$REMOVE_DUPLICATE_IMPROPERS" ]; then
+    PIPELINE_ARGS+=(-overlay-impropers)
 fi
-if [ -s "${data_cmap}" ]; then
-  NCMAP=`awk 'END{print NR}' < "${data_cmap}"`
+if [ -n "$REPORT_DUPLICATES" ]; then
+    PIPELINE_ARGS+=(-report-duplicates "$RD_ID_FILTER" "$RD_TYPE_FILTER")
 fi
-
-
-echo "LAMMPS Description" > "$OUT_FILE_DATA"
-echo "" >> "$OUT_FILE_DATA"
-echo "     $NATOMS  atoms" >> "$OUT_FILE_DATA"
-if [ -n "$NELLIPSOIDS" ]; then
-    echo "     $NELLIPSOIDS  ellipsoids" >> "$OUT_FILE_DATA"
-fi
-if [ -n "$NBONDS" ] || [ -n "$NBONDTYPES" ]; then
-    echo "     $NBONDS  bonds" >> "$OUT_FILE_DATA"
+if [ -n "$SUBGRAPH_SCRIPT_BONDS" ]; then
+    PIPELINE_ARGS+=(-bond-symmetry "$SUBGRAPH_SCRIPT_BONDS")
 fi
-if [ -n "$NANGLES" ] || [ -n "$NANGLETYPES" ]; then
-    echo "     $NANGLES  angles" >> "$OUT_FILE_DATA"
+if [ -n "$SUBGRAPH_SCRIPT_ANGLES" ]; then
+    PIPELINE_ARGS+=(-angle-symmetry "$SUBGRAPH_SCRIPT_ANGLES")
 fi
-if [ -n "$NDIHEDRALS" ] || [ -n "$NDIHEDRALTYPES" ]; then
-    echo "     $NDIHEDRALS  dihedrals" >> "$OUT_FILE_DATA"
+if [ -n "$SUBGRAPH_SCRIPT_DIHEDRALS" ]; then
+    PIPELINE_ARGS+=(-dihedral-symmetry "$SUBGRAPH_SCRIPT_DIHEDRALS")
 fi
-if [ -n "$NIMPROPERS" ] || [ -n "$NIMPROPERTYPES" ]; then
-    echo "     $NIMPROPERS  impropers" >> "$OUT_FILE_DATA"
+if [ -n "$SUBGRAPH_SCRIPT_IMPROPERS" ]; then
+    PIPELINE_ARGS+=(-improper-symmetry "$SUBGRAPH_SCRIPT_IMPROPERS")
 fi
-if [ -n "$NCMAP" ] && [ "$NCMAP" -gt "0" ]; then
-   echo "     $NCMAP  crossterms" >> "$OUT_FILE_DATA"
+if [ -n "$NBODY_JOBS" ]; then
+    PIPELINE_ARGS+=(-jobs "$NBODY_JOBS")
 fi
 
-echo "" >> "$OUT_FILE_DATA"
-echo "     $NATOMTYPES  atom types" >> "$OUT_FILE_DATA"
-
-if [ -n "$NBONDTYPES" ]; then
-    echo "     $NBONDTYPES  bond types" >> "$OUT_FILE_DATA"
-fi
-if [ -n "$NANGLETYPES" ]; then
-    echo "     $NANGLETYPES  angle types" >> "$OUT_FILE_DATA"
-fi
-if [ -n "$NDIHEDRALTYPES" ]; then
-    echo "     $NDIHEDRALTYPES  dihedral types" >> "$OUT_FILE_DATA"
-fi
-if [ -n "$NIMPROPERTYPES" ]; then
-    echo "     $NIMPROPERTYPES  improper types" >> "$OUT_FILE_DATA"
-fi
-echo "" >> "$OUT_FILE_DATA"
-
-
-
-
-if [ -s "$data_header" ]; then
-  cat "$data_header" >> "$OUT_FILE_DATA"
-  echo "" >> "$OUT_FILE_DATA"
+$PYTHON_COMMAND "${PY_SCR_DIR}/pipeline.py" "${PIPELINE_ARGS[@]}"
+PIPELINE_STATUS=$?
+if [ $PIPELINE_STATUS -ne 0 ]; then
+    exit $PIPELINE_STATUS
 fi
+echo "" >&2
 
 
 
+# -------------------------------------------------------
 
-# --- PERIODIC BOUNDARY CONDITIONS ---
+rm -f "$OUT_FILE_DATA"
 
+# Count the number of atoms, bonds, angles, ... (the number of lines in each
+# of the data section files), determine the periodic boundary conditions,
+# and write the header of the data file.
 # Note: If there is a "$data_boundary" file present, it overrides any settings
 #       which may have been stored in a pdb file or other external file.
+#       Otherwise, if the boundary is unspecified, it is estimated from the
+#       minimum and maximum coordinates in the "$tmp_atom_coords" file.
 
-if [ -s "$data_pbc" ] && [ ! -s "$data_boundary" ]; then
-    mv -f "$data_pbc" "$data_boundary"
-    echo "WARNING: write_once(\"$data_pbc\") is depreciated" >&2
-    echo "     Use write_once(\"$data_boundary\") instead" >&2
+DATA_HEADER_ARGS=(-types "$NATOMTYPES" "$NBONDTYPES" "$NANGLETYPES" "$NDIHEDRALTYPES" "$NIMPROPERTYPES")
+DATA_HEADER_ARGS+=(-box "$BOXSIZE_MINX" "$BOXSIZE_MAXX" "$BOXSIZE_MINY" "$BOXSIZE_MAXY" "$BOXSIZE_MINZ" "$BOXSIZE_MAXZ")
+if [ -n "$TRICLINIC" ]; then
+    DATA_HEADER_ARGS+=(-triclinic "$BOXSIZE_XY" "$BOXSIZE_XZ" "$BOXSIZE_YZ")
 fi
+DATA_HEADER_ARGS+=(-coords "$tmp_atom_coords")
 
-if [ -s "$data_boundary" ]; then
-    # Copy the boundary conditions from the "$data_boundary" file.
-    # Don't assume there is only one line containing "xlo xhi", for example.
-    # It's possible the user wrote the boundary conditions multiple times.
-    # As always, the most recent setting overrides the earlier settings.
-    BOXSIZE_MINX=`tr -d '\015' < "$data_boundary" | awk '{if ($3=="xlo") {xlo=$1}} END{print xlo}'`
-    BOXSIZE_MAXX=`tr -d '\015' < "$data_boundary" | awk '{if ($4=="xhi") {xhi=$2}} END{print xhi}'`
-
-    BOXSIZE_MINY=`tr -d '\015' < "$data_boundary" | awk '{if ($3=="ylo") {ylo=$1}} END{print ylo}'`
-    BOXSIZE_MAXY=`tr -d '\015' < "$data_boundary" | awk '{if ($4=="yhi") {yhi=$2}} END{print yhi}'`
-
-    BOXSIZE_MINZ=`tr -d '\015' < "$data_boundary" | awk '{if ($3=="zlo") {zlo=$1}} END{print zlo}'`
-    BOXSIZE_MAXZ=`tr -d '\015' < "$data_boundary" | awk '{if ($4=="zhi") {zhi=$2}} END{print zhi}'`
-
-    if [ -z "$BOXSIZE_MINX" ] || [ -z "$BOXSIZE_MAXX" ]; then
-        echo "Error: Problem with box boundary format (\"xlo xhi\") in \"$data_boundary\"" >&2
-        exit 12
-    fi
-    if [ -z "$BOXSIZE_MINY" ] || [ -z "$BOXSIZE_MAXY" ]; then
-        echo "Error: Problem with box boundary format (\"ylo yhi\") in \"$data_boundary\"" >&2
-        exit 12
-    fi
-    if [ -z "$BOXSIZE_MINZ" ] || [ -z "$BOXSIZE_MAXZ" ]; then
-        echo "Error: Problem with box boundary format (\"zlo zhi\") in \"$data_boundary\"" >&2
-        exit 12
-    fi
-
-    BOXSIZE_XY=`awk '{if ($4=="xy") {xy=$1}} END{print xy}' < "$data_boundary"`
-    BOXSIZE_XZ=`awk '{if ($5=="xz") {xz=$2}} END{print xz}' < "$data_boundary"`
-    BOXSIZE_YZ=`awk '{if ($6=="yz") {yz=$3}} END{print yz}' < "$data_boundary"`
-
-    if [ -n "$BOXSIZE_XY" ] || [ -n "$BOXSIZE_XZ" ] || [ -n "$BOXSIZE_YZ" ]; then
-        if [ -n "$BOXSIZE_XY" ] && [ -n "$BOXSIZE_XZ" ] && [ -n "$BOXSIZE_YZ" ]; then
-            #echo "triclinic_parameters: XY XZ YZ = $BOXSIZE_XY $BOXSIZE_XZ $BOXSIZE_YZ" >&2
-            TRICLINIC="true"
-        else
-            echo "Error: Problem with triclinic format (\"xy xz yz\") in \"$data_boundary\"" >&2
-            exit 13
-        fi
-    fi
+$PYTHON_COMMAND "${PY_SCR_DIR}/lttree_data_header.py" "${DATA_HEADER_ARGS[@]}" > "$OUT_FILE_DATA"
+DATA_HEADER_STATUS=$?
+if [ $DATA_HEADER_STATUS -ne 0 ]; then
+    exit $DATA_HEADER_STATUS
 fi
 
 
 
 
-if [ -z "$BOXSIZE_MINX" ] || [ -z "$BOXSIZE_MAXX" ] || [ -z "$BOXSIZE_MINY" ] || [ -z "$BOXSIZE_MAXY" ] || [ -z "$BOXSIZE_MINZ" ] || [ -z "$BOXSIZE_MAXZ" ]; then
-    echo "Periodic boundary conditions unspecified. Attempting to generate automatically." >&2
-
-    # By default, disable triclinic
-    BOXSIZE_XY=""
-    BOXSIZE_XZ=""
-    BOXSIZE_YZ=""
-    TRICLINIC=""
-
-    if [ -s "$tmp_atom_coords" ]; then
-        # Estimate the minimimum, maximum x,y,z values
-        # from the coordinate data.
-
-        MINMAX_BOUNDS=`awk 'BEGIN{first=1}{if (NF>=3){x=$1; y=$2; z=$3; if (first) {first=0; xmin=x; xmax=x; ymin=y; ymax=y; zmin=z; zmax=z;} else {if (x<xmin) xmin=x; if (x>xmax) xmax=x; if (y<ymin) ymin=y; if (y>ymax) ymax=y; if (z<zmin) zmin=z; if (z>zmax) zmax=z;}}} END{print xmin" "xmax" "ymin" "ymax" "zmin" "zmax;}' < "$tmp_atom_coords"`
-
-        # ...and add a narrow margin (10%) around the boundaries:
-        BOXSIZE_MINX=`echo $MINMAX_BOUNDS | awk '{margin=0.1; width=$2-$1; print $1-0.5*margin*width}'`
-        BOXSIZE_MAXX=`echo $MINMAX_BOUNDS | awk '{margin=0.1; width=$2-$1; print $2+0.5*margin*width}'`
-        BOXSIZE_MINY=`echo $MINMAX_BOUNDS | awk '{margin=0.1; width=$4-$3; print $3-0.5*margin*width}'`
-        BOXSIZE_MAXY=`echo $MINMAX_BOUNDS | awk '{margin=0.1; width=$4-$3; print $4+0.5*margin*width}'`
-        BOXSIZE_MINZ=`echo $MINMAX_BOUNDS | awk '{margin=0.1; width=$6-$5; print $5-0.5*margin*width}'`
-        BOXSIZE_MAXZ=`echo $MINMAX_BOUNDS | awk '{margin=0.1; width=$6-$5; print $6+0.5*margin*width}'`
-    else
-        # By default, choose some reasonably large box:
-        BOXSIZE_MINX="-100.0"
-        BOXSIZE_MAXX="100.0"
-        BOXSIZE_MINY="-100.0"
-        BOXSIZE_MAXY="100.0"
-        BOXSIZE_MINZ="-100.0"
-        BOXSIZE_MAXZ="100.0"
-        # ...and print message scolding the user for being lazy
-        echo "----------------------------------------------------------------------" >&2
-        echo "---- WARNING: Unable to determine periodic boundary conditions.   ----" >&2
-        echo "----           (A default cube of volume=(200.0)^3 was used.      ----" >&2
-        echo "----               This is probably not what you want!)           ----" >&2
-        echo "---- It is recommended that you specify your periodic boundary    ----" >&2
-        echo "---- by adding a write_once(\"Data Boundary\") command to your .lt file. ----" >&2
-        echo "---- For example:                                                 ----" >&2
-        #echo "----------------------------------------------------------------------" >&2
-        echo "----                                                              ----" >&2
-        echo "----   write_once(\"Data Boundary\") {                                   ----" >&2
-        echo "----     2.51  46.79 xlo xhi                                      ----" >&2
-        echo "----     -4.38 35.824 ylo yhi                                     ----" >&2
-        echo "----     0.3601 42.95 zlo zhi                                     ----" >&2
-        echo "----   }                                                          ----" >&2
-        echo "----------------------------------------------------------------------" >&2
-    fi
-fi
-
-
-
-
-if [ -z "$TRICLINIC" ]; then
-    echo "  $BOXSIZE_MINX $BOXSIZE_MAXX xlo xhi" >> "$OUT_FILE_DATA"
-    echo "  $BOXSIZE_MINY $BOXSIZE_MAXY ylo yhi" >> "$OUT_FILE_DATA"
-    echo "  $BOXSIZE_MINZ $BOXSIZE_MAXZ zlo zhi" >> "$OUT_FILE_DATA"
-else
-    echo "triclinic parameters: XY XZ YZ = $BOXSIZE_XY $BOXSIZE_XZ $BOXSIZE_YZ" >&2
-    echo "" >&2
-    # Otherwise, this is a triclinic (non orthoganal) crystal basis.
-    # LAMMPS represents triclinic symmetry using a different set of parameters
-    # (lx,ly,lz,xy,xz,yz) than the PDB file format (alpha,beta,gamma).
-    echo "  $BOXSIZE_MINX $BOXSIZE_MAXX xlo xhi" >> "$OUT_FILE_DATA"
-    echo "  $BOXSIZE_MINY $BOXSIZE_MAXY ylo yhi" >> "$OUT_FILE_DATA"
-    echo "  $BOXSIZE_MINZ $BOXSIZE_MAXZ zlo zhi" >> "$OUT_FILE_DATA"
-    #echo "  0.000000 $BOXSIZE_X xlo xhi" >> "$OUT_FILE_DATA"
-    #echo "  0.000000 $BOXSIZE_Y ylo yhi" >> "$OUT_FILE_DATA"
-    #echo "  0.000000 $BOXSIZE_Z zlo zhi" >> "$OUT_FILE_DATA"
-    echo "  $BOXSIZE_XY $BOXSIZE_XZ $BOXSIZE_YZ xy xz yz" >> "$OUT_FILE_DATA"
-    #echo "a,b,c,alpha,beta,gamma = $BOXSIZE_A,$BOXSIZE_B,$BOXSIZE_C,$ALPHA,$BETA,$GAMMA"
-fi
-echo "" >> "$OUT_FILE_DATA"
-
-
-
-
 
 if [ -s "$data_masses" ]; then
     echo "Masses" >> "$OUT_FILE_DATA"
@@ -2313,11 +1244,11 @@ if [ -s "$data_ellipsoids" ]; then
     # Replace the Quaternion section, if a dump has been used to write the DATA file.
     if [ -s "$tmp_ellips_quat" ]; then 
 
-       NATOMS=`awk 'END{print NR}' "$data_ellipsoids"`
-       NATOMCRDS=`awk 'END{print NR}' "$tmp_ellips_quat"`
-       if [ $NATOMS -ne $NATOMCRDS ]; then
-           echo "Error: Number of atoms in coordinate file provided by user ($NATOMCRDS)" >&2
-           echo "does not match the number of atoms generated in ttree file ($NATOMS)" >&2
+       NELLIPSOIDS=`awk 'END{print NR}' "$data_ellipsoids"`
+       NATOMQUATS=`awk 'END{print NR}' "$tmp_ellips_quat"`
+       if [ $NELLIPSOIDS -ne $NATOMQUATS ]; then
+           echo "Error: Number of atoms in coordinate file provided by user ($NATOMQUATS)" >&2
+           echo "does not match the number of atoms generated in ttree file ($NELLIPSOIDS)" >&2
            exit 14
        fi
 
@@ -2460,10 +1391,6 @@ fi
 
 
 if [ -s "$tmp_atom_coords" ]; then
-    NATOMS=`awk 'BEGIN{n=0} /^\\\$\/atom:/{n++}END{print n}' < ttree_assignments.txt`
-    NATOMS_SP=`awk 'BEGIN{n=0} /^\\\${\/atom:/{n++}END{print n}' < ttree_assignments.txt`
-    NATOMS=$((NATOMS + NATOMS_SP))
-    NATOMCRDS=`awk '{if (NF>=3) natom+=1} END{print(natom)}' < "$tmp_atom_coords"`
     if [ $NATOMS -ne $NATOMCRDS ]; then
         echo "Error: Number of atoms in coordinate file provided by user ($NATOMCRDS)" >&2
         echo "does not match the number of atoms generated in ttree file ($NATOMS)" >&2
@@ -2472,7 +1399,7 @@ if [ -s "$tmp_atom_coords" ]; then
 
     # Copy the coordinates in $tmp_atom_coords into $OUT_FILE_DATA
     rm -f "$OUT_FILE_COORDS"
-    if ! eval $PYTHON_COMMAND "${PY_SCR_DIR}/raw2data.py -ignore-atom-id " $ATOM_STYLE_ARG "$OUT_FILE_DATA" < "$tmp_atom_coords" > "$OUT_FILE_COORDS"; then
+    if ! eval $PYTHON_COMMAND "${PY_SCR_DIR}/raw2data.py -ignore-atom-id -in $tmp_atom_coords " $ATOM_STYLE_ARG "$OUT_FILE_DATA" > "$OUT_FILE_COORDS"; then
         ERR_INTERNAL
     fi
     mv -f "$OUT_FILE_COORDS" "$OUT_FILE_DATA"
@@ -2562,10 +1489,6 @@ done
 IFS=$OIFS
 
 
-# We no longer need the "ttree_assignments_static.txt" file.
-rm -f ttree_assignments_static.txt
-
-
 
 # ############## DEAL WITH CUSTOM NON-STANDARD SECTIONS ################
 
@@ -44,9 +44,13 @@ InstanceObj   Instance nodes are created when a user creates one (or many)
 """
 
 import sys
+import os
 from collections import defaultdict
 import operator
 import random
+import hashlib
+import pickle
+import tempfile
 #import gc
 
 try:
@@ -65,8 +69,8 @@ except NameError:
 try:
     from .ttree_lex import TtreeShlex, SplitQuotedString, EscCharStrToChar, \
         SafelyEncodeString, RemoveOuterQuotes, MaxLenStr, HasWildcard, HasRE, \
-        InputError, ErrorLeader, OSrcLoc, TextBlock, VarRef, VarBinding, \
-        TemplateLexer
+        InputError, ErrorLeader, OSrcLoc, TextBlock, VarRef, VarNPtr, \
+        VarBinding, TemplateLexer
 except (ImportError, SystemError, ValueError):
     # not installed as a package
     from ttree_lex import *
@@ -186,13 +190,14 @@ class WriteFileCommand(Command):
                identify where they occur in in the original user's files).
 
     """
-    __slots__ = ["filename", "tmpl_list"]
+    __slots__ = ["filename", "tmpl_list", "instance_plan"]
 
     def __init__(self,
                  filename=None,
                  tmpl_list=None,
                  srcloc=None):
         self.filename = filename
+        self.instance_plan = None
         if tmpl_list is None:
             self.tmpl_list = []
         else:
@@ -205,9 +210,32 @@ class WriteFileCommand(Command):
         else:
             return 'WriteFileCommand(NULL)'
 
+    def InstancePlan(self):
+        """
+        Return a list of the positions in self.tmpl_list where '$' (instance)
+        variables appear.  These are the only entries which must be copied
+        (and looked up again) whenever the class containing this command is
+        instantiated.  Everything else in the template is shared by all of the
+        instances.  The list is computed once and reused for every instance.
+
+        """
+        if self.instance_plan is None:
+            self.instance_plan = [i for i, entry in enumerate(self.tmpl_list)
+                                  if (isinstance(entry, VarRef) and
+                                      (entry.prefix[0] == '$'))]
+        return self.instance_plan
+
     def __copy__(self):
-        tmpl_list = []
-        CopyTmplList(self.tmpl_list, tmpl_list)  # CHECK:IS_MEMORY_WASTED_HERE?
+        # Equivalent to CopyTmplList(self.tmpl_list, tmpl_list), but
+        # it only visits the entries which actually need to be copied:
+        tmpl_list = list(self.tmpl_list)
+        for i in self.InstancePlan():
+            entry = tmpl_list[i]
+            # Note: "entry.nptr" should not contain any data yet
+            tmpl_list[i] = VarRef(entry.prefix,
+                                  entry.descr_str,
+                                  entry.suffix,
+                                  entry.srcloc)
         return WriteFileCommand(self.filename, tmpl_list, self.srcloc)
 
 
@@ -1307,6 +1335,46 @@ def DescrToCatLeafPtkns(descr_str, dbg_loc):
 
 
 
+# Most of the '$' variables that appear in templates have descriptors
+# with no path information (eg. "$atom:H1", "$bond:OH", "$mol").
+# They are parsed millions of times during instantiation, so the result
+# of parsing each descriptor string is stored here.  (See SimpleDescr())
+g_simple_descrs = {}
+
+
+def SimpleDescr(descr_str):
+    """
+    SimpleDescr() checks whether a descriptor string refers to a variable
+    whose leaf node is either the current node, or one of its children.
+    Descriptors like these ("atom:H1", or "mol") contain no '/' characters
+    and at most one ':' character.  The way they are interpreted does not
+    depend on the context, so DescrToCatLeafPtkns() only needs to parse them
+    once.  This function returns a 2-tuple (cat_name, leaf_name) in that case,
+    (where leaf_name is None if the leaf is the current node), and it returns
+    None for every other kind of descriptor (which must be handled by
+    DescrToCatLeafNodes() instead).
+
+    """
+    try:
+        return g_simple_descrs[descr_str]
+    except KeyError:
+        pass
+    simple = None
+    if (descr_str.find('/') == -1):
+        split_colon = descr_str.split(':')
+        if len(split_colon) == 1:
+            if descr_str != '':
+                simple = (descr_str, None)
+        elif len(split_colon) == 2:
+            cat_name, leaf_name = split_colon
+            if ((cat_name != '') and
+                (leaf_name not in ('', '.', '..', '...', 'query()'))):
+                simple = (cat_name, leaf_name)
+    g_simple_descrs[descr_str] = simple
+    return simple
+
+
+
 def DescrToCatLeafNodes(descr_str,
                         context_node,
                         dbg_loc,
@@ -2093,10 +2161,13 @@ class StaticObj(object):
     # vb##    else:
     # vb##        self.var_bindings.append(var_binding)
 
-    def Parse(self, lex):
+    def Parse(self, lex, import_cache=None):
         """ Parse() builds a static tree of StaticObjs by parsing text file.
         -The "lex" argument is a file or input stream which has been converted
          to a "TemplateLexer" object (similar to the python's built-in shlex lexer).
+        -The optional "import_cache" argument is an ImportCache object.  If
+         present, files imported at the top level are loaded from that cache.
+         (It should only be supplied when parsing the root of the tree.)
         """
 
         # The next two variables store a stack of commands the user wants
@@ -2116,9 +2187,18 @@ class StaticObj(object):
         if self.srcloc_begin is None:  # <-- not defined yet?
             self.srcloc_begin = lex.GetSrcLoc()
 
+        import_hook = None
+        if import_cache is not None:
+            def import_hook(newfile, instream):
+                return import_cache.Import(self, lex, newfile, instream)
+
         while True:
 
-            cmd_token = lex.get_token()
+            lex.import_hook = import_hook
+            try:
+                cmd_token = lex.get_token()
+            finally:
+                lex.import_hook = None
 
             #print('Parse(): token = \"'+cmd_token+'\", '+lex.error_leader())
 
@@ -3431,6 +3511,374 @@ def RandomSelect(entries, weights):
 
 
 
+class ImportCache(object):
+    """
+    ImportCache stores the StaticObj subtree built from each file loaded
+    with the "import" command on disk, so that large files which rarely
+    change (such as force-field files like "oplsaa.lt" or "dreiding.lt")
+    do not have to be lexed and parsed again every time moltemplate runs.
+
+    The cache is only used if a directory was selected (using the
+    "-import-cache DIRECTORY" argument, or the MOLTEMPLATE_CACHE_DIR
+    environment variable).  That directory should not be writable by
+    other users.  (Entries are stored using "pickle".)
+
+    Each entry is keyed by a hash of the file's name, location and contents
+    (and the source code of this module).  The name, location and hash of
+    every file it includes or imports are stored with it.  Before an entry
+    is used, these names are located again (using the current include path)
+    and the files found must be the same files with the same contents.
+    When the cache grows larger than max_size bytes, the entries which were
+    used least recently are deleted.
+    Files are parsed in isolation (in a separate static tree) before they
+    are stored.  Files which cannot be understood this way (for example,
+    files which refer to classes defined elsewhere, or which augment
+    classes which have already been defined) are parsed the ordinary way.
+
+    """
+
+    # The hash of the source code of the modules which define the objects
+    # stored in the cache.  (Computed when it is first needed.)
+    source_digest = None
+
+    def __init__(self, directory=None, max_size=256*1024*1024):
+        if directory is None:
+            directory = ImportCache.DefaultDirectory()
+        self.directory = directory
+        self.max_size = max_size
+        # While a file is parsed in isolation, the files it depends on
+        # are collected here (so that they can be stored with it).
+        self.recording = []
+
+    @staticmethod
+    def DefaultDirectory():
+        """
+        Returns the directory named by the MOLTEMPLATE_CACHE_DIR environment
+        variable, or '' if it is not set (in which case the cache is not used
+        unless a directory is specified using "-import-cache").
+        """
+        return os.environ.get('MOLTEMPLATE_CACHE_DIR', '')
+
+    def Import(self, static_root, lex, newfile, instream):
+        """
+        Invoked by the lexer (see "import_hook" in ttree_lex.py) when an
+        "import" command is encountered at the top level of the file.
+        If a parsed copy of the file is available (or can be created), it is
+        merged into "static_root", and True is returned.  Otherwise, the
+        stream is rewound and False is returned (and the caller reads it).
+
+        """
+        text = instream.read()
+        path = os.path.abspath(instream.name)
+        key = ImportCache._Key(newfile, path, text)
+        entry = self._Load(key, lex)
+        loaded = ((entry is not None) and
+                  ImportCache._ContextMatches(entry, lex))
+        if not loaded:
+            entry = self._ParseIsolated(lex, newfile, text)
+            self._Save(key, entry)
+        (sub_root, restricted, skipped, dependencies,
+         order_begin, order_end, srclocs, root_refs) = entry
+        order_offset = 0
+        if loaded:
+            # The OSrcLoc objects in the stored tree were numbered when the
+            # file was first parsed. Renumber them so that they are ordered
+            # as if this file had been parsed here (variables are numbered
+            # in the order they appear).
+            order_offset = OSrcLoc.count - order_begin
+        if ((sub_root is None) or
+            (not ImportCache._Graft(static_root, lex, entry, order_offset))):
+            instream.seek(0)
+            return False
+        if loaded:
+            OSrcLoc.count += order_end - order_begin
+        if len(self.recording) > 0:
+            self.recording[-1][0].update(skipped)
+            self.recording[-1][1].extend(dependencies)
+        return True
+
+    @staticmethod
+    def _Key(newfile, path, text):
+        if ImportCache.source_digest is None:
+            # Objects stored by an older version of this code may
+            # have a different layout.  Include the source code in the key.
+            h = hashlib.sha256()
+            for module_name in (__name__, TtreeShlex.__module__):
+                h.update(ImportCache._FileDigest(
+                    sys.modules[module_name].__file__).encode('utf-8'))
+            ImportCache.source_digest = h.hexdigest()
+        h = hashlib.sha256()
+        for s in (ImportCache.source_digest, g_version_str,
+                  '%d.%d' % sys.version_info[:2], newfile, path, text):
+            h.update(s.encode('utf-8', 'surrogateescape') + b'\0')
+        return h.hexdigest()
+
+    @staticmethod
+    def _Locate(fname, infile, include_path):
+        """
+        Returns the absolute path of the file which would be opened if "fname"
+        was included from within "infile" (see TtreeShlex.sourcehook()),
+        or None if the file can not be found.
+        """
+        fname = RemoveOuterQuotes(fname)
+        candidates = [fname]
+        if isinstance(infile, str) and not os.path.isabs(fname):
+            candidates = [os.path.join(os.path.dirname(infile), fname)]
+        candidates += [os.path.join(d, fname) for d in include_path]
+        for candidate in candidates:
+            if os.path.isfile(candidate):
+                return os.path.abspath(candidate)
+        return None
+
+    @staticmethod
+    def _FileDigest(fname):
+        try:
+            with open(fname, 'rb') as f:
+                return hashlib.sha256(f.read()).hexdigest()
+        except (IOError, OSError):
+            return None
+
+    @staticmethod
+    def _ContextMatches(entry, lex):
+        """
+        Files which were imported earlier are skipped when they are imported
+        again.  An entry can only be used if the same files were skipped
+        (and the same files were not skipped) when it was created.
+        """
+        restricted = entry[1]
+        skipped = entry[2]
+        for fname in restricted:
+            if fname in lex.source_files_restricted:
+                return False
+        for fname in skipped:
+            if fname not in lex.source_files_restricted:
+                return False
+        return True
+
+    def _ParseIsolated(self, lex, newfile, text):
+        """
+        Parse the contents of an imported file into a new (empty) static
+        tree.  Returns a tuple:
+          (sub_root, restricted, skipped, dependencies,
+           order_begin, order_end, srclocs, root_refs)
+        where "sub_root" is None if the file could not be parsed this way.
+        """
+        sub_lex = TemplateLexer(io.StringIO(text), newfile)
+        sub_lex.include_path = list(lex.include_path)
+        sub_lex.source_files_restricted = set(lex.source_files_restricted)
+        sourced = set([])
+        dependencies = []
+        sourcehook = sub_lex.sourcehook
+
+        def RecordingSourcehook(fname):
+            infile = sub_lex.infile
+            spec = sourcehook(fname)
+            path = os.path.abspath(spec[1].name)
+            sourced.add(spec[0])
+            dependencies.append((fname, infile, path,
+                                 ImportCache._FileDigest(path)))
+            return spec
+
+        sub_lex.sourcehook = RecordingSourcehook
+        self.recording.append((sourced, dependencies))
+        random_state = random.getstate()
+        order_begin = OSrcLoc.count
+        sub_root = StaticObj('', None)
+        try:
+            sub_root.Parse(sub_lex, self)
+        except Exception:
+            # (The error, if any, is reported when the file is parsed again
+            #  the ordinary way, which is what happens next.)
+            sub_root = None
+        finally:
+            self.recording.pop()
+        order_end = OSrcLoc.count
+        if sub_root is not None:
+            # Files which (re)seed the random number generator, or which
+            # contain "push" commands that are never popped, depend on the
+            # context in which they were imported.  Don't store those.
+            if random.getstate() != random_state:
+                sub_root = None
+            elif any(isinstance(command, PopCommand) and
+                     (command.srcloc is sub_root.srcloc_end)
+                     for command in sub_root.instance_commands):
+                sub_root = None
+        srclocs = []
+        root_refs = []
+        if sub_root is not None:
+            srclocs, root_refs = _FindSubtreeRefs(sub_root)
+            if any(isinstance(obj, (tuple, set, frozenset))
+                   for obj, k in root_refs):
+                sub_root = None
+        restricted = sorted(sub_lex.source_files_restricted -
+                            lex.source_files_restricted)
+        skipped = sorted(sourced & lex.source_files_restricted)
+        return (sub_root, restricted, skipped, dependencies,
+                order_begin, order_end, srclocs, root_refs)
+
+    def _Trusted(self):
+        """
+        Only load entries from a directory (and files) which belong to the
+        current user and which other users can not modify.
+        """
+        if not hasattr(os, 'getuid'):
+            return True
+        try:
+            st = os.stat(self.directory)
+        except OSError:
+            return False
+        return ((st.st_uid == os.getuid()) and
+                ((st.st_mode & 0o022) == 0))
+
+    def _Load(self, key, lex):
+        fname = os.path.join(self.directory, key + '.pickle')
+        if not os.path.exists(fname):
+            return None
+        try:
+            if not self._Trusted():
+                return None
+            if hasattr(os, 'getuid') and (os.stat(fname).st_uid != os.getuid()):
+                return None
+            with open(fname, 'rb') as f:
+                entry = pickle.load(f)
+        except Exception:
+            return None
+        # Locate the files this file depends on using the current include
+        # path.  They must be the same files, with the same contents.
+        for name, infile, path, digest in entry[3]:
+            if ((ImportCache._Locate(name, infile, lex.include_path) != path) or
+                (ImportCache._FileDigest(path) != digest)):
+                return None
+        try:
+            os.utime(fname, None)  # (remember when this entry was last used)
+        except OSError:
+            pass
+        return entry
+
+    def _Save(self, key, entry):
+        # (Caching is an optimization.  Failure to write is not an error.)
+        tmp_fname = None
+        try:
+            data = pickle.dumps(entry, pickle.HIGHEST_PROTOCOL)
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory, 0o700)
+            fd, tmp_fname = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            # (Renaming is atomic, in case other jobs share this directory.)
+            os.rename(tmp_fname, os.path.join(self.directory,
+                                              key + '.pickle'))
+            self._Prune()
+        except Exception:
+            if tmp_fname is not None and os.path.exists(tmp_fname):
+                os.remove(tmp_fname)
+
+    def _Prune(self):
+        """
+        Delete the least recently used entries until the total size of
+        the cache no longer exceeds self.max_size.
+        """
+        entries = []
+        total_size = 0
+        for fname in os.listdir(self.directory):
+            if fname.endswith('.pickle'):
+                st = os.stat(os.path.join(self.directory, fname))
+                entries.append((st.st_mtime, st.st_size, fname))
+                total_size += st.st_size
+        entries.sort()
+        # (Always keep the entry which was just saved.)
+        for mtime, size, fname in entries[:-1]:
+            if total_size <= self.max_size:
+                break
+            os.remove(os.path.join(self.directory, fname))
+            total_size -= size
+
+    @staticmethod
+    def _Graft(static_root, lex, entry, order_offset):
+        """
+        Move the contents of the stored tree into "static_root" (unless doing
+        so would collide with something which was defined earlier).
+        """
+        (sub_root, restricted, skipped, dependencies,
+         order_begin, order_end, srclocs, root_refs) = entry
+        for attr in ('children', 'categories', 'instance_categories',
+                     'instname_refs'):
+            existing = getattr(static_root, attr)
+            for name in getattr(sub_root, attr):
+                if name in existing:
+                    return False
+
+        if order_offset != 0:
+            for srcloc in srclocs:
+                srcloc.order += order_offset
+        for obj, k in root_refs:
+            if isinstance(obj, (list, dict)):
+                obj[k] = static_root
+            else:
+                setattr(obj, k, static_root)
+
+        static_root.children.update(sub_root.children)
+        static_root.categories.update(sub_root.categories)
+        static_root.instance_categories.update(sub_root.instance_categories)
+        static_root.instname_refs.update(sub_root.instname_refs)
+        static_root.commands += sub_root.commands
+        static_root.class_parents += sub_root.class_parents
+        static_root.namespaces += sub_root.namespaces
+        static_root.instance_commands_push += sub_root.instance_commands_push
+        static_root.instance_commands += sub_root.instance_commands
+        static_root.instance_commands_pop += sub_root.instance_commands_pop
+        lex.source_files_restricted.update(restricted)
+        return True
+
+
+def _FindSubtreeRefs(sub_root):
+    """
+    Visit every object reachable from "sub_root".  Return a list of every
+    OSrcLoc object, and a list of (object, attribute_or_key) pairs for every
+    reference to "sub_root" itself.  (ImportCache stores both lists so that
+    the subtree can be renumbered and moved without visiting it again.)
+    """
+    atomic_types = set([str, unicode, bytes, int, float, bool, type(None)])
+    slot_names = {}
+    srclocs = []
+    root_refs = []
+    visited = set([id(sub_root)])
+    pending = [sub_root]
+    while pending:
+        obj = pending.pop()
+        cls = type(obj)
+        if cls is OSrcLoc:
+            srclocs.append(obj)
+            continue
+        if isinstance(obj, (list, dict)):
+            items = enumerate(obj) if isinstance(obj, list) else obj.items()
+        elif isinstance(obj, (tuple, set, frozenset)):
+            items = enumerate(obj)
+        elif isinstance(obj, type):
+            continue
+        else:
+            names = slot_names.get(cls)
+            if names is None:
+                names = []
+                for c in cls.__mro__:
+                    slots = c.__dict__.get('__slots__', ())
+                    if isinstance(slots, basestring):
+                        slots = (slots,)
+                    names += slots
+                slot_names[cls] = names
+            items = [(name, getattr(obj, name)) for name in names
+                     if hasattr(obj, name)]
+            if hasattr(obj, '__dict__'):
+                items += list(obj.__dict__.items())
+        for k, v in items:
+            if v is sub_root:
+                root_refs.append((obj, k))
+            elif (type(v) not in atomic_types) and (id(v) not in visited):
+                visited.add(id(v))
+                pending.append(v)
+    return srclocs, root_refs
+
+
 class InstanceObjBasic(object):
     """ A simplified version of InstanceObj.
         See the documentation/comments for InstanceObj for more details.
@@ -3981,6 +4429,7 @@ class InstanceObj(InstanceObjBasic):
             return  # ends "if isinstance(command, ModCommand):"
 
         # Otherwise:
+        static_command = command
         command = command.__copy__()
         self.ProcessContextNodes(command)
 
@@ -4030,99 +4479,99 @@ class InstanceObj(InstanceObjBasic):
 
             self.commands.append(command)
 
-            for var_ref in command.tmpl_list:
-                # Process the VarRef entries in the tmpl_list,
-                #   (and check they have the correct prefix: either '$' or '@')
-                # Ignore other entries (for example, ignore TextBlocks).
-
-                if (isinstance(var_ref, VarRef) and (var_ref.prefix[0] == '$')):
-
-                    if (var_ref.descr_str[:4] == 'mol:'):
-                        pass
-
-                    var_ref.nptr.cat_name, var_ref.nptr.cat_node, var_ref.nptr.leaf_node = \
-                        DescrToCatLeafNodes(var_ref.descr_str,
-                                            self,
-                                            var_ref.srcloc,
-                                            True)
-
-                    categories = var_ref.nptr.cat_node.categories
-
-                    # "categories" is a dictionary storing "Category" objects
-                    # indexed by category names.
-
-                    # Note to self:  Always use the ".categories" member,
-                    #  (never the ".instance_categories" member.
-                    #  ".instance_categories" are only used temporarilly before
-                    # we instantiate, ie. before we build the tree of
-                    # InstanceObjs.)
-
-                    category = categories[var_ref.nptr.cat_name]
-                    # "category" is a Category object containing a
-                    # dictionary of VarBinding objects, and an internal
-                    # counter.
-
-                    var_bindings = category.bindings
-                    # "var_bindings" is a dictionary storing "VarBinding"
-                    # objects, indexed by leaf nodes.  Each leaf node
-                    # corresponds to a unique variable in this category.
-
-                    # --- Now update "var_bindings" ---
-
-                    # Search for the "VarBinding" object that
-                    # corresponds to this leaf node.
-                    # If not found, then create one.
-
-                    if var_ref.nptr.leaf_node in var_bindings:
-                        var_binding = var_bindings[var_ref.nptr.leaf_node]
-                        # "var_binding" stores the information for a variable,
-                        # including pointers to all of the places the variable
-                        # is rerefenced, the variable's (full) name, and value.
-                        #
-                        # Keep track of all the places that varible is
-                        # referenced by updating the ".refs" member
-                        var_binding.refs.append(var_ref)
-                    else:
-                        # Not found, so we create a new binding.
-                        var_binding = VarBinding()
+            # Process the '$' VarRef entries in the tmpl_list.
+            # Ignore other entries (for example, ignore TextBlocks).
+            # (Their locations are the same for every instance of this class.)
+            for i in static_command.InstancePlan():
+                var_ref = command.tmpl_list[i]
+
+                if (var_ref.descr_str[:4] == 'mol:'):
+                    pass
+
+                var_ref.nptr.cat_name, var_ref.nptr.cat_node, var_ref.nptr.leaf_node = \
+                    self.DescrToCatLeafNodes(var_ref.descr_str,
+                                             var_ref.srcloc)
+
+                categories = var_ref.nptr.cat_node.categories
+
+                # "categories" is a dictionary storing "Category" objects
+                # indexed by category names.
+
+                # Note to self:  Always use the ".categories" member,
+                #  (never the ".instance_categories" member.
+                #  ".instance_categories" are only used temporarilly before
+                # we instantiate, ie. before we build the tree of
+                # InstanceObjs.)
+
+                category = categories[var_ref.nptr.cat_name]
+                # "category" is a Category object containing a
+                # dictionary of VarBinding objects, and an internal
+                # counter.
+
+                var_bindings = category.bindings
+                # "var_bindings" is a dictionary storing "VarBinding"
+                # objects, indexed by leaf nodes.  Each leaf node
+                # corresponds to a unique variable in this category.
+
+                # --- Now update "var_bindings" ---
+
+                # Search for the "VarBinding" object that
+                # corresponds to this leaf node.
+                # If not found, then create one.
+
+                if var_ref.nptr.leaf_node in var_bindings:
+                    var_binding = var_bindings[var_ref.nptr.leaf_node]
+                    # "var_binding" stores the information for a variable,
+                    # including pointers to all of the places the variable
+                    # is rerefenced, the variable's (full) name, and value.
+                    #
+                    # Keep track of all the places that varible is
+                    # referenced by updating the ".refs" member
+                    var_binding.refs.append(var_ref)
+                    # Every reference to this variable can share the same
+                    # VarNPtr.  (There can be millions of them.)
+                    var_ref.nptr = var_binding.nptr
+                else:
+                    # Not found, so we create a new binding.
+                    var_binding = VarBinding()
 
-                        # var_binding.refs contains a list of all the places
-                        # this variable is referenced. Start with this var_ref:
-                        var_binding.refs = [var_ref]
+                    # var_binding.refs contains a list of all the places
+                    # this variable is referenced. Start with this var_ref:
+                    var_binding.refs = [var_ref]
 
-                        # keep track of the cat_node, cat_name, leaf_node:
-                        var_binding.nptr = var_ref.nptr
+                    # keep track of the cat_node, cat_name, leaf_node:
+                    var_binding.nptr = var_ref.nptr
 
-                        # "var_binding.full_name" stores a unique string like
-                        #   '@/atom:Water/H' or '$/atom:water[1423]/H2',
-                        # which contains the full path for the category and leaf
-                        # nodes, and uniquely identifies this variable globally.
-                        # Thus these strings correspond uniquely (ie. in a
-                        # one-to-one fashion) with the nodes they represent.
+                    # "var_binding.full_name" stores a unique string like
+                    #   '@/atom:Water/H' or '$/atom:water[1423]/H2',
+                    # which contains the full path for the category and leaf
+                    # nodes, and uniquely identifies this variable globally.
+                    # Thus these strings correspond uniquely (ie. in a
+                    # one-to-one fashion) with the nodes they represent.
 
-                        var_binding.full_name = var_ref.prefix[0] + \
-                            CanonicalDescrStr(var_ref.nptr.cat_name,
-                                              var_ref.nptr.cat_node,
-                                              var_ref.nptr.leaf_node,
-                                              var_ref.srcloc)
-                        # (These names can always be generated later when needed
-                        #  but it doesn't hurt to keep track of it here too.)
+                    var_binding.full_name = var_ref.prefix[0] + \
+                        CanonicalDescrStr(var_ref.nptr.cat_name,
+                                          var_ref.nptr.cat_node,
+                                          var_ref.nptr.leaf_node,
+                                          var_ref.srcloc)
+                    # (These names can always be generated later when needed
+                    #  but it doesn't hurt to keep track of it here too.)
 
-                        # Now add this binding to the other
-                        # bindings in this category:
-                        var_bindings[var_ref.nptr.leaf_node] = var_binding
+                    # Now add this binding to the other
+                    # bindings in this category:
+                    var_bindings[var_ref.nptr.leaf_node] = var_binding
 
-                        # vb##
-                        # var_ref.nptr.leaf_node.AddVarBinding(var_binding)
+                    # vb##
+                    # var_ref.nptr.leaf_node.AddVarBinding(var_binding)
 
-                        var_binding.category = category
+                    var_binding.category = category
 
-                    # It's convenient to add a pointer in the opposite direction
-                    # so that later if we find the var_ref, we can find its
-                    # binding and visa-versa. (Ie. two-way pointers)
-                    var_ref.binding = var_binding
+                # It's convenient to add a pointer in the opposite direction
+                # so that later if we find the var_ref, we can find its
+                # binding and visa-versa. (Ie. two-way pointers)
+                var_ref.binding = var_binding
 
-                    assert(var_ref.nptr.leaf_node in var_bindings)
+                assert(var_ref.nptr.leaf_node in var_bindings)
 
         else:
             # Otherwise, we don't know what this command is yet.
@@ -4139,6 +4588,30 @@ class InstanceObj(InstanceObjBasic):
                                                      command.srcloc)
             # (Otherwise, just leave it as None)
 
+    def DescrToCatLeafNodes(self, descr_str, srcloc):
+        """
+        Equivalent to DescrToCatLeafNodes(descr_str, self, srcloc, True),
+        except that the most common kinds of descriptors (see SimpleDescr())
+        are looked up directly, without following a path through the tree.
+
+        """
+        simple = SimpleDescr(descr_str)
+        if simple is None:
+            return DescrToCatLeafNodes(descr_str, self, srcloc, True)
+
+        cat_name, leaf_name = simple
+        cat_node = FindCatNode(cat_name, self, srcloc)
+        if cat_name not in cat_node.categories:
+            cat_node.categories[cat_name] = Category(cat_name)
+
+        if leaf_name is None:
+            return cat_name, cat_node, self
+        leaf_node = self.children.get(leaf_name)
+        if leaf_node is None:
+            leaf_node = InstanceObjBasic(leaf_name, self)
+            self.children[leaf_name] = leaf_node
+        return cat_name, cat_node, leaf_node
+
     def BuildCommandList(self, command_list):
         """
         Search the commands in the tree and make a linear list of commands
@@ -4223,11 +4696,11 @@ def AssignTemplateVarPtrs(tmpl_list, context_node):
              (isinstance(context_node, InstanceObjBasic) and
               (var_ref.prefix[0] == '$')))):
 
-            var_ref.nptr.cat_name, var_ref.nptr.cat_node, var_ref.nptr.leaf_node = \
-                DescrToCatLeafNodes(var_ref.descr_str,
-                                    context_node,
-                                    var_ref.srcloc,
-                                    True)
+            # (Don't modify var_ref.nptr.  It may be shared with other VarRefs.)
+            var_ref.nptr = VarNPtr(*DescrToCatLeafNodes(var_ref.descr_str,
+                                                        context_node,
+                                                        var_ref.srcloc,
+                                                        True))
 
             categories = var_ref.nptr.cat_node.categories
 
@@ -4263,6 +4736,8 @@ def AssignTemplateVarPtrs(tmpl_list, context_node):
                 # Keep track of all the places that varible is
                 # referenced by updating the ".refs" member
                 var_binding.refs.append(var_ref)
+                # Every reference to this variable can share the same VarNPtr.
+                var_ref.nptr = var_binding.nptr
             else:
                 # Not found, so we create a new binding.
                 var_binding = VarBinding()
@@ -4705,9 +5180,10 @@ def ReplaceVarsInTmpl(tmpl_list, replace_var_pairs):
                 #    ref.nptr.cat_name = nptr_new_cat_name
                 #    ref.nptr.cat_node = nptr_new_cat_node
                 #    ref.nptr.leaf_node = nptr_new_leaf_node
+                old_refs = [var_ref]
                 if nptr_old.leaf_node in var_bindings:
-                    var_bindings[nptr_new_leaf_node].refs += \
-                        var_bindings[nptr_old.leaf_node].refs
+                    old_refs = var_bindings[nptr_old.leaf_node].refs
+                    var_bindings[nptr_new_leaf_node].refs += old_refs
                     del var_bindings[nptr_old.leaf_node]
 
                 var_ref.nptr.cat_name = nptr_new_cat_name
@@ -4727,6 +5203,11 @@ def ReplaceVarsInTmpl(tmpl_list, replace_var_pairs):
                                       var_ref.nptr.cat_node,
                                       var_ref.nptr.leaf_node,
                                       var_ref.srcloc)
+                # The other references to the old variable share the same
+                # nptr (which we just updated), so update them as well:
+                for ref in old_refs:
+                    if ref.nptr is nptr_old:
+                        ref.descr_str = var_ref.descr_str
 
                 var_bindings[nptr_new_leaf_node].full_name = \
                     var_ref.prefix[0] + var_ref.descr_str
@@ -5079,6 +5560,10 @@ class BasicUISettings(object):
     created by the ttree file matches the order they appear in other files
     created by other programs.)
 
+        import_cache
+    An ImportCache object storing previously parsed copies of imported
+    files (or None, if the cache is disabled).
+
     """
 
     def __init__(self,
@@ -5099,6 +5584,10 @@ class BasicUISettings(object):
             self.lex = TemplateLexer()
         else:
             self.lex = lex
+        # (The cache is only used if MOLTEMPLATE_CACHE_DIR is set.)
+        self.import_cache = None
+        if ImportCache.DefaultDirectory() != '':
+            self.import_cache = ImportCache()
 
 
 def BasicUIParseArgs(argv, settings, main=False):
@@ -5201,6 +5690,22 @@ def BasicUIParseArgs(argv, settings, main=False):
                     settings.lex.include_path.append(d)
             del(argv[i:i + 2])
 
+        elif ((argv[i] == '-import-cache') or
+              (argv[i] == '-import_cache')):
+            if ((i + 1 >= len(argv)) or (argv[i + 1][:1] == '-')):
+                raise InputError('Error(' + g_filename + '):\n'
+                                 '     Error in \"' +
+                                 argv[i] + '\" argument.\"\n'
+                                 '     The \"' + argv[i] + '\" argument should be followed by the name of\n'
+                                 '     a directory for storing previously parsed (imported) files.\n')
+            settings.import_cache = ImportCache(RemoveOuterQuotes(argv[i + 1]))
+            del(argv[i:i + 2])
+
+        elif ((argv[i] == '-no-import-cache') or
+              (argv[i] == '-no_import_cache')):
+            settings.import_cache = None
+            del(argv[i:i + 1])
+
         elif (argv[i][0] == '-') and main:
             # elif (__name__ == '__main__'):
             raise InputError('Error(' + g_filename + '):\n'
@@ -5251,7 +5756,8 @@ def BasicUI(settings,
             static_tree_root,
             instance_tree_root,
             static_commands,
-            instance_commands):
+            instance_commands,
+            check_static_tree=None):
     """
     BasicUI()
     This function loads a ttree file and optional custom bindings for it,
@@ -5260,6 +5766,10 @@ def BasicUI(settings,
     automatically assigns values to unbound variables,
     substitutes them into text templates (renders the template).
     The actual writing of the templates to a file is not handled here.
+    If "check_static_tree" is not None, it is invoked with the arguments
+    (static_tree_root, replace_var_pairs) once the static tree is complete
+    (before the instance tree is built), so that the caller can check it
+    for mistakes.  (It should raise an InputError if it finds one.)
 
     """
 
@@ -5268,7 +5778,7 @@ def BasicUI(settings,
     # Step 1: Read in the StaticObj (class) definitions, without checking
     # whether or not the instance_children refer to valid StaticObj types.
     sys.stderr.write('parsing the class definitions...')
-    static_tree_root.Parse(settings.lex)
+    static_tree_root.Parse(settings.lex, settings.import_cache)
     # gc.collect()
 
     #sys.stderr.write('static = ' + str(static_tree_root) + '\n')
@@ -5307,6 +5817,11 @@ def BasicUI(settings,
     ReplaceVars(static_tree_root, replace_var_pairs,
                 search_instance_commands=True)
 
+    # (Optional) Step 3d) Check the static tree for mistakes
+    if check_static_tree != None:
+        sys.stderr.write(' done\nchecking syntax...')
+        check_static_tree(static_tree_root, replace_var_pairs)
+
     sys.stderr.write(' done\nconstructing the tree of class definitions...')
     sys.stderr.write(' done\n\nclass_def_tree = ' +
                      str(static_tree_root) + '\n\n')
@@ -136,6 +136,11 @@ class TtreeShlex(object):
         # if it has not been included already.  It does this
         # by checking if one of these tokens has been encountered.
         self.source_files_restricted = set([])
+        # self.import_hook is an optional function which is invoked (with
+        # the file name and stream) before an exclusive (import) file is
+        # read.  If it returns True, the file was handled elsewhere and
+        # its contents are skipped.  (See ImportCache in ttree.py)
+        self.import_hook = None
         self.include_path = []
         if 'TTREE_PATH' in os.environ:
             include_path_list = os.environ['TTREE_PATH'].split(':')
@@ -218,9 +223,14 @@ class TtreeShlex(object):
                     (newfile, newstream) = spec
                     if ((raw not in self.source_triggers_x) or
                             (newfile not in self.source_files_restricted)):
-                        self.push_source(newstream, newfile)
                         if raw in self.source_triggers_x:
                             self.source_files_restricted.add(newfile)
+                        if ((raw in self.source_triggers_x) and
+                            (self.import_hook is not None) and
+                            self.import_hook(newfile, newstream)):
+                            newstream.close()
+                        else:
+                            self.push_source(newstream, newfile)
                     else:
                         if self.debug >= 1:
                             sys.stderr.write(
@@ -509,12 +519,53 @@ class SrcLoc(object):
         self.lineno = lineno
 
 
+# SplitQuotedString() is invoked on every line of some very large files.
+# Most of these lines contain no quotes, escape or comment characters.
+# Such lines can be split using str.split(), which is much faster.
+# This dictionary stores the regular expressions used to detect the lines
+# which can not be split this way (one for each combination of arguments).
+_split_quoted_special = {}
+
+
+def _SplitQuotedSpecialChars(quotes, delimiters, escape, comment_char):
+    """ Return a compiled regular expression which matches any character
+    that SplitQuotedString() must handle one character at a time
+    (given these arguments), or None if str.split() can never be used. """
+    key = (quotes, delimiters, escape, comment_char)
+    try:
+        return _split_quoted_special[key]
+    except KeyError:
+        pass
+    regex = None
+    # str.split() splits the string at every whitespace character, so we
+    # can only use it when all of the delimiters are whitespace characters.
+    # Other whitespace characters (which are not delimiters) are special.
+    if (len(delimiters) > 0) and delimiters.isspace():
+        special = quotes + escape + comment_char
+        pattern = '[^\\S' + re.escape(delimiters) + ']'
+        if len(special) > 0:
+            pattern = '[' + re.escape(special) + ']|' + pattern
+        regex = re.compile(pattern)
+    _split_quoted_special[key] = regex
+    return regex
+
+
 def SplitQuotedString(string,
                       quotes='\'\"',
                       delimiters=' \t\r\f\n',
                       escape='\\',
                       comment_char='#',
                       endquote=None):
+    # Fast path: (See comment above _split_quoted_special)
+    try:
+        special = _split_quoted_special[(quotes, delimiters,
+                                         escape, comment_char)]
+    except KeyError:
+        special = _SplitQuotedSpecialChars(quotes, delimiters,
+                                           escape, comment_char)
+    if (special != None) and (special.search(string) is None):
+        return string.split()
+
     tokens = []
     token = ''
     reading_token = True
@@ -17,11 +17,19 @@ This program reads a text file containing ttree-style variables,
 substitutes the corresponding values stored in ttree_assignments.txt,
 and prints out the new (rendered) text to the standard-out.
 
+Several templates can be rendered at once (so that ttree_assignments.txt
+is only read once) by supplying pairs of file names after the first argument:
+
+ttree_render.py ttree_assignments.txt f1.template f1 f2.template f2 ...
+
+In that case each rendered template is written to the file which follows it.
+
 """
 
 
 import sys
 import gc
+import io
 
 try:
     from .ttree import ExtractFormattingCommands
@@ -44,6 +52,119 @@ g_program_name = g_filename
 
 
 
+def ReadBindings(fbindings, assignments=None):
+    """
+    Read a 2-column file (typically "ttree_assignments.txt") containing
+    variable names (1st column) and their values (2nd column).
+    Returns a dictionary which maps each variable name to its value.
+    """
+    if assignments is None:
+        assignments = {}
+
+    #BasicUIReadBindingsStream(assignments, f, bindings_filename)
+
+    # The line above is robust but it uses far too much memory.
+    # This for loop below works for most cases.
+    for line in fbindings:
+        #tokens = lines.strip().split()
+        # like split but handles quotes
+        tokens = SplitQuotedString(line.strip())
+        if len(tokens) < 2:
+            continue
+        assignments[tokens[0]] = tokens[1]
+
+    return assignments
+
+
+
+def RenderTemplate(ftemplate, ftemplate_name, assignments, fout=None):
+    """
+    Read a text file containing ttree-style variables, substitute the
+    corresponding values stored in "assignments", and return the
+    new (rendered) text as a string.
+    If "fout" is not None, the text is written to this stream instead
+    (as it is generated), and nothing is returned.
+    """
+    lex = TemplateLexer(ftemplate, ftemplate_name)
+    lex.var_delim = '$@'
+
+    text_block_list = lex.ReadTemplate(simplify_output=True)
+
+    if fout is None:
+        output = io.StringIO()
+    else:
+        output = fout
+    write = output.write
+
+    for entry in text_block_list:
+        assert(isinstance(entry, str))
+
+        if ((len(entry) > 1) and (entry[0] in lex.var_delim)):
+
+            var_prefix = ''
+            var_suffix = ''
+            var_format = ''
+            if ((len(entry) >= 3) and
+                (entry[1] == '{') and
+                (entry[-1] == '}')):
+                var_prefix = '{'
+                var_suffix = '}'
+                entry = entry[0] + entry[2:-1]
+
+            if '.' in entry:
+                ic = entry.find('.')
+                var_name = entry[:ic]
+                var_format = entry[ic:]
+                if not var_format[0:7] in ('.ljust(', '.rjust('):
+                    var_name = entry
+                    var_format = ''
+            else:
+                var_name = entry
+                var_format = ''
+
+            if var_name not in assignments:
+                #COMMENTING OUT:
+                #raise(InputError('Error(' + g_program_name + ')'
+                #                 #' at '+ErrorLeader(var_ref.src_loc.infile,
+                #                 #                   var_ref.src_loc.lineno)+
+                #                 ' unknown variable:\n'
+                #                 '         \"' + var_name + '\"\n'))
+                # ...actually don't raise an error message:
+                # Actually there are some legitimate reasons this could occur.
+                # Some users want to put LAMMPS-style variables in the 
+                # write_once() {...} text blocks in their moltemplate files.
+                # Variables in both LAMMPS and moltemplate contain $ characters, 
+                # and this script gets confused.  Better to just ignore it
+                # when this happens instead of printing an error message.
+                # Just leave the text alone and print the variable name.
+                #
+                # Do this by substituting the variable's name as it's value:
+
+                var_value = entry[0] + var_prefix + var_name[1:] + var_suffix
+
+            else:
+                var_value = assignments[var_name]
+
+            format_fname, args = ExtractFormattingCommands(var_format)
+            if format_fname == 'ljust':
+                if len(args) == 1:
+                    var_value = var_value.ljust(int(args[0]))
+                else:
+                    var_value = var_value.ljust(int(args[0]), args[1])
+            elif format_fname == 'rjust':
+                if len(args) == 1:
+                    var_value = var_value.rjust(int(args[0]))
+                else:
+                    var_value = var_value.rjust(int(args[0]), args[1])
+            write(var_value)
+        else:
+            write(entry)
+
+    if fout is None:
+        return output.getvalue()
+
+
+
 def main():
     try:
         if (len(sys.argv) < 2):
@@ -58,109 +179,43 @@ def main():
                              '    This script was not intended to be run by end users.)\n')
 
         bindings_filename = sys.argv[1]
-        ftemplate = sys.stdin
-        ftemplate_name = '__standard_input_for_ttree_render__'
-        if len(sys.argv) >= 3:
-            ftemplate_name = sys.argv[2]
-            ftemplate = open(ftemplate_name, 'r')
-
+        # The remaining arguments are either the name of a single template
+        # (rendered to the standard-out), or pairs of file names:
+        #   template1 output1 template2 output2 ...
+        file_names = sys.argv[2:]
+        if (len(file_names) > 1) and (len(file_names) % 2 != 0):
+            raise InputError('Error(' + g_program_name + '):\n'
+                             '   Expected pairs of file names after the first argument:\n'
+                             '   template1 output1 template2 output2 ...\n'
+                             '   (The last template has no corresponding output file.)\n')
 
         fbindings = open(bindings_filename)
-        assignments = {}
-
-        #BasicUIReadBindingsStream(assignments, f, bindings_filename)
-
-        # The line above is robust but it uses far too much memory.
-        # This for loop below works for most cases.
-        for line in fbindings:
-            #tokens = lines.strip().split()
-            # like split but handles quotes
-            tokens = SplitQuotedString(line.strip())
-            if len(tokens) < 2:
-                continue
-            assignments[tokens[0]] = tokens[1]
-
+        assignments = ReadBindings(fbindings)
         fbindings.close()
         gc.collect()
-       
-        lex = TemplateLexer(ftemplate, ftemplate_name)
-        lex.var_delim = '$@'
-
-        text_block_list = lex.ReadTemplate(simplify_output=True)
-
-        output = []
-
-        for entry in text_block_list:
-            assert(isinstance(entry, str))
-
-            if ((len(entry) > 1) and (entry[0] in lex.var_delim)):
-
-                var_prefix = ''
-                var_suffix = ''
-                var_format = ''
-                if ((len(entry) >= 3) and
-                    (entry[1] == '{') and
-                    (entry[-1] == '}')):
-                    var_prefix = '{'
-                    var_suffix = '}'
-                    entry = entry[0] + entry[2:-1]
-
-                if '.' in entry:
-                    ic = entry.find('.')
-                    var_name = entry[:ic]
-                    var_format = entry[ic:]
-                    if not var_format[0:7] in ('.ljust(', '.rjust('):
-                        var_name = entry
-                        var_format = ''
-                else:
-                    var_name = entry
-                    var_format = ''
-
-                if var_name not in assignments:
-                    #COMMENTING OUT:
-                    #raise(InputError('Error(' + g_program_name + ')'
-                    #                 #' at '+ErrorLeader(var_ref.src_loc.infile,
-                    #                 #                   var_ref.src_loc.lineno)+
-                    #                 ' unknown variable:\n'
-                    #                 '         \"' + var_name + '\"\n'))
-                    # ...actually don't raise an error message:
-                    # Actually there are some legitimate reasons this could occur.
-                    # Some users want to put LAMMPS-style variables in the 
-                    # write_once() {...} text blocks in their moltemplate files.
-                    # Variables in both LAMMPS and moltemplate contain $ characters, 
-                    # and this script gets confused.  Better to just ignore it
-                    # when this happens instead of printing an error message.
-                    # Just leave the text alone and print the variable name.
-                    #
-                    # Do this by substituting the variable's name as it's value:
-
-                    var_value = entry[0] + var_prefix + var_name[1:] + var_suffix
-
-                else:
-                    var_value = assignments[var_name]
-
-                format_fname, args = ExtractFormattingCommands(var_format)
-                if format_fname == 'ljust':
-                    if len(args) == 1:
-                        var_value = var_value.ljust(int(args[0]))
-                    else:
-                        var_value = var_value.ljust(int(args[0]), args[1])
-                elif format_fname == 'rjust':
-                    if len(args) == 1:
-                        var_value = var_value.rjust(int(args[0]))
-                    else:
-                        var_value = var_value.rjust(int(args[0]), args[1])
-                output.append(var_value)
-            else:
-                output += entry
-
-        sys.stdout.write(''.join(output))
 
-        # If we are not reading the file from sys.stdin, then close the file:
-        if ftemplate_name == '__standard_input_for_ttree_render__':
-            assert(ftemplate == sys.stdin)
-        else:
+        if len(file_names) == 0:
+            RenderTemplate(sys.stdin,
+                           '__standard_input_for_ttree_render__',
+                           assignments,
+                           sys.stdout)
+        elif len(file_names) == 1:
+            ftemplate = open(file_names[0], 'r')
+            RenderTemplate(ftemplate,
+                           file_names[0],
+                           assignments,
+                           sys.stdout)
             ftemplate.close()
+        else:
+            for i in range(0, len(file_names), 2):
+                ftemplate = open(file_names[i], 'r')
+                fout = open(file_names[i + 1], 'w')
+                RenderTemplate(ftemplate,
+                               file_names[i],
+                               assignments,
+                               fout)
+                fout.close()
+                ftemplate.close()
 
     except (ValueError, InputError) as err:
         sys.stderr.write('\n' + str(err) + '\n')
@@ -90,11 +90,14 @@ setup(
         'ltemplify.py=moltemplate.ltemplify:main',
         'lttree.py=moltemplate.lttree:main',
         'lttree_check.py=moltemplate.lttree_check:main',
+        'lttree_data_header.py=moltemplate.lttree_data_header:main',
+        'lttree_coords.py=moltemplate.lttree_coords:main',
         'lttree_postprocess.py=moltemplate.lttree_postprocess:main',
         'nbody_by_type.py=moltemplate.nbody_by_type:main',
         'nbody_fix_ttree_assignments.py=moltemplate.nbody_fix_ttree_assignments:main',
         'nbody_reorder_atoms.py=moltemplate.nbody_reorder_atoms:main',
         'pdbsort.py=moltemplate.pdbsort:main',
+        'pipeline.py=moltemplate.pipeline:main',
         'postprocess_input_script.py=moltemplate.postprocess_input_script:main',
         'postprocess_coeffs.py=moltemplate.postprocess_coeffs:main',
         'raw2data.py=moltemplate.raw2data:main',
@@ -0,0 +1,169 @@
+#!/usr/bin/env bash
+
+# Check the header of the data files created by moltemplate.sh (which is
+# written by lttree_data_header.py): the number of atoms, bonds, and types,
+# and the periodic boundary conditions (read from the "Data Boundary"
+# section, estimated from the coordinates, or chosen by default).
+
+write_system() {
+  # usage: write_system FILE_NAME < DATA_BOUNDARY_TEXT
+  # (If DATA_BOUNDARY_TEXT is empty, "Data Boundary" is omitted.)
+  cat > "$1" << 'EOF'
+write_once("In Init") {
+  atom_style full
+}
+write_once("In Settings") {
+  pair_coeff @atom:A @atom:A 0.1 1.0
+  pair_coeff @atom:B @atom:B 0.2 2.0
+  bond_coeff @bond:AB 100.0 1.0
+}
+write_once("Data Masses") {
+  @atom:A 1.0
+  @atom:B 2.0
+}
+write("Data Atoms") {
+  $atom:a1 $mol:m @atom:A 0.0   0.0  0.0 -5.0
+  $atom:a2 $mol:m @atom:B 0.0  10.0  5.0  0.0
+  $atom:a3 $mol:m @atom:A 0.0   5.0 20.0  5.0
+}
+write("Data Bonds") {
+  $bond:b1 @bond:AB $atom:a1 $atom:a2
+  $bond:b2 @bond:AB $atom:a2 $atom:a3
+}
+EOF
+  BOUNDARY=`cat`
+  if [ -n "$BOUNDARY" ]; then
+    echo 'write_once("Data Boundary") {' >> "$1"
+    echo "$BOUNDARY" >> "$1"
+    echo '}' >> "$1"
+  fi
+}
+
+box_lines() {
+  # usage: box_lines DATA_FILE
+  # Print the lines from the header which describe the box (on one line).
+  extract_lammps_data.py Header < "$1" | awk '/xlo|ylo|zlo|xy/{printf("%s%s %s", sep, $1, $2); if (NF>5) {printf(" %s", $3)} sep=" "}'
+}
+
+oneTimeSetUp() {
+  cd tests/
+    rm -rf data_header_tmp
+    mkdir data_header_tmp
+  cd ../
+}
+
+oneTimeTearDown() {
+  rm -rf tests/data_header_tmp
+}
+
+test_data_header_count_types() {
+  cd tests/data_header_tmp/
+    cat > ttree_assignments.txt << 'EOF'
+# comment @/atom:Z 1
+$/atom:a1 1
+${/atom:a2 b} 2
+$/bond:b1 1
+@/atom:A 1
+@{/atom:B C} 2
+@/bond:X 1
+@/angle:Y 1
+@/angle:Z 2
+@/angle:W 3
+@/improper:V 1
+EOF
+    assertEquals "wrong number of types" "NATOMTYPES=2
+NBONDTYPES=1
+NANGLETYPES=3
+NDIHEDRALTYPES=0
+NIMPROPERTYPES=1
+NATOMS=2" "`lttree_data_header.py -count-types ttree_assignments.txt`"
+    rm -f ttree_assignments.txt
+    assertEquals "wrong number of types (missing file)" "NATOMTYPES=0
+NBONDTYPES=0
+NANGLETYPES=0
+NDIHEDRALTYPES=0
+NIMPROPERTYPES=0
+NATOMS=0" "`lttree_data_header.py -count-types ttree_assignments.txt`"
+  cd ../../
+}
+
+test_data_header_boundary() {
+  cd tests/data_header_tmp/
+    # (The last "zlo zhi" line should override the first one.)
+    write_system boundary.lt << 'EOF'
+  -1.0 11.0 xlo xhi
+  -2.0 22.0 ylo yhi
+  0.0 1.0 zlo zhi
+  -6.0 6.0 zlo zhi
+EOF
+    moltemplate.sh boundary.lt
+    assertEquals "moltemplate.sh failed" 0 $?
+    HEADER=`extract_lammps_data.py Header < boundary.data`
+    assertEquals "wrong number of atoms" 3 "`echo "$HEADER" | awk '$2=="atoms"{print $1}'`"
+    assertEquals "wrong number of bonds" 2 "`echo "$HEADER" | awk '$2=="bonds"{print $1}'`"
+    assertEquals "wrong number of angles" 0 "`echo "$HEADER" | awk '$2=="angles"{print $1}'`"
+    assertEquals "wrong number of atom types" 2 "`echo "$HEADER" | awk '$2=="atom" && $3=="types"{print $1}'`"
+    assertEquals "wrong number of bond types" 1 "`echo "$HEADER" | awk '$2=="bond" && $3=="types"{print $1}'`"
+    assertEquals "wrong box" "-1.0 11.0 -2.0 22.0 -6.0 6.0" "`box_lines boundary.data`"
+
+    write_system triclinic.lt << 'EOF'
+  -1.0 11.0 xlo xhi
+  -2.0 22.0 ylo yhi
+  -6.0 6.0 zlo zhi
+  0.5 -1.5 2.5 xy xz yz
+EOF
+    moltemplate.sh triclinic.lt
+    assertEquals "moltemplate.sh failed (triclinic)" 0 $?
+    assertEquals "wrong triclinic box" "-1.0 11.0 -2.0 22.0 -6.0 6.0 0.5 -1.5 2.5" "`box_lines triclinic.data`"
+  cd ../../
+}
+
+test_data_header_boundary_errors() {
+  cd tests/data_header_tmp/
+    write_system missing_zlo_zhi.lt << 'EOF'
+  -1.0 11.0 xlo xhi
+  -2.0 22.0 ylo yhi
+EOF
+    moltemplate.sh missing_zlo_zhi.lt 2> stderr.txt
+    assertEquals "wrong exit status (missing zlo zhi)" 12 $?
+    assertTrue "missing error message" "grep -q 'Problem with box boundary format (\"zlo zhi\")' stderr.txt"
+
+    write_system bad_tilt.lt << 'EOF'
+  -1.0 11.0 xlo xhi
+  -2.0 22.0 ylo yhi
+  -6.0 6.0 zlo zhi
+  0.5 -1.5 2.5 xy xz zy
+EOF
+    moltemplate.sh bad_tilt.lt 2> stderr.txt
+    assertEquals "wrong exit status (incomplete xy xz yz)" 13 $?
+    assertTrue "missing error message" "grep -q 'Problem with triclinic format (\"xy xz yz\")' stderr.txt"
+  cd ../../
+}
+
+test_data_header_box_from_coords() {
+  # Without "Data Boundary", the box should enclose the coordinates
+  # (read using -raw) with a margin of 5% of the width on either side.
+  cd tests/data_header_tmp/
+    write_system auto_box.lt < /dev/null
+    printf '0.0 -10.0 -5.0\n10.0 0.0 0.0\n5.0 30.0 5.0\n' > coords.raw
+    moltemplate.sh -raw coords.raw auto_box.lt 2> stderr.txt
+    assertEquals "moltemplate.sh failed" 0 $?
+    assertEquals "wrong box" "-0.5 10.5 -12 32 -5.5 5.5" "`box_lines auto_box.data`"
+    assertTrue "missing message" "grep -q 'Periodic boundary conditions unspecified' stderr.txt"
+    assertFalse "unexpected warning" "grep -q 'Unable to determine periodic boundary conditions' stderr.txt"
+  cd ../../
+}
+
+test_data_header_default_box() {
+  # Without "Data Boundary" or a coordinate file, a default box is used
+  # (and a warning is printed).
+  cd tests/data_header_tmp/
+    write_system default_box.lt < /dev/null
+    moltemplate.sh default_box.lt 2> stderr.txt
+    assertEquals "moltemplate.sh failed" 0 $?
+    assertEquals "wrong box" "-100.0 100.0 -100.0 100.0 -100.0 100.0" "`box_lines default_box.data`"
+    assertTrue "missing warning" "grep -q 'Unable to determine periodic boundary conditions' stderr.txt"
+  cd ../../
+}
+
+. tests/shunit2/shunit2
@@ -0,0 +1,213 @@
+#!/usr/bin/env bash
+
+# When the dump file is not a pipe, dump2data.py jumps directly to the
+# snapshots it needs (using a "<dump>.index" file, or by reading the file
+# backwards for -last).  The results should be identical to the results
+# obtained by reading the same dump file sequentially (from a pipe).
+
+write_frame() {
+  # usage: write_frame TIMESTEP >> DUMP_FILE
+  # (The atoms are not sorted.  Their coordinates depend on the timestep.)
+  T=$1
+  cat << EOF
+ITEM: TIMESTEP
+$T
+ITEM: NUMBER OF ATOMS
+3
+ITEM: BOX BOUNDS pp pp pp
+-10.0 10.$T
+-20.0 20.$T
+-30.0 30.$T
+ITEM: ATOMS id type x y z
+2 1 2.$T 0.0 -1.$T
+3 2 3.$T 1.5 2.$T
+1 1 1.$T -0.5 0.$T
+EOF
+}
+
+compare_sequential() {
+  # usage: compare_sequential DUMP_FILE [dump2data.py arguments...]
+  # Run dump2data.py on DUMP_FILE (with random access) and on a pipe
+  # (sequentially), and compare the results.  (If SEQUENTIAL_DUMP_FILE is
+  # set, the sequential reader reads that file instead of DUMP_FILE.)
+  DUMP_FILE="$1"
+  shift
+  cat "${SEQUENTIAL_DUMP_FILE:-$DUMP_FILE}" | dump2data.py "$@" orig.data > sequential.data 2> /dev/null
+  assertEquals "dump2data.py $* failed (sequential)" 0 $?
+  assertTrue "dump2data.py $* created an empty file (sequential)" "[ -s sequential.data ]"
+  dump2data.py "$@" -dump "$DUMP_FILE" orig.data > random_access.data 2> /dev/null
+  assertEquals "dump2data.py $* -dump $DUMP_FILE failed" 0 $?
+  assertTrue "dump2data.py $* -dump $DUMP_FILE differs from the sequential reader" "cmp -s sequential.data random_access.data"
+}
+
+compare_multi() {
+  # usage: compare_multi DUMP_FILE
+  # Compare the files created by "dump2data.py -multi -jobs 3 -dump DUMP_FILE"
+  # with the files created by "dump2data.py -multi" (reading from a pipe).
+  # (If SEQUENTIAL_DUMP_FILE is set, the pipe reads that file instead.)
+  DUMP_FILE="$1"
+  rm -rf multi_sequential multi_jobs
+  mkdir multi_sequential multi_jobs
+  cp orig.data multi_sequential/
+  cp orig.data multi_jobs/
+  cd multi_sequential/
+    cat "../${SEQUENTIAL_DUMP_FILE:-$DUMP_FILE}" | dump2data.py -multi orig.data 2> /dev/null
+    assertEquals "dump2data.py -multi failed (sequential)" 0 $?
+  cd ../
+  cd multi_jobs/
+    dump2data.py -multi -jobs 3 -dump "../$DUMP_FILE" orig.data 2> /dev/null
+    assertEquals "dump2data.py -multi -jobs 3 -dump $DUMP_FILE failed" 0 $?
+  cd ../
+  assertTrue "no files created by dump2data.py -multi" "[ -s multi_sequential/orig.data.1 ]"
+  assertTrue "dump2data.py -multi -jobs 3 -dump $DUMP_FILE differs from the sequential reader" "diff -r -q multi_sequential multi_jobs"
+}
+
+oneTimeSetUp() {
+  cd tests/
+    rm -rf dump2data_tmp
+    mkdir dump2data_tmp
+    cd dump2data_tmp/
+      cat > orig.data << 'EOF'
+LAMMPS Description
+
+     3  atoms
+
+     2  atom types
+
+  -1.0 1.0 xlo xhi
+  -1.0 1.0 ylo yhi
+  -1.0 1.0 zlo zhi
+
+Masses
+
+1 1.0
+2 2.0
+
+Atoms  # full
+
+1 1 1 0.0 0.0 0.0 0.0
+2 1 1 0.0 0.0 0.0 0.0
+3 1 2 0.0 0.0 0.0 0.0
+
+EOF
+    cd ../
+  cd ../
+}
+
+oneTimeTearDown() {
+  rm -rf tests/dump2data_tmp
+}
+
+test_dump2data_random_access() {
+  cd tests/dump2data_tmp/
+    rm -f traj.lammpstrj traj.lammpstrj.index
+    for t in 0 100 200 300; do
+      write_frame $t >> traj.lammpstrj
+    done
+    compare_sequential traj.lammpstrj -t 200
+    assertTrue "traj.lammpstrj.index file not created" "[ -s traj.lammpstrj.index ]"
+    # (The second time, the frames are looked up in the index file.)
+    compare_sequential traj.lammpstrj -t 100
+    compare_sequential traj.lammpstrj -t 0
+    compare_sequential traj.lammpstrj -t 300
+    compare_sequential traj.lammpstrj -last
+    compare_multi traj.lammpstrj
+  cd ../../
+}
+
+test_dump2data_appended() {
+  # The dump file is appended to after the index file was created.
+  # (The last frame in the index was incomplete at the time.)
+  cd tests/dump2data_tmp/
+    rm -f traj.lammpstrj traj.lammpstrj.index
+    for t in 0 100 200; do
+      write_frame $t >> traj.lammpstrj
+    done
+    write_frame 300 | head -n 11 >> traj.lammpstrj
+    compare_sequential traj.lammpstrj -t 100
+    assertTrue "traj.lammpstrj.index file not created" "[ -s traj.lammpstrj.index ]"
+    write_frame 300 | tail -n +12 >> traj.lammpstrj
+    write_frame 400 >> traj.lammpstrj
+    compare_sequential traj.lammpstrj -t 300
+    compare_sequential traj.lammpstrj -t 400
+    compare_sequential traj.lammpstrj -last
+    compare_multi traj.lammpstrj
+    assertEquals "wrong number of frames in the index file" 5 "`grep -v '^#' traj.lammpstrj.index | wc -l`"
+
+    # Now replace the dump file with a shorter file.
+    # The index file is out of date and should be ignored.
+    rm -f traj.lammpstrj
+    for t in 500 600; do
+      write_frame $t >> traj.lammpstrj
+    done
+    compare_sequential traj.lammpstrj -t 600
+    compare_sequential traj.lammpstrj -t 500
+    compare_multi traj.lammpstrj
+    assertEquals "wrong number of frames in the index file" 2 "`grep -v '^#' traj.lammpstrj.index | wc -l`"
+  cd ../../
+}
+
+test_dump2data_incomplete_header() {
+  # The last frame of the dump file is still being written, and its
+  # timestep (or number of atoms) is incomplete.  It should be ignored.
+  cd tests/dump2data_tmp/
+    rm -f traj.lammpstrj traj_growing.lammpstrj traj_growing.lammpstrj.index
+    for t in 0 100 200; do
+      write_frame $t >> traj.lammpstrj
+    done
+    cp traj.lammpstrj traj_growing.lammpstrj
+    printf 'ITEM: TIMESTEP\n' >> traj_growing.lammpstrj
+    SEQUENTIAL_DUMP_FILE=traj.lammpstrj
+    compare_sequential traj_growing.lammpstrj -t 100
+    assertEquals "wrong number of frames in the index file" 3 "`grep -v '^#' traj_growing.lammpstrj.index | wc -l`"
+    printf '30' >> traj_growing.lammpstrj
+    compare_sequential traj_growing.lammpstrj -t 0
+    assertEquals "wrong number of frames in the index file" 3 "`grep -v '^#' traj_growing.lammpstrj.index | wc -l`"
+    printf '0\nITEM: NUMBER OF ATOMS\n' >> traj_growing.lammpstrj
+    compare_sequential traj_growing.lammpstrj -t 200
+    assertEquals "wrong number of frames in the index file" 3 "`grep -v '^#' traj_growing.lammpstrj.index | wc -l`"
+    unset SEQUENTIAL_DUMP_FILE
+    # Now the frame is finished
+    write_frame 300 | tail -n +4 >> traj_growing.lammpstrj
+    compare_sequential traj_growing.lammpstrj -t 300
+    assertEquals "wrong number of frames in the index file" 4 "`grep -v '^#' traj_growing.lammpstrj.index | wc -l`"
+  cd ../../
+}
+
+test_dump2data_other_index_file() {
+  # A file named "<dump>.index" which was not created by dump2data.py
+  # must not be overwritten (or used).
+  cd tests/dump2data_tmp/
+    rm -f traj.lammpstrj
+    for t in 0 100 200; do
+      write_frame $t >> traj.lammpstrj
+    done
+    printf 'my notes about this simulation\n0 3 200\n' > traj.lammpstrj.index
+    cp traj.lammpstrj.index notes.txt
+    compare_sequential traj.lammpstrj -t 100
+    compare_multi traj.lammpstrj
+    assertTrue "traj.lammpstrj.index was overwritten" "cmp -s notes.txt traj.lammpstrj.index"
+    rm -f traj.lammpstrj.index
+  cd ../../
+}
+
+test_dump2data_crlf() {
+  # A dump file with DOS/Windows line endings ("\r\n").  The results should
+  # match the results of reading the same file with "\n" line endings.
+  cd tests/dump2data_tmp/
+    rm -f traj.lammpstrj traj_crlf.lammpstrj traj_crlf.lammpstrj.index
+    for t in 0 100 200 300; do
+      write_frame $t >> traj.lammpstrj
+      write_frame $t | sed -e 's/$/\r/' >> traj_crlf.lammpstrj
+    done
+    SEQUENTIAL_DUMP_FILE=traj.lammpstrj
+    compare_sequential traj_crlf.lammpstrj -t 200
+    compare_sequential traj_crlf.lammpstrj -t 0
+    compare_sequential traj_crlf.lammpstrj -last
+    compare_multi traj_crlf.lammpstrj
+    unset SEQUENTIAL_DUMP_FILE
+    assertEquals "wrong number of frames in the index file" 4 "`grep -v '^#' traj_crlf.lammpstrj.index | wc -l`"
+  cd ../../
+}
+
+. tests/shunit2/shunit2
@@ -0,0 +1,172 @@
+#!/usr/bin/env bash
+
+# Build each system several times: once without the "import" cache, and
+# twice with the cache (in a temporary MOLTEMPLATE_CACHE_DIR directory).
+# The files created by moltemplate.sh should be identical in every case.
+
+build_system() {
+  # usage: build_system OUT_DIR SYSTEM_FILE [moltemplate.sh arguments...]
+  OUT_DIR="$1"
+  SYSTEM_FILE="$2"
+  shift 2
+  rm -rf "$OUT_DIR"
+  mkdir "$OUT_DIR"
+  cd "$OUT_DIR"
+    moltemplate.sh "$@" "../$SYSTEM_FILE" > moltemplate.log 2>&1
+    echo $? > exit_code.txt
+    rm -rf output_ttree/
+  cd ../
+}
+
+compare_builds() {
+  # usage: compare_builds DIR1 DIR2
+  assertTrue "the files in $2 differ from the uncached build ($1)" "diff -r -q -x moltemplate.log $1 $2"
+}
+
+num_cache_entries() {
+  ls "$MOLTEMPLATE_CACHE_DIR" | grep -c '\.pickle$'
+}
+
+oneTimeSetUp() {
+  cd tests/
+    rm -rf import_cache_tmp
+    mkdir import_cache_tmp
+  cd ../
+}
+
+oneTimeTearDown() {
+  rm -rf tests/import_cache_tmp
+}
+
+setUp() {
+  export MOLTEMPLATE_CACHE_DIR=`mktemp -d`
+}
+
+tearDown() {
+  rm -rf "$MOLTEMPLATE_CACHE_DIR"
+  unset MOLTEMPLATE_CACHE_DIR
+}
+
+test_import_cache_oplsaa() {
+  cd tests/import_cache_tmp/
+    cp -r ../../examples/all_atom/force_field_OPLSAA/ethylene+benzene/moltemplate_files oplsaa
+    cd oplsaa/
+      MOLTEMPLATE_CACHE_DIR='' build_system uncached system.lt
+      assertEquals "uncached build failed" 0 `cat uncached/exit_code.txt`
+      assertTrue "system.data file not created" "[ -s uncached/system.data ]"
+      assertEquals "the cache should not be used by default" 0 `num_cache_entries`
+
+      build_system cached1 system.lt
+      compare_builds uncached cached1
+      NUM_ENTRIES=`num_cache_entries`
+      assertTrue "no files were stored in the cache" "[ $NUM_ENTRIES -gt 0 ]"
+
+      # The second time, the imported files should be loaded from the cache
+      build_system cached2 system.lt
+      compare_builds uncached cached2
+      assertEquals "new cache entries were created" $NUM_ENTRIES `num_cache_entries`
+
+      build_system disabled system.lt -no-import-cache
+      compare_builds uncached disabled
+    cd ../
+  cd ../../
+}
+
+test_import_cache_fallback() {
+  # Files which augment a class defined in another file, or which
+  # inherit from one, can not be parsed in isolation.  They must still
+  # be read correctly (the ordinary way).
+  cd tests/import_cache_tmp/
+    mkdir fallback
+    cd fallback/
+      cat > base.lt << 'EOF'
+write_once("In Init") {
+  atom_style full
+}
+Foo {
+  write("Data Atoms") {
+    $atom:a $mol:. @atom:A 0.0 0.0 0.0 0.0
+  }
+}
+EOF
+      cat > augment.lt << 'EOF'
+Foo {
+  write_once("In Settings") {
+    pair_coeff @atom:A @atom:A 0.1 1.0
+  }
+}
+EOF
+      cat > inherit.lt << 'EOF'
+Bar inherits Foo {
+  write("Data Atoms") {
+    $atom:b $mol:. @atom:B 0.0 1.0 0.0 0.0
+  }
+  write_once("In Settings") {
+    pair_coeff @atom:B @atom:B 0.2 2.0
+  }
+}
+EOF
+      cat > system.lt << 'EOF'
+import "base.lt"
+import "augment.lt"
+import "inherit.lt"
+foo = new Foo
+bar = new Bar.move(3.0, 0.0, 0.0)
+EOF
+      MOLTEMPLATE_CACHE_DIR='' build_system uncached system.lt
+      assertEquals "uncached build failed" 0 `cat uncached/exit_code.txt`
+      NUM_PAIR_COEFFS=`grep -c pair_coeff uncached/system.in.settings`
+      assertEquals "wrong number of pair_coeff commands" 2 $NUM_PAIR_COEFFS
+      build_system cached1 system.lt
+      compare_builds uncached cached1
+      build_system cached2 system.lt
+      compare_builds uncached cached2
+    cd ../
+  cd ../../
+}
+
+test_import_cache_include_path() {
+  # Two directories contain different files with the same name.
+  # The file which is used must depend on the include path, even if
+  # the file importing it is identical (and was stored in the cache).
+  cd tests/import_cache_tmp/
+    mkdir include_path
+    cd include_path/
+      mkdir A B
+      for d in A B; do
+        printf 'write_once("In Settings") {\n  pair_coeff @atom:C @atom:C 1.0 %s\n}\n' $d$d$d$d > $d/params.lt
+      done
+      echo 'import "params.lt"' > forcefield.lt
+      cat > system.lt << 'EOF'
+import "forcefield.lt"
+write_once("In Init") {
+  atom_style full
+}
+write("Data Atoms") {
+  $atom:a1 $mol:m1 @atom:C 0.0 0.0 0.0 0.0
+}
+EOF
+      INCLUDE_A="`pwd`/A"
+      INCLUDE_B="`pwd`/B"
+      MOLTEMPLATE_CACHE_DIR='' build_system uncached_A system.lt -importpath "$INCLUDE_A"
+      MOLTEMPLATE_CACHE_DIR='' build_system uncached_B system.lt -importpath "$INCLUDE_B"
+      assertEquals AAAA "`awk '/pair_coeff/{print $NF}' uncached_A/system.in.settings`"
+      assertEquals BBBB "`awk '/pair_coeff/{print $NF}' uncached_B/system.in.settings`"
+
+      build_system cached_A system.lt -importpath "$INCLUDE_A"
+      build_system cached_B system.lt -importpath "$INCLUDE_B"
+      compare_builds uncached_A cached_A
+      compare_builds uncached_B cached_B
+      build_system cached_A2 system.lt -importpath "$INCLUDE_A"
+      compare_builds uncached_A cached_A2
+
+      # Changing the contents of a file which was imported indirectly
+      # must invalidate the cache entries which depend on it.
+      printf 'write_once("In Settings") {\n  pair_coeff @atom:C @atom:C 1.0 CCCC\n}\n' > A/params.lt
+      build_system cached_A3 system.lt -importpath "$INCLUDE_A"
+      assertEquals CCCC "`awk '/pair_coeff/{print $NF}' cached_A3/system.in.settings`"
+    cd ../
+  cd ../../
+}
+
+. tests/shunit2/shunit2
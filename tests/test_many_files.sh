@@ -0,0 +1,50 @@
+#!/usr/bin/env bash
+
+# Create more output files (using write() and write_once()) than the
+# number of files which a process is allowed to open at once.
+
+oneTimeSetUp() {
+  cd tests/
+    rm -rf many_files_tmp
+    mkdir many_files_tmp
+  cd ../
+}
+
+oneTimeTearDown() {
+  rm -rf tests/many_files_tmp
+}
+
+test_many_files() {
+  cd tests/many_files_tmp/
+    NUM_FILES=300
+    cat > system.lt << 'EOF'
+write_once("In Init") {
+  atom_style full
+}
+write_once("In Settings") {
+  pair_coeff @atom:A @atom:A 0.1 1.0
+}
+write_once("Data Masses") {
+  @atom:A 1.0
+}
+Monomer {
+  write("Data Atoms") {
+    $atom:a $mol:. @atom:A 0.0 0.0 0.0 0.0
+  }
+EOF
+    for i in `seq 1 $NUM_FILES`; do
+      printf '  write("file%s.txt") {\n    $atom:a file%s\n  }\n' $i $i >> system.lt
+    done
+    echo '}' >> system.lt
+    echo 'monomers = new Monomer[2].move(2.0, 0, 0)' >> system.lt
+    # (Run moltemplate.sh in a subshell, so that the limit on the number
+    #  of open files does not affect the rest of this script.)
+    (ulimit -n 256; moltemplate.sh system.lt)
+    assertEquals "moltemplate.sh failed" 0 $?
+    assertEquals "wrong contents of file$NUM_FILES.txt" "1 file$NUM_FILES
+2 file$NUM_FILES" "`awk '{print $1" "$2}' < file$NUM_FILES.txt`"
+    assertEquals "wrong number of files created" $NUM_FILES `ls file*.txt | wc -l`
+  cd ../../
+}
+
+. tests/shunit2/shunit2
@@ -0,0 +1,56 @@
+#!/usr/bin/env bash
+
+# Build small systems which use most of the steps carried out after lttree.py
+# (by pipeline.py): removing duplicate atoms and bonds, generating bonds,
+# angles and dihedrals "By Type", expanding wildcards in "_coeff" commands,
+# and assigning partial charges "By Bond".  Compare the resulting files with
+# the files in tests/test_pipeline_files/expected_*/
+
+compare_to_expected() {
+  # usage: compare_to_expected EXPECTED_DIR
+  for f in "$1"/*; do
+    fname=`basename "$f"`
+    assertTrue "$fname file not created" "[ -s $fname ]"
+    assertTrue "$fname differs from the expected file ($f)" "cmp -s $f $fname"
+  done
+}
+
+oneTimeSetUp() {
+  cd tests/
+    rm -rf pipeline_tmp
+    cp -r test_pipeline_files pipeline_tmp
+  cd ../
+}
+
+oneTimeTearDown() {
+  rm -rf tests/pipeline_tmp
+}
+
+test_pipeline() {
+  cd tests/pipeline_tmp/
+    moltemplate.sh system.lt
+    assertEquals "moltemplate.sh failed" 0 $?
+    compare_to_expected expected_system
+  cd ../../
+}
+
+test_pipeline_bond_list() {
+  cd tests/pipeline_tmp/
+    moltemplate.sh system_bond_list.lt
+    assertEquals "moltemplate.sh failed" 0 $?
+    compare_to_expected expected_system_bond_list
+  cd ../../
+}
+
+test_pipeline_error() {
+  # A "Data Bond List" section without "Data Bonds By Type" is an error
+  # (reported with exit status 15).  No data file should be created.
+  cd tests/pipeline_tmp/
+    rm -f system_no_bonds_by_type.data
+    moltemplate.sh system_no_bonds_by_type.lt
+    assertEquals "wrong exit status" 15 $?
+    assertFalse "data file created despite the error" "[ -s system_no_bonds_by_type.data ]"
+  cd ../../
+}
+
+. tests/shunit2/shunit2
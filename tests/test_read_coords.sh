@@ -0,0 +1,153 @@
+#!/usr/bin/env bash
+
+# Read the atom coordinates from XYZ, RAW, and LAMMPS dump files
+# (using the -xyz, -raw, and -dump arguments of moltemplate.sh).
+# The coordinates should be copied into the "Atoms" section verbatim.
+# (The quaternions and velocities in the dump file should be copied into
+#  the "Ellipsoids" and "Velocities" sections, with quaternions in
+#  "w i j k" order.)
+
+atoms_section_xyz() {
+  # usage: atoms_section_xyz DATA_FILE
+  # Print the x,y,z coordinates from the "Atoms" section, sorted by atom-ID
+  extract_lammps_data.py Atoms < "$1" | sort -g -k 1 | awk '{print $(NF-2)" "$(NF-1)" "$NF}'
+}
+
+oneTimeSetUp() {
+  cd tests/
+    rm -rf read_coords_tmp
+    mkdir read_coords_tmp
+    cd read_coords_tmp/
+      cat > system.lt << 'EOF'
+write_once("In Init") {
+  atom_style full
+}
+write_once("In Settings") {
+  pair_coeff @atom:A @atom:A 0.1 1.0
+}
+write_once("Data Masses") {
+  @atom:A 1.0
+}
+write("Data Atoms") {
+  $atom:a1 $mol:m @atom:A 0.0  0.0 0.0 0.0
+  $atom:a2 $mol:m @atom:A 0.0  1.0 0.0 0.0
+  $atom:a3 $mol:m @atom:A 0.0  2.0 0.0 0.0
+}
+EOF
+      cat > ellipsoids.lt << 'EOF'
+write_once("In Init") {
+  atom_style ellipsoid
+}
+write_once("In Settings") {
+  pair_coeff @atom:A @atom:A 0.1 1.0
+}
+write_once("Data Masses") {
+  @atom:A 1.0
+}
+write("Data Atoms") {
+  $atom:a1 @atom:A 1 1.0  0.0 0.0 0.0
+  $atom:a2 @atom:A 1 1.0  1.0 0.0 0.0
+  $atom:a3 @atom:A 1 1.0  2.0 0.0 0.0
+}
+write("Data Ellipsoids") {
+  $atom:a1 1.0 2.0 3.0  1.0 0.0 0.0 0.0
+  $atom:a2 1.0 2.0 3.0  1.0 0.0 0.0 0.0
+  $atom:a3 1.0 2.0 3.0  1.0 0.0 0.0 0.0
+}
+EOF
+      cat > expected_coords.txt << 'EOF'
+1.500 -2.250 3.0
+0.00 10.000 -0.5
+7 8.10 9.000
+EOF
+    cd ../
+  cd ../
+}
+
+oneTimeTearDown() {
+  rm -rf tests/read_coords_tmp
+}
+
+test_read_coords_raw() {
+  cd tests/read_coords_tmp/
+    cp expected_coords.txt coords.raw
+    moltemplate.sh -raw coords.raw system.lt
+    assertEquals "moltemplate.sh -raw failed" 0 $?
+    assertEquals "coordinates from -raw file differ" \
+      "`cat expected_coords.txt`" "`atoms_section_xyz system.data`"
+  cd ../../
+}
+
+test_read_coords_wrong_number() {
+  # The number of atoms in the coordinate file does not match the number
+  # of atoms in the system.
+  cd tests/read_coords_tmp/
+    head -n 2 expected_coords.txt > coords_short.raw
+    moltemplate.sh -raw coords_short.raw system.lt 2> stderr.txt
+    assertEquals "wrong exit status (too few coordinates)" 14 $?
+    assertTrue "missing error message" "grep -q 'does not match the number of atoms generated in ttree file (3)' stderr.txt"
+  cd ../../
+}
+
+test_read_coords_xyz() {
+  cd tests/read_coords_tmp/
+    echo 3 > coords.xyz
+    echo "comment line" >> coords.xyz
+    awk '{print "C "$0}' < expected_coords.txt >> coords.xyz
+    moltemplate.sh -xyz coords.xyz system.lt
+    assertEquals "moltemplate.sh -xyz failed" 0 $?
+    assertEquals "coordinates from -xyz file differ" \
+      "`cat expected_coords.txt`" "`atoms_section_xyz system.data`"
+  cd ../../
+}
+
+test_read_coords_dump() {
+  cd tests/read_coords_tmp/
+    # Only the last frame should be used.  The atoms are not sorted, and
+    # the quaternions are stored in "i j k w" order (c_orient[1..4]).
+    cat > traj.lammpstrj << 'EOF'
+ITEM: TIMESTEP
+0
+ITEM: NUMBER OF ATOMS
+3
+ITEM: BOX BOUNDS pp pp pp
+-5.0 5.0
+-6.0 6.0
+-7.0 7.0
+ITEM: ATOMS id type x y z c_orient[1] c_orient[2] c_orient[3] c_orient[4] vx vy vz
+1 1 0.0 0.0 0.0 0 0 0 1 0 0 0
+2 1 1.0 0.0 0.0 0 0 0 1 0 0 0
+3 1 2.0 0.0 0.0 0 0 0 1 0 0 0
+ITEM: TIMESTEP
+100
+ITEM: NUMBER OF ATOMS
+3
+ITEM: BOX BOUNDS pp pp pp
+-10.0 10.0
+-20.0 20.0
+-30.0 30.0
+ITEM: ATOMS id type x y z c_orient[1] c_orient[2] c_orient[3] c_orient[4] vx vy vz
+3 1 7 8.10 9.000 0.32 0.33 0.34 0.31 3.1 3.2 3.3
+1 1 1.500 -2.250 3.0 0.12 0.13 0.14 0.11 1.1 1.2 1.3
+2 1 0.00 10.000 -0.5 0.22 0.23 0.24 0.21 2.1 2.2 2.3
+EOF
+    moltemplate.sh -atomstyle ellipsoid -dump traj.lammpstrj ellipsoids.lt
+    assertEquals "moltemplate.sh -dump failed" 0 $?
+    assertEquals "coordinates from -dump file differ" \
+      "`cat expected_coords.txt`" \
+      "`extract_lammps_data.py Atoms < ellipsoids.data | sort -g -k 1 | awk '{print $5" "$6" "$7}'`"
+    assertEquals "wrong box size" "-10 10 -20 20 -30 30" \
+      "`extract_lammps_data.py Header < ellipsoids.data | awk '/xlo|ylo|zlo/{printf("%s%s %s", sep, $1, $2); sep=" "}'`"
+    # The quaternions should be in "w i j k" order
+    assertEquals "wrong quaternions" "1 1.0 2.0 3.0 0.11 0.12 0.13 0.14
+2 1.0 2.0 3.0 0.21 0.22 0.23 0.24
+3 1.0 2.0 3.0 0.31 0.32 0.33 0.34" \
+      "`extract_lammps_data.py Ellipsoids < ellipsoids.data | sort -g -k 1`"
+    assertEquals "wrong velocities" "1 1.1 1.2 1.3
+2 2.1 2.2 2.3
+3 3.1 3.2 3.3" \
+      "`extract_lammps_data.py Velocities < ellipsoids.data | sort -g -k 1`"
+  cd ../../
+}
+
+. tests/shunit2/shunit2
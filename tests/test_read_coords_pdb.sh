@@ -25,6 +25,12 @@ test_read_coords_pdb() {
       Ypdb=`echo $CRDS_PDB_LINE4 | awk '{print $2}'`
       Zpdb=`echo $CRDS_PDB_LINE4 | awk '{print $3}'`
       assertTrue "PDB coordinates do not match coordinates from system.data file created by moltemplate. (See line 4)" "[ $Xdata = $Xpdb ] && [ $Ydata = $Ypdb ] && [ $Zdata = $Zpdb ]"
+
+      # Now check all of the atoms.  (The coordinates should be copied
+      # verbatim, so "12.490" in the PDB file should not become "12.49".)
+      extract_lammps_data.py Atoms < system.data | sort -g -k 1 | awk '{print $5" "$6" "$7}' > crds_data.txt
+      awk '/^ATOM  |^HETATM/{print substr($0,31,8)" "substr($0,39,8)" "substr($0,47,8)}' < moltemplate_files/solvate.pdb | awk '{print $1" "$2" "$3}' > crds_pdb.txt
+      assertTrue "PDB coordinates do not match coordinates from system.data file created by moltemplate." "cmp -s crds_pdb.txt crds_data.txt"
     cd ../
     rm -rf waterSPCE_from_PDBfile/
   cd ../